@@ -1,3 +1,4 @@
+import sqlite3
 import uuid
 
 from textual import on, work
@@ -11,7 +12,12 @@ from dyno_viewer.components.screens.help import Help
 from dyno_viewer.components.screens.select_session_group import SelectSessionGroup
 from dyno_viewer.components.screens.session_browser import SessionBrowser
 from dyno_viewer.components.screens.table_view import TableViewer
-from dyno_viewer.constants import CONFIG_DIR_NAME, DATABASE_FILE_PATH
+from dyno_viewer.constants import (
+    CONFIG_DIR_NAME,
+    DATABASE_CHECKPOINT_INTERVAL,
+    DATABASE_FILE_PATH,
+    HISTORY_COMPACTION_INTERVAL,
+)
 from dyno_viewer.db.manager import DatabaseManager
 from dyno_viewer.messages import ClearQueryHistory
 from dyno_viewer.models import Config, Session, SessionGroup
@@ -96,8 +102,18 @@ class DynCli(App):
     async def on_mount(self) -> None:
         # Initialize the database connection
         ensure_config_dir(CONFIG_DIR_NAME)
-        self.db_manager = DatabaseManager(DATABASE_FILE_PATH)
+        # writes are flushed in the background so the UI never waits on them, and the
+        # WAL is checkpointed on an interval instead of by whichever commit grows it
+        self.db_manager = DatabaseManager(
+            DATABASE_FILE_PATH,
+            write_behind=True,
+            busy_timeout=self.app_config.database_busy_timeout,
+            auto_checkpoint=False,
+        )
         await self.db_manager.setup()
+        self.compact_history()
+        self.set_interval(HISTORY_COMPACTION_INTERVAL, self.compact_history)
+        self.set_interval(DATABASE_CHECKPOINT_INTERVAL, self.checkpoint_database)
         if self.app_config.startup_session_group:
             self.session_group = await self.db_manager.get_session_group_by_name(
                 self.app_config.startup_session_group
@@ -193,6 +209,39 @@ class DynCli(App):
         await self.db_manager.remove_all_query_history()
         self.notify("Query history cleared.")
 
+    @work(exclusive=True, group="compact_history")
+    async def compact_history(self) -> None:
+        """Enforce the query history retention and compact the database."""
+        if not self.db_manager:
+            return
+        try:
+            removed = await self.db_manager.compact_history(
+                max_rows=self.app_config.history_max_rows,
+                max_age_days=self.app_config.history_max_age_days,
+                vacuum=self.app_config.database_vacuum,
+            )
+        except sqlite3.OperationalError as error:
+            # e.g the database is busy, tried again on the next interval
+            self.log.warning(f"failed to compact query history: {error}")
+            return
+        self.log.info(f"compacted query history, removed {removed} queries")
+
+    @work(exclusive=True, group="checkpoint_database")
+    async def checkpoint_database(self) -> None:
+        """Checkpoint the WAL into the database so it doesn't keep growing."""
+        if not self.db_manager:
+            return
+        try:
+            busy, log, checkpointed = await self.db_manager.checkpoint()
+        except sqlite3.OperationalError as error:
+            # e.g the database is busy, tried again on the next interval
+            self.log.warning(f"failed to checkpoint the database: {error}")
+            return
+        self.log.info(
+            f"checkpointed {checkpointed} of {log} WAL pages"
+            + (", another connection is still reading" if busy else "")
+        )
+
     def watch_theme(self, new_theme: str) -> None:
         """Called automatically when the theme changes."""
         if not self.app_config:
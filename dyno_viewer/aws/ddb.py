@@ -1,7 +1,8 @@
+import base64
 import logging
 import re
 from decimal import Decimal
-from typing import Any
+from typing import Any, Iterator
 
 import boto3
 import simplejson as json
@@ -11,10 +12,13 @@ from boto3.dynamodb.conditions import (
     ConditionExpressionBuilder,
     Key,
 )
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from boto3.session import Session
 from dynamodb_json import json_util as dyn_json
 
 LOG_LEVEL = logging.INFO
+# type descriptors of the attribute values of typed dynamodb json
+DYNAMODB_TYPES = {"S", "N", "B", "SS", "NS", "BS", "M", "L", "NULL", "BOOL"}
 
 
 def get_logger():
@@ -134,17 +138,22 @@ def get_items(table_name, item_keys, **kwargs):
 def query_items(
     table,
     paginate=True,
+    on_response=None,
     **query_kwargs,
 ):
     items = []
     table_client = get_table_client(table)
     resp = table_client.query(**query_kwargs)
+    if on_response:
+        on_response(resp)
     items.extend(resp["Items"])
     if paginate:
         while "LastEvaluatedKey" in resp:
             resp = table_client.query(
                 **query_kwargs, ExclusiveStartKey=resp["LastEvaluatedKey"]
             )
+            if on_response:
+                on_response(resp)
             items.extend(resp["Items"])
         return items
 
@@ -178,23 +187,55 @@ def check_attr_exists(table, pk, attr, sk=None):
     )
 
 
-def scan_items(table, paginate=True, **query_kwargs):
+def scan_items(table, paginate=True, on_response=None, **query_kwargs):
     """Debugging utility."""
     items = []
     table_client = get_table_client(table)
     resp = table_client.scan(**query_kwargs)
+    if on_response:
+        on_response(resp)
     items.extend(resp["Items"])
     if paginate:
         while "LastEvaluatedKey" in resp:
             resp = table_client.scan(
                 **query_kwargs, ExclusiveStartKey=resp["LastEvaluatedKey"]
             )
+            if on_response:
+                on_response(resp)
             items.extend(resp["Items"])
         return items
 
     return items, resp.get("LastEvaluatedKey")
 
 
+def iter_pages(
+    table, scan_mode=False, exclusive_start_key=None, on_response=None, **query_kwargs
+) -> Iterator[tuple[list[dict], dict | None]]:
+    """
+    Lazily fetch every page of a query or scan, only the current page is held in memory
+
+    :param table: name or client of the dynamodb table
+    :param scan_mode: scan the table instead of querying it
+    :param exclusive_start_key: LastEvaluatedKey to carry on from
+    :param on_response: called with each response before its page is yielded, e.g to
+        read the ConsumedCapacity
+    :return: iterator of each page of items and the LastEvaluatedKey after it
+    """
+    table_client = get_table_client(table)
+    operation = table_client.scan if scan_mode else table_client.query
+    if exclusive_start_key:
+        query_kwargs["ExclusiveStartKey"] = exclusive_start_key
+    while True:
+        resp = operation(**query_kwargs)
+        if on_response:
+            on_response(resp)
+        last_evaluated_key = resp.get("LastEvaluatedKey")
+        yield resp["Items"], last_evaluated_key
+        if not last_evaluated_key:
+            return
+        query_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+
 def covert_comparator_exp(cond, attr_name, value, is_key=True) -> Key | Attr | None:
     attr_class = Key if is_key else Attr
     if cond == "==":
@@ -279,6 +320,73 @@ def serialise_dynamodb_json(json_obj):
     return json.loads(dyn_json.dumps(json_obj))
 
 
+def to_dynamodb_json(item: dict) -> dict:
+    """
+    Serialise an item into typed dynamodb json (e.g {"pk": {"S": "value"}}) that can be
+    dumped as is. Unlike `serialise_dynamodb_json` sets and binary values keep their own
+    types, with binary values base64 encoded like the dynamodb export to s3 does
+    """
+    serializer = TypeSerializer()
+    return {
+        key: _convert_binary(serializer.serialize(value), _encode_base64)
+        for key, value in item.items()
+    }
+
+
+def from_dynamodb_json(item: dict) -> dict:
+    """
+    Deserialise typed dynamodb json back into an item, also accepts items wrapped in
+    {"Item": ...} like the dynamodb export to s3 writes. Other untyped fields next to
+    the wrapped item, like the error of a rejected import, are left out. An item is
+    only taken to be wrapped if "Item" holds typed attributes rather than being the
+    typed value of an attribute called Item
+    """
+    if (
+        _is_typed_item(item.get("Item"))
+        and not _is_typed_value(item["Item"])
+        and all(
+            not isinstance(value, dict) for key, value in item.items() if key != "Item"
+        )
+    ):
+        item = item["Item"]
+    deserializer = TypeDeserializer()
+    return {
+        key: deserializer.deserialize(_convert_binary(value, base64.b64decode))
+        for key, value in item.items()
+    }
+
+
+def _is_typed_value(value) -> bool:
+    """Whether a value looks like a typed dynamodb json value, e.g {"S": "value"}"""
+    return (
+        isinstance(value, dict) and len(value) == 1 and value.keys() <= DYNAMODB_TYPES
+    )
+
+
+def _is_typed_item(value) -> bool:
+    """Whether a value looks like an item of typed dynamodb json attribute values"""
+    return isinstance(value, dict) and all(
+        _is_typed_value(attribute) for attribute in value.values()
+    )
+
+
+def _encode_base64(value: bytes) -> str:
+    return base64.b64encode(value).decode()
+
+
+def _convert_binary(value: dict, convert) -> dict:
+    (type_name, type_value), *_ = value.items()
+    if type_name == "B":
+        return {"B": convert(type_value)}
+    if type_name == "BS":
+        return {"BS": [convert(binary) for binary in type_value]}
+    if type_name == "M":
+        return {"M": {k: _convert_binary(v, convert) for k, v in type_value.items()}}
+    if type_name == "L":
+        return {"L": [_convert_binary(v, convert) for v in type_value]}
+    return value
+
+
 def pretty_condition(cond: ConditionBase, is_key=False) -> str:
     builder = ConditionExpressionBuilder()
     built = builder.build_expression(cond, is_key_condition=is_key)
@@ -0,0 +1,257 @@
+import time
+from decimal import Decimal
+
+from textual import on, work
+from textual.containers import Horizontal
+from textual.message import Message
+from textual.reactive import reactive
+from textual.widget import Widget
+from textual.widgets import Button, DataTable, Input, Label, Static
+from textual.worker import get_current_worker
+
+from dyno_viewer.aws.ddb import iter_pages
+from dyno_viewer.models import QueryParameters
+from dyno_viewer.util.aggregate import AggregateResult, Aggregator
+from dyno_viewer.util.row_store import ColumnarRowStore
+from dyno_viewer.util.util import format_output
+
+AGGREGATE_COLUMNS = ["group", "count", "sum", "avg", "min", "max"]
+AVG_PRECISION = Decimal("0.0001")
+
+
+class AggregationPanel(Widget):
+    """
+    Grouped count/sum/avg/min/max over either the loaded rows or every page of the
+    current query, results are updated after each page while the query is streamed
+    """
+
+    DEFAULT_CSS = """
+    AggregationPanel {
+        dock: right;
+        width: 60;
+        height: 100%;
+        display: none;
+        border-left: solid $primary;
+        padding: 0 1;
+    }
+    AggregationPanel.-active {
+        display: block;
+    }
+    AggregationPanel Horizontal {
+        height: auto;
+    }
+    AggregationPanel Button {
+        min-width: 10;
+    }
+    #aggregate_status {
+        height: auto;
+    }
+    """
+
+    running = reactive(False)
+
+    class Requested(Message):
+        """Asks the screen for the rows to aggregate"""
+
+        def __init__(self, stream: bool, group_by: str, attribute: str) -> None:
+            self.stream = stream
+            self.group_by = group_by
+            self.attribute = attribute
+            super().__init__()
+
+    class Progress(Message):
+        def __init__(
+            self,
+            results: list[AggregateResult],
+            items: int,
+            pages: int,
+            elapsed: float,
+            *,
+            finished: bool = False,
+            error: str | None = None,
+        ) -> None:
+            self.results = results
+            self.items = items
+            self.pages = pages
+            self.elapsed = elapsed
+            self.finished = finished
+            self.error = error
+            super().__init__()
+
+    def compose(self):
+        yield Label("Aggregate results")
+        yield Input(placeholder="group by attribute (optional)", id="group_by")
+        yield Input(placeholder="number attribute (optional)", id="attribute")
+        with Horizontal():
+            yield Button("Loaded", id="aggregate_loaded", tooltip="Loaded rows only")
+            yield Button(
+                "Full query", id="aggregate_stream", tooltip="Every page of the query"
+            )
+            yield Button("Cancel", id="aggregate_cancel", disabled=True)
+        yield Static(id="aggregate_status")
+        yield DataTable(id="aggregate_results", cursor_type="row")
+
+    def on_mount(self) -> None:
+        table = self.query_one("#aggregate_results", DataTable)
+        for col in AGGREGATE_COLUMNS:
+            table.add_column(col, key=col)
+
+    @on(Button.Pressed, "#aggregate_loaded")
+    def aggregate_loaded_pressed(self, event: Button.Pressed) -> None:
+        event.stop()
+        self._request(stream=False)
+
+    @on(Button.Pressed, "#aggregate_stream")
+    def aggregate_stream_pressed(self, event: Button.Pressed) -> None:
+        event.stop()
+        self._request(stream=True)
+
+    @on(Button.Pressed, "#aggregate_cancel")
+    def aggregate_cancel_pressed(self, event: Button.Pressed) -> None:
+        event.stop()
+        self.workers.cancel_group(self, "aggregate")
+        self.running = False
+        self.query_one("#aggregate_status", Static).update("Cancelled")
+
+    @on(Input.Submitted)
+    def input_submitted(self, event: Input.Submitted) -> None:
+        event.stop()
+        self._request(stream=False)
+
+    def _request(self, stream: bool) -> None:
+        self.post_message(
+            self.Requested(
+                stream,
+                self.query_one("#group_by", Input).value.strip(),
+                self.query_one("#attribute", Input).value.strip(),
+            )
+        )
+
+    @work(exclusive=True, group="aggregate", thread=True)
+    def aggregate_store(
+        self, store: ColumnarRowStore, group_by: str, attribute: str
+    ) -> None:
+        """
+        Aggregate the rows that are already loaded
+
+        :param store: loaded rows, from `ColumnarRowStore.snapshot` as this runs in a thread
+        :type store: ColumnarRowStore
+        :param group_by: attribute to group by
+        :type group_by: str
+        :param attribute: number attribute to aggregate
+        :type attribute: str
+        """
+        start = time.monotonic()
+        aggregator = Aggregator(group_by, attribute)
+        aggregator.add_store(store)
+        self.post_message(
+            self.Progress(
+                aggregator.results(),
+                aggregator.item_count,
+                store.page_count,
+                time.monotonic() - start,
+                finished=True,
+            )
+        )
+
+    @work(exclusive=True, group="aggregate", thread=True)
+    def aggregate_query(
+        self,
+        table_client,
+        query_params: QueryParameters,
+        group_by: str,
+        attribute: str,
+    ) -> None:
+        """
+        Aggregate every page of a query or scan, each page is dropped once it has been
+        added so memory only grows with the number of groups
+
+        :param table_client: dynamodb table to query
+        :param query_params: query to run from the start
+        :type query_params: QueryParameters
+        :param group_by: attribute to group by
+        :type group_by: str
+        :param attribute: number attribute to aggregate
+        :type attribute: str
+        """
+        worker = get_current_worker()
+        start = time.monotonic()
+        aggregator = Aggregator(group_by, attribute)
+        pages = 0
+        error = None
+        params = query_params.model_copy(update={"next_token": None})
+        try:
+            for items, _ in iter_pages(
+                table_client, scan_mode=params.scan_mode, **params.boto_params
+            ):
+                if worker.is_cancelled:
+                    return
+                aggregator.add_items(items)
+                pages += 1
+                self.post_message(
+                    self.Progress(
+                        aggregator.results(),
+                        aggregator.item_count,
+                        pages,
+                        time.monotonic() - start,
+                    )
+                )
+        except Exception as e:  # pylint: disable=broad-except
+            self.log.error(f"Error aggregating query results: {e}")
+            error = str(e)
+        self.post_message(
+            self.Progress(
+                aggregator.results(),
+                aggregator.item_count,
+                pages,
+                time.monotonic() - start,
+                finished=True,
+                error=error,
+            )
+        )
+
+    @on(Progress)
+    def show_progress(self, progress: Progress) -> None:
+        if not self.running and not progress.finished:
+            # progress from a cancelled run
+            return
+        self.running = not progress.finished
+        state = "done" if progress.finished else "running…"
+        if progress.error:
+            state = f"failed: {progress.error}"
+            self.notify(
+                f"Error aggregating query results: {progress.error}", severity="error"
+            )
+        self.query_one("#aggregate_status", Static).update(
+            f"{progress.items} items, {progress.pages} pages, "
+            f"{progress.elapsed:.1f}s, {state}"
+        )
+        table = self.query_one("#aggregate_results", DataTable)
+        table.clear()
+        table.add_rows(
+            [
+                [
+                    "(missing)" if result.group is None else result.group,
+                    result.count,
+                    format_output(result.sum),
+                    format_output(
+                        result.avg.quantize(AVG_PRECISION)
+                        if result.avg is not None
+                        else None
+                    ),
+                    format_output(result.min),
+                    format_output(result.max),
+                ]
+                for result in progress.results
+            ]
+        )
+
+    def start(self) -> None:
+        """Mark a run as started, called before one of the aggregate workers"""
+        self.running = True
+        self.query_one("#aggregate_status", Static).update("running…")
+
+    def watch_running(self, running: bool) -> None:
+        if not self.is_mounted:
+            return
+        self.query_one("#aggregate_cancel", Button).disabled = not running
@@ -0,0 +1,63 @@
+from textual.widgets import Static
+
+from dyno_viewer.models import DiffProgress, ExportProgress, WriteProgress
+from dyno_viewer.util.util import format_bytes, format_duration
+
+
+class JobStatus(Static):
+    """Status line of a background export, import, copy or diff job, hidden until a job is started"""
+
+    DEFAULT_CSS = """
+    JobStatus {
+        dock: bottom;
+        height: 1;
+        display: none;
+        background: $boost;
+    }
+    JobStatus.-active {
+        display: block;
+    }
+    """
+
+    def update_progress(self, progress: ExportProgress) -> None:
+        self.add_class("-active")
+        eta = progress.eta
+        status = (
+            f"export to {progress.path}: {progress.items} items, "
+            f"{format_bytes(progress.bytes_written)}, "
+            f"{format_duration(progress.elapsed)} elapsed"
+        )
+        if progress.error:
+            status += f", failed: {progress.error}"
+        elif progress.finished:
+            status += ", done"
+        elif eta is not None:
+            status += f", ETA {format_duration(eta)}"
+        self.update(status)
+
+    def update_write_progress(self, progress: WriteProgress) -> None:
+        self.add_class("-active")
+        status = (
+            f"{progress.description}: {progress.items} items, "
+            f"{progress.items_per_second:.0f} items/s, {progress.rejected} rejected, "
+            f"{format_duration(progress.elapsed)} elapsed"
+        )
+        if progress.error:
+            status += f", failed: {progress.error}"
+        elif progress.finished:
+            status += ", done"
+        self.update(status)
+
+    def update_diff_progress(self, progress: DiffProgress) -> None:
+        self.add_class("-active")
+        status = (
+            f"diff of {progress.source} and {progress.target}: "
+            f"{progress.source_items}/{progress.target_items} items read, "
+            f"{progress.added} added, {progress.removed} removed, "
+            f"{progress.changed} changed, {format_duration(progress.elapsed)} elapsed"
+        )
+        if progress.error:
+            status += f", failed: {progress.error}"
+        elif progress.finished:
+            status += ", done"
+        self.update(status)
@@ -0,0 +1,135 @@
+from pathlib import Path
+
+from textual import on
+from textual.app import ComposeResult
+from textual.containers import Container, Horizontal
+from textual.screen import ModalScreen
+from textual.widgets import Button, Input, Label, Markdown, Switch
+
+from dyno_viewer.models import TableCopyOptions
+from dyno_viewer.util.table_copy import copy_reject_path
+
+
+class CopyTableScreen(ModalScreen):
+    """Pick the table to copy the current table or query to and how to copy it"""
+
+    BINDINGS = [("escape", "cancel", "Cancel")]
+    DEFAULT_CSS = """
+    #copyTable {
+        margin: 1 1;
+        background: $boost;
+        border: heavy grey;
+        height: auto;
+    }
+    #copyTable Horizontal {
+        height: auto;
+    }
+    #copyTable Input {
+        width: 1fr;
+    }
+    #copyTable Label {
+        margin: 1 1 0 1;
+    }
+    #buttons {
+        height: auto;
+        align-horizontal: center;
+    }
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        profile: str | None,
+        region: str,
+        has_query: bool,
+        total_segments: int = 4,
+    ) -> None:
+        super().__init__()
+        self.table_name = table_name
+        self.default_profile = profile
+        self.default_region = region
+        self.has_query = has_query
+        self.total_segments = total_segments
+
+    def compose(self) -> ComposeResult:
+        with Container(id="copyTable"):
+            yield Markdown("# Copy table")
+            yield Label("Target profile, region and table:")
+            with Horizontal():
+                yield Input(
+                    value=self.default_profile or "",
+                    placeholder="default profile",
+                    id="targetProfile",
+                )
+                yield Input(
+                    value=self.default_region, placeholder="region", id="targetRegion"
+                )
+                yield Input(placeholder="table", id="targetTable")
+            yield Label("Only copy the current query:")
+            yield Switch(
+                value=self.has_query, disabled=not self.has_query, id="useQuery"
+            )
+            yield Label("Parallel scan segments:")
+            yield Input(
+                value=str(self.total_segments), type="integer", id="totalSegments"
+            )
+            yield Label("Rewrite key prefix:")
+            yield Input(placeholder="old=>new e.g prod#=>staging#", id="keyPrefix")
+            yield Label("Capacity units per second, blank for no limit:")
+            with Horizontal():
+                yield Input(placeholder="read", type="integer", id="rcuBudget")
+                yield Input(placeholder="write", type="integer", id="wcuBudget")
+            yield Label("Write items that can't be copied to:")
+            yield Input(value=str(copy_reject_path(self.table_name)), id="rejectPath")
+            with Horizontal(id="buttons"):
+                yield Button("Copy", id="ok")
+                yield Button("Cancel", id="cancel")
+
+    def _positive_int(self, input_id: str, name: str) -> int | None:
+        value = self.query_one(f"#{input_id}", Input).value
+        if not value:
+            return None
+        if int(value) <= 0:
+            raise ValueError(f"{name} has to be more than 0")
+        return int(value)
+
+    @on(Button.Pressed, "#ok")
+    def ok_pressed(self, _: Button.Pressed) -> None:
+        target_table = self.query_one("#targetTable", Input).value.strip()
+        target_region = self.query_one("#targetRegion", Input).value.strip()
+        reject_path = self.query_one("#rejectPath", Input).value.strip()
+        if not target_table or not target_region or not reject_path:
+            self.app.notify(
+                "Please enter a target region, table and file for rejected items",
+                severity="warning",
+            )
+            return
+        key_prefix = self.query_one("#keyPrefix", Input).value
+        if key_prefix and "=>" not in key_prefix:
+            self.app.notify("Key prefix has to be old=>new", severity="warning")
+            return
+        try:
+            total_segments = self._positive_int("totalSegments", "Segments") or 1
+            rcu_budget = self._positive_int("rcuBudget", "Read capacity")
+            wcu_budget = self._positive_int("wcuBudget", "Write capacity")
+        except ValueError as e:
+            self.app.notify(str(e), severity="warning")
+            return
+        self.dismiss(
+            TableCopyOptions(
+                target_profile=self.query_one("#targetProfile", Input).value.strip()
+                or None,
+                target_region=target_region,
+                target_table=target_table,
+                use_query=self.query_one("#useQuery", Switch).value,
+                total_segments=total_segments,
+                key_prefix=tuple(key_prefix.split("=>", 1)) if key_prefix else None,
+                rcu_budget=rcu_budget,
+                wcu_budget=wcu_budget,
+                reject_path=Path(reject_path).expanduser(),
+            )
+        )
+
+    @on(Button.Pressed, "#cancel")
+    def action_cancel(self) -> None:
+        self.dismiss(None)
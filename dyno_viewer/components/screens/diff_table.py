@@ -0,0 +1,116 @@
+from datetime import datetime
+from pathlib import Path
+
+from textual import on
+from textual.app import ComposeResult
+from textual.containers import Container, Horizontal
+from textual.screen import ModalScreen
+from textual.widgets import Button, Input, Label, Markdown, Switch
+
+from dyno_viewer.models import TableDiffOptions
+
+
+class DiffTableScreen(ModalScreen):
+    """Pick the table to diff the current table or query against"""
+
+    BINDINGS = [("escape", "cancel", "Cancel")]
+    DEFAULT_CSS = """
+    #diffTable {
+        margin: 1 1;
+        background: $boost;
+        border: heavy grey;
+        height: auto;
+    }
+    #diffTable Horizontal {
+        height: auto;
+    }
+    #diffTable Input {
+        width: 1fr;
+    }
+    #diffTable Label {
+        margin: 1 1 0 1;
+    }
+    #buttons {
+        height: auto;
+        align-horizontal: center;
+    }
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        profile: str | None,
+        region: str,
+        has_query: bool,
+        total_segments: int = 4,
+    ) -> None:
+        super().__init__()
+        self.table_name = table_name
+        self.default_profile = profile
+        self.default_region = region
+        self.has_query = has_query
+        self.total_segments = total_segments
+
+    def compose(self) -> ComposeResult:
+        with Container(id="diffTable"):
+            yield Markdown("# Diff table")
+            yield Label("Profile, region and table to diff against:")
+            with Horizontal():
+                yield Input(
+                    value=self.default_profile or "",
+                    placeholder="default profile",
+                    id="targetProfile",
+                )
+                yield Input(
+                    value=self.default_region, placeholder="region", id="targetRegion"
+                )
+                yield Input(placeholder="table", id="targetTable")
+            yield Label("Only diff the current query:")
+            yield Switch(
+                value=self.has_query, disabled=not self.has_query, id="useQuery"
+            )
+            yield Label("Parallel scan segments:")
+            yield Input(
+                value=str(self.total_segments), type="integer", id="totalSegments"
+            )
+            yield Label("Write the differences to:")
+            yield Input(
+                value=str(
+                    Path.home()
+                    / f"{self.table_name}-diff-{datetime.now():%Y%m%d-%H%M%S}.jsonl"
+                ),
+                id="outputPath",
+            )
+            with Horizontal(id="buttons"):
+                yield Button("Diff", id="ok")
+                yield Button("Cancel", id="cancel")
+
+    @on(Button.Pressed, "#ok")
+    def ok_pressed(self, _: Button.Pressed) -> None:
+        target_table = self.query_one("#targetTable", Input).value.strip()
+        target_region = self.query_one("#targetRegion", Input).value.strip()
+        output_path = self.query_one("#outputPath", Input).value.strip()
+        if not target_table or not target_region or not output_path:
+            self.app.notify(
+                "Please enter a region, table and file to write to", severity="warning"
+            )
+            return
+        total_segments = self.query_one("#totalSegments", Input).value
+        if total_segments and int(total_segments) <= 0:
+            self.app.notify("Segments has to be more than 0", severity="warning")
+            return
+        self.dismiss(
+            TableDiffOptions(
+                target_profile=self.query_one("#targetProfile", Input).value.strip()
+                or None,
+                target_region=target_region,
+                target_table=target_table,
+                use_query=self.query_one("#useQuery", Switch).value,
+                total_segments=int(total_segments or 1),
+                output_path=Path(output_path).expanduser(),
+            )
+        )
+
+    @on(Button.Pressed, "#cancel")
+    def action_cancel(self) -> None:
+        self.dismiss(None)
@@ -7,7 +7,33 @@ from textual.screen import ModalScreen
 from textual.widgets import Button, DirectoryTree, Input, Label, Markdown, OptionList
 from textual.widgets.option_list import Option
 
-from dyno_viewer.models import FileToSave, OutputFormat
+from dyno_viewer.models import Compression, FileToImport, FileToSave, OutputFormat
+from dyno_viewer.util.bulk_import import IMPORT_FORMATS, parse_column_types
+from dyno_viewer.util.export import (
+    COMPRESSION_MODULES,
+    COMPRESSION_SUFFIXES,
+    EXPORT_WRITERS,
+)
+
+# file format picked by default for a file being imported
+IMPORT_SUFFIXES = {
+    ".csv": OutputFormat.CSV,
+    ".json": OutputFormat.JSON,
+    ".jsonl": OutputFormat.JSONL,
+    ".ndjson": OutputFormat.JSONL,
+    ".ddb-json": OutputFormat.DYNAMODB_JSON,
+}
+
+
+def guess_import_format(path: Path) -> OutputFormat | None:
+    """File format of a file from its suffix, ignoring any compression suffix"""
+    name = path.name
+    for suffix in COMPRESSION_SUFFIXES.values():
+        name = name.removesuffix(suffix)
+    if name.endswith(".rejected.jsonl"):
+        # rejected items from an import are written as dynamodb json
+        return OutputFormat.DYNAMODB_JSON
+    return IMPORT_SUFFIXES.get(Path(name).suffix.lower())
 
 
 class SaveFileChooser(ModalScreen):
@@ -47,6 +73,7 @@ class SaveFileChooser(ModalScreen):
     path_selected = reactive(Path.home())
     base_directory = reactive(Path.home(), init=False)
     file_format: OutputFormat = reactive(OutputFormat.CSV)
+    compression: Compression = reactive(Compression.NONE)
 
     def __init__(self, default_filename: str = "") -> None:
         super().__init__()
@@ -71,9 +98,23 @@ class SaveFileChooser(ModalScreen):
                 )
                 yield Label("File format:")
                 yield OptionList(
-                    *[Option(format.value, id=format) for format in OutputFormat],
+                    *[
+                        Option(format.value, id=format)
+                        for format in OutputFormat
+                        if format.value in EXPORT_WRITERS
+                    ],
                     id="fileformat",
                 )
+                yield Label("Compression:")
+                yield OptionList(
+                    *[
+                        Option(compression.value, id=compression)
+                        for compression in Compression
+                        if compression == Compression.NONE
+                        or compression.value in COMPRESSION_MODULES
+                    ],
+                    id="compression",
+                )
             yield DirectoryTree(self.base_directory)
         with Container(id="buttons"):
             yield Button("Ok", id="ok")
@@ -94,15 +135,26 @@ class SaveFileChooser(ModalScreen):
     def fileformat_selected(self, event: OptionList.OptionSelected) -> None:
         self.file_format = event.option.id
 
+    @on(OptionList.OptionSelected, "#compression")
+    def compression_selected(self, event: OptionList.OptionSelected) -> None:
+        self.compression = event.option.id
+
     @on(Button.Pressed, "#ok")
     async def ok_pressed(self, _: Button.Pressed) -> None:
         filename = self.query_one("#filename_input").value
         if not filename:
             self.app.notify("Please enter a file name", severity="warning")
             return
+        suffix = COMPRESSION_SUFFIXES.get(self.compression.value, "")
+        if not filename.endswith(suffix):
+            filename += suffix
         path = self.path_selected / filename
 
-        self.dismiss(FileToSave(path=path, file_format=self.file_format))
+        self.dismiss(
+            FileToSave(
+                path=path, file_format=self.file_format, compression=self.compression
+            )
+        )
 
     @on(Button.Pressed, "#cancel")
     async def cancel_pressed(self, _: Button.Pressed) -> None:
@@ -119,3 +171,118 @@ class SaveFileChooser(ModalScreen):
                 return
             directory_tree.path = new_path
             directory_tree.refresh()
+
+
+class ImportFileChooser(ModalScreen):
+    """Pick a file to import into the table, with csv column types and a WCU budget"""
+
+    DEFAULT_CSS = """
+    * {
+        overflow-y: auto;
+    }
+    #title {
+        text-align: center;
+        height: 3;
+    }
+    #options {
+        height: auto;
+        layout: vertical;
+    }
+    #buttons {
+        height: 5;
+        layout: horizontal;
+        align-horizontal: center;
+        padding: 1 2;
+        dock: bottom;
+    }
+    #filetree {
+        layout: horizontal;
+    }
+    #navbar {
+        height: 100%;
+        width: 18;
+        layout: vertical;
+    }
+    """
+
+    path_selected: Path | None = reactive(None)
+    file_format: OutputFormat = reactive(OutputFormat.JSONL)
+
+    def compose(self):
+        yield Markdown("# Import a file", id="title")
+        with Container(id="options"):
+            yield Label(" File:")
+            yield Label(" no file selected", id="selected_file")
+            yield Input(
+                placeholder="csv column types e.g amount=N,tags=SS, other columns are strings",
+                id="column_types",
+            )
+            yield Input(
+                placeholder="max write capacity units per second, blank for no limit",
+                type="integer",
+                id="wcu_budget",
+            )
+        with Container(id="filetree"):
+            with Container(id="navbar"):
+                yield Label("File format:")
+                yield OptionList(
+                    *[
+                        Option(format.value, id=format)
+                        for format in OutputFormat
+                        if format.value in IMPORT_FORMATS
+                    ],
+                    id="fileformat",
+                )
+            yield DirectoryTree(Path.home())
+        with Container(id="buttons"):
+            yield Button("Ok", id="ok")
+            yield Button("Cancel", id="cancel")
+
+    @on(DirectoryTree.FileSelected)
+    def file_selected(self, event: DirectoryTree.FileSelected) -> None:
+        self.path_selected = event.path
+        file_format = guess_import_format(event.path)
+        if file_format:
+            self.file_format = file_format
+
+    @on(OptionList.OptionSelected, "#fileformat")
+    def fileformat_selected(self, event: OptionList.OptionSelected) -> None:
+        self.file_format = event.option.id
+
+    def watch_path_selected(self, path: Path | None) -> None:
+        if path:
+            self.query_one("#selected_file", Label).update(f" {path}")
+
+    def watch_file_format(self, file_format: OutputFormat) -> None:
+        option_list = self.query_one("#fileformat", OptionList)
+        option_list.highlighted = option_list.get_option_index(file_format)
+
+    @on(Button.Pressed, "#ok")
+    async def ok_pressed(self, _: Button.Pressed) -> None:
+        if not self.path_selected:
+            self.app.notify("Please select a file to import", severity="warning")
+            return
+        try:
+            column_types = parse_column_types(self.query_one("#column_types").value)
+        except ValueError as e:
+            self.app.notify(str(e), severity="warning")
+            return
+        wcu_budget = self.query_one("#wcu_budget").value
+        wcu_budget = int(wcu_budget) if wcu_budget else None
+        if wcu_budget is not None and wcu_budget <= 0:
+            self.app.notify(
+                "Write capacity budget has to be more than 0", severity="warning"
+            )
+            return
+        self.dismiss(
+            FileToImport(
+                path=self.path_selected,
+                file_format=self.file_format,
+                column_types=column_types,
+                wcu_budget=wcu_budget,
+            )
+        )
+
+    @on(Button.Pressed, "#cancel")
+    async def cancel_pressed(self, _: Button.Pressed) -> None:
+        self.dismiss(None)
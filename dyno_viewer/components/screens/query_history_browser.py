@@ -3,10 +3,11 @@ from textual.app import ComposeResult
 from textual.message import Message
 from textual.reactive import reactive
 from textual.screen import ModalScreen
-from textual.widgets import DataTable, Markdown
+from textual.widgets import DataTable, Input, Markdown
 
 from dyno_viewer.aws.ddb import pretty_condition
 from dyno_viewer.components.screens.confirm_dialogue import ConfirmDialogue
+from dyno_viewer.db.models import PageCursor
 
 
 class QueryHistoryBrowser(ModalScreen):
@@ -25,10 +26,15 @@ class QueryHistoryBrowser(ModalScreen):
     DataTable {
         min-height: 50%;
     }
+    Input {
+        margin: 1 0;
+    }
     """
 
     next_page = reactive(1)
     at_last_page = reactive(False)
+    # where the last page loaded ended, so the next one is found with an index seek
+    cursor: PageCursor | None = None
 
     class QueryHistoryResult(Message):
         def __init__(self, data) -> None:
@@ -37,6 +43,9 @@ class QueryHistoryBrowser(ModalScreen):
 
     def compose(self) -> ComposeResult:
         yield Markdown("# Query History:", id="title")
+        yield Input(
+            placeholder="Search by table or condition", id="search_query_history"
+        )
         yield DataTable(id="query_history_table")
 
     async def on_mount(self):
@@ -55,13 +64,16 @@ class QueryHistoryBrowser(ModalScreen):
         if self.at_last_page:
             return
         result = await self.app.db_manager.list_query_history(
-            page=self.next_page, page_size=20
+            page_size=20,
+            search=self.query_one("#search_query_history", Input).value,
+            after=self.cursor,
         )
         if len(result) == 0:
             self.at_last_page = True
             return
         table = self.query_one(DataTable)
         self.next_page += 1
+        self.cursor = result[-1].cursor
         for param in result:
             boto_params = param.data.boto_params
             key_condition = (
@@ -97,6 +109,15 @@ class QueryHistoryBrowser(ModalScreen):
         table = self.query_one(DataTable)
         table.clear()
 
+    @on(Input.Submitted, "#search_query_history")
+    def search_query_history(self, _: Input.Submitted) -> None:
+        self.next_page = 1
+        self.at_last_page = False
+        self.cursor = None
+        self.query_one(DataTable).clear()
+        self.retrieve_query_history()
+        self.query_one(DataTable).focus()
+
     @on(DataTable.RowSelected)
     async def on_row_selected(self, message: DataTable.RowSelected) -> None:
         query_history = await self.app.db_manager.get_query(message.row_key.value)
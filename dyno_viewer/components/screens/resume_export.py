@@ -0,0 +1,41 @@
+from textual.app import ComposeResult
+from textual.screen import ModalScreen
+from textual.widgets import Label, ListItem, ListView
+
+from dyno_viewer.models import ExportManifest
+
+
+class ResumeExportSelect(ModalScreen):
+    """Pick an export that didn't finish to resume"""
+
+    BINDINGS = [("escape", "cancel", "Cancel")]
+
+    def __init__(self, exports: list[ExportManifest]) -> None:
+        super().__init__()
+        self.exports = exports
+
+    def compose(self) -> ComposeResult:
+        yield ListView(
+            *[
+                ListItem(
+                    Label(
+                        f"{manifest.path}  {manifest.items} items, "
+                        f"{sum(part.finished for part in manifest.parts)}/"
+                        f"{manifest.total_segments} parts done"
+                        + (
+                            f", last checkpoint {manifest.updated_at:%Y-%m-%d %H:%M}"
+                            if manifest.updated_at
+                            else ""
+                        )
+                    )
+                )
+                for manifest in self.exports
+            ],
+            id="exports",
+        )
+
+    def on_list_view_selected(self, selected: ListView.Selected) -> None:
+        self.dismiss(self.exports[selected.list_view.index])
+
+    def action_cancel(self) -> None:
+        self.dismiss(None)
@@ -9,6 +9,7 @@ from textual.widgets import DataTable, Input, Markdown
 
 from dyno_viewer.aws.ddb import pretty_condition
 from dyno_viewer.components.screens.confirm_dialogue import ConfirmDialogue
+from dyno_viewer.db.models import PageCursor
 
 
 class SavedQueryBrowser(ModalScreen):
@@ -37,6 +38,8 @@ class SavedQueryBrowser(ModalScreen):
 
     next_page = reactive(1)
     at_last_page = reactive(False)
+    # where the last page loaded ended, so the next one is found with an index seek
+    cursor: PageCursor | None = None
 
     class QueryHistoryResult(Message):
         def __init__(self, data) -> None:
@@ -67,13 +70,14 @@ class SavedQueryBrowser(ModalScreen):
         if self.at_last_page:
             return
         result = await self.app.db_manager.list_saved_queries(
-            page=self.next_page, search=search
+            search=search, after=self.cursor
         )
         if len(result) == 0:
             self.at_last_page = True
             return
         table = self.query_one(DataTable)
         self.next_page += 1
+        self.cursor = result[-1].cursor
         for row in result:
             boto_params = row.data.boto_params
             key_condition = (
@@ -104,6 +108,8 @@ class SavedQueryBrowser(ModalScreen):
     @on(Input.Submitted, "#search_saved_queries")
     async def search_saved_queries(self, message: Input.Submitted) -> None:
         self.next_page = 1
+        self.at_last_page = False
+        self.cursor = None
         table = self.query_one(DataTable)
         table.clear()
         self.get_saved_query(search=message.value)
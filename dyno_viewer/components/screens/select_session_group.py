@@ -6,6 +6,7 @@ from textual.widgets import Button, Input, Markdown, OptionList
 from textual.widgets.option_list import Option
 
 from dyno_viewer.components.screens.reaname_session_group import RenameSessionGroup
+from dyno_viewer.db.models import PageCursor
 from dyno_viewer.models import SelectedSessionGroup, SessionGroup
 
 
@@ -23,6 +24,8 @@ class SelectSessionGroup(ModalScreen):
     page = reactive(1)
     session_groups: dict[str, SessionGroup] = reactive({})
     last_page = reactive(False)
+    # where the last page loaded ended, so the next one is found with an index seek
+    cursor: PageCursor | None = None
 
     def compose(self):
         yield Markdown("# Select a Session Group")
@@ -50,21 +53,24 @@ class SelectSessionGroup(ModalScreen):
 
     @work(exclusive=True)
     async def update_workspaces(self, search_name: str = "", clear: bool = False):
-        if self.last_page:
-            return
         option_list = self.query_exactly_one(OptionList)
-        option_list.loading = True
         if clear:
             self.page = 1
+            self.last_page = False
+            self.cursor = None
             option_list.clear_options()
+        if self.last_page:
+            return
+        option_list.loading = True
         result = await self.app.db_manager.list_session_group(
-            page=self.page, page_size=40, search_name=search_name
+            page_size=40, search_name=search_name, after=self.cursor
         )
         if len(result) == 0:
             option_list.loading = False
             self.last_page = True
             return
         self.page += 1
+        self.cursor = result[-1].cursor
         self.session_groups.update(
             {item.data.session_group_id: item.data for item in result}
         )
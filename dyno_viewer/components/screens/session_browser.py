@@ -8,6 +8,7 @@ from textual.widgets import DataTable, Input, Markdown
 
 from dyno_viewer.components.screens.create_rename_session import RenameCreateSession
 from dyno_viewer.components.screens.select_session_group import SelectSessionGroup
+from dyno_viewer.db.models import PageCursor
 from dyno_viewer.models import (
     Session,
 )
@@ -37,6 +38,8 @@ class SessionBrowser(ModalScreen):
 
     next_page = reactive(1)
     at_last_page = reactive(False)
+    # where the last page loaded ended, so the next one is found with an index seek
+    cursor: PageCursor | None = None
 
     async def update_sessions_db(self, search: str = "", clear: bool = False) -> None:
         table = self.query_one(DataTable)
@@ -44,18 +47,20 @@ class SessionBrowser(ModalScreen):
             table.clear()
             self.next_page = 1
             self.at_last_page = False
+            self.cursor = None
 
         if self.at_last_page:
             return
         result = await self.app.db_manager.list_sessions(
-            page=self.next_page,
             search_name=search,
             session_group_id=self.app.session_group.session_group_id,
+            after=self.cursor,
         )
         if len(result) == 0:
             self.at_last_page = True
             return
         self.next_page += 1
+        self.cursor = result[-1].cursor
         for row in result:
             table.add_row(
                 row.data.name,
@@ -116,6 +121,13 @@ class SessionBrowser(ModalScreen):
         name = event.data_table.get_cell_at(Coordinate(event.cursor_row, 0))
         self.dismiss(name)
 
+    @on(Input.Submitted)
+    async def search_sessions(self, event: Input.Submitted) -> None:
+        if self.app.session_group:
+            await self.update_sessions_db(event.value, clear=True)
+        else:
+            self.update_sessions(event.value)
+
     @work(exclusive=True)
     async def worker_update_sessions_db(self) -> None:
         search_input = self.query_exactly_one(Input)
@@ -1,37 +1,82 @@
+import re
+import time
+from typing import Callable
+
 from textual import log, on, work
 from textual.app import ComposeResult
 from textual.binding import Binding
 from textual.message import Message
 from textual.reactive import reactive
 from textual.screen import Screen
-from textual.widgets import Footer
+from textual.widgets import DataTable, Footer, Input
 from textual.worker import get_current_worker
 
 from dyno_viewer.aws.ddb import (
     get_ddb_client,
+    get_table,
     query_items,
     scan_items,
     table_client_exist,
 )
+from dyno_viewer.components.aggregation import AggregationPanel
+from dyno_viewer.components.job_status import JobStatus
 from dyno_viewer.components.screens import (
     TableSelect,
 )
-from dyno_viewer.components.screens.file_chooser import SaveFileChooser
+from dyno_viewer.components.screens.confirm_dialogue import ConfirmDialogue
+from dyno_viewer.components.screens.copy_table import CopyTableScreen
+from dyno_viewer.components.screens.diff_table import DiffTableScreen
+from dyno_viewer.components.screens.file_chooser import (
+    ImportFileChooser,
+    SaveFileChooser,
+)
 from dyno_viewer.components.screens.profile_select import ProfileSelect
 from dyno_viewer.components.screens.query_history_browser import QueryHistoryBrowser
 from dyno_viewer.components.screens.region_select import RegionSelect
+from dyno_viewer.components.screens.resume_export import ResumeExportSelect
 from dyno_viewer.components.screens.saved_querys_browser import SavedQueryBrowser
 from dyno_viewer.components.screens.table_query import TableQuery
+from dyno_viewer.components.screens.write_progress import WriteProgressScreen
 from dyno_viewer.components.table import DataTableManager
-from dyno_viewer.models import OutputFormat, QueryHistory, QueryParameters, TableInfo
-from dyno_viewer.util import save_query_results_to_csv, save_query_results_to_json
+from dyno_viewer.models import (
+    CopyProgress,
+    DiffProgress,
+    ExportManifest,
+    ExportProgress,
+    FileToImport,
+    FileToSave,
+    ImportProgress,
+    QueryHistory,
+    QueryParameters,
+    QueryRunMetrics,
+    TableCopyOptions,
+    TableDiffOptions,
+    TableInfo,
+    WriteProgress,
+)
+from dyno_viewer.util.bulk_import import BulkImport, TableWriter
+from dyno_viewer.util.export import get_export_writer
+from dyno_viewer.util.segmented_export import SegmentedExport, manifest_path
+from dyno_viewer.util.table_copy import (
+    TableCopy,
+    replace_key_prefix,
+    table_description,
+)
+from dyno_viewer.util.table_diff import TableDiff, write_diff_entry
 
 
 class QueryResult(Message):
-    def __init__(self, data, next_token, update_existing_data=False) -> None:
+    def __init__(
+        self,
+        data,
+        next_token,
+        update_existing_data=False,
+        metrics: QueryRunMetrics | None = None,
+    ) -> None:
         self.data = data
         self.next_token = next_token
         self.update_existing_data = update_existing_data
+        self.metrics = metrics
         super().__init__()
 
 
@@ -41,11 +86,73 @@ class UpdateDynTableInfo(Message):
         super().__init__()
 
 
-class TableViewer(Screen):
+class ExportUpdate(Message):
+    def __init__(self, progress: ExportProgress) -> None:
+        self.progress = progress
+        super().__init__()
+
+
+class WriteUpdate(Message):
+    def __init__(self, progress: WriteProgress) -> None:
+        self.progress = progress
+        super().__init__()
+
+
+class DiffUpdate(Message):
+    def __init__(self, progress: DiffProgress) -> None:
+        self.progress = progress
+        super().__init__()
+
+
+# textual needs the watch_, action_ and on_ handlers to be public
+class TableViewer(Screen):  # pylint: disable=too-many-public-methods
     BINDINGS = [
         Binding("t", "select_table", "Select table", show=False),
         Binding("q", "query_table", "Query table", show=False),
         Binding("o", "save_query", "Output query result to file", show=False),
+        Binding(
+            "e",
+            "export_query",
+            "Export entire result",
+            show=False,
+            tooltip="Stream every page of the current query to a file in the background",
+        ),
+        Binding(
+            "E",
+            "export_query_segmented",
+            "Parallel export",
+            show=False,
+            tooltip="Export the table with a parallel scan, writing a part file per segment",
+        ),
+        Binding("ctrl+e", "cancel_export", "Cancel export", show=False),
+        Binding(
+            "R",
+            "resume_export",
+            "Resume export",
+            show=False,
+            tooltip="Carry on an export that didn't finish from its last checkpoint",
+        ),
+        Binding(
+            "I",
+            "import_items",
+            "Import items",
+            show=False,
+            tooltip="Import a json, json lines, dynamodb json or csv file into the table",
+        ),
+        Binding(
+            "C",
+            "copy_table",
+            "Copy to another table",
+            show=False,
+            tooltip="Copy the table or current query to a table in any profile or region",
+        ),
+        Binding(
+            "D",
+            "diff_tables",
+            "Diff with another table",
+            show=False,
+            tooltip="Write the items added, removed or changed in another table to a file",
+        ),
         Binding("h", "show_query_history", "Show query history", show=False),
         Binding("y", "show_saved_queries", "Show saved queries", show=False),
         Binding(
@@ -55,10 +162,34 @@ class TableViewer(Screen):
             tooltip="Select AWS Profile",
         ),
         Binding("r", "select_region", "Region", tooltip="Select AWS Region"),
+        Binding(
+            "/",
+            "quick_filter",
+            "Filter loaded results",
+            show=False,
+            tooltip="Filter loaded rows by text, attr=value or /regex/",
+        ),
+        Binding("escape", "close_quick_filter", "Close filter", show=False),
+        Binding(
+            "a",
+            "toggle_aggregation",
+            "Aggregate results",
+            show=False,
+            tooltip="Show count/sum/avg/min/max per group of the results",
+        ),
     ]
     HELP = """
     ## Table viewer 
     """
+    DEFAULT_CSS = """
+    #quick_filter {
+        dock: top;
+        display: none;
+    }
+    #quick_filter.-active {
+        display: block;
+    }
+    """
 
     table_info = reactive(None)
 
@@ -75,8 +206,19 @@ class TableViewer(Screen):
 
     data = reactive([], always_update=True)
 
+    write_progress: WriteProgress | None = None
+    # query history row of the query just run, its metrics are saved to it once the
+    # first page comes back
+    query_history_key: str | None = None
+
     def compose(self) -> ComposeResult:
+        yield Input(
+            placeholder="filter loaded rows: text, attr=value or /regex/",
+            id="quick_filter",
+        )
         yield DataTableManager().data_bind(TableViewer.data, TableViewer.table_info)
+        yield AggregationPanel()
+        yield JobStatus()
         yield Footer()
 
     async def on_mount(self) -> None:
@@ -155,10 +297,21 @@ class TableViewer(Screen):
         worker = get_current_worker()
         if not worker.is_cancelled:
             extra_params = query_params.boto_params if query_params else {}
+            metrics = QueryRunMetrics()
+
+            def record_metrics(resp: dict) -> None:
+                metrics.scanned_count = resp.get("ScannedCount", 0)
+                metrics.consumed_capacity = (resp.get("ConsumedCapacity") or {}).get(
+                    "CapacityUnits"
+                )
+
+            start = time.monotonic()
             result, next_token = (
                 scan_items(
                     self.table_client,
                     paginate=False,
+                    on_response=record_metrics,
+                    ReturnConsumedCapacity="TOTAL",
                     Limit=(
                         self.app.app_config.page_size if self.app.app_config else 50
                     ),
@@ -168,29 +321,392 @@ class TableViewer(Screen):
                 else query_items(
                     self.table_client,
                     paginate=False,
+                    on_response=record_metrics,
+                    ReturnConsumedCapacity="TOTAL",
                     Limit=(
                         self.app.app_config.page_size if self.app.app_config else 50
                     ),
                     **extra_params,
                 )
             )
+            metrics.elapsed = time.monotonic() - start
+            metrics.items = len(result)
             self.log.info(f"query result: {result}")
-            self.post_message(QueryResult(result, next_token, update_existing))
+            self.post_message(
+                QueryResult(result, next_token, update_existing, metrics=metrics)
+            )
+
+    def _run_export(
+        self, segmented_export: SegmentedExport, progress: ExportProgress
+    ) -> None:
+        """
+        Run an export on the current thread worker, posting its progress and saving its
+        checkpoints to the data store so it can be resumed
+
+        :param segmented_export: export to run
+        :type segmented_export: SegmentedExport
+        :param progress: progress to update, with the estimated total items if known
+        :type progress: ExportProgress
+        """
+        worker = get_current_worker()
+        db_manager = self.app.db_manager
+        start = time.monotonic()
+
+        def export_progress(manifest: ExportManifest) -> None:
+            self.post_message(
+                ExportUpdate(
+                    progress.model_copy(
+                        update={
+                            "items": manifest.items,
+                            "bytes_written": manifest.bytes_written,
+                            "elapsed": time.monotonic() - start,
+                        }
+                    )
+                )
+            )
+
+        def save_checkpoint(manifest: ExportManifest) -> None:
+            if db_manager:
+                self.app.call_from_thread(db_manager.save_export_checkpoint, manifest)
+
+        try:
+            manifest = segmented_export.run(
+                is_cancelled=lambda: worker.is_cancelled,
+                on_progress=export_progress,
+                on_checkpoint=save_checkpoint,
+            )
+            if worker.is_cancelled:
+                return
+            progress.items = manifest.items
+            progress.bytes_written = manifest.bytes_written
+            if manifest.segmented and not manifest.merged:
+                progress.path = manifest_path(manifest.path)
+            errors = [part.error for part in manifest.parts if part.error]
+            if errors:
+                progress.error = errors[0]
+            else:
+                progress.finished = True
+                if db_manager and segmented_export.resumable:
+                    self.app.call_from_thread(db_manager.remove, manifest.export_id)
+        except Exception as e:  # pylint: disable=broad-except
+            self.log.error(f"Error exporting query results: {e}")
+            progress.error = str(e)
+        progress.elapsed = time.monotonic() - start
+        self.post_message(ExportUpdate(progress))
+
+    @work(exclusive=True, group="export_query", thread=True)
+    def export_query(
+        self, file_to_save: FileToSave, query_params: QueryParameters | None
+    ) -> None:
+        """
+        Stream every page of a query or scan straight to a file, from the first page
+        regardless of how many pages are loaded
+
+        :param file_to_save: file and format to export to
+        :type file_to_save: FileToSave
+        :param query_params: query to export, a full table scan if not set
+        :type query_params: QueryParameters | None
+        """
+        segmented_export = SegmentedExport(
+            self.table_client, file_to_save, total_segments=1, query_params=query_params
+        )
+        progress = ExportProgress(path=file_to_save.path)
+        if (
+            segmented_export.manifest.scan_mode
+            and "FilterExpression" not in segmented_export.query_kwargs
+        ):
+            # dynamodb only updates the item count every 6 hours so this is a rough estimate
+            progress.total_items = self.table_client.item_count
+        self._run_export(segmented_export, progress)
+
+    @work(exclusive=True, group="export_query", thread=True)
+    def export_query_segmented(
+        self, file_to_save: FileToSave, query_params: QueryParameters | None
+    ) -> None:
+        """
+        Export a scan with a parallel scan, see `SegmentedExport`
+
+        :param file_to_save: file and format to export to
+        :type file_to_save: FileToSave
+        :param query_params: scan to export, a full table scan if not set
+        :type query_params: QueryParameters | None
+        """
+        config = self.app.app_config
+        segmented_export = SegmentedExport(
+            self.table_client,
+            file_to_save,
+            total_segments=config.export_segments if config else 4,
+            merge=config.merge_export_parts if config else True,
+            query_params=query_params,
+        )
+        progress = ExportProgress(path=file_to_save.path)
+        if "FilterExpression" not in segmented_export.query_kwargs:
+            progress.total_items = self.table_client.item_count
+        self._run_export(segmented_export, progress)
+
+    @work(exclusive=True, group="export_query", thread=True)
+    def resume_export(self, manifest: ExportManifest) -> None:
+        """
+        Carry on an export from its last checkpoint
+
+        :param manifest: manifest of the export from the data store
+        :type manifest: ExportManifest
+        """
+        self._run_export(
+            SegmentedExport.resume(self.table_client, manifest),
+            ExportProgress(path=manifest.path, items=manifest.items),
+        )
+
+    def _run_write(
+        self, create_writer: Callable[[], TableWriter], progress: WriteProgress
+    ) -> None:
+        """
+        Create and run an import or copy on the current thread worker, posting its
+        progress
+
+        :param create_writer: creates the job, called on the worker as it can call aws
+        :type create_writer: Callable[[], TableWriter]
+        :param progress: progress to post if the job can't be created
+        :type progress: WriteProgress
+        """
+        worker = get_current_worker()
+        try:
+            progress = create_writer().run(
+                is_cancelled=lambda: worker.is_cancelled,
+                on_progress=lambda update: self.post_message(WriteUpdate(update)),
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            self.log.error(f"Error writing items: {e}")
+            progress.error = str(e)
+        if not worker.is_cancelled:
+            self.post_message(WriteUpdate(progress))
+
+    @property
+    def _write_workers(self) -> int:
+        return self.app.app_config.import_workers if self.app.app_config else 4
+
+    @work(exclusive=True, group="write_items", thread=True)
+    def import_items(self, file_to_import: FileToImport) -> None:
+        """
+        Write the items of a file to the table in the background, see `BulkImport`
+
+        :param file_to_import: file and how to import it
+        :type file_to_import: FileToImport
+        """
+        self._run_write(
+            lambda: BulkImport(
+                self.table_client, file_to_import, workers=self._write_workers
+            ),
+            ImportProgress(path=file_to_import.path),
+        )
+
+    @work(exclusive=True, group="write_items", thread=True)
+    def copy_table(
+        self, options: TableCopyOptions, query_params: QueryParameters | None
+    ) -> None:
+        """
+        Copy the table, or the items of a query, to another table in the background,
+        see `TableCopy`
+
+        :param options: table to copy to and how to copy
+        :type options: TableCopyOptions
+        :param query_params: query or scan to copy, the whole table if not set
+        :type query_params: QueryParameters | None
+        """
+
+        def create_copy() -> TableCopy:
+            target = get_table(
+                options.target_table, options.target_region, options.target_profile
+            )
+            return TableCopy(
+                self.table_client,
+                target,
+                query_params=query_params,
+                total_segments=(
+                    1
+                    if query_params and not query_params.scan_mode
+                    else options.total_segments
+                ),
+                transform=(
+                    replace_key_prefix(
+                        [key["AttributeName"] for key in target.key_schema],
+                        *options.key_prefix,
+                    )
+                    if options.key_prefix
+                    else None
+                ),
+                workers=self._write_workers,
+                rcu_budget=options.rcu_budget,
+                wcu_budget=options.wcu_budget,
+                reject_path=options.reject_path,
+            )
+
+        self._run_write(
+            create_copy,
+            CopyProgress(
+                source=table_description(self.table_client),
+                target=f"{options.target_region}/{options.target_table}",
+                reject_path=options.reject_path,
+            ),
+        )
+
+    @work(exclusive=True, group="diff_tables", thread=True)
+    def diff_tables(
+        self, options: TableDiffOptions, query_params: QueryParameters | None
+    ) -> None:
+        """
+        Diff the table, or the items of a query, with another table in the background
+        and write the differences to a json lines file, see `TableDiff`
+
+        :param options: table to diff against and where to write the differences
+        :type options: TableDiffOptions
+        :param query_params: query or scan to diff, the whole tables if not set
+        :type query_params: QueryParameters | None
+        """
+        worker = get_current_worker()
+        progress = DiffProgress(
+            source=table_description(self.table_client),
+            target=f"{options.target_region}/{options.target_table}",
+            output_path=options.output_path,
+        )
+        try:
+            diff = TableDiff(
+                self.table_client,
+                get_table(
+                    options.target_table, options.target_region, options.target_profile
+                ),
+                query_params=query_params,
+                total_segments=(
+                    1
+                    if query_params and not query_params.scan_mode
+                    else options.total_segments
+                ),
+            )
+            diff.progress.output_path = options.output_path
+            with open(options.output_path, "w", encoding="utf-8") as f:
+                progress = diff.run(
+                    is_cancelled=lambda: worker.is_cancelled,
+                    on_entry=lambda entry: write_diff_entry(f, entry),
+                    on_progress=lambda update: self.post_message(DiffUpdate(update)),
+                )
+        except Exception as e:  # pylint: disable=broad-except
+            self.log.error(f"Error diffing tables: {e}")
+            progress.error = str(e)
+        if not worker.is_cancelled:
+            self.post_message(DiffUpdate(progress))
 
     # on methods
 
+    @on(ExportUpdate)
+    def export_updated(self, update: ExportUpdate) -> None:
+        self.query_one(JobStatus).update_progress(update.progress)
+        if update.progress.error:
+            self.notify(
+                f"Error exporting query results: {update.progress.error}",
+                severity="error",
+            )
+        elif update.progress.finished:
+            self.notify(
+                f"Exported {update.progress.items} items to {update.progress.path}"
+            )
+
+    @on(WriteUpdate)
+    def write_updated(self, update: WriteUpdate) -> None:
+        self.write_progress = update.progress
+        self.query_one(JobStatus).update_write_progress(update.progress)
+        for screen in self.app.screen_stack:
+            if isinstance(screen, WriteProgressScreen):
+                screen.progress = update.progress
+        if update.progress.error:
+            self.notify(
+                f"Error writing items, {update.progress.description}: "
+                f"{update.progress.error}",
+                severity="error",
+            )
+        elif update.progress.finished:
+            self.notify(
+                f"Finished {update.progress.description}, "
+                f"{update.progress.items} items written"
+                + (
+                    f", {update.progress.rejected} rejected items written to "
+                    f"{update.progress.reject_path}"
+                    if update.progress.rejected
+                    else ""
+                ),
+                severity="warning" if update.progress.rejected else "information",
+            )
+
+    @on(DiffUpdate)
+    def diff_updated(self, update: DiffUpdate) -> None:
+        self.query_one(JobStatus).update_diff_progress(update.progress)
+        if update.progress.error:
+            self.notify(
+                f"Error diffing tables: {update.progress.error}", severity="error"
+            )
+        elif update.progress.finished:
+            self.notify(
+                f"{update.progress.source_items} items diffed with "
+                f"{update.progress.target}, {update.progress.added} added, "
+                f"{update.progress.removed} removed and {update.progress.changed} "
+                f"changed"
+                + (
+                    f", written to {update.progress.output_path}"
+                    if update.progress.differences
+                    else ""
+                )
+            )
+
     @on(DataTableManager.PaginateRequest)
     async def paginate_table(self, _) -> None:
         table = self.query_one(DataTableManager)
         if not self.query_params:
             self.notify("No query parameters set, cannot paginate.")
-            table.loading = False
+            table.pagination_finished()
             return
 
         if self.query_params.next_token:
             self.run_table_query(self.query_params, update_existing=True)
         else:
-            table.loading = False
+            table.pagination_finished(has_more=False)
+
+    @on(Input.Changed, "#quick_filter")
+    def quick_filter_changed(self, event: Input.Changed) -> None:
+        try:
+            self.query_one(DataTableManager).apply_filter(event.value)
+            event.input.remove_class("-invalid")
+        except re.error:
+            # most likely a regex that is still being typed, keep the last filter
+            event.input.add_class("-invalid")
+
+    @on(Input.Submitted, "#quick_filter")
+    def quick_filter_submitted(self, _: Input.Submitted) -> None:
+        self.query_one(DataTableManager).query_one(DataTable).focus()
+
+    @on(AggregationPanel.Requested)
+    def aggregate_results(self, request: AggregationPanel.Requested) -> None:
+        panel = self.query_one(AggregationPanel)
+        if request.stream:
+            if not self.table_client or not self.query_params:
+                self.notify("No query to aggregate", severity="warning")
+                return
+            panel.start()
+            panel.aggregate_query(
+                self.table_client,
+                self.query_params,
+                request.group_by,
+                request.attribute,
+            )
+        else:
+            panel.start()
+            # the worker gets a copy of the columns it needs since the live store has
+            # pages appended to it on this thread while the worker reads
+            panel.aggregate_store(
+                self.query_one(DataTableManager).store.snapshot(
+                    [request.group_by, request.attribute]
+                ),
+                request.group_by,
+                request.attribute,
+            )
 
     @on(UpdateDynTableInfo)
     async def update_table_info(self, update: UpdateDynTableInfo) -> None:
@@ -206,11 +722,16 @@ class TableViewer(Screen):
             # If we are updating existing data, we should not clear the current data
             self.log.info("Updating existing data in the table")
             self.data = self.data + [update_data.data]
-            table.increment_page_index()
+            table.page_appended()
         else:
             # If not updating existing data, clear the current data
             table.page_index = 0
             self.data = [update_data.data]
+            if self.query_history_key and update_data.metrics:
+                await self.app.db_manager.update_query_history_metrics(
+                    self.query_history_key, update_data.metrics
+                )
+                self.query_history_key = None
 
         # when scan
         if not self.query_params:
@@ -222,9 +743,31 @@ class TableViewer(Screen):
             )
         else:
             self.query_params.next_token = update_data.next_token
-        table.loading = False
+        table.pagination_finished(has_more=bool(update_data.next_token))
 
     # action methods
+    def action_quick_filter(self) -> None:
+        quick_filter = self.query_one("#quick_filter", Input)
+        quick_filter.add_class("-active")
+        quick_filter.focus()
+
+    def action_toggle_aggregation(self) -> None:
+        panel = self.query_one(AggregationPanel)
+        panel.toggle_class("-active")
+        if panel.has_class("-active"):
+            panel.query_one("#group_by").focus()
+        else:
+            self.query_one(DataTableManager).query_one(DataTable).focus()
+
+    def action_close_quick_filter(self) -> None:
+        quick_filter = self.query_one("#quick_filter", Input)
+        if not quick_filter.has_class("-active"):
+            return
+        quick_filter.value = ""
+        self.query_one(DataTableManager).apply_filter("")
+        quick_filter.remove_class("-active", "-invalid")
+        self.query_one(DataTableManager).query_one(DataTable).focus()
+
     @work
     async def action_select_profile(self) -> None:
         """Open the profile select screen."""
@@ -251,14 +794,17 @@ class TableViewer(Screen):
             self.draft_query_params = new_query_param
             return
 
-        self.query_params = new_query_param
-        self.draft_query_params = None
         query_history = QueryHistory.model_validate(
             {"table": self.table_name, **new_query_param.model_dump()}
         )
         if await self.app.db_manager.get(self.id):
             query_history.session_id = self.id
-        await self.app.db_manager.add_query_history(query_history)
+        # added before the query runs so its metrics can be saved to the row
+        self.query_history_key = await self.app.db_manager.add_query_history(
+            query_history
+        )
+        self.query_params = new_query_param
+        self.draft_query_params = None
 
     @work
     async def action_select_table(self) -> None:
@@ -279,16 +825,14 @@ class TableViewer(Screen):
             file_to_save = await self.app.push_screen_wait(SaveFileChooser())
             if file_to_save:
                 try:
-                    if file_to_save.file_format == OutputFormat.CSV:
-                        save_query_results_to_csv(
-                            file_to_save.path,
-                            [item for page in self.data if page for item in page],
-                        )
-                    else:
-                        save_query_results_to_json(
-                            file_to_save.path,
-                            [item for page in self.data if page for item in page],
-                        )
+                    with get_export_writer(
+                        file_to_save.file_format,
+                        file_to_save.path,
+                        compression=file_to_save.compression,
+                    ) as writer:
+                        for page in self.data:
+                            if page:
+                                writer.write_page(page)
 
                     self.notify(f"Query results saved to {file_to_save.path}")
                 except Exception as e:  # pylint: disable=broad-except
@@ -297,6 +841,175 @@ class TableViewer(Screen):
         else:
             self.notify("Empty data, cannot save.")
 
+    @work
+    async def action_export_query(self) -> None:
+        """Export every page of the current query to a file in the background."""
+        if not self.table_client:
+            self.notify("No table selected", severity="warning")
+            return
+        file_to_save = await self.app.push_screen_wait(SaveFileChooser())
+        if file_to_save:
+            self.query_one(JobStatus).update_progress(
+                ExportProgress(path=file_to_save.path)
+            )
+            self.export_query(file_to_save, self.query_params)
+
+    @work
+    async def action_export_query_segmented(self) -> None:
+        """Export the current scan with a parallel scan in the background."""
+        if not self.table_client:
+            self.notify("No table selected", severity="warning")
+            return
+        if self.query_params and not self.query_params.scan_mode:
+            self.notify(
+                "Parallel export only works for scans, use export instead",
+                severity="warning",
+            )
+            return
+        file_to_save = await self.app.push_screen_wait(SaveFileChooser())
+        if file_to_save:
+            self.query_one(JobStatus).update_progress(
+                ExportProgress(path=file_to_save.path)
+            )
+            self.export_query_segmented(file_to_save, self.query_params)
+
+    @work
+    async def action_resume_export(self) -> None:
+        """Pick an export that didn't finish and resume it in the background."""
+        if not self.table_client:
+            self.notify("No table selected", severity="warning")
+            return
+        if self.export_running:
+            self.notify("An export is already running", severity="warning")
+            return
+        exports = await self.app.db_manager.list_unfinished_exports(
+            self.table_client.name
+        )
+        if not exports:
+            self.notify("No exports to resume")
+            return
+        manifest = await self.app.push_screen_wait(ResumeExportSelect(exports))
+        if manifest:
+            self.query_one(JobStatus).update_progress(
+                ExportProgress(path=manifest.path, items=manifest.items)
+            )
+            self.resume_export(manifest)
+
+    @work
+    async def action_import_items(self) -> None:
+        """Pick a file and import it into the table in the background."""
+        if not self.table_client:
+            self.notify("No table selected", severity="warning")
+            return
+        # an import or copy that's already running is shown instead of starting another
+        if not self.write_running:
+            file_to_import = await self.app.push_screen_wait(ImportFileChooser())
+            if not file_to_import:
+                return
+            self.write_progress = ImportProgress(path=file_to_import.path)
+            self.query_one(JobStatus).update_write_progress(self.write_progress)
+            self.import_items(file_to_import)
+        await self._show_write_progress()
+
+    @work
+    async def action_copy_table(self) -> None:
+        """Copy the table or current query to another table in the background."""
+        if not self.table_client:
+            self.notify("No table selected", severity="warning")
+            return
+        if not self.write_running:
+            config = self.app.app_config
+            options = await self.app.push_screen_wait(
+                CopyTableScreen(
+                    self.table_name,
+                    self.aws_profile,
+                    self.aws_region,
+                    has_query=self.query_params is not None,
+                    total_segments=config.export_segments if config else 4,
+                )
+            )
+            if not options:
+                return
+            self.write_progress = CopyProgress(
+                source=table_description(self.table_client),
+                target=f"{options.target_region}/{options.target_table}",
+                reject_path=options.reject_path,
+            )
+            self.query_one(JobStatus).update_write_progress(self.write_progress)
+            self.copy_table(options, self.query_params if options.use_query else None)
+        await self._show_write_progress()
+
+    @work
+    async def action_diff_tables(self) -> None:
+        """Diff the table or current query with another table in the background."""
+        if not self.table_client:
+            self.notify("No table selected", severity="warning")
+            return
+        if self.diff_running:
+            if await self.app.push_screen_wait(
+                ConfirmDialogue("A diff is already running, do you want to cancel it?")
+            ):
+                self.workers.cancel_group(self, "diff_tables")
+                self.query_one(JobStatus).remove_class("-active")
+                self.notify("Diff cancelled")
+            return
+        config = self.app.app_config
+        options = await self.app.push_screen_wait(
+            DiffTableScreen(
+                self.table_name,
+                self.aws_profile,
+                self.aws_region,
+                has_query=self.query_params is not None,
+                total_segments=config.export_segments if config else 4,
+            )
+        )
+        if not options:
+            return
+        self.query_one(JobStatus).update_diff_progress(
+            DiffProgress(
+                source=table_description(self.table_client),
+                target=f"{options.target_region}/{options.target_table}",
+            )
+        )
+        self.diff_tables(options, self.query_params if options.use_query else None)
+
+    async def _show_write_progress(self) -> None:
+        cancel = await self.app.push_screen_wait(
+            WriteProgressScreen(self.write_progress)
+        )
+        if cancel and self.write_running:
+            self.workers.cancel_group(self, "write_items")
+            self.query_one(JobStatus).remove_class("-active")
+            self.notify(f"Cancelled {self.write_progress.description}")
+
+    @property
+    def write_running(self) -> bool:
+        return any(
+            worker.group == "write_items" and worker.is_running
+            for worker in self.workers
+        )
+
+    @property
+    def diff_running(self) -> bool:
+        return any(
+            worker.group == "diff_tables" and worker.is_running
+            for worker in self.workers
+        )
+
+    @property
+    def export_running(self) -> bool:
+        return any(
+            worker.group == "export_query" and worker.is_running
+            for worker in self.workers
+        )
+
+    def action_cancel_export(self) -> None:
+        if not self.export_running:
+            return
+        self.workers.cancel_group(self, "export_query")
+        self.query_one(JobStatus).remove_class("-active")
+        self.notify("Export cancelled")
+
     @work
     async def action_show_query_history(self) -> None:
         """Open the query history screen."""
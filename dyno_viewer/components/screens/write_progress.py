@@ -0,0 +1,103 @@
+from textual import on
+from textual.containers import Container
+from textual.reactive import reactive
+from textual.screen import ModalScreen
+from textual.widgets import Button, Markdown, Static
+
+from dyno_viewer.models import CopyProgress, ImportProgress, WriteProgress
+from dyno_viewer.util.util import format_duration
+
+
+class WriteProgressScreen(ModalScreen):
+    """
+    Progress of an import or copy running in the background, dismissed with True to
+    cancel it or False to hide it and keep it running
+    """
+
+    DEFAULT_CSS = """
+    WriteProgressScreen {
+        align: center middle;
+    }
+    #write_progress {
+        width: 80;
+        height: auto;
+        border: thick $background 80%;
+        background: $surface;
+        padding: 0 1;
+    }
+    #status {
+        height: auto;
+        padding: 1 0;
+    }
+    #buttons {
+        height: auto;
+        layout: horizontal;
+        align-horizontal: center;
+    }
+    """
+
+    BINDINGS = [("escape", "hide", "Hide")]
+
+    progress: WriteProgress = reactive(None, always_update=True)
+
+    def __init__(self, progress: WriteProgress) -> None:
+        super().__init__()
+        self.set_reactive(WriteProgressScreen.progress, progress)
+
+    def compose(self):
+        with Container(id="write_progress"):
+            yield Markdown(
+                "# Copy" if isinstance(self.progress, CopyProgress) else "# Import",
+                id="title",
+            )
+            yield Static(id="status")
+            with Container(id="buttons"):
+                yield Button("Hide", id="hide")
+                yield Button("Cancel", id="cancel", variant="error")
+
+    def on_mount(self) -> None:
+        self.watch_progress(self.progress)
+
+    def watch_progress(self, progress: WriteProgress) -> None:
+        if progress.error:
+            state = f"failed: {progress.error}"
+        elif progress.finished:
+            state = "done"
+        else:
+            state = "running"
+        if isinstance(progress, CopyProgress):
+            lines = [
+                f"from: {progress.source}",
+                f"to: {progress.target}",
+                f"items read: {progress.items_read}",
+                f"read capacity consumed: {progress.consumed_read_capacity:.0f} RCU",
+                f"rejected items file: {progress.reject_path}",
+            ]
+        elif isinstance(progress, ImportProgress):
+            lines = [f"file: {progress.path}"]
+        else:
+            lines = []
+        lines += [
+            f"items written: {progress.items} ({progress.items_per_second:.0f} items/s)",
+            f"write capacity consumed: {progress.consumed_capacity:.0f} WCU",
+            f"rejected: {progress.rejected}"
+            + (
+                f", written to {progress.reject_path}"
+                if progress.rejected and progress.reject_path
+                else ""
+            ),
+            f"elapsed: {format_duration(progress.elapsed)}",
+            f"status: {state}",
+        ]
+        self.query_one("#status", Static).update("\n".join(lines))
+        self.query_one("#cancel", Button).disabled = bool(
+            progress.finished or progress.error
+        )
+
+    @on(Button.Pressed, "#hide")
+    def action_hide(self) -> None:
+        self.dismiss(False)
+
+    @on(Button.Pressed, "#cancel")
+    def cancel_pressed(self) -> None:
+        self.dismiss(True)
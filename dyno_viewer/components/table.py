@@ -1,21 +1,35 @@
 from itertools import cycle
+from math import ceil
+from typing import Sequence
 
 import pyclip
-from textual import log
+from textual import log, on
 from textual.binding import Binding
 from textual.message import Message
 from textual.reactive import reactive
 from textual.widget import Widget
-from textual.widgets import DataTable
+from textual.widgets import DataTable, Static
 
 from dyno_viewer.components.screens.view_row_item import ViewRowItem
 from dyno_viewer.models import TableInfo
+from dyno_viewer.util.row_store import ColumnarRowStore
+from dyno_viewer.util.search_index import RowSearchIndex
 from dyno_viewer.util.util import format_output, output_to_csv_str
 
+# how many rows from the bottom of the grid before the next page is fetched in infinite scroll mode
+INFINITE_SCROLL_FETCH_THRESHOLD = 10
 
-class DataTableManager(Widget):
+
+# textual needs the watch_, action_ and on_ handlers to be public
+class DataTableManager(Widget):  # pylint: disable=too-many-public-methods
     """
     handles pagination and displaying of dynamodb query and scan results
+
+    In infinite scroll mode all loaded pages are shown in the one grid and the next page
+    is requested in the background once the cursor or viewport gets close to the bottom
+
+    A quick filter can be applied to only show loaded rows that match it, filtered rows
+    are paged using the size of the first page
     """
 
     BINDINGS = [
@@ -36,57 +50,295 @@ class DataTableManager(Widget):
         Binding("i", action="view_row_item", description="View table row", show=False),
         Binding("ctrl+r", "change_cursor_type", "Change Cursor type", show=False),
         Binding("c", "copy_table_data", "Copy cell", show=False),
+        Binding(
+            "s",
+            "sort_column",
+            "Sort by column",
+            show=False,
+            tooltip="Sort all loaded rows by the selected column, press again to reverse then clear",
+        ),
+        Binding(
+            "ctrl+t",
+            "toggle_infinite_scroll",
+            "Toggle infinite scroll",
+            show=False,
+            tooltip="Toggle between paged results and one continuously loading grid",
+        ),
     ]
     DEFAULT_CSS = """
     DataTable {
         min-height: 100%;
     }
+    #stream_status {
+        dock: bottom;
+        height: 1;
+        display: none;
+        background: $boost;
+    }
+    #stream_status.-active {
+        display: block;
+    }
     """
 
     table_info = reactive(None)
     data = reactive([])
     static_cols = reactive([])
     page_index = reactive(0)
+    infinite_scroll = reactive(False)
+    # ceiling on the amount of rows to hold in infinite scroll mode
+    max_rows = reactive(10_000)
+    fetching = reactive(False)
+    has_more = reactive(True)
+    sort_column: str | None = reactive(None)
+    sort_descending = reactive(False)
+    filter_query = reactive("")
     cursors = cycle(["column", "row", "cell"])
 
     class PaginateRequest(Message):
         pass
 
-    def _update_table(self, new_page):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # loaded results are kept column by column, the grid only renders from this store
+        self._store = ColumnarRowStore()
+        self._rendered_rows = 0
+        self._rendered_cols: list[str] = []
+        self._sort_permutation: Sequence[int] | None = None
+        self._search_index = RowSearchIndex()
+        # cached rows matching the filter and the filtered display order, keyed by the
+        # store state they were worked out from
+        self._filter_matches: tuple[tuple, set[int]] | None = None
+        self._filtered_rows: tuple[tuple, Sequence[int]] | None = None
+
+    @property
+    def store(self) -> ColumnarRowStore:
+        self._store.sync_pages(self.data)
+        return self._store
+
+    @property
+    def loaded_row_count(self) -> int:
+        return len(self.store)
+
+    def _sorted_rows(self) -> Sequence[int]:
+        store = self.store
+        if not self.sort_column:
+            return range(len(store))
+        if self._sort_permutation is None or len(self._sort_permutation) != len(store):
+            self._sort_permutation = store.sort_permutation(
+                self.sort_column, self.sort_descending
+            )
+        return self._sort_permutation
+
+    def _matching_rows(self) -> set[int]:
+        store = self.store
+        key = (store.generation, len(store))
+        if self._filter_matches is None or self._filter_matches[0] != key:
+            # only rows loaded since the last search get indexed
+            matches = self._search_index.search(store, self.filter_query)
+            self._filter_matches = (key, matches or set())
+        return self._filter_matches[1]
+
+    def _ordered_rows(self) -> Sequence[int]:
+        """
+        All loaded row indexes in display order, i.e sorted if a sort is applied and only
+        the rows matching the filter if one is applied
+        """
+        rows = self._sorted_rows()
+        if not self.filter_query:
+            return rows
+        store = self.store
+        key = (store.generation, len(store), self.sort_column, self.sort_descending)
+        if self._filtered_rows is None or self._filtered_rows[0] != key:
+            matches = self._matching_rows()
+            self._filtered_rows = (
+                key,
+                (
+                    [row for row in rows if row in matches]
+                    if self.sort_column
+                    else sorted(matches)
+                ),
+            )
+        return self._filtered_rows[1]
+
+    def _page_size(self) -> int:
+        return max(len(self.store.page_range(0)), 1) if self.data else 1
+
+    def _page_count(self) -> int:
+        if not self.filter_query:
+            return len(self.data)
+        return max(ceil(len(self._ordered_rows()) / self._page_size()), 1)
+
+    def _view_rows(self) -> Sequence[int]:
+        """Row indexes in the store that are currently shown in the grid"""
+        if self.infinite_scroll:
+            return self._ordered_rows()
+        if self.filter_query:
+            start = self.page_index * self._page_size()
+            return self._ordered_rows()[start : start + self._page_size()]
+        page_rows = self.store.page_range(self.page_index)
+        if not self.sort_column:
+            return page_rows
+        # pages keep their size when sorted but show rows from across all loaded pages
+        return self._ordered_rows()[page_rows.start : page_rows.stop]
+
+    def _columns_for(self, rows: Sequence[int]) -> list[str]:
+        present_cols = self.store.columns_of(rows)
+        return [
+            *self.static_cols,
+            *[col for col in present_cols if col not in self.static_cols],
+        ]
+
+    def _column_label(self, col: str) -> str:
+        if col != self.sort_column:
+            return col
+        return f"{col} {'▼' if self.sort_descending else '▲'}"
+
+    def _update_table(self) -> None:
         table = self.query_one(DataTable)
         table.clear(columns=True)
         table.refresh()
-        non_static_cols = {
-            col
-            for data_item in self.data[new_page]
-            for col in data_item.keys()
-            if col not in self.static_cols
-        }
-        cols = [*self.static_cols, *non_static_cols]
+        rows = self._view_rows()
+        cols = self._columns_for(rows)
         for col in cols:
-            table.add_column(col, key=col)
-        rows = [[item.get(col) for col in cols] for item in self.data[new_page]]
+            table.add_column(self._column_label(col), key=col)
 
-        table.add_rows(rows)
+        table.add_rows(self.store.rows(rows, cols))
         table.refresh()
+        self._rendered_rows = 0
+        self._rendered_cols = cols
+        self._update_stream_status()
+
+    def _render_infinite_scroll(self) -> None:
+        """
+        Render all loaded pages into the one grid, only adding rows for pages that
+        haven't been rendered yet unless the underlying data was replaced
+        """
+        table = self.query_one(DataTable)
+        if self._store.sync_pages(self.data):
+            self._rendered_rows = 0
+        rows = self._ordered_rows()
+        if self._rendered_rows > len(rows) or (
+            self.sort_column and self._rendered_rows != len(rows)
+        ):
+            # new rows can land anywhere in the sorted order so render everything again
+            self._rendered_rows = 0
+        if self._rendered_rows == 0:
+            table.clear(columns=True)
+            self._rendered_cols = list(self.static_cols)
+            for col in self._rendered_cols:
+                table.add_column(self._column_label(col), key=col)
+
+        new_rows = rows[self._rendered_rows :]
+        for col in self._columns_for(new_rows):
+            if col not in self._rendered_cols:
+                self._rendered_cols.append(col)
+                table.add_column(self._column_label(col), key=col)
+
+        table.add_rows(self._store.rows(new_rows, self._rendered_cols))
+        self._rendered_rows = len(rows)
+        self._update_stream_status()
+        # keep fetching until the grid fills the viewport
+        self.call_after_refresh(self.fetch_more_if_needed)
+
+    def _update_stream_status(self) -> None:
+        status = self.query_one("#stream_status", Static)
+        status.set_class(self.infinite_scroll or bool(self.filter_query), "-active")
+        row_count = self.loaded_row_count
+        matches = (
+            f"{len(self._ordered_rows())} of "
+            if self.filter_query and self.data
+            else ""
+        )
+        if not self.infinite_scroll:
+            status.update(f"{matches}{row_count} loaded rows match filter")
+        elif self.fetching:
+            status.update(f"{matches}{row_count} rows loaded, fetching…")
+        elif row_count >= self.max_rows:
+            status.update(
+                f"{matches}{row_count} rows loaded, row limit of {self.max_rows} reached"
+            )
+        elif not self.has_more:
+            status.update(f"{matches}{row_count} rows loaded, all results loaded")
+        else:
+            status.update(f"{matches}{row_count} rows loaded")
+
+    def _near_bottom(self) -> bool:
+        table = self.query_one(DataTable)
+        if table.row_count == 0:
+            return False
+        return (
+            table.cursor_row >= table.row_count - INFINITE_SCROLL_FETCH_THRESHOLD
+            or table.scroll_y >= table.max_scroll_y - INFINITE_SCROLL_FETCH_THRESHOLD
+        )
+
+    def fetch_more_if_needed(self, force: bool = False) -> None:
+        """
+        Request the next page in the background when the grid is scrolled close to the bottom
+
+        :param force: fetch the next page even if the grid isn't close to the bottom
+        :type force: bool
+        """
+        if not self.infinite_scroll or self.fetching or not self.has_more:
+            return
+        if not self.data or self.loaded_row_count >= self.max_rows:
+            return
+        if force or self._near_bottom():
+            self.fetching = True
+            self.post_message(self.PaginateRequest())
+
+    def pagination_finished(self, has_more: bool = True) -> None:
+        """
+        Called once a page request has been handled
+
+        :param has_more: whether there are more results to fetch after this page
+        :type has_more: bool
+        """
+        self.loading = False
+        self.has_more = has_more
+        self.fetching = False
 
     def increment_page_index(self):
-        if self.page_index < len(self.data) - 1:
+        if self.infinite_scroll:
+            self.fetch_more_if_needed(force=True)
+            return
+        if self.page_index < self._page_count() - 1:
             self.page_index += 1
         else:
             self.post_message(self.PaginateRequest())
             self.loading = True
 
+    def page_appended(self) -> None:
+        """
+        Called once a page requested by going past the last page has been added to data,
+        moves on to the next page unless the new page had nothing to show with the filter
+        """
+        if self.infinite_scroll:
+            return
+        if self.page_index < self._page_count() - 1:
+            self.page_index += 1
+        elif self.filter_query:
+            self.notify("No more rows matching the filter in the next page", timeout=1)
+
     def decrement_page_index(self):
         if self.page_index > 0:
             self.page_index -= 1
 
     def compose(self):
         yield DataTable(id="data_table")
+        yield Static(id="stream_status")
 
     def on_mount(self):
         table = self.query_one(DataTable)
         table.focus()
+        app_config = getattr(self.app, "app_config", None)
+        if app_config:
+            self.max_rows = app_config.infinite_scroll_max_rows
+            self.infinite_scroll = app_config.infinite_scroll
+        self.watch(table, "scroll_y", lambda _: self.fetch_more_if_needed(), init=False)
+
+    @on(DataTable.RowHighlighted)
+    def row_highlighted(self, _: DataTable.RowHighlighted) -> None:
+        self.fetch_more_if_needed()
 
     def action_page_decrement(self):
         self.decrement_page_index()
@@ -94,15 +346,85 @@ class DataTableManager(Widget):
     def action_page_increment(self):
         self.increment_page_index()
 
+    def action_sort_column(self) -> None:
+        table = self.query_one(DataTable)
+        if not self.data or not self._rendered_cols:
+            return
+        col = self._rendered_cols[table.cursor_column]
+        if col != self.sort_column:
+            self.sort_by(col)
+        elif not self.sort_descending:
+            self.sort_by(col, descending=True)
+        else:
+            self.sort_by(None)
+
+    def sort_by(self, col: str | None, descending: bool = False) -> None:
+        """
+        Sort all loaded rows, across every page, by an attribute
+
+        :param col: attribute name to sort by or None to go back to dynamodb order
+        :type col: str | None
+        :param descending: sort from largest to smallest
+        :type descending: bool
+        """
+        self.sort_column = col
+        self.sort_descending = descending
+        self._sort_permutation = None
+        self._refresh_view()
+        if col:
+            self.notify(
+                f"sorted by {col} {'descending' if descending else 'ascending'}",
+                timeout=1,
+            )
+
+    def apply_filter(self, query: str) -> int:
+        """
+        Only show loaded rows that match a quick filter query, see `RowSearchIndex.search`
+        for the supported queries
+
+        :param query: quick filter query, an empty query removes the filter
+        :type query: str
+        :return: number of rows shown
+        :rtype: int
+        :raises: re.error if the query is an invalid regex
+        """
+        query = query.strip()
+        self._filtered_rows = None
+        self._filter_matches = None
+        if query:
+            # search first so an invalid regex leaves the current filter in place
+            store = self.store
+            matches = self._search_index.search(store, query)
+            self._filter_matches = ((store.generation, len(store)), matches)
+        self.filter_query = query
+        self.page_index = 0
+        self._refresh_view()
+        self._update_stream_status()
+        return len(self._ordered_rows())
+
+    def _refresh_view(self) -> None:
+        if not self.data:
+            return
+        if self.infinite_scroll:
+            self._rendered_rows = 0
+            self._render_infinite_scroll()
+        else:
+            self._update_table()
+
+    def action_toggle_infinite_scroll(self) -> None:
+        self.infinite_scroll = not self.infinite_scroll
+        self.notify(
+            f"infinite scroll: {'on' if self.infinite_scroll else 'off'}", timeout=1
+        )
+
     def action_view_row_item(self):
         if not self.data:
             return
 
         table = self.query_one(DataTable)
-        current_page = self.data[self.page_index]
         cursor_row = table.cursor_row
 
-        selected_row = current_page[cursor_row]
+        selected_row = self.store.row(self._view_rows()[cursor_row])
 
         self.app.push_screen(ViewRowItem(item=selected_row))
 
@@ -129,20 +451,31 @@ class DataTableManager(Widget):
                     if row:
                         pyclip.copy(output_to_csv_str(row))
                 elif table.cursor_type == "column":
-                    col = table.get_column_at(table.cursor_column)
-                    if col:
-                        pyclip.copy(output_to_csv_str(col))
+                    col = self._rendered_cols[table.cursor_column]
+                    values = self.store.column_values(col, self._view_rows())
+                    if values:
+                        pyclip.copy(output_to_csv_str(values))
 
     def watch_data(self, new_data):
         # only update first time data is added
         log.info("data updated, updating table", new_data)
         table = self.query_one(DataTable)
-        if not new_data and table.row_count > 0:
-            table.clear(columns=True)
+        self._sort_permutation = None
+        self._filtered_rows = None
+        if not new_data:
+            self._store.clear()
+            self._rendered_rows = 0
+            self._rendered_cols = []
+            self.has_more = True
+            if table.row_count > 0:
+                table.clear(columns=True)
+            self._update_stream_status()
             return
 
-        if new_data:
-            self._update_table(self.page_index)
+        if self.infinite_scroll:
+            self._render_infinite_scroll()
+        else:
+            self._update_table()
 
     def watch_table_info(self, new_table: TableInfo):
         if not new_table:
@@ -163,6 +496,26 @@ class DataTableManager(Widget):
         log.info(f"{len(self.static_cols)} total cols")
         self.page_index = min(self.page_index, 0)
 
-    def watch_page_index(self, new_page: int):
-        if self.data:
-            self._update_table(new_page)
+    def watch_page_index(self) -> None:
+        if self.data and not self.infinite_scroll:
+            self._update_table()
+
+    def watch_infinite_scroll(self, infinite_scroll: bool) -> None:
+        if not self.data:
+            self._update_stream_status()
+            return
+        if infinite_scroll:
+            self._rendered_rows = 0
+            self._render_infinite_scroll()
+        else:
+            self.page_index = min(self.page_index, len(self.data) - 1)
+            self._update_table()
+            self._update_stream_status()
+
+    def watch_fetching(self, _: bool) -> None:
+        if self.is_mounted:
+            self._update_stream_status()
+
+    def watch_has_more(self, _: bool) -> None:
+        if self.is_mounted:
+            self._update_stream_status()
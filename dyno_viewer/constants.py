@@ -43,3 +43,9 @@ ATTRIBUTE_TYPES = [
 CONFIG_DIR_NAME = "dyno-viewer"
 
 DATABASE_FILE_PATH = get_user_config_dir(CONFIG_DIR_NAME) / "data-store.db"
+
+# seconds between enforcing the query history retention and compacting the database
+HISTORY_COMPACTION_INTERVAL = 60 * 60
+
+# seconds between checkpointing the WAL of the database into the database file
+DATABASE_CHECKPOINT_INTERVAL = 5 * 60
@@ -1,29 +1,59 @@
+import asyncio
 import json
+import logging
+import sqlite3
 import uuid
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional
 from zoneinfo import ZoneInfo
 
 import aiosqlite
+from pydantic import BaseModel
 
+from dyno_viewer.db.migrations import migrate
 from dyno_viewer.db.models import (
+    BaseDataStoreRow,
     BatchInsertRecord,
     ListQueryHistoryResultRow,
     ListSavedQueryResultRow,
     ListSessionGroupResultRow,
     ListSessionResultRow,
+    PageCursor,
+    PendingWrite,
     RecordType,
 )
-from dyno_viewer.db.utils import json_path_from_dict
+from dyno_viewer.db.tables import (
+    FIELD_COLUMNS,
+    RECORD_COLUMNS,
+    RECORD_MODELS,
+    RECORD_TABLES,
+    parse_timestamp,
+    record_from_row,
+    record_values,
+)
+from dyno_viewer.db.utils import fts_match_expression, json_path_from_dict
 from dyno_viewer.models import (
+    ExportManifest,
     QueryHistory,
     QueryParameters,
+    QueryRunMetrics,
     SavedQuery,
     Session,
     SessionGroup,
 )
 
+# a record read from its table, the pydantic model of a typed record or the json data
+# of a record in the data_store table
+Record = BaseModel | dict
+
+logger = logging.getLogger(__name__)
+
+# a record that can't be worked out from the write-behind queue without flushing it
+_UNRESOLVED = object()
+
 
 # pylint: disable=too-many-positional-arguments, too-many-public-methods
 class DatabaseManager:
@@ -35,26 +65,112 @@ class DatabaseManager:
     a single async SQLite connection that is created on initialization and closed
     when the manager is closed.
 
+    Session groups, sessions, saved queries and query history are kept in tables of
+    their own with a column for each field, see `dyno_viewer.db.tables`. Other records
+    are kept as json in the data_store table. Records are looked up by key through the
+    records view, which lists the key and type of every record.
+
+    With write behind on, writes are queued and return straight away. The queue is
+    flushed in a single transaction once the flush interval has passed, with updates
+    of the same record merged into one. Reads always see the writes before them, a
+    record read by key is read as it is in the database with its queued inserts and
+    updates applied on top, other reads flush the queue first. The queue is flushed
+    when the manager is closed.
+
+    A database file can be shared by several dyno-viewer instances. Each manager has a
+    single connection that writes and a few read only connections that reads take
+    turns on, an in-memory database only has the one connection. Every connection
+    waits up to the busy timeout for a lock held by another connection instead of
+    failing with `database is locked`, and writes take the write lock when their
+    transaction starts so they never have to give up a read lock half way through.
+    Records read by key are cached, the cache is dropped when another connection has
+    written to the database file since it was filled.
+
     :param db_path: Path to the SQLite database file, defaults to None (in-memory DB)
     :type db_path: Path | None
+    :param write_behind: queue writes and flush them in the background
+    :type write_behind: bool
+    :param flush_interval: seconds a write waits in the queue before it's flushed
+    :type flush_interval: float
+    :param busy_timeout: seconds to wait for a lock held by another connection
+    :type busy_timeout: float
+    :param read_connections: number of read only connections to a database file
+    :type read_connections: int
+    :param auto_checkpoint: let sqlite checkpoint the WAL when a commit grows it past
+        1000 pages, turn it off when the WAL is checkpointed with `checkpoint` instead
+    :type auto_checkpoint: bool
     """
 
     EXCLUDED_FIELDS = {"boto_params"}
-
-    def __init__(self, db_path: Path | None = None):
+    # bm25 weights of the columns of the full text index of a table, name,
+    # description, table name and conditions, so a match in the name ranks highest
+    SEARCH_RANK = "bm25({table}_fts, 10.0, 5.0, 2.0, 1.0)"
+    # fields of a query history row about its runs rather than the query itself, so
+    # they're not part of its key
+    QUERY_HISTORY_RUN_FIELDS = {"run_count", "first_run", "last_run", "last_metrics"}
+    # PRAGMA auto_vacuum value of incremental mode
+    AUTO_VACUUM_INCREMENTAL = 2
+    # records kept in the read-through cache, looked up by key on most UI changes, and
+    # the max number of keys cached
+    CACHED_RECORD_TYPES = {
+        RecordType.Session.value,
+        RecordType.SessionGroup.value,
+        RecordType.SavedQuery.value,
+    }
+    RECORD_CACHE_SIZE = 512
+    # modes of PRAGMA wal_checkpoint
+    CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+    def __init__(
+        self,
+        db_path: Path | None = None,
+        write_behind: bool = False,
+        flush_interval: float = 0.5,
+        busy_timeout: float = 5.0,
+        read_connections: int = 2,
+        auto_checkpoint: bool = True,
+    ):
         """
         Initialize the DatabaseManager.
 
         :param db_path: Path to the SQLite database file, defaults to None (in-memory DB)
         :type db_path: Path | None
+        :param write_behind: queue writes and flush them in the background
+        :type write_behind: bool
+        :param flush_interval: seconds a write waits in the queue before it's flushed
+        :type flush_interval: float
+        :param busy_timeout: seconds to wait for a lock held by another connection
+        :type busy_timeout: float
+        :param read_connections: number of read only connections to a database file
+        :type read_connections: int
+        :param auto_checkpoint: let sqlite checkpoint the WAL when a commit grows it
+            past 1000 pages
+        :type auto_checkpoint: bool
         """
         self._db_path = db_path
+        self._busy_timeout = busy_timeout
+        self._read_connections = read_connections
+        self._auto_checkpoint = auto_checkpoint
         self._connection: Optional[aiosqlite.Connection] = None
+        self._readers: list[aiosqlite.Connection] = []
+        self._next_reader = 0
         self._is_closed = True
+        self._write_behind = write_behind
+        self._flush_interval = flush_interval
+        self._pending_writes: list[PendingWrite] = []
+        self._flush_task: asyncio.Task | None = None
+        self._write_lock = asyncio.Lock()
+        # key -> record type and record, None if there's no record with the key
+        self._record_cache: OrderedDict[str, tuple[str, BaseModel] | None] = (
+            OrderedDict()
+        )
+        # PRAGMA data_version of the writer when the cache was last checked, it
+        # changes when another connection commits to the database file
+        self._data_version: int | None = None
 
     async def setup(self) -> None:
         """
-        Set up the database connection with WAL mode and create the data_store table.
+        Set up the database connection with WAL mode and migrate the data_store table.
 
         :return: None
         :rtype: None
@@ -63,6 +179,12 @@ class DatabaseManager:
             return
 
         self._connection = await self._setup_connection()
+        if self._db_path:
+            # opened once the schema is migrated
+            self._readers = [
+                await self._connect(read_only=True)
+                for _ in range(self._read_connections)
+            ]
         self._is_closed = False
 
     async def close(self) -> None:
@@ -75,6 +197,13 @@ class DatabaseManager:
         if self._is_closed:
             return
 
+        await self.flush()
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
         if self._connection:
             await self._connection.close()
             self._connection = None
@@ -84,45 +213,404 @@ class DatabaseManager:
     def connection(self) -> aiosqlite.Connection:
         return self._ensure_connection()
 
-    async def _setup_connection(self) -> aiosqlite.Connection:
+    @property
+    def pending_writes(self) -> int:
+        """Number of writes waiting in the write-behind queue"""
+        return len(self._pending_writes)
+
+    async def _reader(self, flush: bool = True) -> aiosqlite.Connection:
         """
-        Set up the SQLite database connection with WAL mode and create the data_store table.
+        Connection to read with. Reads take turns on the read only connections, or use
+        the writer if there aren't any
 
+        :param flush: flush the writes queued before the read first, so it sees them
+        :type flush: bool
         :return: Database connection
         :rtype: aiosqlite.Connection
         """
-        db = await aiosqlite.connect(self._db_path or ":memory:")
-        # Enable WAL mode for better concurrency
-        cur = await db.execute("PRAGMA journal_mode;")
-        row = await cur.fetchone()
-        current = row[0] if row else None
-        if str(current).lower() != "wal":
-            await db.execute("PRAGMA journal_mode = WAL;")
-            await db.execute("PRAGMA synchronous=NORMAL;")
-            await db.execute("PRAGMA foreign_keys=ON;")
-        await self._create_data_store_table(db)
-        return db
+        if flush and (self._pending_writes or self._write_lock.locked()):
+            await self.flush()
+        connection = self._ensure_connection()
+        if not self._readers:
+            return connection
+        self._next_reader = (self._next_reader + 1) % len(self._readers)
+        return self._readers[self._next_reader]
 
-    async def _create_data_store_table(self, connection: aiosqlite.Connection) -> None:
+    async def _write(self, write: PendingWrite) -> None:
         """
-        Create the data_store table if it does not exist.
+        Run a write, or with write behind on queue it to be flushed later. An update of
+        a record already waiting to be updated is merged into that update, unless
+        something else wrote the record in between
+
+        :param write: the write
+        :type write: PendingWrite
+        """
+        connection = self._ensure_connection()
+        self._invalidate_cache(write.key)
+        if not self._write_behind:
+            await self._execute(connection, write)
+            await connection.commit()
+            return
+
+        if write.update is not None:
+            for pending in reversed(self._pending_writes):
+                if pending.key is None or pending.key == write.key:
+                    if (
+                        pending.update is not None
+                        and pending.record_type == write.record_type
+                    ):
+                        pending.update.update(write.update)
+                        return
+                    break
+        self._pending_writes.append(write)
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _execute(
+        self, connection: aiosqlite.Connection, write: PendingWrite
+    ) -> None:
+        """
+        Execute the statement of a write without committing it
 
         :param connection: Database connection
         :type connection: aiosqlite.Connection
+        :param write: the write
+        :type write: PendingWrite
+        """
+        if write.update is not None:
+            _, statement, values = await self._update_statement(connection, write)
+            await connection.execute(statement, values)
+        elif write.many:
+            await connection.executemany(write.statement, write.values)
+        else:
+            await connection.execute(write.statement, write.values)
+
+    def _invalidate_cache(self, key: str | None) -> None:
+        """
+        Drop a record written to from the read-through cache
+
+        :param key: key of the record, the whole cache is dropped if None
+        :type key: str | None
+        """
+        if key is None:
+            self._record_cache.clear()
+        else:
+            self._record_cache.pop(key, None)
+
+    async def _check_data_version(self) -> None:
+        """
+        Drop the read-through cache if another connection, e.g another dyno-viewer
+        instance, has written to the database file since it was last checked
+        """
+        if not self._db_path:
+            return
+        connection = self._ensure_connection()
+        async with connection.execute("PRAGMA data_version") as cursor:
+            (data_version,) = await cursor.fetchone()
+        if data_version != self._data_version:
+            self._record_cache.clear()
+            self._data_version = data_version
+
+    def _cache_record(self, key: str, record: tuple[str, Record] | None) -> None:
         """
-        await connection.execute(
-            """
-        CREATE TABLE IF NOT EXISTS data_store (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            key TEXT NOT NULL UNIQUE,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            record_type TEXT,
-            data TEXT NOT NULL,
-            CHECK (json_valid(data))
+        Cache a record read by key, only records of the cached types or that don't
+        exist are cached
+
+        :param key: key of the record
+        :type key: str
+        :param record: record type and the record, None if it doesn't exist
+        :type record: tuple[str, Record] | None
+        """
+        if record is not None and record[0] not in self.CACHED_RECORD_TYPES:
+            self._record_cache.pop(key, None)
+            return
+        self._record_cache[key] = record
+        self._record_cache.move_to_end(key)
+        if len(self._record_cache) > self.RECORD_CACHE_SIZE:
+            self._record_cache.popitem(last=False)
+
+    async def _get_record(self, key: str) -> tuple[str, Record] | None:
+        """
+        Read a record by key through the cache. If writes of the key are waiting in the
+        write-behind queue the record in the database has them applied on top, see
+        `_apply_pending`, and the queue is only flushed if that can't be worked out.
+        Cached records are shared, copy them before handing them out
+
+        :param key: key of the record
+        :type key: str
+        :return: record type and the record, None if it doesn't exist
+        :rtype: tuple[str, Record] | None
+        """
+        if self._write_lock.locked():
+            # the writes being flushed have already left the queue
+            await self.flush()
+        pending = [write for write in self._pending_writes if write.key in (key, None)]
+        if not pending:
+            await self._check_data_version()
+            if key in self._record_cache:
+                self._record_cache.move_to_end(key)
+                return self._record_cache[key]
+            record = await self._read_record(key)
+            self._cache_record(key, record)
+            return record
+
+        record = await self._read_record(key)
+        for write in pending:
+            record = self._apply_pending(record, write)
+            if record is _UNRESOLVED:
+                await self.flush()
+                return await self._get_record(key)
+        return record
+
+    async def _read_record(self, key: str) -> tuple[str, Record] | None:
+        """
+        Read a record by key as it is in the database, without flushing the write-behind
+        queue. The type of the record is looked up in the records view then the record
+        is read from its table
+
+        :param key: key of the record
+        :type key: str
+        :return: record type and the record, None if it doesn't exist
+        :rtype: tuple[str, Record] | None
+        """
+        connection = await self._reader(flush=False)
+        async with connection.execute(
+            "SELECT record_type FROM records WHERE key = ?",
+            (key,),
+        ) as cursor:
+            row = await cursor.fetchone()
+        record = None
+        if row and row[0] in RECORD_TABLES:
+            found = await self._find_record(
+                RecordType(row[0]), "key = ?", (key,), flush=False
+            )
+            record = (row[0], found) if found else None
+        elif row:
+            async with connection.execute(
+                "SELECT data FROM data_store WHERE key = ?", (key,)
+            ) as cursor:
+                data = await cursor.fetchone()
+            record = (row[0], json.loads(data[0])) if data else None
+        return record
+
+    @staticmethod
+    def _apply_pending(record: tuple[str, Record] | None, write: PendingWrite) -> Any:
+        """
+        Record after a write of its key waiting in the write-behind queue. Inserts and
+        updates of the fields of a typed record can be applied, for any other write
+        the record can only be known by running it
+
+        :param record: record type and the record before the write, None if it doesn't
+            exist
+        :type record: tuple[str, Record] | None
+        :param write: the queued write
+        :type write: PendingWrite
+        :return: record type and the record after the write, None if it doesn't exist
+            or `_UNRESOLVED` if it can't be worked out
+        :rtype: tuple[str, Record] | None | object
+        """
+        if write.key is None:
+            return _UNRESOLVED
+        if write.record is not None:
+            # inserting a key that's taken fails
+            return record if record is not None else (write.record_type, write.record)
+        if write.update is None:
+            return _UNRESOLVED
+        if record is None or (write.record_type and write.record_type != record[0]):
+            return record
+        record_type, model = record
+        if not isinstance(model, BaseModel):
+            return _UNRESOLVED
+        fields = {
+            path.removeprefix("$."): value for path, value in write.update.items()
+        }
+        if not fields.keys() <= FIELD_COLUMNS[record_type].keys():
+            # fails when it's flushed
+            return record
+        return record_type, model.model_copy(update=fields)
+
+    async def _find_record(
+        self,
+        record_type: RecordType,
+        condition: str,
+        values: tuple,
+        order_by: str = "",
+        flush: bool = True,
+    ) -> BaseModel | None:
+        """
+        Read the first record of a type that has its own table matching a condition
+
+        :param record_type: type of the record
+        :type record_type: RecordType
+        :param condition: condition on the columns of the record's table
+        :type condition: str
+        :param values: values of the condition
+        :type values: tuple
+        :param order_by: order of the rows, the first one is read
+        :type order_by: str
+        :param flush: flush the write-behind queue first
+        :type flush: bool
+        :return: the record, None if there isn't one
+        :rtype: BaseModel | None
+        """
+        connection = await self._reader(flush)
+        columns = ", ".join(RECORD_COLUMNS[record_type.value])
+        statement = (
+            f"SELECT key, {columns} FROM {RECORD_TABLES[record_type.value]} "
+            f"WHERE {condition}"
         )
+        if order_by:
+            statement += f" ORDER BY {order_by}"
+        async with connection.execute(f"{statement} LIMIT 1", values) as cursor:
+            row = await cursor.fetchone()
+        if not row:
+            return None
+        return record_from_row(record_type.value, row[0], row[1:], trusted=True)
+
+    def _record_data(self, record: Record) -> dict:
+        """
+        Data of a record as it's returned by `get`
+
+        :param record: the record
+        :type record: Record
+        :return: json data of the record
+        :rtype: dict
+        """
+        if isinstance(record, BaseModel):
+            return record.model_dump(mode="json", exclude=self.EXCLUDED_FIELDS)
+        return record
+
+    async def _update_returning(self, write: PendingWrite) -> Record | None:
+        """
+        Run an update of the fields of a record now, after the queued writes, in one
+        statement returning the record after the update
+
+        :param write: update with the json paths and values to set
+        :type write: PendingWrite
+        :return: the record after the update, None if it doesn't exist
+        :rtype: Record | None
+        """
+        self._invalidate_cache(write.key)
+        async with self._write_lock:
+            await self._flush_pending_writes()
+            connection = self._ensure_connection()
+            record_type, statement, values = await self._update_statement(
+                connection, write
+            )
+            returning = (
+                ", ".join(RECORD_COLUMNS[record_type])
+                if record_type in RECORD_TABLES
+                else "data"
+            )
+            async with connection.execute(
+                f"{statement} RETURNING {returning}", values
+            ) as cursor:
+                row = await cursor.fetchone()
+            await connection.commit()
+        if not row:
+            return None
+        if record_type not in RECORD_TABLES:
+            return json.loads(row[0])
+        record = record_from_row(record_type, write.key, row, trusted=True)
+        self._cache_record(write.key, (record_type, record))
+        return record
+
+    async def _flush_later(self) -> None:
+        """
+        Flush the write-behind queue once the flush interval has passed, tried again
+        after another interval while the database is locked
+        """
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+                return
+            except sqlite3.OperationalError:
+                logger.warning("Database is locked, flushing writes again later")
+
+    async def flush(self) -> None:
+        """
+        Write the queued writes in a single transaction. If it fails each write is
+        tried again in its own transaction, so one bad write doesn't lose the others
+
+        :raises sqlite3.OperationalError: if another connection held the write lock for
+            longer than the busy timeout, the writes are kept in the queue
+        """
+        async with self._write_lock:
+            await self._flush_pending_writes()
+
+    async def _flush_pending_writes(self) -> None:
+        """Flush the write-behind queue, the write lock has to be held"""
+        if not self._pending_writes:
+            return
+        connection = self._ensure_connection()
+        writes, self._pending_writes = self._pending_writes, []
+        try:
+            await connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            self._pending_writes[:0] = writes
+            raise
+        try:
+            for write in writes:
+                await self._execute(connection, write)
+            await connection.commit()
+            return
+        except (sqlite3.Error, ValueError):
+            await connection.rollback()
+            logger.warning(
+                "Failed to flush %s writes, writing them one by one", len(writes)
+            )
+        for write in writes:
+            try:
+                await self._execute(connection, write)
+                await connection.commit()
+            except (sqlite3.Error, ValueError):
+                await connection.rollback()
+                logger.exception("Dropped write to the data store: %s", write)
+
+    async def _connect(self, read_only: bool = False) -> aiosqlite.Connection:
         """
+        Open a connection to the database with the pragmas every connection needs, they
+        aren't kept in the database file
+
+        :param read_only: open a connection that can't write
+        :type read_only: bool
+        :return: Database connection
+        :rtype: aiosqlite.Connection
+        """
+        # the timeout is the busy timeout, how long to wait for a lock held by another
+        # connection, e.g another dyno-viewer instance, before giving up
+        db = await aiosqlite.connect(
+            self._db_path or ":memory:", timeout=self._busy_timeout
         )
-        await connection.commit()
+        await db.execute("PRAGMA synchronous=NORMAL;")
+        # sessions are deleted with their group
+        await db.execute("PRAGMA foreign_keys=ON;")
+        if read_only:
+            await db.execute("PRAGMA query_only=ON;")
+        return db
+
+    async def _setup_connection(self) -> aiosqlite.Connection:
+        """
+        Set up the SQLite database connection that writes with WAL mode and migrate
+        the schema to the latest version, see `dyno_viewer.db.migrations`.
+
+        :return: Database connection
+        :rtype: aiosqlite.Connection
+        """
+        db = await self._connect()
+        # Enable WAL mode for better concurrency, it's kept in the database file
+        cur = await db.execute("PRAGMA journal_mode;")
+        row = await cur.fetchone()
+        current = row[0] if row else None
+        if str(current).lower() != "wal":
+            await db.execute("PRAGMA journal_mode = WAL;")
+        if not self._auto_checkpoint:
+            await db.execute("PRAGMA wal_autocheckpoint = 0;")
+        # only takes effect on a new database, `compact_history` vacuums older ones
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        await migrate(db)
+        return db
 
     def _ensure_connection(self) -> aiosqlite.Connection:
         """
@@ -136,6 +624,189 @@ class DatabaseManager:
             raise RuntimeError("Database connection is closed")
         return self._connection
 
+    def _listing_query(
+        self,
+        record_type: RecordType,
+        sort_by: str | None = None,
+        descending: bool = False,
+        search: str = "",
+        where: str = "",
+        values: tuple = (),
+        page: int = 1,
+        page_size: int = 20,
+        after: PageCursor | None = None,
+    ) -> tuple[str, tuple]:
+        """
+        Build the statement of a page of a listing. Rows are sorted on a column then
+        their key, or when searching matched with the full text index and sorted by how
+        well they match. A page after a cursor is found with an index seek on the sort
+        value and key of the row it ended on, otherwise pages are counted with an offset
+
+        :param record_type: type of the records listed, one that has its own table
+        :type record_type: RecordType
+        :param sort_by: column the rows are sorted on before the key, only the key if not
+            set
+        :type sort_by: str | None
+        :param descending: sort the rows in descending order, ignored when searching
+        :type descending: bool
+        :param search: words to search for, matched as prefixes
+        :type search: str
+        :param where: extra condition on the columns of the table
+        :type where: str
+        :param values: values of the extra condition
+        :type values: tuple
+        :param page: page number, only used without a cursor
+        :type page: int
+        :param page_size: number of rows per page
+        :type page_size: int
+        :param after: cursor of the row the previous page ended on
+        :type after: PageCursor | None
+        :return: statement, selecting the created_at, key and sort value of each row
+            then its columns, see `RECORD_COLUMNS`, and its values
+        :rtype: tuple[str, tuple]
+        """
+        table = RECORD_TABLES[record_type.value]
+        match = fts_match_expression(search)
+        if match:
+            sort_by, descending = self.SEARCH_RANK.format(table=table), False
+        columns = ", ".join(
+            f"{table}.{column}" for column in RECORD_COLUMNS[record_type.value]
+        )
+        statement = (
+            f"SELECT {table}.created_at, {table}.key, {sort_by or 'NULL'}, {columns} "
+            f"FROM {table}"
+        )
+        conditions = [where] if where else []
+        if match:
+            statement += f" JOIN {table}_fts ON {table}_fts.rowid = {table}.id"
+            conditions.append(f"{table}_fts MATCH ?")
+            values += (match,)
+        operator, direction = ("<", "DESC") if descending else (">", "ASC")
+        if after and sort_by:
+            conditions.append(f"({sort_by}, {table}.key) {operator} (?, ?)")
+            values += (after.sort_value, after.key)
+        elif after:
+            conditions.append(f"{table}.key {operator} ?")
+            values += (after.key,)
+        if conditions:
+            statement += f" WHERE {' AND '.join(conditions)}"
+        order_by = f"{table}.key {direction}"
+        if sort_by:
+            order_by = f"{sort_by} {direction}, {order_by}"
+        return (
+            f"{statement} ORDER BY {order_by} LIMIT ? OFFSET ?",
+            (*values, page_size, 0 if after else (page - 1) * page_size),
+        )
+
+    async def _list_records(
+        self,
+        row_type: type[BaseDataStoreRow],
+        record_type: RecordType,
+        statement: str,
+        values: tuple,
+    ) -> list:
+        """
+        Run the statement of a page of a listing, see `_listing_query`. The rows are
+        lazy, their records are only built when they're used
+
+        :param row_type: type of the rows of the listing
+        :type row_type: type[BaseDataStoreRow]
+        :param record_type: type of the records listed
+        :type record_type: RecordType
+        :param statement: statement of the page
+        :type statement: str
+        :param values: values of the statement
+        :type values: tuple
+        :return: rows of the page
+        :rtype: list
+        """
+        connection = await self._reader()
+        rows = []
+        async with connection.execute(statement, values) as cursor:
+            async for row in cursor:
+                rows.append(
+                    row_type.lazy(
+                        partial(
+                            record_from_row,
+                            record_type.value,
+                            row[1],
+                            row[3:],
+                            trusted=True,
+                        ),
+                        created_at=parse_timestamp(row[0]),
+                        key=row[1],
+                        sort_value=row[2],
+                    )
+                )
+        return rows
+
+    @staticmethod
+    def _record_row(
+        key: str, record: Record, record_type: str | None, created_at: str | None
+    ) -> tuple[str, dict[str, Any]]:
+        """
+        Table and column values of a new record
+
+        :param key: Key for the record
+        :type key: str
+        :param record: the record, its pydantic model if its type has its own table
+        :type record: Record
+        :param record_type: type of the record
+        :type record_type: str | None
+        :param created_at: creation timestamp, the current time if not set
+        :type created_at: str | None
+        :return: name of the table and the value of each column
+        :rtype: tuple[str, dict[str, Any]]
+        """
+        if record_type in RECORD_TABLES:
+            table, row = RECORD_TABLES[record_type], {
+                "key": key,
+                **record_values(record),
+            }
+        else:
+            table, row = "data_store", {"key": key, "data": json.dumps(record)}
+            if record_type:
+                row["record_type"] = record_type
+        if created_at:
+            row["created_at"] = created_at
+        return table, row
+
+    @staticmethod
+    def _insert_statement(table: str, columns: list[str]) -> str:
+        """Statement inserting a row into a table"""
+        placeholders = ", ".join("?" for _ in columns)
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    async def _insert_record(
+        self,
+        key: str,
+        record: Record,
+        record_type: str | None = None,
+        created_at: str | None = None,
+    ) -> None:
+        """
+        Insert a record into its table
+
+        :param key: Key for the record
+        :type key: str
+        :param record: the record, its pydantic model if its type has its own table
+        :type record: Record
+        :param record_type: type of the record
+        :type record_type: str | None
+        :param created_at: Optional creation timestamp
+        :type created_at: str | None
+        """
+        table, row = self._record_row(key, record, record_type, created_at)
+        await self._write(
+            PendingWrite(
+                statement=self._insert_statement(table, list(row)),
+                values=tuple(row.values()),
+                key=key,
+                record_type=record_type,
+                record=record,
+            )
+        )
+
     async def insert(
         self,
         key: str,
@@ -144,7 +815,9 @@ class DatabaseManager:
         created_at: str | None = None,
     ) -> None:
         """
-        Insert a new record into the data_store table.
+        Insert a new record. Session groups, sessions, saved queries and query history
+        are validated and inserted into their own table, other records into the
+        data_store table.
 
         :param key: Key for the record
         :type key: str
@@ -155,145 +828,404 @@ class DatabaseManager:
         :param created_at: Optional creation timestamp
         :type created_at: str | None
         """
-        connection = self._ensure_connection()
-        sql_statement = "INSERT INTO data_store"
-
-        cols = ["key", "data"]
-        placeholders = ["?", "?"]
-        if record_type:
-            cols.append("record_type")
-            placeholders.append("?")
-        if created_at:
-            cols.append("created_at")
-            placeholders.append("?")
-        sql_statement += f" ({', '.join(cols)}) VALUES ({', '.join(placeholders)})"
-        values = (key, json.dumps(data))
-        if record_type:
-            values += (record_type,)
-        if created_at:
-            values += (created_at,)
-
-        await connection.execute(sql_statement, (values))
-        await connection.commit()
+        record = (
+            RECORD_MODELS[record_type].model_validate(data)
+            if record_type in RECORD_MODELS
+            else data
+        )
+        await self._insert_record(key, record, record_type, created_at)
 
     async def batch_insert(self, records: list[BatchInsertRecord]) -> None:
         """
-        Insert multiple records into the data_store table. Will by default create a utc timestamp for created_at column if not specified
+        Insert multiple records, with one statement for each table they're inserted
+        into. Will by default create a utc timestamp for created_at column if not
+        specified
 
         :param records: List of records to insert
         :type records: list[BatchInsertRecord]
         """
-        connection = self._ensure_connection()
-        sql_statement = "INSERT INTO data_store (key, data, record_type, created_at) VALUES (?, ?, ?, ?)"
-
-        values = [
-            (record.key, json.dumps(record.data), record.record_type, record.created_at)
-            for record in records
-        ]
-        await connection.executemany(sql_statement, values)
-        await connection.commit()
+        tables: dict[tuple[str, tuple[str, ...]], list[tuple]] = {}
+        for record in records:
+            table, row = self._record_row(
+                record.key,
+                (
+                    RECORD_MODELS[record.record_type].model_validate(record.data)
+                    if record.record_type in RECORD_MODELS
+                    else record.data
+                ),
+                record.record_type,
+                record.created_at,
+            )
+            tables.setdefault((table, tuple(row)), []).append(tuple(row.values()))
+        for (table, columns), values in tables.items():
+            await self._write(
+                PendingWrite(
+                    statement=self._insert_statement(table, list(columns)),
+                    values=values,
+                    many=True,
+                )
+            )
 
     async def remove(self, key: str) -> None:
         """
-        Delete a record from the data_store table by key.
+        Delete a record by key, from whichever table it's in.
 
         :param key: Key of the record to delete
         :type key: str
         """
-        connection = self._ensure_connection()
-        await connection.execute(
-            "DELETE FROM data_store WHERE key = ?",
-            (key,),
+        # deleting a session group deletes its sessions too, so the whole cache is
+        # dropped
+        await self._write(
+            PendingWrite(statement="DELETE FROM records WHERE key = ?", values=(key,))
         )
-        await connection.commit()
 
     async def update(
         self, key: str, data: dict, record_type: str | None = None
-    ) -> None:
+    ) -> dict | None:
         """
-        Update an existing record in the data_store table.
+        Update an existing record. Only the fields of a typed record that have a column
+        of their own can be updated, see `FIELD_COLUMNS`
 
         :param key: Key of the record to update
         :type key: str
         :param data: Data to update the record with
         :type data: dict
+        :param record_type: Optional type of the record, not updated if it's another
+            type
+        :type record_type: str | None
+        :return: data of the record after the update, None if it doesn't exist
+        :rtype: dict | None
+        :raises ValueError: if a field of a typed record can't be updated
         """
-        connection = self._ensure_connection()
         json_keys_for_update = json_path_from_dict(data)
         if not json_keys_for_update:
-            return
+            return None
+        write = PendingWrite(
+            key=key,
+            record_type=record_type,
+            update={
+                path_value.path: path_value.value for path_value in json_keys_for_update
+            },
+        )
+        record = await self._update_record(write)
+        return self._record_data(record) if record is not None else None
+
+    async def _update_record(self, write: PendingWrite) -> Record | None:
+        """
+        Update the fields of a record, queued in the write-behind queue if it's on or
+        run now otherwise
 
-        placeholders = ", ".join(["?, ?"] * len(json_keys_for_update))
+        :param write: update with the json paths and values to set
+        :type write: PendingWrite
+        :return: the record after the update, None if it doesn't exist
+        :rtype: Record | None
+        :raises ValueError: if a field of a typed record can't be updated
+        """
+        if self._write_behind:
+            return await self._queue_update(write)
+        return await self._update_returning(write)
+
+    async def _queue_update(self, write: PendingWrite) -> Record | None:
+        """
+        Queue an update of the fields of a record in the write-behind queue
+
+        :param write: update with the json paths and values to set
+        :type write: PendingWrite
+        :return: the record as it is after the update, None if it doesn't exist
+        :rtype: Record | None
+        :raises ValueError: if a field of a typed record can't be updated
+        """
+        record = await self._get_record(write.key)
+        if record is None or (write.record_type and write.record_type != record[0]):
+            return None
+        if record[0] in RECORD_TABLES:
+            self._update_columns(record[0], write.update)
+        await self._write(write)
+        record = await self._get_record(write.key)
+        return record[1] if record else None
+
+    @staticmethod
+    def _update_columns(record_type: str, update: dict[str, Any]) -> list[str]:
+        """
+        Columns of the fields an update of a typed record sets
+
+        :param record_type: type of the record, one that has its own table
+        :type record_type: str
+        :param update: json paths and values to set
+        :type update: dict[str, Any]
+        :return: column of each field, in the order of the update
+        :rtype: list[str]
+        :raises ValueError: if a field doesn't have a column
+        """
+        columns = FIELD_COLUMNS[record_type]
+        update_columns = []
+        for path in update:
+            field = path.removeprefix("$.")
+            if field not in columns:
+                raise ValueError(f"{field} of a {record_type} can't be updated")
+            update_columns.append(columns[field])
+        return update_columns
+
+    @staticmethod
+    async def _update_statement(
+        connection: aiosqlite.Connection, write: PendingWrite
+    ) -> tuple[str | None, str, tuple]:
+        """
+        Statement of an update of the fields of a record. A record in its own table has
+        the columns of the fields set, one in the data_store table its json fields. If
+        the update doesn't have a record type it's looked up when it's run, so updates
+        in the write-behind queue don't have to read
+
+        :param connection: Database connection
+        :type connection: aiosqlite.Connection
+        :param write: update with the json paths and values to set
+        :type write: PendingWrite
+        :return: type of the record, statement and its values
+        :rtype: tuple[str | None, str, tuple]
+        :raises ValueError: if a field of a typed record can't be updated
+        """
+        record_type = write.record_type
+        if record_type is None:
+            async with connection.execute(
+                "SELECT record_type FROM records WHERE key = ?", (write.key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            record_type = row[0] if row else None
+
+        if record_type in RECORD_TABLES:
+            assignments = [
+                f"{column} = ?"
+                for column in DatabaseManager._update_columns(record_type, write.update)
+            ]
+            return (
+                record_type,
+                f"UPDATE {RECORD_TABLES[record_type]} SET {', '.join(assignments)} "
+                "WHERE key = ?",
+                (*write.update.values(), write.key),
+            )
+
+        placeholders = ", ".join(["?, ?"] * len(write.update))
         sql_statement = (
             "UPDATE data_store SET data = json_set(data, "
             + placeholders
             + ") WHERE key = ?"
         )
 
-        if record_type:
+        if write.record_type:
             sql_statement += " AND record_type = ?"
 
         params = []
-        for path_value in json_keys_for_update:
-            params.append(path_value.path)
-            params.append(path_value.value)
-        params.append(key)
-        if record_type:
-            params.append(record_type)
-        await connection.execute(sql_statement, (tuple(params)))
-        await connection.commit()
+        for path, value in write.update.items():
+            params.append(path)
+            params.append(value)
+        params.append(write.key)
+        if write.record_type:
+            params.append(write.record_type)
+        return record_type, sql_statement, tuple(params)
 
     async def get(self, key: str) -> dict | None:
         """
-        Retrieve a record from the data_store table by key.
+        Retrieve a record by key.
 
         :param key: Key of the record to retrieve
         :type key: str
         :return: Retrieved data as a dictionary or None if not found
         :rtype: dict | None
         """
-        connection = self._ensure_connection()
-        async with connection.execute(
-            "SELECT data FROM data_store WHERE key = ?",
-            (key,),
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return json.loads(row[0])
-            return None
+        record = await self._get_record(key)
+        if record:
+            return self._record_data(record[1])
+        return None
 
     async def get_all(self) -> List[dict]:
         """
-        Retrieve all records from the data_store table.
+        Retrieve all records, from every table.
 
         :return: List of all records as dictionaries
         :rtype: List[dict]
         """
-        connection = self._ensure_connection()
+        connection = await self._reader()
+        records = []
+        for record_type, table in RECORD_TABLES.items():
+            async with connection.execute(
+                f"SELECT key, {', '.join(RECORD_COLUMNS[record_type])} FROM {table}",
+            ) as cursor:
+                records += [
+                    self._record_data(
+                        record_from_row(record_type, row[0], row[1:], trusted=True)
+                    )
+                    async for row in cursor
+                ]
         async with connection.execute(
             "SELECT data FROM data_store",
         ) as cursor:
-            return [json.loads(row[0]) async for row in cursor]
+            records += [json.loads(row[0]) async for row in cursor]
+        return records
 
-    async def add_query_history(self, params: QueryHistory) -> None:
+    def query_history_key(self, params: QueryHistory) -> str:
         """
-        Add a query to the history table.
+        Key of a query in the query history, a hash of its parameters so running the
+        same query again updates its row instead of adding another
 
         :param params: Query parameters
-        :type params: QueryParameters
+        :type params: QueryHistory
+        :return: key of the query history row
+        :rtype: str
         """
-        key_uuid = str(
+        return str(
             uuid.uuid5(
-                uuid.NAMESPACE_DNS, params.model_dump_json(exclude=self.EXCLUDED_FIELDS)
+                uuid.NAMESPACE_DNS,
+                params.model_dump_json(
+                    exclude=self.EXCLUDED_FIELDS | self.QUERY_HISTORY_RUN_FIELDS
+                ),
             )
         )
-        date = datetime.now(ZoneInfo("UTC")).isoformat()
-        await self.insert(
-            f"{date}_{key_uuid}",
-            params.model_dump(mode="json", exclude=self.EXCLUDED_FIELDS),
-            record_type=RecordType.QueryHistory.value,
-            created_at=date,
+
+    async def add_query_history(self, params: QueryParameters) -> str:
+        """
+        Add a query to the history table, or if it's been run before bump its run count
+        and last run. created_at is the last run so the history lists the most recently
+        run queries first
+
+        :param params: Query parameters
+        :type params: QueryParameters
+        :return: key of the query history row
+        :rtype: str
+        """
+        key = self.query_history_key(params)
+        now = datetime.now(ZoneInfo("UTC"))
+        if not isinstance(params, QueryHistory):
+            params = QueryHistory.model_validate(
+                params.model_dump(exclude=self.EXCLUDED_FIELDS)
+            )
+        table, row = self._record_row(
+            key,
+            params.model_copy(
+                update={"run_count": 1, "first_run": now, "last_run": now}
+            ),
+            RecordType.QueryHistory.value,
+            now.isoformat(),
+        )
+        await self._write(
+            PendingWrite(
+                statement=f"{self._insert_statement(table, list(row))} "
+                "ON CONFLICT (key) DO UPDATE SET created_at = excluded.created_at, "
+                "run_count = query_history.run_count + 1, last_run = excluded.last_run",
+                values=tuple(row.values()),
+                key=key,
+            )
         )
+        return key
+
+    async def update_query_history_metrics(
+        self, key: str, metrics: QueryRunMetrics
+    ) -> None:
+        """
+        Set the metrics of the latest run of a query in the query history
+
+        :param key: Key of the query history row
+        :type key: str
+        :param metrics: metrics of the run
+        :type metrics: QueryRunMetrics
+        """
+        await self._write(
+            PendingWrite(
+                statement="UPDATE query_history SET items = ?, scanned_count = ?, "
+                "consumed_capacity = ?, elapsed = ? WHERE key = ?",
+                values=(
+                    metrics.items,
+                    metrics.scanned_count,
+                    metrics.consumed_capacity,
+                    metrics.elapsed,
+                    key,
+                ),
+                key=key,
+            )
+        )
+
+    async def compact_history(
+        self,
+        max_rows: int | None = None,
+        max_age_days: int | None = None,
+        vacuum: bool = False,
+    ) -> int:
+        """
+        Enforce the query history retention then give the free pages back to the file
+        system with an incremental vacuum and checkpoint the WAL into the database so it
+        doesn't keep growing. A database made before auto vacuum was turned on only has
+        its free pages given back if it's vacuumed once to turn it on, which rewrites
+        the whole file so it's opt in
+
+        :param max_rows: Max number of queries to keep, the least recently run are
+            removed first, no limit if not set
+        :type max_rows: int | None
+        :param max_age_days: Remove queries that haven't been run for this many days, no
+            limit if not set
+        :type max_age_days: int | None
+        :param vacuum: vacuum the database to turn on auto vacuum if it's not on yet
+        :type vacuum: bool
+        :return: number of queries removed
+        :rtype: int
+        """
+        async with self._write_lock:
+            await self._flush_pending_writes()
+            return await self._compact_history(max_rows, max_age_days, vacuum)
+
+    async def _compact_history(
+        self, max_rows: int | None, max_age_days: int | None, vacuum: bool
+    ) -> int:
+        """`compact_history` once the write lock is held"""
+        connection = self._ensure_connection()
+        removed = 0
+        if max_age_days is not None:
+            cutoff = datetime.now(ZoneInfo("UTC")) - timedelta(days=max_age_days)
+            # created_at is an iso timestamp or a CURRENT_TIMESTAMP with a space
+            # instead of the T, so they're compared as datetimes rather than strings
+            cursor = await connection.execute(
+                "DELETE FROM query_history WHERE datetime(created_at) < datetime(?)",
+                (cutoff.isoformat(),),
+            )
+            removed += cursor.rowcount
+        if max_rows is not None:
+            cursor = await connection.execute(
+                "DELETE FROM query_history WHERE id IN (SELECT id FROM query_history "
+                "ORDER BY created_at DESC, key DESC LIMIT -1 OFFSET ?)",
+                (max_rows,),
+            )
+            removed += cursor.rowcount
+        await connection.commit()
+
+        async with connection.execute("PRAGMA auto_vacuum") as cursor:
+            auto_vacuum = (await cursor.fetchone())[0]
+        if vacuum and auto_vacuum != self.AUTO_VACUUM_INCREMENTAL:
+            await connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            await connection.execute("VACUUM")
+        await connection.execute("PRAGMA incremental_vacuum")
+        await connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    async def checkpoint(self, mode: str = "PASSIVE") -> tuple[int, int, int]:
+        """
+        Checkpoint the WAL into the database, after flushing the queued writes. A
+        passive checkpoint copies what it can without waiting for other connections,
+        the others wait up to the busy timeout for them
+
+        :param mode: mode of the checkpoint, one of `CHECKPOINT_MODES`
+        :type mode: str
+        :return: if it couldn't finish because of another connection, the number of
+            pages in the WAL and how many were checkpointed
+        :rtype: tuple[int, int, int]
+        :raises ValueError: if the mode isn't a checkpoint mode
+        """
+        if mode not in self.CHECKPOINT_MODES:
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        async with self._write_lock:
+            await self._flush_pending_writes()
+            connection = self._ensure_connection()
+            # pragmas can't take parameters, the mode is one of CHECKPOINT_MODES
+            async with connection.execute(f"PRAGMA wal_checkpoint({mode})") as cursor:
+                busy, log, checkpointed = await cursor.fetchone()
+        return busy, log, checkpointed
 
     async def add_saved_query_from_query_params(
         self, name: str, description: str, params: QueryParameters
@@ -320,14 +1252,14 @@ class DatabaseManager:
             }
         )
         date = datetime.now(ZoneInfo("UTC")).isoformat()
-        await self.insert(
+        await self._insert_record(
             str(
                 uuid.uuid5(
                     uuid.NAMESPACE_DNS,
                     saved_query.model_dump_json(exclude=self.EXCLUDED_FIELDS),
                 )
             ),
-            saved_query.model_dump(mode="json", exclude=self.EXCLUDED_FIELDS),
+            saved_query,
             record_type=RecordType.SavedQuery.value,
             created_at=date,
         )
@@ -350,185 +1282,143 @@ class DatabaseManager:
             )
         )
         date = datetime.now(ZoneInfo("UTC")).isoformat()
-        await self.insert(
+        await self._insert_record(
             key_uuid,
-            saved_query.model_dump(mode="json", exclude=self.EXCLUDED_FIELDS),
+            saved_query,
             record_type=RecordType.SavedQuery.value,
             created_at=date,
         )
 
     async def list_saved_queries(
-        self, page: int = 1, page_size: int = 20, search: str = ""
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        search: str = "",
+        after: PageCursor | None = None,
     ) -> list[ListSavedQueryResultRow]:
         """
-        List all saved queries from the data_store table.
+        List all saved queries from the saved_queries table.
 
-        :param page: Page number for pagination
+        :param page: Page number for pagination, only used without a cursor
         :type page: int
         :param page_size: Number of items per page
         :type page_size: int
-        :param search: Search term to filter saved queries by name
+        :param search: Words to search the name, description, table and conditions of
+            saved queries for, best matches first
         :type search: str
+        :param after: Cursor of the last row of the previous page, see `PageCursor`
+        :type after: PageCursor | None
         :return: List of saved queries
         :rtype: list[ListSavedQueryResultRow]
         """
-        connection = self._ensure_connection()
-        offset = (page - 1) * page_size
-        saved_queries = []
-        statement = "SELECT data, created_at, key FROM data_store"
-        where_clauses = (
-            f"WHERE json_extract(data, '$.name') LIKE '%{search}%' AND record_type = ?"
-            if search
-            else "WHERE record_type = ?"
-        )
-        order_limit_offset = "ORDER BY key LIMIT ? OFFSET ?"
-        query = f"{statement} {where_clauses} {order_limit_offset}"
-        async with connection.execute(
-            query,
-            (RecordType.SavedQuery.value, page_size, offset),
-        ) as cursor:
-            async for row in cursor:
-                data = json.loads(row[0])
-                saved_queries.append(
-                    ListSavedQueryResultRow(
-                        data=SavedQuery.model_validate(data),
-                        created_at=row[1],
-                        key=row[2],
-                    )
-                )
-        return saved_queries
+        query, values = self._listing_query(
+            RecordType.SavedQuery,
+            search=search,
+            page=page,
+            page_size=page_size,
+            after=after,
+        )
+        return await self._list_records(
+            ListSavedQueryResultRow, RecordType.SavedQuery, query, values
+        )
 
     async def list_query_history(
-        self, page: int = 1, page_size: int = 20
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        search: str = "",
+        after: PageCursor | None = None,
     ) -> list[ListQueryHistoryResultRow]:
         """
-        List all query history from the data_store table.
+        List all query history from the query_history table.
 
-        :param page: Page number for pagination
+        :param page: Page number for pagination, only used without a cursor
         :type page: int
         :param page_size: Number of items per page
         :type page_size: int
+        :param search: Words to search the table and conditions of queries for, best
+            matches first
+        :type search: str
+        :param after: Cursor of the last row of the previous page, see `PageCursor`
+        :type after: PageCursor | None
         :return: List of query history
         :rtype: list[ListQueryHistoryResultRow]
         """
-        connection = self._ensure_connection()
-        offset = (page - 1) * page_size
-        query_history = []
-        async with connection.execute(
-            "SELECT data, created_at, key FROM data_store WHERE record_type = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
-            (RecordType.QueryHistory.value, page_size, offset),
-        ) as cursor:
-            async for row in cursor:
-                data = json.loads(row[0])
-                query_history.append(
-                    ListQueryHistoryResultRow(
-                        data=QueryHistory.model_validate(data),
-                        created_at=row[1],
-                        key=row[2],
-                    )
-                )
-        return query_history
+        query, values = self._listing_query(
+            RecordType.QueryHistory,
+            "query_history.created_at",
+            descending=True,
+            search=search,
+            page=page,
+            page_size=page_size,
+            after=after,
+        )
+        return await self._list_records(
+            ListQueryHistoryResultRow, RecordType.QueryHistory, query, values
+        )
 
     async def get_query(self, key: str) -> QueryParameters | None:
         """
-        Retrieve a query history entry by key from the data_store table as QueryParameters model.
+        Retrieve a query history entry by key from the query_history table as QueryParameters model.
 
         :param key: Key of the query history entry
         :type key: str
         :return: Retrieved query parameters or None if not found
         :rtype: QueryParameters | None
         """
-        connection = self._ensure_connection()
-        async with connection.execute(
-            "SELECT data FROM data_store WHERE record_type = ? AND key = ?",
-            (RecordType.QueryHistory.value, key),
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                data = json.loads(row[0])
-                return QueryParameters.model_validate(data)
-        return None
+        query_history = await self._find_record(
+            RecordType.QueryHistory, "key = ?", (key,)
+        )
+        return query_history.to_query_params() if query_history else None
 
     async def get_last_query_ran(self) -> QueryParameters | None:
         """
-        Retrieve the most recent query history from the data_store table.
+        Retrieve the most recent query history from the query_history table.
 
         :return: Most recent query history or None if not found
         :rtype: QueryParameters | None
         """
-        connection = self._ensure_connection()
-        async with connection.execute(
-            "SELECT data FROM data_store WHERE record_type = ? ORDER BY created_at DESC LIMIT 1",
-            (RecordType.QueryHistory.value,),
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                data = json.loads(row[0])
-                query_history = QueryHistory.model_validate(data)
-                return query_history.to_query_params()
-        return None
+        query_history = await self._find_record(
+            RecordType.QueryHistory, "1", (), order_by="created_at DESC, key DESC"
+        )
+        return query_history.to_query_params() if query_history else None
 
     async def get_saved_query_by_name(self, name: str) -> SavedQuery | None:
         """
-        Retrieve a saved query by name from the data_store table.
+        Retrieve a saved query by name from the saved_queries table.
 
         :param name: Name of the saved query
         :type name: str
         :return: Retrieved saved query or None if not found
         :rtype: SavedQuery | None
         """
-        connection = self._ensure_connection()
-        async with connection.execute(
-            "SELECT data FROM data_store WHERE record_type = ? AND json_extract(data, '$.name') = ?",
-            (RecordType.SavedQuery.value, name),
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                data = json.loads(row[0])
-                return SavedQuery.model_validate(data)
-        return None
+        return await self._find_record(RecordType.SavedQuery, "name = ?", (name,))
 
     async def get_saved_query(self, key: str) -> SavedQuery | None:
         """
-        Retrieve a saved query by key from the data_store table.
+        Retrieve a saved query by key from the saved_queries table.
 
         :param key: Key of the saved query
         :type key: str
         :return: Retrieved saved query or None if not found
         :rtype: SavedQuery | None
         """
-        connection = self._ensure_connection()
-        async with connection.execute(
-            "SELECT data FROM data_store WHERE record_type = ? AND key = ?",
-            (RecordType.SavedQuery.value, key),
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                data = json.loads(row[0])
-                return SavedQuery.model_validate(data)
+        record = await self._get_record(key)
+        if record and record[0] == RecordType.SavedQuery.value:
+            return record[1].model_copy(deep=True)
         return None
 
     async def remove_all_query_history(self) -> None:
         """
-        Delete all query history from the data_store table.
+        Delete all query history from the query_history table.
         """
-        connection = self._ensure_connection()
-        await connection.execute(
-            "DELETE FROM data_store WHERE record_type = ?",
-            (RecordType.QueryHistory.value,),
-        )
-        await connection.commit()
+        await self._write(PendingWrite(statement="DELETE FROM query_history"))
 
     async def delete_all_saved_queries(self) -> None:
         """
-        Delete all saved queries from the data_store table.
+        Delete all saved queries from the saved_queries table.
         """
-        connection = self._ensure_connection()
-        await connection.execute(
-            "DELETE FROM data_store WHERE record_type = ?",
-            (RecordType.SavedQuery.value,),
-        )
-        await connection.commit()
+        await self._write(PendingWrite(statement="DELETE FROM saved_queries"))
 
     async def add_session_group(self, session_group: SessionGroup) -> None:
         """
@@ -538,9 +1428,9 @@ class DatabaseManager:
         :type workspace: SessionGroup
         """
         date = datetime.now(ZoneInfo("UTC")).isoformat()
-        await self.insert(
+        await self._insert_record(
             session_group.session_group_id,
-            session_group.model_dump(mode="json"),
+            session_group,
             RecordType.SessionGroup.value,
             created_at=date,
         )
@@ -556,9 +1446,9 @@ class DatabaseManager:
         if not workspace:
             raise ValueError(f"Workspace {session.session_group_id} does not exist")
         date = datetime.now(ZoneInfo("UTC")).isoformat()
-        await self.insert(
+        await self._insert_record(
             str(session.session_id),
-            session.model_dump(mode="json"),
+            session,
             RecordType.Session.value,
             created_at=date,
         )
@@ -582,45 +1472,37 @@ class DatabaseManager:
         await self.batch_insert(records)
 
     async def list_session_group(
-        self, page: int = 1, page_size: int = 20, search_name: str = ""
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        search_name: str = "",
+        after: PageCursor | None = None,
     ) -> List[ListSessionGroupResultRow]:
         """
         List session groups
 
-        :param page: Page number for pagination
+        :param page: Page number for pagination, only used without a cursor
         :type page: int
         :param page_size: Number of items per page
         :type page_size: int
-        :param search_name: Search name for filtering workspaces
+        :param search_name: Words to search session group names for, best matches first
         :type search_name: str
+        :param after: Cursor of the last row of the previous page, see `PageCursor`
+        :type after: PageCursor | None
         :return: List of workspace results
         :rtype: List[ListWorkspaceResultRow]
         """
-        connection = self._ensure_connection()
-        offset = (page - 1) * page_size
-        statement = "SELECT data, created_at, key FROM data_store"
-        where_clauses = (
-            f"WHERE record_type = ? AND json_extract(data, '$.name') LIKE '%{search_name}%'"
-            if search_name
-            else "WHERE record_type = ?"
-        )
-        order_limit_offset = "ORDER BY json_extract(data, '$.name') LIMIT ? OFFSET ?"
-        query = f"{statement} {where_clauses} {order_limit_offset}"
-        result = []
-        async with connection.execute(
-            query,
-            ((RecordType.SessionGroup.value, page_size, offset)),
-        ) as cursor:
-            async for row in cursor:
-                data = json.loads(row[0])
-                result.append(
-                    ListSessionGroupResultRow(
-                        data=data,
-                        created_at=row[1],
-                        key=row[2],
-                    )
-                )
-        return result
+        query, values = self._listing_query(
+            RecordType.SessionGroup,
+            "session_groups.name",
+            search=search_name,
+            page=page,
+            page_size=page_size,
+            after=after,
+        )
+        return await self._list_records(
+            ListSessionGroupResultRow, RecordType.SessionGroup, query, values
+        )
 
     async def get_session(self, session_id: str) -> Session | None:
         """
@@ -632,10 +1514,10 @@ class DatabaseManager:
         :return: a session or if cannot find None
         :rtype: Session | None
         """
-        result = await self.get(session_id)
-        if not result:
-            return
-        return Session.model_validate(result)
+        record = await self._get_record(session_id)
+        if not record or record[0] != RecordType.Session.value:
+            return None
+        return record[1].model_copy()
 
     async def get_session_group_by_name(self, name: str) -> SessionGroup | None:
         """
@@ -646,19 +1528,9 @@ class DatabaseManager:
         :return: SessionGroup pydantic model or None
         :rtype: SessionGroup | None
         """
-        connection = self._ensure_connection()
-        async with connection.execute(
-            "SELECT data FROM data_store WHERE record_type = ? AND json_extract(data, '$.name') = ? ORDER BY created_at DESC LIMIT 1",
-            (
-                RecordType.SessionGroup.value,
-                name,
-            ),
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                data = json.loads(row[0])
-                return SessionGroup.model_validate(data)
-        return None
+        return await self._find_record(
+            RecordType.SessionGroup, "name = ?", (name,), order_by="created_at DESC"
+        )
 
     async def list_sessions(
         self,
@@ -666,57 +1538,45 @@ class DatabaseManager:
         page_size: int = 20,
         search_name: str = "",
         session_group_id: str | None = None,
+        after: PageCursor | None = None,
     ) -> List[ListSessionResultRow]:
         """
         List workspace sessions based on the provided parameters.
 
-        :param page: Page number for pagination
+        :param page: Page number for pagination, only used without a cursor
         :type page: int
         :param page_size: Number of items per page
         :type page_size: int
-        :param search_name: Search name for filtering workspace sessions
+        :param search_name: Words to search the name and table of sessions for, best
+            matches first
         :type search_name: str
         :param session_group_id: Session group ID for filtering workspace sessions
         :type session_group_id: str | None
+        :param after: Cursor of the last row of the previous page, see `PageCursor`
+        :type after: PageCursor | None
         :return: List of workspace session results
         :rtype: List[ListWorkspaceSessionResultRow]
         """
-        connection = self._ensure_connection()
-        offset = (page - 1) * page_size
-        statement = "SELECT data, created_at, key FROM data_store"
-        where_clauses = "WHERE record_type = ?"
-        if search_name:
-            where_clauses += f"AND json_extract(data, '$.name') LIKE '%{search_name}%'"
-
-        if session_group_id:
-            where_clauses += "AND json_extract(data, '$.session_group_id') = ?"
-
-        order_limit_offset = "ORDER BY json_extract(data, '$.name') LIMIT ? OFFSET ?"
-        query = f"{statement} {where_clauses} {order_limit_offset}"
-        values = (
-            (RecordType.Session.value, session_group_id, page_size, offset)
+        where, values = (
+            ("sessions.session_group_id = ?", (session_group_id,))
             if session_group_id
-            else (RecordType.Session.value, page_size, offset)
+            else ("", ())
+        )
+        query, values = self._listing_query(
+            RecordType.Session,
+            "sessions.name",
+            search=search_name,
+            where=where,
+            values=values,
+            page=page,
+            page_size=page_size,
+            after=after,
+        )
+        return await self._list_records(
+            ListSessionResultRow, RecordType.Session, query, values
         )
-        result = []
-        async with connection.execute(
-            query,
-            (values),
-        ) as cursor:
-            async for row in cursor:
-                data = json.loads(row[0])
-                result.append(
-                    ListSessionResultRow(
-                        data=data,
-                        created_at=row[1],
-                        key=row[2],
-                    )
-                )
-        return result
 
-    async def update_session_group(
-        self, session_group_id: str, name: str
-    ) -> SessionGroup:
+    async def update_session_group(self, session_group_id: str, name: str) -> dict:
         """
         Update a session group name in the database.
 
@@ -724,15 +1584,19 @@ class DatabaseManager:
         :type workspace_id: str
         :param name: the new name for the session group
         :type name: str
-        :return: the updated session group object
-        :type: SessionGroup
-        """
-        workspace = await self.get(session_group_id)
-        if not workspace:
+        :return: data of the updated session group
+        :rtype: dict
+        """
+        updated_session_group = await self._update_record(
+            PendingWrite(
+                key=session_group_id,
+                record_type=RecordType.SessionGroup.value,
+                update={"$.name": name},
+            )
+        )
+        if not updated_session_group:
             raise ValueError(f"Session group with ID {session_group_id} does not exist")
-        await self.update(session_group_id, {"name": name})
-        updated_session_group = await self.get(session_group_id)
-        return updated_session_group
+        return self._record_data(updated_session_group)
 
     async def update_session(
         self,
@@ -742,7 +1606,7 @@ class DatabaseManager:
         table_name: str | None = None,
         aws_region: str | None = None,
         session_group_id: str | None = None,
-    ) -> Session:
+    ) -> Session | None:
         """
         Update a session in the database.
 
@@ -758,8 +1622,8 @@ class DatabaseManager:
         :type aws_region: str | None
         :param session_group_id: the ID of the session group to associate with the session
         :type session_group_id: str | None
-        :return: the updated session
-        :rtype: Session
+        :return: the updated session, None if it doesn't exist
+        :rtype: Session | None
         """
         if all(
             not param
@@ -780,19 +1644,69 @@ class DatabaseManager:
         if session_group_id:
             update_dict["session_group_id"] = session_group_id
 
-        await self.update(session_id, update_dict, RecordType.Session.value)
-        return await self.get(session_id)
+        updated_session = await self._update_record(
+            PendingWrite(
+                key=session_id,
+                record_type=RecordType.Session.value,
+                update={f"$.{field}": value for field, value in update_dict.items()},
+            )
+        )
+        return updated_session.model_copy() if updated_session else None
 
     async def delete_session_group(self, session_group_id: str) -> None:
         """
-        Delete a session group from the database. With its sessions
+        Delete a session group from the database. Its sessions are deleted with it by
+        the foreign key of the sessions table
 
         :param session_group_id: the ID of the session group to delete
         :type session_group_id: str
         """
-        connection = self._ensure_connection()
-        await connection.execute(
-            "DELETE FROM data_store WHERE key = ? and json_extract(data, '$.session_group_id') = ?",
-            ((session_group_id, session_group_id)),
+        await self._write(
+            PendingWrite(
+                statement="DELETE FROM session_groups WHERE key = ?",
+                values=(session_group_id,),
+            )
         )
-        await connection.commit()
+
+    async def save_export_checkpoint(self, manifest: ExportManifest) -> None:
+        """
+        Save the latest checkpoint of an export, replacing the one before it
+
+        :param manifest: manifest of the export with the checkpoint of each part
+        :type manifest: ExportManifest
+        """
+        date = datetime.now(ZoneInfo("UTC")).isoformat()
+        await self._write(
+            PendingWrite(
+                statement="INSERT INTO data_store (key, data, record_type, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data",
+                values=(
+                    manifest.export_id,
+                    manifest.model_dump_json(),
+                    RecordType.ExportCheckpoint.value,
+                    date,
+                ),
+                key=manifest.export_id,
+            )
+        )
+
+    async def list_unfinished_exports(
+        self, table_name: str | None = None
+    ) -> List[ExportManifest]:
+        """
+        List exports that have a checkpoint but didn't finish, most recently updated first
+
+        :param table_name: only list exports of this table
+        :type table_name: str | None
+        :return: manifests of the unfinished exports
+        :rtype: List[ExportManifest]
+        """
+        connection = await self._reader()
+        statement = "SELECT data FROM data_store WHERE record_type = ? AND json_extract(data, '$.finished') = 0"
+        values = (RecordType.ExportCheckpoint.value,)
+        if table_name:
+            statement += " AND json_extract(data, '$.table_name') = ?"
+            values += (table_name,)
+        statement += " ORDER BY json_extract(data, '$.updated_at') DESC"
+        async with connection.execute(statement, values) as cursor:
+            return [ExportManifest.model_validate_json(row[0]) async for row in cursor]
@@ -0,0 +1,376 @@
+from typing import Callable
+
+import aiosqlite
+
+# record types that used to be kept in data_store as json, until migration 6 moved
+# them to their own tables
+TYPED_RECORD_TYPES = ("SavedQuery", "QueryHistory", "Session", "SessionGroup")
+
+_TYPED = ", ".join(f"'{record_type}'" for record_type in TYPED_RECORD_TYPES)
+
+
+def _conditions(row: str) -> str:
+    """
+    Conditions of a saved_queries or query_history row rendered as text for the full
+    text index, like `pk 1234 sk begins_with Order# status == Active`
+
+    :param row: name of the row in the statement, e.g new in a trigger
+    :type row: str
+    :return: sql expression of the conditions
+    :rtype: str
+    """
+    condition = " || ' ' || ".join(
+        f"coalesce(json_extract(value, '$.{name}'), '')"
+        for name in ("attrName", "attrCondition", "attrValue")
+    )
+    conditions = " || ' ' || ".join(
+        [
+            f"{row}.primary_key_name",
+            f"coalesce({row}.partition_key_value, '')",
+            f"{row}.sort_key_name",
+            f"coalesce({row}.sort_key_condition, '')",
+            f"coalesce(json_extract({row}.sort_key_value, '$'), '')",
+            f"coalesce((SELECT group_concat({condition}, ' ') "
+            f"FROM json_each({row}.filter_conditions)), '')",
+        ]
+    )
+    return f"trim({conditions})"
+
+
+def _search_index(
+    table: str, columns: Callable[[str], tuple[str, str, str, str]]
+) -> list[str]:
+    """
+    Statements creating the full text index of a table, named `<table>_fts`, with the
+    triggers keeping it up to date. Rows share the rowid of the row they index,
+    prefixes of 2 and 3 characters are indexed so prefix searches don't scan every term
+
+    :param table: name of the table
+    :type table: str
+    :param columns: gives the sql expressions of the name, description, table name and
+        conditions of a row from the name of the row in the statement
+    :type columns: Callable[[str], tuple[str, str, str, str]]
+    :return: statements creating the index
+    :rtype: list[str]
+    """
+
+    def values(row: str) -> str:
+        return ", ".join([f"{row}.id", *columns(row)])
+
+    insert = (
+        f"INSERT INTO {table}_fts (rowid, name, description, table_name, conditions)"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+        "name, description, table_name, conditions, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+        f"{insert} SELECT {values(table)} FROM {table}",
+        f"CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+        f"{insert} VALUES ({values('new')}); END",
+        f"CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {table}_fts WHERE rowid = old.id; END",
+        f"CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} BEGIN "
+        f"DELETE FROM {table}_fts WHERE rowid = old.id; "
+        f"{insert} VALUES ({values('new')}); END",
+    ]
+
+
+# columns of the query parameters of saved_queries and query_history. The key
+# condition is split into its partition key and sort key, the sort key value, filter
+# conditions and next token can be any json value so are kept as json
+_QUERY_COLUMNS = """
+    scan_mode INTEGER NOT NULL DEFAULT 0,
+    primary_key_name TEXT NOT NULL,
+    sort_key_name TEXT NOT NULL,
+    index_name TEXT NOT NULL DEFAULT 'table',
+    partition_key_value TEXT,
+    sort_key_type TEXT,
+    sort_key_condition TEXT,
+    sort_key_value TEXT,
+    filter_conditions TEXT NOT NULL DEFAULT '[]',
+    next_token TEXT,
+    draft INTEGER NOT NULL DEFAULT 0,
+    CHECK (json_valid(filter_conditions))
+"""
+
+
+def _json_value(source: str, path: str) -> str:
+    """
+    Sql expression of the json text of the value at a path, NULL if it's missing. Works
+    like `source -> path`, which needs sqlite 3.38, json_extract gives the sql value
+    so scalars are turned back into json
+
+    :param source: sql expression of the json
+    :type source: str
+    :param path: json path of the value
+    :type path: str
+    :return: sql expression
+    :rtype: str
+    """
+    extract = f"json_extract({source}, '{path}')"
+    value_type = f"json_type({source}, '{path}')"
+    # the type of true, false and null is their json text
+    return (
+        f"CASE WHEN {value_type} IN ('object', 'array') THEN {extract} "
+        f"WHEN {value_type} IN ('text', 'integer', 'real') THEN json_quote({extract}) "
+        f"ELSE {value_type} END"
+    )
+
+
+def _query_values(row: str = "data_store") -> str:
+    """Values of the query parameter columns from the json data of a data_store row"""
+    return (
+        f"coalesce(json_extract({row}.data, '$.scan_mode'), 0), "
+        f"json_extract({row}.data, '$.primary_key_name'), "
+        f"json_extract({row}.data, '$.sort_key_name'), "
+        f"coalesce(json_extract({row}.data, '$.index'), 'table'), "
+        f"json_extract({row}.data, '$.key_condition.partitionKeyValue'), "
+        f"json_extract({row}.data, '$.key_condition.sortKey.attrType'), "
+        f"json_extract({row}.data, '$.key_condition.sortKey.attrCondition'), "
+        f"{_json_value(f'{row}.data', '$.key_condition.sortKey.attrValue')}, "
+        f"coalesce({_json_value(f'{row}.data', '$.filter_conditions')}, '[]'), "
+        f"nullif({_json_value(f'{row}.data', '$.next_token')}, 'null'), "
+        f"coalesce(json_extract({row}.data, '$.draft'), 0)"
+    )
+
+
+# session group of a Session row of data_store
+_SESSION_GROUP_ID = (
+    "coalesce(json_extract(data, '$.session_group_id'), 'recovered-sessions')"
+)
+
+_QUERY_COLUMN_NAMES = (
+    "scan_mode, primary_key_name, sort_key_name, index_name, partition_key_value, "
+    "sort_key_type, sort_key_condition, sort_key_value, filter_conditions, "
+    "next_token, draft"
+)
+
+# Each migration is a list of statements run in one transaction, the schema version
+# of a database (PRAGMA user_version) is the number of migrations applied to it. Only
+# ever add migrations to the end, databases made by older versions are brought up to
+# date by running the ones they haven't had yet
+MIGRATIONS: list[list[str]] = [
+    # 1: the data_store table, databases made before migrations have it already
+    [
+        """
+        CREATE TABLE IF NOT EXISTS data_store (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            record_type TEXT,
+            data TEXT NOT NULL,
+            CHECK (json_valid(data))
+        )
+        """,
+    ],
+    # 2-4: steps towards migration 6 that were never released, left empty so the
+    # version numbers stay the same
+    [],
+    [],
+    [],
+    # 5: query history keyed by the hash of the query, rows used to be keyed by the
+    # time it was run then the hash, e.g `2024-01-01T12:00:00+00:00_<hash>`. Each
+    # query's latest row is kept with its run count, first and last run
+    [
+        "CREATE TEMP TABLE query_history_runs AS "
+        "SELECT substr(key, instr(key, '_') + 1) AS params_hash, count(*) AS run_count, "
+        "min(created_at) AS first_run, max(created_at) AS last_run, max(id) AS id "
+        "FROM data_store WHERE record_type = 'QueryHistory' AND instr(key, '_') > 0 "
+        "GROUP BY params_hash",
+        "DELETE FROM data_store WHERE record_type = 'QueryHistory' "
+        "AND instr(key, '_') > 0 AND id NOT IN (SELECT id FROM query_history_runs)",
+        "UPDATE data_store SET key = runs.params_hash, created_at = runs.last_run, "
+        "data = json_set(data, '$.run_count', runs.run_count, "
+        "'$.first_run', runs.first_run, '$.last_run', runs.last_run) "
+        "FROM query_history_runs AS runs WHERE data_store.id = runs.id",
+        "DROP TABLE query_history_runs",
+    ],
+    # 6: sessions, session groups, saved queries and query history move out of
+    # data_store to their own tables with a column for each field and a full text
+    # index, sessions are deleted with their session group from now on. data_store is
+    # left with the other records, and the records view lists the key and type of
+    # every record for looking them up by key, deleting from it deletes the record
+    # from its table
+    [
+        """
+        CREATE TABLE session_groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            name TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            session_group_id TEXT NOT NULL
+                REFERENCES session_groups (key) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            aws_profile TEXT,
+            table_name TEXT NOT NULL,
+            aws_region TEXT NOT NULL
+        )
+        """,
+        f"""
+        CREATE TABLE saved_queries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            {_QUERY_COLUMNS}
+        )
+        """,
+        f"""
+        CREATE TABLE query_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            table_name TEXT,
+            session_id TEXT,
+            run_count INTEGER NOT NULL DEFAULT 1,
+            first_run DATETIME,
+            last_run DATETIME,
+            items INTEGER,
+            scanned_count INTEGER,
+            consumed_capacity REAL,
+            elapsed REAL,
+            {_QUERY_COLUMNS}
+        )
+        """,
+        "CREATE INDEX idx_session_groups_name_key ON session_groups (name, key)",
+        "CREATE INDEX idx_sessions_name_key ON sessions (name, key)",
+        "CREATE INDEX idx_sessions_session_group_id_name_key "
+        "ON sessions (session_group_id, name, key)",
+        "CREATE INDEX idx_saved_queries_name_key ON saved_queries (name, key)",
+        "CREATE INDEX idx_query_history_created_at_key "
+        "ON query_history (created_at, key)",
+        "INSERT INTO session_groups (key, created_at, name) "
+        "SELECT key, created_at, json_extract(data, '$.name') FROM data_store "
+        "WHERE record_type = 'SessionGroup'",
+        # sessions of deleted session groups used to be left behind, their groups are
+        # added back so they're kept and show up as recovered sessions
+        "INSERT INTO session_groups (key, name) "
+        f"SELECT DISTINCT {_SESSION_GROUP_ID}, "
+        f"'Recovered sessions ' || substr({_SESSION_GROUP_ID}, 1, 8) FROM data_store "
+        f"WHERE record_type = 'Session' AND {_SESSION_GROUP_ID} "
+        "NOT IN (SELECT key FROM session_groups)",
+        "INSERT INTO sessions (key, created_at, session_group_id, name, aws_profile, "
+        "table_name, aws_region) SELECT key, created_at, "
+        f"{_SESSION_GROUP_ID}, json_extract(data, '$.name'), "
+        "json_extract(data, '$.aws_profile'), json_extract(data, '$.table_name'), "
+        "json_extract(data, '$.aws_region') FROM data_store "
+        "WHERE record_type = 'Session'",
+        "INSERT INTO saved_queries (key, created_at, name, description, "
+        f"{_QUERY_COLUMN_NAMES}) SELECT key, created_at, json_extract(data, '$.name'), "
+        f"coalesce(json_extract(data, '$.description'), ''), {_query_values()} "
+        "FROM data_store WHERE record_type = 'SavedQuery'",
+        "INSERT INTO query_history (key, created_at, table_name, session_id, "
+        "run_count, first_run, last_run, items, scanned_count, consumed_capacity, "
+        f"elapsed, {_QUERY_COLUMN_NAMES}) SELECT key, created_at, "
+        "json_extract(data, '$.table'), json_extract(data, '$.session_id'), "
+        "coalesce(json_extract(data, '$.run_count'), 1), "
+        "json_extract(data, '$.first_run'), json_extract(data, '$.last_run'), "
+        "json_extract(data, '$.last_metrics.items'), "
+        "json_extract(data, '$.last_metrics.scanned_count'), "
+        "json_extract(data, '$.last_metrics.consumed_capacity'), "
+        f"json_extract(data, '$.last_metrics.elapsed'), {_query_values()} "
+        "FROM data_store WHERE record_type = 'QueryHistory'",
+        f"DELETE FROM data_store WHERE record_type IN ({_TYPED})",
+        "CREATE INDEX idx_data_store_record_type_key ON data_store (record_type, key)",
+        *_search_index("session_groups", lambda row: (f"{row}.name", "''", "''", "''")),
+        *_search_index(
+            "sessions", lambda row: (f"{row}.name", "''", f"{row}.table_name", "''")
+        ),
+        *_search_index(
+            "saved_queries",
+            lambda row: (f"{row}.name", f"{row}.description", "''", _conditions(row)),
+        ),
+        *_search_index(
+            "query_history",
+            lambda row: (
+                "''",
+                "''",
+                f"coalesce({row}.table_name, '')",
+                _conditions(row),
+            ),
+        ),
+        """
+        CREATE VIEW records (id, key, record_type, created_at) AS
+        SELECT id, key, 'SessionGroup', created_at FROM session_groups
+        UNION ALL SELECT id, key, 'Session', created_at FROM sessions
+        UNION ALL SELECT id, key, 'SavedQuery', created_at FROM saved_queries
+        UNION ALL SELECT id, key, 'QueryHistory', created_at FROM query_history
+        UNION ALL SELECT id, key, record_type, created_at FROM data_store
+        """,
+        """
+        CREATE TRIGGER records_delete INSTEAD OF DELETE ON records BEGIN
+            DELETE FROM session_groups
+                WHERE old.record_type = 'SessionGroup' AND key = old.key;
+            DELETE FROM sessions WHERE old.record_type = 'Session' AND key = old.key;
+            DELETE FROM saved_queries
+                WHERE old.record_type = 'SavedQuery' AND key = old.key;
+            DELETE FROM query_history
+                WHERE old.record_type = 'QueryHistory' AND key = old.key;
+            DELETE FROM data_store WHERE id = old.id
+                AND old.record_type NOT IN ('SessionGroup', 'Session', 'SavedQuery', 'QueryHistory');
+        END
+        """,
+    ],
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+async def get_schema_version(connection: aiosqlite.Connection) -> int:
+    """
+    Schema version of a database, the number of migrations applied to it
+
+    :param connection: Database connection
+    :type connection: aiosqlite.Connection
+    :return: schema version
+    :rtype: int
+    """
+    async with connection.execute("PRAGMA user_version") as cursor:
+        row = await cursor.fetchone()
+    return row[0]
+
+
+async def migrate(connection: aiosqlite.Connection) -> int:
+    """
+    Apply the migrations a database hasn't had yet, each one in its own transaction
+    with the schema version bumped in the same transaction, so a migration that fails
+    is rolled back and tried again the next time the database is opened. Databases
+    opened by several instances at once are only migrated by one of them
+
+    :param connection: Database connection
+    :type connection: aiosqlite.Connection
+    :return: schema version of the database after migrating
+    :rtype: int
+    :raises: RuntimeError if the database was made by a newer version
+    """
+    version = await get_schema_version(connection)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is newer than {SCHEMA_VERSION}, "
+            "please upgrade dyno-viewer"
+        )
+    while version < SCHEMA_VERSION:
+        # take the write lock first then read the version again, another instance
+        # opening the database at the same time may have migrated it in the meantime
+        await connection.execute("BEGIN IMMEDIATE")
+        try:
+            version = await get_schema_version(connection)
+            if version < SCHEMA_VERSION:
+                for statement in MIGRATIONS[version]:
+                    await connection.execute(statement)
+                version += 1
+                # pragmas can't take parameters, version is always an int
+                await connection.execute(f"PRAGMA user_version = {version}")
+            await connection.commit()
+        except Exception:
+            await connection.rollback()
+            raise
+    return SCHEMA_VERSION
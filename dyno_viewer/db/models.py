@@ -1,11 +1,39 @@
 from datetime import datetime
 from enum import Enum
+from typing import Any, Callable, TypeVar
 from zoneinfo import ZoneInfo
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
 
 from dyno_viewer.models import QueryHistory, SavedQuery, Session, SessionGroup
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def construct_trusted(
+    model: type[ModelT], fields: dict[str, Any], private: dict[str, Any] | None = None
+) -> ModelT:
+    """
+    Build a model from trusted fields, e.g read from the database, without validating
+    them. This is what `model_construct` does, without it looking up the default and
+    alias of each field, which makes it slower than validating the fields
+
+    :param model: the model
+    :type model: type[ModelT]
+    :param fields: value of every field of the model
+    :type fields: dict[str, Any]
+    :param private: values of the private attributes of the model, if it has any
+    :type private: dict[str, Any] | None
+    :return: the model
+    :rtype: ModelT
+    """
+    record = model.__new__(model)
+    object.__setattr__(record, "__dict__", fields)
+    object.__setattr__(record, "__pydantic_fields_set__", set(fields))
+    object.__setattr__(record, "__pydantic_extra__", None)
+    object.__setattr__(record, "__pydantic_private__", private)
+    return record
+
 
 class JsonPathNode(BaseModel):
     path: str
@@ -17,6 +45,22 @@ class RecordType(Enum):
     QueryHistory = "QueryHistory"  # pylint: disable=invalid-name
     SessionGroup = "SessionGroup"  # pylint: disable=invalid-name
     Session = "Session"  # pylint: disable=invalid-name
+    ExportCheckpoint = "ExportCheckpoint"  # pylint: disable=invalid-name
+
+
+class PageCursor(BaseModel):
+    """
+    Where a page of a listing ended, the next page is the rows that sort after it.
+    Pages are found with an index seek instead of skipping the rows before them, so a
+    deep page costs the same as the first one and rows written in the meantime don't
+    shift the pages
+    """
+
+    sort_value: Any = Field(
+        default=None,
+        description="value the listing is sorted on of the last row, e.g its created_at, name or search rank",
+    )
+    key: str
 
 
 class BaseDataStoreRow(BaseModel):
@@ -25,6 +69,11 @@ class BaseDataStoreRow(BaseModel):
     data: BaseModel
     created_at: datetime
     key: str
+    cursor: PageCursor | None = Field(
+        default=None, description="cursor of the page that starts after this row"
+    )
+    # builds the data of a lazy row the first time it's used, see `lazy`
+    _load_data: Callable[[], BaseModel] | None = PrivateAttr(default=None)
 
     @field_validator("created_at", mode="after")
     @classmethod
@@ -33,6 +82,75 @@ class BaseDataStoreRow(BaseModel):
             return v.replace(tzinfo=ZoneInfo("UTC"))
         return v
 
+    @classmethod
+    def lazy(
+        cls,
+        load_data: Callable[[], BaseModel],
+        created_at: datetime,
+        key: str,
+        sort_value: Any = None,
+    ) -> "BaseDataStoreRow":
+        """
+        Row of a listing read from the database. It's trusted so it's built without
+        validation, and its data is only built the first time it's used, so a page of
+        rows that are only partly looked at doesn't build every record
+
+        :param load_data: builds the data of the row
+        :type load_data: Callable[[], BaseModel]
+        :param created_at: when the row was created
+        :type created_at: datetime
+        :param key: key of the row
+        :type key: str
+        :param sort_value: value the listing is sorted on, see `PageCursor`
+        :type sort_value: Any
+        :return: the row
+        :rtype: BaseDataStoreRow
+        """
+        return construct_trusted(
+            cls,
+            {
+                "created_at": cls.ensure_timezone(created_at),
+                "key": key,
+                "cursor": construct_trusted(
+                    PageCursor, {"sort_value": sort_value, "key": key}
+                ),
+            },
+            private={"_load_data": load_data},
+        )
+
+    def _loaded(self) -> "BaseDataStoreRow":
+        """Build the data of a lazy row if it hasn't been yet"""
+        load_data = self.__pydantic_private__.get("_load_data")
+        if load_data is not None:
+            self.__dict__["data"] = load_data()
+            self.__pydantic_fields_set__.add("data")
+            self._load_data = None
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        # only called when data isn't set, i.e a lazy row that hasn't been used yet
+        if name == "data" and self.__pydantic_private__.get("_load_data"):
+            return self._loaded().data
+        return super().__getattr__(name)
+
+    def __eq__(self, other: Any) -> bool:
+        self._loaded()
+        if isinstance(other, BaseDataStoreRow):
+            other._loaded()
+        return super().__eq__(other)
+
+    def __repr_args__(self):
+        self._loaded()
+        return super().__repr_args__()
+
+    def model_dump(self, **kwargs) -> dict[str, Any]:
+        self._loaded()
+        return super().model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        self._loaded()
+        return super().model_dump_json(**kwargs)
+
 
 class ListQueryHistoryResultRow(BaseDataStoreRow):
     data: QueryHistory
@@ -57,3 +175,26 @@ class BatchInsertRecord(BaseModel):
         default_factory=lambda: datetime.now(ZoneInfo("UTC")).isoformat()
     )
     data: dict
+
+
+class PendingWrite(BaseModel):
+    """A write waiting in the write-behind queue of the `DatabaseManager`"""
+
+    statement: str = ""
+    values: tuple | list = ()
+    many: bool = Field(
+        default=False, description="run the statement once for each of the values"
+    )
+    key: str | None = Field(
+        default=None,
+        description="key of the record written, None if the write can touch many records",
+    )
+    record_type: str | None = None
+    update: dict[str, Any] | None = Field(
+        default=None,
+        description="json paths and values of an update of the record, later updates of the record are merged into it",
+    )
+    record: Any = Field(
+        default=None,
+        description="record inserted, so reads of its key can be answered from the queue",
+    )
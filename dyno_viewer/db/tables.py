@@ -0,0 +1,285 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+from dyno_viewer.db.models import ModelT, RecordType, construct_trusted
+from dyno_viewer.models import (
+    FilterCondition,
+    KeyCondition,
+    QueryHistory,
+    QueryParameters,
+    QueryRunMetrics,
+    SavedQuery,
+    Session,
+    SessionGroup,
+    SortKeyCondition,
+)
+
+# table of each record type that has its own table, other records are kept in the
+# data_store table as json, see migration 6 in `dyno_viewer.db.migrations`
+RECORD_TABLES: dict[str, str] = {
+    RecordType.SessionGroup.value: "session_groups",
+    RecordType.Session.value: "sessions",
+    RecordType.SavedQuery.value: "saved_queries",
+    RecordType.QueryHistory.value: "query_history",
+}
+
+RECORD_MODELS: dict[str, type[BaseModel]] = {
+    RecordType.SessionGroup.value: SessionGroup,
+    RecordType.Session.value: Session,
+    RecordType.SavedQuery.value: SavedQuery,
+    RecordType.QueryHistory.value: QueryHistory,
+}
+
+QUERY_COLUMNS = (
+    "scan_mode",
+    "primary_key_name",
+    "sort_key_name",
+    "index_name",
+    "partition_key_value",
+    "sort_key_type",
+    "sort_key_condition",
+    "sort_key_value",
+    "filter_conditions",
+    "next_token",
+    "draft",
+)
+
+# columns of each record's table apart from its id, key and created_at, in the order
+# they're selected in
+RECORD_COLUMNS: dict[str, tuple[str, ...]] = {
+    RecordType.SessionGroup.value: ("name",),
+    RecordType.Session.value: (
+        "session_group_id",
+        "name",
+        "aws_profile",
+        "table_name",
+        "aws_region",
+    ),
+    RecordType.SavedQuery.value: ("name", "description", *QUERY_COLUMNS),
+    RecordType.QueryHistory.value: (
+        "table_name",
+        "session_id",
+        "run_count",
+        "first_run",
+        "last_run",
+        "items",
+        "scanned_count",
+        "consumed_capacity",
+        "elapsed",
+        *QUERY_COLUMNS,
+    ),
+}
+
+# columns of the fields that can be updated with `DatabaseManager.update`, fields
+# without a column of their own like the key condition can't be
+FIELD_COLUMNS: dict[str, dict[str, str]] = {
+    RecordType.SessionGroup.value: {"name": "name"},
+    RecordType.Session.value: {
+        column: column for column in RECORD_COLUMNS[RecordType.Session.value]
+    },
+    RecordType.SavedQuery.value: {
+        "name": "name",
+        "description": "description",
+        "scan_mode": "scan_mode",
+        "primary_key_name": "primary_key_name",
+        "sort_key_name": "sort_key_name",
+        "index": "index_name",
+        "draft": "draft",
+    },
+    RecordType.QueryHistory.value: {
+        "table": "table_name",
+        "session_id": "session_id",
+        "run_count": "run_count",
+        "scan_mode": "scan_mode",
+        "primary_key_name": "primary_key_name",
+        "sort_key_name": "sort_key_name",
+        "index": "index_name",
+        "draft": "draft",
+    },
+}
+
+
+def _query_values(params: QueryParameters) -> dict[str, Any]:
+    data = params.model_dump(
+        mode="json", include={"key_condition", "filter_conditions", "next_token"}
+    )
+    key_condition = data["key_condition"] or {}
+    sort_key = key_condition.get("sortKey") or {}
+    return {
+        "scan_mode": params.scan_mode,
+        "primary_key_name": params.primary_key_name,
+        "sort_key_name": params.sort_key_name,
+        "index_name": params.index,
+        "partition_key_value": key_condition.get("partitionKeyValue"),
+        "sort_key_type": sort_key.get("attrType"),
+        "sort_key_condition": sort_key.get("attrCondition"),
+        "sort_key_value": json.dumps(sort_key["attrValue"]) if sort_key else None,
+        "filter_conditions": json.dumps(data["filter_conditions"]),
+        "next_token": (
+            json.dumps(data["next_token"]) if params.next_token is not None else None
+        ),
+        "draft": params.draft,
+    }
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    """
+    Parse a timestamp column, written by `datetime.isoformat`, as json by pydantic or by
+    sqlite's CURRENT_TIMESTAMP
+
+    :param value: value of the column
+    :type value: str | None
+    :return: the timestamp, None if the column isn't set
+    :rtype: datetime | None
+    """
+    if value is None:
+        return None
+    # fromisoformat only understands a Z suffix from python 3.11
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _build(model: type[ModelT], fields: dict[str, Any], trusted: bool) -> ModelT:
+    """Build a model from fields read from the database, see `construct_trusted`"""
+    if trusted:
+        return construct_trusted(model, fields)
+    return model.model_validate(fields)
+
+
+def _query_fields(row: dict[str, Any], trusted: bool) -> dict[str, Any]:
+    fields = {
+        "scan_mode": bool(row["scan_mode"]),
+        "primary_key_name": row["primary_key_name"],
+        "sort_key_name": row["sort_key_name"],
+        "index": row["index_name"],
+        "draft": bool(row["draft"]),
+        "key_condition": None,
+        "filter_conditions": [],
+        "next_token": None,
+    }
+    if row["partition_key_value"] is not None:
+        sort_key = None
+        if row["sort_key_condition"] is not None:
+            sort_key = _build(
+                SortKeyCondition,
+                {
+                    "attrType": row["sort_key_type"],
+                    "attrCondition": row["sort_key_condition"],
+                    "attrValue": json.loads(row["sort_key_value"]),
+                },
+                trusted,
+            )
+        fields["key_condition"] = _build(
+            KeyCondition,
+            {"partitionKeyValue": row["partition_key_value"], "sortKey": sort_key},
+            trusted,
+        )
+    # the json columns are only parsed when they're set
+    if row["filter_conditions"] != "[]":
+        fields["filter_conditions"] = [
+            _build(FilterCondition, condition, trusted)
+            for condition in json.loads(row["filter_conditions"])
+        ]
+    if row["next_token"] is not None:
+        fields["next_token"] = json.loads(row["next_token"])
+    return fields
+
+
+def record_values(record: BaseModel) -> dict[str, Any]:
+    """
+    Values of the columns of a record's table
+
+    :param record: a session group, session, saved query or query history
+    :type record: BaseModel
+    :return: value of each column, apart from the id, key and created_at, in the order
+        of `RECORD_COLUMNS`
+    :rtype: dict[str, Any]
+    """
+    if isinstance(record, SessionGroup):
+        return {"name": record.name}
+    if isinstance(record, Session):
+        return {
+            column: getattr(record, column)
+            for column in RECORD_COLUMNS[RecordType.Session.value]
+        }
+    if isinstance(record, SavedQuery):
+        return {
+            "name": record.name,
+            "description": record.description,
+            **_query_values(record),
+        }
+    if isinstance(record, QueryHistory):
+        metrics = record.last_metrics
+        return {
+            "table_name": record.table,
+            "session_id": record.session_id,
+            "run_count": record.run_count,
+            "first_run": record.first_run.isoformat() if record.first_run else None,
+            "last_run": record.last_run.isoformat() if record.last_run else None,
+            "items": metrics.items if metrics else None,
+            "scanned_count": metrics.scanned_count if metrics else None,
+            "consumed_capacity": metrics.consumed_capacity if metrics else None,
+            "elapsed": metrics.elapsed if metrics else None,
+            **_query_values(record),
+        }
+    raise ValueError(f"{type(record).__name__} doesn't have its own table")
+
+
+def record_from_row(
+    record_type: str, key: str, row: tuple, trusted: bool = False
+) -> BaseModel:
+    """
+    Build a record from the columns of its table, see `RECORD_COLUMNS`. Rows written
+    by the `DatabaseManager` were validated before they were written, so they can be
+    trusted and built without validating them again, which is several times faster for
+    saved queries and query history with conditions
+
+    :param record_type: type of the record
+    :type record_type: str
+    :param key: key of the record
+    :type key: str
+    :param row: values of the record's columns
+    :type row: tuple
+    :param trusted: build the record without validating it
+    :type trusted: bool
+    :return: the record
+    :rtype: BaseModel
+    """
+    values = dict(zip(RECORD_COLUMNS[record_type], row))
+    if record_type == RecordType.SessionGroup.value:
+        return _build(SessionGroup, {"session_group_id": key, **values}, trusted)
+    if record_type == RecordType.Session.value:
+        return _build(Session, {"session_id": key, **values}, trusted)
+    if record_type == RecordType.SavedQuery.value:
+        return _build(
+            SavedQuery,
+            {
+                "name": values["name"],
+                "description": values["description"],
+                **_query_fields(values, trusted),
+            },
+            trusted,
+        )
+    fields = {
+        "table": values["table_name"],
+        "session_id": values["session_id"],
+        "run_count": values["run_count"],
+        "first_run": parse_timestamp(values["first_run"]),
+        "last_run": parse_timestamp(values["last_run"]),
+        "last_metrics": None,
+        **_query_fields(values, trusted),
+    }
+    if values["items"] is not None:
+        fields["last_metrics"] = _build(
+            QueryRunMetrics,
+            {
+                "items": values["items"],
+                "scanned_count": values["scanned_count"],
+                "consumed_capacity": values["consumed_capacity"],
+                "elapsed": values["elapsed"],
+            },
+            trusted,
+        )
+    return _build(QueryHistory, fields, trusted)
@@ -1,3 +1,4 @@
+import re
 from typing import Any, List
 
 from dyno_viewer.db.models import (
@@ -28,3 +29,17 @@ def json_path_from_dict(data: dict[str, Any]) -> List[JsonPathNode]:
     if not isinstance(data, dict):
         return []
     return walk(data, "$")
+
+
+def fts_match_expression(search: str) -> str:
+    """
+    Turn a search into an FTS5 match expression where every word has to match the
+    start of a word, e.g `ord act` matches `orders by status Active`. Words are quoted
+    so quotes and FTS5 operators in the search are matched as text
+
+    :param search: search typed by the user
+    :type search: str
+    :return: match expression, empty if the search has no words
+    :rtype: str
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", search))
@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 from enum import Enum
 from functools import reduce
 from operator import and_
@@ -27,11 +28,240 @@ from dyno_viewer.util.path import ensure_config_dir
 class OutputFormat(Enum):
     CSV = "csv"
     JSON = "json"
+    JSONL = "jsonl"
+    DYNAMODB_JSON = "ddb-json"
+    # only offered when pyarrow is installed
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
+class Compression(Enum):
+    NONE = "none"
+    GZIP = "gzip"
+    # only offered when zstd is available
+    ZSTD = "zstd"
 
 
 class FileToSave(BaseModel):
     path: str | Path
     file_format: OutputFormat
+    compression: Compression = Compression.NONE
+
+
+class ExportProgress(BaseModel):
+    path: str | Path
+    items: int = 0
+    bytes_written: int = 0
+    elapsed: float = 0.0
+    total_items: int | None = Field(
+        default=None, description="estimated total items, only known for table scans"
+    )
+    finished: bool = False
+    error: str | None = None
+
+    @property
+    def eta(self) -> float | None:
+        """Estimated seconds left, None if there's no estimate of the total items"""
+        if not self.total_items or not self.items or self.finished:
+            return None
+        return max(self.total_items - self.items, 0) * self.elapsed / self.items
+
+
+class FileToImport(BaseModel):
+    path: str | Path
+    file_format: OutputFormat
+    column_types: dict[str, str] = Field(
+        default={},
+        description="dynamodb type of csv columns e.g N or SS, any other column is read as a string",
+    )
+    wcu_budget: int | None = Field(
+        default=None,
+        description="max write capacity units used per second, no limit if not set",
+    )
+
+
+class WriteProgress(BaseModel):
+    """Progress of a job writing items to a table with BatchWriteItem"""
+
+    items: int = 0
+    rejected: int = 0
+    reject_path: str | Path | None = None
+    consumed_capacity: float = 0.0
+    elapsed: float = 0.0
+    finished: bool = False
+    error: str | None = None
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def description(self) -> str:
+        return "write items"
+
+
+class ImportProgress(WriteProgress):
+    path: str | Path
+
+    @property
+    def description(self) -> str:
+        return f"import from {self.path}"
+
+
+class CopyProgress(WriteProgress):
+    source: str
+    target: str
+    items_read: int = 0
+    consumed_read_capacity: float = 0.0
+
+    @property
+    def description(self) -> str:
+        return f"copy from {self.source} to {self.target}"
+
+
+class TableCopyOptions(BaseModel):
+    target_profile: str | None = Field(
+        default=None,
+        description="aws profile of the target table, the default if not set",
+    )
+    target_region: str
+    target_table: str
+    use_query: bool = Field(
+        default=True,
+        description="copy the items of the current query or scan instead of the whole table",
+    )
+    total_segments: int = Field(
+        default=1, description="parallel scan segments read at once"
+    )
+    key_prefix: tuple[str, str] | None = Field(
+        default=None,
+        description="replace this prefix of the key values with the other one",
+    )
+    rcu_budget: int | None = Field(
+        default=None,
+        description="max read capacity units used per second, no limit if not set",
+    )
+    wcu_budget: int | None = Field(
+        default=None,
+        description="max write capacity units used per second, no limit if not set",
+    )
+    reject_path: str | Path = Field(
+        description="file items that couldn't be copied are written to"
+    )
+
+
+class AttributeChange(BaseModel):
+    name: str
+    change: str = Field(description="added, removed or changed")
+    old: Any = None
+    new: Any = None
+
+
+class DiffEntry(BaseModel):
+    """An item that's only in one side of a diff or differs between them"""
+
+    change: str = Field(
+        description="added if only in the target, removed if only in the source or changed"
+    )
+    key: dict
+    attributes: list[AttributeChange] = []
+
+
+class DiffProgress(BaseModel):
+    source: str
+    target: str
+    output_path: str | Path | None = None
+    merge_join: bool = Field(
+        default=False,
+        description="both sides were read in key order and merged, otherwise the hashes were spilled to disk",
+    )
+    source_items: int = 0
+    target_items: int = 0
+    added: int = 0
+    removed: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    elapsed: float = 0.0
+    finished: bool = False
+    error: str | None = None
+
+    @property
+    def differences(self) -> int:
+        return self.added + self.removed + self.changed
+
+
+class TableDiffOptions(BaseModel):
+    target_profile: str | None = Field(
+        default=None,
+        description="aws profile of the target table, the default if not set",
+    )
+    target_region: str
+    target_table: str
+    use_query: bool = Field(
+        default=True,
+        description="diff the current query or scan on both tables instead of the whole tables",
+    )
+    total_segments: int = Field(
+        default=1, description="parallel scan segments read at once on each side"
+    )
+    output_path: str | Path
+
+
+class ExportCheckpoint(BaseModel):
+    """Point an export part can be resumed from, taken after a page has been synced"""
+
+    last_evaluated_key: dict | None = Field(
+        default=None, description="key to carry on from as typed dynamodb json"
+    )
+    items: int = 0
+    offset: int = Field(default=0, description="bytes of the part file to keep")
+
+
+class ExportPart(BaseModel):
+    segment: int
+    path: str
+    items: int = 0
+    bytes_written: int = 0
+    finished: bool = False
+    error: str | None = None
+    checkpoint: ExportCheckpoint | None = None
+
+
+class ExportManifest(BaseModel):
+    """
+    Parts of an export, saved next to a parallel scan export as it runs and checkpointed
+    to the data store so an export that dies can be resumed
+    """
+
+    export_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    path: str
+    file_format: OutputFormat
+    compression: Compression = Compression.NONE
+    table_name: str | None = None
+    query_params: dict | None = Field(
+        default=None, description="query or scan being exported, without boto_params"
+    )
+    scan_mode: bool = True
+    total_segments: int
+    merge: bool = False
+    parts: list[ExportPart] = []
+    finished: bool = False
+    merged: bool = Field(
+        default=False, description="parts have been merged into path and removed"
+    )
+    updated_at: datetime | None = None
+
+    @property
+    def items(self) -> int:
+        return sum(part.items for part in self.parts)
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(part.bytes_written for part in self.parts)
+
+    @property
+    def segmented(self) -> bool:
+        return self.total_segments > 1
 
 
 class KeySchema(TypedDict):
@@ -162,9 +392,24 @@ class SavedQuery(QueryParameters):
     description: str
 
 
+class QueryRunMetrics(BaseModel):
+    """Metrics of the first page of a query run from the table view"""
+
+    items: int = 0
+    scanned_count: int = 0
+    consumed_capacity: float | None = None
+    elapsed: float = 0.0
+
+
 class QueryHistory(QueryParameters):
     table: str | None = None
     session_id: str | None = None
+    run_count: int = 1
+    first_run: datetime | None = None
+    last_run: datetime | None = None
+    last_metrics: QueryRunMetrics | None = Field(
+        default=None, description="metrics of the latest run of the query"
+    )
 
     def to_query_params(self) -> QueryParameters:
         return QueryParameters(
@@ -188,6 +433,42 @@ class Config(BaseModel):
     startup_session_group: str | None = Field(
         default=None, description="load a session group when the application starts"
     )
+    infinite_scroll: bool = Field(
+        default=False,
+        description="load the next page of results when scrolling near the bottom of the table instead of paging",
+    )
+    infinite_scroll_max_rows: int = Field(
+        default=10_000,
+        description="max number of rows to load into the table in infinite scroll mode",
+    )
+    export_segments: int = Field(
+        default=4,
+        description="number of parallel scan segments used by the parallel export, each is written to its own part file",
+    )
+    merge_export_parts: bool = Field(
+        default=True,
+        description="merge the part files of a parallel export into a single file once it finishes",
+    )
+    import_workers: int = Field(
+        default=4,
+        description="number of threads writing batches of items in parallel when importing a file",
+    )
+    history_max_rows: int | None = Field(
+        default=10_000,
+        description="max number of queries kept in the query history, the least recently run are removed first",
+    )
+    history_max_age_days: int | None = Field(
+        default=365,
+        description="remove queries from the query history that haven't been run for this many days",
+    )
+    database_busy_timeout: float = Field(
+        default=5.0,
+        description="seconds to wait for another dyno-viewer instance using the database to finish writing to it",
+    )
+    database_vacuum: bool = Field(
+        default=False,
+        description="vacuum a database made before auto vacuum was turned on once when the query history is compacted, so the space it frees is given back",
+    )
 
     @classmethod
     def load_config(cls) -> "Config":
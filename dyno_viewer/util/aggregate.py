@@ -0,0 +1,206 @@
+import math
+from decimal import Decimal
+from typing import Any, Iterable, Sequence
+
+import simplejson as json
+from pydantic import BaseModel
+
+from dyno_viewer.util.row_store import ColumnarRowStore, ColumnType, number_to_decimal
+
+# group everything is put in when there isn't a group by attribute
+ALL_GROUP = "(all)"
+# whole numbers summed as floats stay exact while the total fits in the mantissa
+MAX_EXACT_FLOAT = 2**53
+
+
+class AggregateResult(BaseModel):
+    group: str | None = None
+    count: int = 0
+    sum: Decimal | None = None
+    avg: Decimal | None = None
+    min: Decimal | None = None
+    max: Decimal | None = None
+
+
+class GroupAggregate:
+    """Running count/sum/min/max of one group, only the totals are kept"""
+
+    __slots__ = ("count", "value_count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.value_count = 0
+        self.total = Decimal(0)
+        self.minimum: Decimal | None = None
+        self.maximum: Decimal | None = None
+
+    def add(self, value: Any) -> None:
+        self.count += 1
+        self.add_value(value)
+
+    def add_value(self, value: Any) -> None:
+        """Add a value without counting its row, values that aren't numbers are skipped"""
+        if isinstance(value, bool) or not isinstance(value, (Decimal, int, float)):
+            return
+        value = Decimal(str(value)) if isinstance(value, float) else Decimal(value)
+        self.value_count += 1
+        self.total += value
+        self._update_range(value)
+
+    def add_numbers(self, numbers: list[float], exact: Iterable[Decimal] = ()) -> None:
+        """
+        Add the values of a numeric column without counting their rows. The floats are
+        summed as floats when that's exact, i.e they're all whole numbers and the total
+        can't outgrow `MAX_EXACT_FLOAT`, otherwise as `Decimal`
+
+        :param numbers: packed floats of the column
+        :type numbers: list[float]
+        :param exact: values that can't round trip through a float
+        :type exact: Iterable[Decimal]
+        """
+        if numbers:
+            low, high = min(numbers), max(numbers)
+            if max(-low, high) * len(numbers) < MAX_EXACT_FLOAT and all(
+                map(float.is_integer, numbers)
+            ):
+                total = Decimal(int(math.fsum(numbers)))
+            else:
+                total = sum(map(number_to_decimal, numbers), Decimal(0))
+            self.value_count += len(numbers)
+            self.total += total
+            self._update_range(number_to_decimal(low))
+            self._update_range(number_to_decimal(high))
+        for value in exact:
+            self.add_value(value)
+
+    def _update_range(self, value: Decimal) -> None:
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+
+def group_key(value: Any) -> str | None:
+    """
+    Turn the value of the group by attribute into something that can be grouped on
+
+    :param value: value of the group by attribute
+    :type value: Any
+    :return: group name or None if the item doesn't have the attribute
+    :rtype: str | None
+    """
+    if value is None:
+        return None
+    if isinstance(value, (dict, list, set)):
+        return json.dumps(
+            sorted(value, key=str) if isinstance(value, set) else value,
+            default=str,
+            sort_keys=True,
+        )
+    return str(value)
+
+
+class Aggregator:
+    """
+    Works out count/sum/avg/min/max per group as items are added, so it can be fed a
+    stream of pages without holding onto any of the items
+
+    :param group_by: attribute to group by, if not set everything is in the one group
+    :type group_by: str | None
+    :param attribute: numeric attribute to sum/avg/min/max, non numeric values are only counted
+    :type attribute: str | None
+    """
+
+    def __init__(self, group_by: str | None = None, attribute: str | None = None):
+        self.group_by = group_by or None
+        self.attribute = attribute or None
+        self.groups: dict[str | None, GroupAggregate] = {}
+        self.item_count = 0
+
+    def _group(self, key: str | None) -> GroupAggregate:
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = GroupAggregate()
+        return group
+
+    def _add(self, group_value: Any, value: Any) -> None:
+        self._group(group_key(group_value)).add(value)
+
+    def add_items(self, items: Iterable[dict]) -> None:
+        for item in items:
+            self.item_count += 1
+            self._add(
+                item.get(self.group_by) if self.group_by else ALL_GROUP,
+                item.get(self.attribute) if self.attribute else None,
+            )
+
+    def _group_rows(self, store: ColumnarRowStore) -> dict[str | None, Sequence[int]]:
+        """Rows of a row store in each group"""
+        rows = range(len(store))
+        if not self.group_by:
+            return {group_key(ALL_GROUP): rows}
+        column = store.column(self.group_by)
+        if column is None:
+            return {None: rows}
+        groups: dict[str | None, list[int]] = {}
+        # group key of each distinct value, by type as well since e.g True == 1
+        keys: dict[tuple[type, Any], str | None] = {}
+        for row, value in column.iter_values(0, len(store)):
+            try:
+                key = keys[type(value), value]
+            except KeyError:
+                key = keys[type(value), value] = group_key(value)
+            except TypeError:
+                # maps, lists and sets can't be hashed
+                key = group_key(value)
+            groups.setdefault(key, []).append(row)
+        missing = column.missing_rows(len(store))
+        if missing:
+            groups.setdefault(None, []).extend(missing)
+        return groups
+
+    def add_store(self, store: ColumnarRowStore) -> None:
+        """
+        Add every row of a row store, reading just the columns that are needed. A
+        numeric attribute is aggregated over the packed floats of each group's rows, see
+        `GroupAggregate.add_numbers`, a column of mixed types is read row by row
+        """
+        self.item_count += len(store)
+        value_column = store.column(self.attribute) if self.attribute else None
+        for key, rows in self._group_rows(store).items():
+            group = self._group(key)
+            group.count += len(rows)
+            if value_column is None:
+                continue
+            if value_column.is_numeric:
+                group.add_numbers(
+                    *value_column.number_values(
+                        None if len(rows) == len(store) else rows
+                    )
+                )
+            elif value_column.type == ColumnType.MIXED:
+                for row in rows:
+                    group.add_value(value_column.get(row))
+
+    def results(self) -> list[AggregateResult]:
+        """
+        Aggregates of every group seen so far, ordered by group with items missing the
+        group by attribute last
+
+        :return: one result per group
+        :rtype: list[AggregateResult]
+        """
+        return [
+            AggregateResult(
+                group=key,
+                count=group.count,
+                sum=group.total if group.value_count else None,
+                avg=group.total / group.value_count if group.value_count else None,
+                min=group.minimum,
+                max=group.maximum,
+            )
+            for key, group in sorted(
+                self.groups.items(),
+                key=lambda group: (group[0] is None, group[0] or ""),
+            )
+        ]
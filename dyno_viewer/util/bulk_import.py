@@ -0,0 +1,409 @@
+import base64
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Callable, Iterator
+
+import simplejson as json
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+from dyno_viewer.aws.ddb import to_dynamodb_json
+from dyno_viewer.models import FileToImport, ImportProgress, WriteProgress
+from dyno_viewer.util.export import COMPRESSION_SUFFIXES, export_json_default
+from dyno_viewer.util.segmented_export import iter_export_pages
+
+# most items BatchWriteItem takes in one request
+BATCH_WRITE_SIZE = 25
+MAX_RETRIES = 8
+RETRY_BASE_DELAY = 0.05
+RETRY_MAX_DELAY = 5.0
+# errors where the whole batch can be sent again after backing off
+RETRYABLE_ERRORS = {
+    "InternalServerError",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "ThrottlingException",
+}
+IMPORT_FORMATS = {"csv", "json", "jsonl", "ddb-json"}
+CSV_COLUMN_TYPES = {"S", "N", "B", "BOOL", "NULL", "SS", "NS", "BS", "L", "M"}
+
+
+def reject_path(path: str | Path) -> Path:
+    """Path of the file items that couldn't be imported are written to"""
+    path = Path(path)
+    name = path.name
+    for suffix in COMPRESSION_SUFFIXES.values():
+        name = name.removesuffix(suffix)
+    return path.with_name(f"{name}.rejected.jsonl")
+
+
+def parse_column_types(text: str) -> dict[str, str]:
+    """
+    Parse csv column types written as `name=type` pairs split by commas, e.g
+    `amount=N,tags=SS`
+
+    :param text: column types
+    :type text: str
+    :raises ValueError: if a pair is malformed or has an unknown type
+    :return: dynamodb type of each column
+    :rtype: dict[str, str]
+    """
+    column_types = {}
+    for pair in text.split(","):
+        if not pair.strip():
+            continue
+        name, sep, column_type = pair.partition("=")
+        column_type = column_type.strip().upper()
+        if not sep or not name.strip():
+            raise ValueError(f"column type '{pair.strip()}' isn't name=type")
+        if column_type not in CSV_COLUMN_TYPES:
+            raise ValueError(
+                f"unknown type {column_type} for column {name.strip()}, must be one of "
+                f"{', '.join(sorted(CSV_COLUMN_TYPES))}"
+            )
+        column_types[name.strip()] = column_type
+    return column_types
+
+
+def convert_csv_value(value: str, column_type: str):
+    """
+    Convert a csv value to the given dynamodb type, sets, lists and maps are read as
+    json like `CsvExportWriter` writes them and binary values as base64
+
+    :raises ValueError: if the value can't be converted
+    """
+    try:
+        if column_type == "N":
+            return Decimal(value)
+        if column_type == "B":
+            return Binary(base64.b64decode(value, validate=True))
+        if column_type == "BOOL":
+            if value.lower() not in ("true", "false"):
+                raise ValueError(f"{value} isn't true or false")
+            return value.lower() == "true"
+        if column_type == "NULL":
+            return None
+        if column_type == "S":
+            return value
+        parsed = json.loads(value, use_decimal=True)
+    except (ValueError, InvalidOperation) as e:
+        raise ValueError(f"can't read '{value}' as {column_type}: {e}") from e
+    if column_type in ("SS", "NS", "BS", "L") and not isinstance(parsed, list):
+        raise ValueError(f"can't read '{value}' as {column_type}, not a json list")
+    if column_type == "M" and not isinstance(parsed, dict):
+        raise ValueError(f"can't read '{value}' as M, not a json object")
+    if column_type == "SS":
+        return {str(element) for element in parsed}
+    if column_type == "NS":
+        return {Decimal(str(element)) for element in parsed}
+    if column_type == "BS":
+        return {Binary(base64.b64decode(element)) for element in parsed}
+    return parsed
+
+
+def item_write_units(item: dict) -> int:
+    """Rough write capacity units needed to put an item, one per started KB"""
+    size = len(json.dumps(item, default=export_json_default).encode())
+    return max(math.ceil(size / 1024), 1)
+
+
+class CapacityBudget:
+    """
+    Token bucket of capacity units shared between threads, refilled at a fixed rate
+    with up to a second of units banked. Units are reserved before a request is sent
+    so callers sleep off any debt, and the estimate is corrected once the consumed
+    capacity is known.
+
+    :param units_per_second: capacity units that can be used per second
+    :type units_per_second: float
+    """
+
+    def __init__(self, units_per_second: float) -> None:
+        if units_per_second <= 0:
+            raise ValueError("capacity budget has to be more than 0 units per second")
+        self.units_per_second = units_per_second
+        self._units = float(units_per_second)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._units = min(
+            self._units + (now - self._updated) * self.units_per_second,
+            self.units_per_second,
+        )
+        self._updated = now
+
+    def acquire(self, units: float) -> None:
+        """Reserve units, sleeping until the budget has caught up with them"""
+        with self._lock:
+            self._refill()
+            self._units -= units
+            wait = -self._units / self.units_per_second if self._units < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+    def adjust(self, units: float) -> None:
+        """Take extra units from the budget, or give them back if negative"""
+        with self._lock:
+            self._refill()
+            self._units = min(self._units - units, self.units_per_second)
+
+
+class TableWriter(ABC):
+    """
+    Write items to a table with BatchWriteItem. Subclasses yield the items from
+    `iter_items`, which is run on the calling thread, and batches of up to
+    `BATCH_WRITE_SIZE` items are written by a pool of worker threads sharing an
+    optional write capacity budget. Unprocessed items and throttled batches are retried
+    with exponential backoff, anything that still can't be written is added to a
+    reject file as dynamodb json with the error, so it can be fixed and imported again.
+
+    :param table: dynamodb table to write to
+    :param progress: progress to update as items are written
+    :type progress: WriteProgress
+    :param reject_path: file rejected items are written to, only created if an item is
+        rejected
+    :type reject_path: str | Path
+    :param workers: number of threads writing batches
+    :type workers: int
+    :param wcu_budget: max write capacity units used per second, no limit if not set
+    :type wcu_budget: int | None
+    """
+
+    def __init__(
+        self,
+        table,
+        progress: WriteProgress,
+        reject_path: str | Path,
+        workers: int = 4,
+        wcu_budget: int | None = None,
+    ) -> None:
+        self.table = table
+        self.progress = progress
+        self.reject_path = Path(reject_path)
+        self.workers = max(workers, 1)
+        self.key_names = [key["AttributeName"] for key in table.key_schema]
+        self.budget = CapacityBudget(wcu_budget) if wcu_budget else None
+        self._reject_file = None
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def iter_items(self) -> Iterator[dict]:
+        """Items to write to the table"""
+
+    def _update(
+        self,
+        on_progress: Callable[[WriteProgress], None],
+        items: int = 0,
+        consumed_capacity: float = 0.0,
+    ) -> None:
+        with self._lock:
+            self.progress.items += items
+            self.progress.consumed_capacity += consumed_capacity
+            self.progress.elapsed = time.monotonic() - self._start
+            progress = self.progress.model_copy()
+        on_progress(progress)
+
+    def _reject(self, items: list[dict], error: str) -> None:
+        with self._lock:
+            if self._reject_file is None:
+                self.progress.reject_path = self.reject_path
+                # only created once an item is rejected, closed when the run ends
+                self._reject_file = open(  # pylint: disable=consider-using-with
+                    self.reject_path, "w", encoding="utf-8"
+                )
+            for item in items:
+                self._reject_file.write(
+                    json.dumps(
+                        {"Item": to_dynamodb_json(item), "Error": error},
+                        default=export_json_default,
+                    )
+                    + "\n"
+                )
+            self.progress.rejected += len(items)
+
+    def _backoff(self, attempt: int) -> None:
+        delay = min(RETRY_BASE_DELAY * 2**attempt, RETRY_MAX_DELAY)
+        time.sleep(delay * random.uniform(0.5, 1))
+
+    def _write_batch(
+        self,
+        items: list[dict],
+        is_cancelled: Callable[[], bool],
+        on_progress: Callable[[WriteProgress], None],
+    ) -> None:
+        client = self.table.meta.client
+        pending = items
+        attempt = 0
+        while pending and not is_cancelled():
+            units = sum(item_write_units(item) for item in pending)
+            if self.budget:
+                self.budget.acquire(units)
+            try:
+                response = client.batch_write_item(
+                    RequestItems={
+                        self.table.name: [
+                            {"PutRequest": {"Item": item}} for item in pending
+                        ]
+                    },
+                    ReturnConsumedCapacity="TOTAL",
+                )
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code in RETRYABLE_ERRORS and attempt < MAX_RETRIES:
+                    attempt += 1
+                    self._backoff(attempt)
+                    continue
+                if code not in RETRYABLE_ERRORS and len(pending) > 1:
+                    # one bad item fails the whole batch, write them one at a time
+                    # so only the bad ones are rejected
+                    for item in pending:
+                        self._write_batch([item], is_cancelled, on_progress)
+                    return
+                self._reject(pending, str(e))
+                self._update(on_progress)
+                return
+            consumed = sum(
+                capacity.get("CapacityUnits", 0)
+                for capacity in response.get("ConsumedCapacity", [])
+            )
+            if self.budget and response.get("ConsumedCapacity"):
+                self.budget.adjust(consumed - units)
+            unprocessed = [
+                request["PutRequest"]["Item"]
+                for request in response.get("UnprocessedItems", {}).get(
+                    self.table.name, []
+                )
+            ]
+            self._update(on_progress, len(pending) - len(unprocessed), consumed)
+            pending = unprocessed
+            if pending:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    self._reject(
+                        pending, f"still unprocessed after {MAX_RETRIES} retries"
+                    )
+                    self._update(on_progress)
+                    return
+                self._backoff(attempt)
+
+    def _iter_batches(self) -> Iterator[list[dict]]:
+        batch = []
+        keys = set()
+        for item in self.iter_items():
+            missing = [name for name in self.key_names if name not in item]
+            if missing:
+                self._reject([item], f"missing key attribute {', '.join(missing)}")
+                continue
+            key = tuple(item[name] for name in self.key_names)
+            # dynamodb rejects a batch that puts the same key twice, so the later put
+            # goes in the next batch
+            if len(batch) >= BATCH_WRITE_SIZE or key in keys:
+                yield batch
+                batch = []
+                keys = set()
+            batch.append(item)
+            keys.add(key)
+        if batch:
+            yield batch
+
+    def run(
+        self,
+        is_cancelled: Callable[[], bool] = lambda: False,
+        on_progress: Callable[[WriteProgress], None] = lambda _: None,
+    ) -> ImportProgress:
+        """
+        Import the file, at most two batches per worker are read ahead of the writes
+
+        :param is_cancelled: checked before each batch is read and sent
+        :type is_cancelled: Callable[[], bool]
+        :param on_progress: called from the worker threads after each request
+        :type on_progress: Callable[[WriteProgress], None]
+        :return: progress of the import
+        :rtype: ImportProgress
+        """
+        self._start = time.monotonic()
+        in_flight = threading.BoundedSemaphore(self.workers * 2)
+        futures: list[Future] = []
+        batches = self._iter_batches()
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="write batch"
+            ) as pool:
+                for batch in batches:
+                    if is_cancelled():
+                        break
+                    # released by the batch's done callback, not in this block
+                    in_flight.acquire()  # pylint: disable=consider-using-with
+                    future = pool.submit(
+                        self._write_batch, batch, is_cancelled, on_progress
+                    )
+                    future.add_done_callback(lambda _: in_flight.release())
+                    futures.append(future)
+                    for done in [future for future in futures if future.done()]:
+                        # raises the error of a batch that failed
+                        done.result()
+                        futures.remove(done)
+            for future in futures:
+                future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            self.progress.error = str(e)
+        finally:
+            # stops any threads reading items for the batches
+            batches.close()
+            if self._reject_file:
+                self._reject_file.close()
+        self.progress.elapsed = time.monotonic() - self._start
+        self.progress.finished = not self.progress.error and not is_cancelled()
+        return self.progress
+
+
+class BulkImport(TableWriter):
+    """
+    Import a json, json lines, dynamodb json or csv file into a table, see
+    `TableWriter`. Rejected items are written next to the file.
+
+    :param table: dynamodb table to import into
+    :param file_to_import: file, format, csv column types and write capacity budget
+    :type file_to_import: FileToImport
+    :param workers: number of threads writing batches
+    :type workers: int
+    """
+
+    def __init__(self, table, file_to_import: FileToImport, workers: int = 4) -> None:
+        file_format = file_to_import.file_format.value
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"can't import a {file_format} file")
+        super().__init__(
+            table,
+            ImportProgress(path=file_to_import.path),
+            reject_path(file_to_import.path),
+            workers=workers,
+            wcu_budget=file_to_import.wcu_budget,
+        )
+        self.file_to_import = file_to_import
+
+    def iter_items(self) -> Iterator[dict]:
+        """Items of the file, csv values are converted with the column types"""
+        file_format = self.file_to_import.file_format.value
+        column_types = self.file_to_import.column_types
+        for page in iter_export_pages(self.file_to_import.path, file_format):
+            for item in page:
+                if file_format == "csv":
+                    try:
+                        item = {
+                            name: convert_csv_value(value, column_types.get(name, "S"))
+                            for name, value in item.items()
+                        }
+                    except ValueError as e:
+                        self._reject([item], str(e))
+                        continue
+                yield item
@@ -0,0 +1,852 @@
+import base64
+import csv
+import gzip
+import io
+import os
+import queue
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterator, TextIO
+
+import simplejson as json
+
+from dyno_viewer.aws.ddb import from_dynamodb_json, to_dynamodb_json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # arrow and parquet exports are only available when pyarrow is installed
+    pa = None
+    pq = None
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        # zstd compression is only available on python 3.14+ or with zstandard
+        zstd = None
+
+if TYPE_CHECKING:
+    from dyno_viewer.models import Compression, ExportCheckpoint, OutputFormat
+
+COPY_CHUNK_SIZE = 1024 * 1024
+# rows buffered before a parquet row group is written, pages are usually much smaller
+PARQUET_ROW_GROUP_SIZE = 64 * 1024
+INT64_RANGE = range(-(2**63), 2**63)
+# chunks of COPY_CHUNK_SIZE waiting to be compressed, bounds the memory used when the
+# compressor falls behind
+COMPRESS_QUEUE_SIZE = 8
+
+# keyed by the Compression value, both modules have an open that accepts a file object
+COMPRESSION_MODULES = {"gzip": gzip}
+if zstd is not None:
+    COMPRESSION_MODULES["zstd"] = zstd
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def export_json_default(value):
+    """Convert the values dynamodb returns that json can't serialise"""
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (bytes, bytearray)) or hasattr(value, "value"):
+        return base64.b64encode(bytes(getattr(value, "value", value))).decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def normalise_csv_value(value):
+    if isinstance(value, (dict, list, set)):
+        return json.dumps(value, default=export_json_default)
+    if isinstance(value, (bytes, bytearray)) or hasattr(value, "value"):
+        return export_json_default(value)
+    return value
+
+
+def copy_range(source: BinaryIO, target: BinaryIO, length: int) -> None:
+    """Copy bytes from the current position of one file to another in chunks"""
+    while length > 0:
+        data = source.read(min(length, COPY_CHUNK_SIZE))
+        if not data:
+            return
+        target.write(data)
+        length -= len(data)
+
+
+class CompressedOutput(io.RawIOBase):
+    """
+    Write only file that compresses on a background thread. Writes are collected into
+    chunks which are handed to the compressor through a bounded queue, so fetching the
+    next page and compressing the last one overlap. Errors from the compressor are
+    raised on the next write or when the file is closed.
+
+    :param path: file to write the compressed output to
+    :type path: str | Path
+    :param compression: compression to use, a key of `COMPRESSION_MODULES`
+    :type compression: str
+    """
+
+    def __init__(self, path: str | Path, compression: str) -> None:
+        super().__init__()
+        # closed by close() once the compressor thread has written everything
+        self._file = open(path, "wb")  # pylint: disable=consider-using-with
+        self._stream = COMPRESSION_MODULES[compression].open(self._file, "wb")
+        self._queue: queue.Queue[bytes | None] = queue.Queue(
+            maxsize=COMPRESS_QUEUE_SIZE
+        )
+        self._chunk = bytearray()
+        self._position = 0
+        self._error: Exception | None = None
+        self._thread = threading.Thread(
+            target=self._compress, name=f"compress {path}", daemon=True
+        )
+        self._thread.start()
+
+    def _compress(self) -> None:
+        while (chunk := self._queue.get()) is not None:
+            if self._error is not None:
+                # keep taking chunks so the writing side never blocks
+                continue
+            try:
+                self._stream.write(chunk)
+            except Exception as e:  # pylint: disable=broad-except
+                self._error = e
+        try:
+            self._stream.close()
+        except Exception as e:  # pylint: disable=broad-except
+            self._error = self._error or e
+        finally:
+            self._file.close()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._raise_error()
+        self._chunk += data
+        self._position += len(data)
+        if len(self._chunk) >= COPY_CHUNK_SIZE:
+            self._queue.put(bytes(self._chunk))
+            self._chunk.clear()
+        return len(data)
+
+    def tell(self) -> int:
+        """Uncompressed bytes written so far"""
+        return self._position
+
+    def flush(self) -> None:
+        if self._chunk and not self.closed:
+            self._queue.put(bytes(self._chunk))
+            self._chunk.clear()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        super().close()
+        self._raise_error()
+
+
+def open_export_output(
+    path: str | Path, compression: "Compression | str | None" = None
+) -> BinaryIO:
+    """
+    Open the file an export is written to
+
+    :param path: file to export to
+    :type path: str | Path
+    :param compression: compression to use, none if not set
+    :type compression: Compression | str | None
+    :return: binary file
+    :rtype: BinaryIO
+    """
+    compression = getattr(compression, "value", compression)
+    if not compression or compression == "none":
+        return open(path, "wb")
+    if compression not in COMPRESSION_MODULES:
+        raise ValueError(f"{compression} compression is not available")
+    return CompressedOutput(path, compression)
+
+
+def open_resumed_output(
+    path: str | Path, compression: "Compression | str | None", offset: int
+) -> BinaryIO:
+    """
+    Reopen an export to carry on writing from a checkpoint, anything written after the
+    checkpoint is dropped
+
+    :param path: file being exported to
+    :type path: str | Path
+    :param compression: compression of the export, compressed exports can't be resumed
+    :type compression: Compression | str | None
+    :param offset: bytes written when the checkpoint was taken
+    :type offset: int
+    :return: binary file positioned at the checkpoint
+    :rtype: BinaryIO
+    :raises: ValueError if the export can't be resumed from the checkpoint
+    """
+    compression = getattr(compression, "value", compression)
+    if compression and compression != "none":
+        raise ValueError("compressed exports can't be resumed")
+    # returned to the caller, who closes it when the export finishes
+    output = open(path, "r+b")  # pylint: disable=consider-using-with
+    if os.fstat(output.fileno()).st_size < offset:
+        output.close()
+        raise ValueError(f"{path} is shorter than its checkpoint")
+    output.truncate(offset)
+    output.seek(offset)
+    return output
+
+
+def detect_compression(path: str | Path) -> str | None:
+    """
+    Work out how an export is compressed from its first bytes
+
+    :param path: exported file
+    :type path: str | Path
+    :return: gzip, zstd or None if it isn't compressed
+    :rtype: str | None
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(ZSTD_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def open_export_binary(path: str | Path) -> BinaryIO:
+    """
+    Open an export for reading, gzip and zstd compressed files are decompressed as
+    they're read
+
+    :param path: exported file
+    :type path: str | Path
+    :return: binary file
+    :rtype: BinaryIO
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        return open(path, "rb")
+    if compression not in COMPRESSION_MODULES:
+        raise ImportError("zstandard is needed to read zstd compressed exports")
+    return COMPRESSION_MODULES[compression].open(path, "rb")
+
+
+def open_export_input(path: str | Path, newline: str | None = None) -> TextIO:
+    """
+    Open an export for reading as text, see `open_export_binary`
+
+    :param path: exported file
+    :type path: str | Path
+    :param newline: newline handling, "" for csv files
+    :type newline: str | None
+    :return: text file
+    :rtype: TextIO
+    """
+    return io.TextIOWrapper(open_export_binary(path), encoding="utf-8", newline=newline)
+
+
+class ExportWriter(ABC):
+    """
+    Base class of the streaming export writers, each page of items is written out as
+    soon as it is fetched so an export never holds more than a page in memory
+
+    :param path: file to export to
+    :type path: str | Path
+    :param compression: compress the file with gzip or zstd
+    :type compression: Compression | str | None
+    :param checkpoint: carry on writing an export from a checkpoint, only for writers
+        that are `resumable`
+    :type checkpoint: ExportCheckpoint | None
+    """
+
+    # whether the file is valid up to the end of every page, so writing can carry on
+    # from the end of any page that has been synced
+    resumable = False
+
+    def __init__(
+        self,
+        path: str | Path,
+        compression: "Compression | str | None" = None,
+        checkpoint: "ExportCheckpoint | None" = None,
+    ) -> None:
+        self.path = Path(path)
+        self.items_written = checkpoint.items if checkpoint else 0
+        self.bytes_written = checkpoint.offset if checkpoint else 0
+        self._output: BinaryIO = (
+            open_resumed_output(self.path, compression, checkpoint.offset)
+            if checkpoint
+            else open_export_output(self.path, compression)
+        )
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _write(self, data: str) -> None:
+        encoded = data.encode("utf-8")
+        self._output.write(encoded)
+        self.bytes_written += len(encoded)
+
+    @abstractmethod
+    def write_page(self, items: list[dict]) -> None:
+        """Write a page of items to the file"""
+
+    def sync(self) -> None:
+        """Make sure everything written so far is on disk, before taking a checkpoint"""
+        self._output.flush()
+        os.fsync(self._output.fileno())
+
+    def close(self) -> None:
+        if not self._output.closed:
+            self._output.close()
+
+
+class JsonExportWriter(ExportWriter):
+    """Writes one json array with an item per line"""
+
+    resumable = True
+
+    def __init__(
+        self,
+        path: str | Path,
+        compression: "Compression | str | None" = None,
+        checkpoint: "ExportCheckpoint | None" = None,
+    ) -> None:
+        super().__init__(path, compression, checkpoint)
+        if checkpoint is None:
+            self._write("[")
+
+    def write_page(self, items: list[dict]) -> None:
+        lines = [json.dumps(item, default=export_json_default) for item in items]
+        if not lines:
+            return
+        self._write(("\n" if not self.items_written else ",\n") + ",\n".join(lines))
+        self._output.flush()
+        self.items_written += len(lines)
+
+    def close(self) -> None:
+        if not self._output.closed:
+            self._write("\n]\n")
+        super().close()
+
+
+class JsonLinesExportWriter(ExportWriter):
+    """
+    Writes one json object per line (https://jsonlines.org), sets are written as lists
+    and binary values as base64 strings
+    """
+
+    resumable = True
+
+    def serialise_item(self, item: dict) -> str:
+        return json.dumps(item, default=export_json_default)
+
+    def write_page(self, items: list[dict]) -> None:
+        lines = [self.serialise_item(item) + "\n" for item in items]
+        self._write("".join(lines))
+        self._output.flush()
+        self.items_written += len(lines)
+
+
+class DynamoDbJsonExportWriter(JsonLinesExportWriter):
+    """
+    Writes one item per line as typed dynamodb json, so every attribute type (sets,
+    binary, numbers) survives being imported back into a table
+    """
+
+    def serialise_item(self, item: dict) -> str:
+        return json.dumps(to_dynamodb_json(item))
+
+
+class CsvExportWriter(ExportWriter):
+    """
+    Writes a csv with a column per attribute in a single pass.
+
+    Without a header up front columns are added as they're first seen, rows are written
+    straight into a temporary spill file and the header is stitched onto the front
+    when the writer is closed. Rows written before the last column was found are padded
+    out, rows written after are copied across as is.
+
+    :param path: file to export to
+    :type path: str | Path
+    :param columns: header to use, e.g from sampling the first page. Attributes that
+        aren't in it are left out of the export
+    :type columns: list[str] | None
+    :param compression: compress the file with gzip or zstd
+    :type compression: Compression | str | None
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        columns: list[str] | None = None,
+        compression: "Compression | str | None" = None,
+    ) -> None:
+        super().__init__(path, compression)
+        self._columns: dict[str, int] = {
+            name: i for i, name in enumerate(columns or [])
+        }
+        self._fixed_columns = columns is not None
+        if self._fixed_columns:
+            self._spill = None
+            self._target = self._output
+        else:
+            self._spill = tempfile.TemporaryFile("w+b", dir=self.path.parent)
+            self._target = self._spill
+        self._text = io.TextIOWrapper(self._target, encoding="utf-8", newline="")
+        self._writer = csv.writer(self._text)
+        # spill offset and row width each time a new column is found
+        self._widths: list[tuple[int, int]] = []
+        if self._fixed_columns:
+            self._writer.writerow(self._columns)
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._columns)
+
+    def write_page(self, items: list[dict]) -> None:
+        columns = self._columns
+        for item in items:
+            if not self._fixed_columns and not columns.keys() >= item.keys():
+                self._text.flush()
+                for name in item:
+                    if name not in columns:
+                        columns[name] = len(columns)
+                self._widths.append((self._spill.tell(), len(columns)))
+            row = [""] * len(columns)
+            for name, value in item.items():
+                index = columns.get(name)
+                if index is not None:
+                    row[index] = (
+                        value if isinstance(value, str) else normalise_csv_value(value)
+                    )
+            self._writer.writerow(row)
+            self.items_written += 1
+        self._text.flush()
+        self.bytes_written = self._target.tell()
+
+    def _spilled_lines(self, start: int, end: int):
+        self._spill.seek(start)
+        while self._spill.tell() < end:
+            yield self._spill.readline().decode("utf-8")
+
+    def _stitch(self) -> None:
+        """Write the header followed by the spilled rows into the output file"""
+        width = len(self._columns)
+        with io.TextIOWrapper(self._output, encoding="utf-8", newline="") as output:
+            writer = csv.writer(output)
+            writer.writerow(self._columns)
+            output.flush()
+            spill_end = self._spill.seek(0, os.SEEK_END)
+            for i, (start, row_width) in enumerate(self._widths):
+                end = self._widths[i + 1][0] if i + 1 < len(self._widths) else spill_end
+                if row_width == width:
+                    self._spill.seek(start)
+                    output.flush()
+                    copy_range(self._spill, self._output, end - start)
+                    continue
+                padding = [""] * (width - row_width)
+                for row in csv.reader(self._spilled_lines(start, end)):
+                    writer.writerow(row + padding)
+
+    def close(self) -> None:
+        if self._output.closed:
+            return
+        self._text.flush()
+        if self._fixed_columns:
+            self._text.close()
+        else:
+            self._stitch()
+            self._text.close()
+        self.bytes_written = os.path.getsize(self.path)
+
+
+def to_arrow_value(value):
+    """
+    Convert a value returned from dynamodb into one pyarrow can infer a type from.
+    Numbers become ints when they are whole and fit in an int64 otherwise floats, sets
+    become sorted lists and binary values bytes.
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, Decimal):
+        if value == value.to_integral_value() and int(value) in INT64_RANGE:
+            return int(value)
+        return float(value)
+    if isinstance(value, dict):
+        return {key: to_arrow_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_arrow_value(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(to_arrow_value(item) for item in value)
+    if isinstance(value, (bytes, bytearray)) or hasattr(value, "value"):
+        return bytes(getattr(value, "value", value))
+    return value
+
+
+def to_json_text(value) -> str | None:
+    """Text stored in a column that has values of more than one type"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, default=export_json_default)
+
+
+def cast_arrow_column(column, target_type):
+    """
+    Cast a column to the type of the merged schema, columns merged into a string
+    column because of mixed types are converted to json text
+    """
+    if column.type == target_type:
+        return column
+    if pa.types.is_string(target_type):
+        return pa.array(
+            [to_json_text(value) for value in column.to_pylist()], type=target_type
+        )
+    try:
+        return column.cast(target_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        return pa.array(column.to_pylist(), type=target_type)
+
+
+def cast_record_batch(batch, schema):
+    """Cast a record batch to a schema, adding null columns for missing fields"""
+    if batch.schema.equals(schema):
+        return batch
+    columns = []
+    for field in schema:
+        index = batch.schema.get_field_index(field.name)
+        columns.append(
+            pa.nulls(batch.num_rows, field.type)
+            if index == -1
+            else cast_arrow_column(batch.column(index), field.type)
+        )
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class ArrowExportWriter(ExportWriter):
+    """
+    Writes an Arrow IPC file with a record batch per page. Column types are inferred
+    from each page, maps become struct columns and lists/sets list columns. A column
+    with values of more than one type is written as json text.
+
+    Pages are written straight to the output while their schema matches, when a page
+    brings new columns or wider types a new segment is started in a temporary file and
+    every segment is cast to the merged schema when the writer is closed.
+    """
+
+    def __init__(
+        self, path: str | Path, compression: "Compression | str | None" = None
+    ) -> None:
+        if pa is None:
+            raise ImportError("pyarrow is needed to export to arrow or parquet")
+        super().__init__(path, compression)
+        self.schema = None
+        self._json_columns: set[str] = set()
+        self._segments: list[BinaryIO] = []
+        self._writer = None
+
+    def _open_writer(self, sink: BinaryIO, schema):
+        return pa.ipc.new_file(sink, schema)
+
+    def _read_batches(self, source: BinaryIO):
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+    def _write_batch(self, batch) -> None:
+        self._writer.write_batch(batch)
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def supports_type(self, arrow_type) -> bool:  # pylint: disable=unused-argument
+        """Whether a column of an arrow type can be written, arrow files take any type"""
+        return True
+
+    def _page_column(self, name: str, values: list):
+        if name not in self._json_columns:
+            try:
+                column = pa.array([to_arrow_value(value) for value in values])
+                if self.supports_type(column.type):
+                    return column
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                pass
+            self._json_columns.add(name)
+        return pa.array([to_json_text(value) for value in values], type=pa.string())
+
+    def _page_batch(self, items: list[dict]):
+        names = list(dict.fromkeys(name for item in items for name in item))
+        return pa.RecordBatch.from_arrays(
+            [
+                self._page_column(name, [item.get(name) for item in items])
+                for name in names
+            ],
+            names=names,
+        )
+
+    def _merge_schema(self, page_schema):
+        fields = {field.name: field for field in self.schema}
+        for field in page_schema:
+            existing = fields.get(field.name)
+            if existing is None:
+                fields[field.name] = field
+            elif existing.type != field.type and field.name not in self._json_columns:
+                try:
+                    fields[field.name] = pa.unify_schemas(
+                        [pa.schema([existing]), pa.schema([field])],
+                        promote_options="permissive",
+                    ).field(0)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    self._json_columns.add(field.name)
+            if field.name in self._json_columns:
+                fields[field.name] = pa.field(field.name, pa.string())
+        return pa.schema(list(fields.values()))
+
+    def _start_segment(self, schema) -> None:
+        self._close_writer()
+        sink = self._output
+        if self._segments or isinstance(self._output, CompressedOutput):
+            # compressed output can't be rewritten so is only written once at the end
+            sink = tempfile.TemporaryFile("w+b", dir=self.path.parent)
+        self._segments.append(sink)
+        self.schema = schema
+        self._writer = self._open_writer(sink, schema)
+
+    def write_page(self, items: list[dict]) -> None:
+        if not items:
+            return
+        self.write_batch(self._page_batch(items))
+
+    def write_batch(self, batch) -> None:
+        """
+        Write a record batch, e.g from another arrow or parquet file, it's cast to the
+        merged schema the same way as a page of items
+
+        :param batch: record batch to write
+        :type batch: pyarrow.RecordBatch
+        """
+        if not batch.num_rows:
+            return
+        if self.schema is None:
+            self._start_segment(batch.schema)
+        else:
+            schema = self._merge_schema(batch.schema)
+            if not schema.equals(self.schema):
+                self._start_segment(schema)
+        self._write_batch(cast_record_batch(batch, self.schema))
+        self.items_written += batch.num_rows
+        self.bytes_written = sum(segment.tell() for segment in self._segments)
+
+    def _stitch(self) -> None:
+        """Rewrite every segment into the output with the merged schema"""
+        segments = self._segments
+        if segments[0] is self._output:
+            first = tempfile.TemporaryFile("w+b", dir=self.path.parent)
+            self._output.flush()
+            with open(self.path, "rb") as output:
+                copy_range(output, first, os.path.getsize(self.path))
+            self._output.seek(0)
+            self._output.truncate()
+            segments = [first, *segments[1:]]
+        self._segments = [self._output]
+        self._writer = self._open_writer(self._output, self.schema)
+        for segment in segments:
+            segment.seek(0)
+            for batch in self._read_batches(segment):
+                self._write_batch(cast_record_batch(batch, self.schema))
+            segment.close()
+
+    def close(self) -> None:
+        if self._output.closed:
+            return
+        if self.schema is None:
+            # nothing was written, still leave a valid file with no columns
+            self._start_segment(pa.schema([]))
+        self._close_writer()
+        if len(self._segments) > 1 or self._segments[0] is not self._output:
+            self._stitch()
+            self._close_writer()
+        super().close()
+        self.bytes_written = os.path.getsize(self.path)
+
+
+def has_empty_struct(arrow_type) -> bool:
+    if pa.types.is_struct(arrow_type):
+        return arrow_type.num_fields == 0 or any(
+            has_empty_struct(field.type) for field in arrow_type
+        )
+    if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return has_empty_struct(arrow_type.value_type)
+    return False
+
+
+class ParquetExportWriter(ArrowExportWriter):
+    """
+    Writes a parquet file, pages are buffered into row groups of
+    `PARQUET_ROW_GROUP_SIZE` rows. Empty maps can't be stored in parquet so columns
+    with them are written as json text.
+    """
+
+    def __init__(
+        self, path: str | Path, compression: "Compression | str | None" = None
+    ) -> None:
+        super().__init__(path, compression)
+        self._pending: list = []
+        self._pending_rows = 0
+
+    def _open_writer(self, sink: BinaryIO, schema):
+        return pq.ParquetWriter(sink, schema)
+
+    def _read_batches(self, source: BinaryIO):
+        return pq.ParquetFile(source).iter_batches()
+
+    def _flush_row_group(self) -> None:
+        if self._pending:
+            self._writer.write_table(pa.Table.from_batches(self._pending))
+            self._pending = []
+            self._pending_rows = 0
+
+    def _write_batch(self, batch) -> None:
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= PARQUET_ROW_GROUP_SIZE:
+            self._flush_row_group()
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._flush_row_group()
+        super()._close_writer()
+
+    def supports_type(self, arrow_type) -> bool:
+        return not has_empty_struct(arrow_type)
+
+
+# keyed by the OutputFormat value, models can't be imported here as it imports util
+EXPORT_WRITERS: dict[str, type[ExportWriter]] = {
+    "csv": CsvExportWriter,
+    "json": JsonExportWriter,
+    "jsonl": JsonLinesExportWriter,
+    "ddb-json": DynamoDbJsonExportWriter,
+}
+if pa is not None:
+    EXPORT_WRITERS["arrow"] = ArrowExportWriter
+    EXPORT_WRITERS["parquet"] = ParquetExportWriter
+
+
+def is_resumable(
+    file_format: "OutputFormat | str", compression: "Compression | str | None" = None
+) -> bool:
+    """
+    Check if an export can be resumed from a checkpoint, only uncompressed json, json
+    lines and dynamodb json exports can be
+
+    :param file_format: format of the export
+    :type file_format: OutputFormat | str
+    :param compression: compression of the export
+    :type compression: Compression | str | None
+    :return: True if the export can be resumed
+    :rtype: bool
+    """
+    writer_class = EXPORT_WRITERS.get(getattr(file_format, "value", file_format))
+    compression = getattr(compression, "value", compression)
+    return bool(
+        writer_class
+        and writer_class.resumable
+        and (not compression or compression == "none")
+    )
+
+
+def get_export_writer(
+    file_format: "OutputFormat | str",
+    path: str | Path,
+    compression: "Compression | str | None" = None,
+    checkpoint: "ExportCheckpoint | None" = None,
+) -> ExportWriter:
+    """
+    Create the streaming writer for an output format
+
+    :param file_format: format to export in
+    :type file_format: OutputFormat | str
+    :param path: file to export to
+    :type path: str | Path
+    :param compression: compress the file with gzip or zstd
+    :type compression: Compression | str | None
+    :param checkpoint: carry on writing an export from a checkpoint
+    :type checkpoint: ExportCheckpoint | None
+    :return: export writer
+    :rtype: ExportWriter
+    :raises: ValueError if resuming an export that can't be resumed
+    """
+    writer_class = EXPORT_WRITERS[getattr(file_format, "value", file_format)]
+    if checkpoint is None:
+        return writer_class(path, compression=compression)
+    if not is_resumable(file_format, compression):
+        raise ValueError(f"{path} can't be resumed")
+    return writer_class(path, compression=compression, checkpoint=checkpoint)
+
+
+def iter_export_items(
+    path: str | Path, file_format: "OutputFormat | str"
+) -> Iterator[dict]:
+    """
+    Read back the items of a json, json lines or dynamodb json export, which can be
+    gzip or zstd compressed. Json lines, dynamodb json and json arrays written by
+    `JsonExportWriter` are read a line at a time, any other json array has to be
+    loaded in one go
+
+    :param path: exported file
+    :type path: str | Path
+    :param file_format: format the file was exported in
+    :type file_format: OutputFormat | str
+    :return: iterator of items
+    :rtype: Iterator[dict]
+    """
+    file_format = getattr(file_format, "value", file_format)
+    with open_export_input(path) as f:
+        if file_format == "json":
+            yield from _iter_json_array(f)
+            return
+        if file_format not in ("jsonl", "ddb-json"):
+            raise ValueError(f"can't read items from a {file_format} export")
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line, use_decimal=True)
+            yield from_dynamodb_json(item) if file_format == "ddb-json" else item
+
+
+def _iter_json_array(f: TextIO) -> Iterator[dict]:
+    start = f.readline()
+    first_item = f.readline()
+    try:
+        # JsonExportWriter puts the opening bracket and every item on their own line
+        items = [json.loads(first_item.rstrip().rstrip(","), use_decimal=True)]
+        if start.strip() != "[" or not isinstance(items[0], dict):
+            raise ValueError("not one item per line")
+    except ValueError:
+        yield from json.loads(start + first_item + f.read(), use_decimal=True)
+        return
+    yield from items
+    for line in f:
+        line = line.rstrip().rstrip(",")
+        if line and line != "]":
+            yield json.loads(line, use_decimal=True)
@@ -1,8 +1,9 @@
 from pathlib import Path
+from typing import Iterable
 
-import simplejson as json
+from dyno_viewer.util.export import JsonExportWriter
 
 
-def save_query_results_to_json(path: str | Path, data: list[dict]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+def save_query_results_to_json(path: str | Path, data: Iterable[dict]) -> None:
+    with JsonExportWriter(path) as writer:
+        writer.write_page(data)
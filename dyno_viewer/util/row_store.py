@@ -0,0 +1,492 @@
+import sys
+from array import array
+from decimal import Decimal
+from enum import Enum
+from itertools import compress
+from typing import Any, Iterable, Iterator, Sequence
+
+
+class ColumnType(Enum):
+    """Type tag of a column, based on the dynamodb attribute types"""
+
+    NUMBER = "N"
+    STRING = "S"
+    BOOLEAN = "BOOL"
+    BINARY = "B"
+    MAP = "M"
+    LIST = "L"
+    SET = "SS"
+    NULL = "NULL"
+    MIXED = "MIXED"
+
+
+def get_column_type(value: Any) -> ColumnType:
+    """
+    Work out the column type tag for a value returned from dynamodb
+
+    :param value: value of an attribute
+    :type value: Any
+    :return: column type tag
+    :rtype: ColumnType
+    """
+    if isinstance(value, bool):
+        return ColumnType.BOOLEAN
+    if isinstance(value, (Decimal, int, float)):
+        return ColumnType.NUMBER
+    if isinstance(value, str):
+        return ColumnType.STRING
+    if isinstance(value, (bytes, bytearray)) or hasattr(value, "value"):
+        return ColumnType.BINARY
+    if isinstance(value, dict):
+        return ColumnType.MAP
+    if isinstance(value, list):
+        return ColumnType.LIST
+    if isinstance(value, (set, frozenset)):
+        return ColumnType.SET
+    if value is None:
+        return ColumnType.NULL
+    return ColumnType.MIXED
+
+
+# order used when sorting a column that has values of more than one type
+SORT_TYPE_RANK = {
+    ColumnType.NUMBER: 0,
+    ColumnType.STRING: 1,
+    ColumnType.BOOLEAN: 2,
+    ColumnType.BINARY: 3,
+}
+
+
+_INVERT_PRESENT = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+
+
+def number_to_decimal(value: float) -> Decimal:
+    """The `Decimal` a number packed into a numeric column was read from"""
+    return Decimal(int(value)) if value.is_integer() else Decimal(repr(value))
+
+
+class Column:
+    """
+    A single attribute across all rows in a `ColumnarRowStore`.
+
+    Numbers are packed into a float array with any value that can't round trip
+    through a float kept as its original `Decimal`, every other type is kept in a list.
+    Whether a row has the attribute at all is tracked separately so missing values
+    and nulls can be told apart.
+    """
+
+    __slots__ = ("name", "type", "_present", "_numbers", "_exact", "_values")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.type: ColumnType | None = None
+        self._present = bytearray()
+        self._numbers = array("d")
+        self._exact: dict[int, Decimal] = {}
+        self._values: list[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._present)
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.type == ColumnType.NUMBER
+
+    def copy(self) -> "Column":
+        """A copy of the column that isn't changed by rows added to this one"""
+        column = Column(self.name)
+        column.type = self.type
+        column._present = self._present[:]
+        column._numbers = self._numbers[:]
+        column._exact = dict(self._exact)
+        column._values = self._values[:]
+        return column
+
+    def _pad(self, row: int) -> None:
+        missing = row - len(self._present)
+        if missing <= 0:
+            return
+        self._present.extend(bytes(missing))
+        if self.is_numeric:
+            self._numbers.extend([0.0] * missing)
+        else:
+            self._values.extend([None] * missing)
+
+    def _to_mixed(self) -> None:
+        self._values = [self.get(row) for row in range(len(self._present))]
+        self._numbers = array("d")
+        self._exact = {}
+        self.type = ColumnType.MIXED
+
+    def append(self, row: int, value: Any) -> None:
+        """
+        Set the value of a row, rows must be added in order
+
+        :param row: index of the row in the store
+        :type row: int
+        :param value: value of the attribute
+        :type value: Any
+        """
+        value_type = get_column_type(value)
+        if self.type is None:
+            if self._present:
+                # rows before this one didn't have the attribute so they were padded
+                # as objects, numbers need the padding moved into the number array
+                self._values = []
+                if value_type == ColumnType.NUMBER:
+                    self._numbers.extend([0.0] * len(self._present))
+                else:
+                    self._values = [None] * len(self._present)
+            self.type = value_type
+        elif self.type not in (value_type, ColumnType.MIXED):
+            self._to_mixed()
+
+        self._pad(row)
+        self._present.append(1)
+        if self.is_numeric:
+            number = float(value)
+            self._numbers.append(number)
+            if isinstance(value, Decimal) and (
+                str(number_to_decimal(number)) != str(value)
+            ):
+                self._exact[row] = value
+        else:
+            self._values.append(value)
+
+    def has_value(self, row: int) -> bool:
+        return row < len(self._present) and self._present[row] == 1
+
+    def any_present(self, rows: range) -> bool:
+        """Check if any row in a contiguous range has this attribute"""
+        return self._present.find(1, rows.start, rows.stop) != -1
+
+    def any_present_in(self, rows: Sequence[int]) -> bool:
+        """Check if any of a set of rows, in any order, has this attribute"""
+        present = self._present
+        return any(map(present.__getitem__, filter(len(present).__gt__, rows)))
+
+    def get(self, row: int, default: Any = None) -> Any:
+        """
+        Get the value of a row, with numbers returned as `Decimal` like boto3 does
+
+        :param row: index of the row in the store
+        :type row: int
+        :param default: value to return when the row doesn't have the attribute
+        :type default: Any
+        :return: value of attribute
+        :rtype: Any
+        """
+        if not self.has_value(row):
+            return default
+        if self.is_numeric:
+            exact = self._exact.get(row)
+            return exact if exact is not None else number_to_decimal(self._numbers[row])
+        return self._values[row]
+
+    def iter_values(self, start: int, stop: int) -> Iterator[tuple[int, Any]]:
+        """
+        Iterate over the rows in a range that have the attribute
+
+        :param start: first row index
+        :type start: int
+        :param stop: row index to stop before
+        :type stop: int
+        :return: iterator of row index and value
+        :rtype: Iterator[tuple[int, Any]]
+        """
+        stop = min(stop, len(self._present))
+        rows = compress(range(start, stop), self._present[start:stop])
+        if not self.is_numeric:
+            values = self._values
+            return ((row, values[row]) for row in rows)
+        return ((row, self.get(row)) for row in rows)
+
+    def numbers(self) -> array:
+        """
+        The packed float array of a numeric column, missing rows are stored as 0.0
+        so need to be checked with `has_value`
+
+        :raises: ValueError if the column isn't numeric
+        """
+        if not self.is_numeric:
+            raise ValueError(f"Column {self.name} is not a number column")
+        return self._numbers
+
+    def present(self) -> bytearray:
+        return self._present
+
+    def missing_rows(self, stop: int) -> list[int]:
+        """
+        Rows before a row index that don't have the attribute
+
+        :param stop: row index to stop before, e.g the number of rows in the store
+        :type stop: int
+        :return: row indexes
+        :rtype: list[int]
+        """
+        present = self._present
+        return [
+            *compress(range(len(present)), present.translate(_INVERT_PRESENT)),
+            *range(len(present), stop),
+        ]
+
+    def number_values(
+        self, rows: Sequence[int] | None = None
+    ) -> tuple[list[float], list[Decimal]]:
+        """
+        The numbers of the rows that have the attribute, as the packed floats plus the
+        `Decimal` of each row that can't round trip through a float
+
+        :param rows: row indexes to read, every row if not set
+        :type rows: Sequence[int] | None
+        :return: floats and exact decimals
+        :rtype: tuple[list[float], list[Decimal]]
+        :raises: ValueError if the column isn't numeric
+        """
+        numbers = self.numbers()
+        present = self._present
+        if self._exact:
+            present = bytearray(present)
+            for row in self._exact:
+                present[row] = 0
+        if rows is None:
+            return list(compress(numbers, present)), list(self._exact.values())
+        rows = [row for row in rows if row < len(present)]
+        floats = list(
+            compress(map(numbers.__getitem__, rows), map(present.__getitem__, rows))
+        )
+        if not self._exact:
+            return floats, []
+        exact = self._exact
+        return floats, [exact[row] for row in set(rows).intersection(exact)]
+
+    def sort_keys(self) -> Sequence[Any]:
+        """
+        Build a key per row that can be compared across the whole column, missing rows
+        get a key as well but are expected to be filtered out with `has_value`
+
+        :return: sort key per row
+        :rtype: Sequence[Any]
+        """
+        if self.is_numeric:
+            if not self._exact:
+                return self._numbers
+            keys: list[Any] = list(self._numbers)
+            for row, exact in self._exact.items():
+                keys[row] = exact
+            return keys
+        if self.type == ColumnType.STRING:
+            return self._values
+        if self.type == ColumnType.BOOLEAN:
+            return [bool(value) for value in self._values]
+        return [
+            (
+                SORT_TYPE_RANK.get(get_column_type(value), len(SORT_TYPE_RANK)),
+                (
+                    value
+                    if get_column_type(value) in (ColumnType.NUMBER, ColumnType.STRING)
+                    else str(value)
+                ),
+            )
+            for value in self._values
+        ]
+
+
+class ColumnarRowStore:
+    """
+    Stores dynamodb result pages as one column per attribute instead of one dict per item,
+    attribute names are interned so they are shared across every page loaded.
+
+    It's an index over the pages the table viewer holds rather than a replacement for
+    them, rendering, sorting, filtering and aggregating read the columns instead of
+    walking every item dict.
+    """
+
+    def __init__(self) -> None:
+        self._columns: dict[str, Column] = {}
+        self._page_offsets: list[int] = [0]
+        # the pages the store was built from, kept so they can be compared by identity,
+        # an id alone can be reused by a new page once the old one is freed
+        self._pages: list[list[dict]] = []
+        # bumped every time the store is cleared so anything built from it knows to rebuild
+        self.generation = 0
+        # sort keys per column, only valid while no rows have been added
+        self._sort_keys: dict[str, tuple[int, Sequence[Any]]] = {}
+
+    def __len__(self) -> int:
+        return self._page_offsets[-1]
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    @property
+    def columns(self) -> list[str]:
+        """Attribute names in the order they were first seen"""
+        return list(self._columns.keys())
+
+    def column(self, name: str) -> Column | None:
+        return self._columns.get(name)
+
+    def clear(self) -> None:
+        self._columns = {}
+        self._page_offsets = [0]
+        self._pages = []
+        self._sort_keys = {}
+        self.generation += 1
+
+    def append_page(self, items: list[dict]) -> range:
+        """
+        Add a page of items to the store
+
+        :param items: items returned by a dynamodb query or scan
+        :type items: list[dict]
+        :return: the row indexes of the added page
+        :rtype: range
+        """
+        start = len(self)
+        columns = self._columns
+        for row, item in enumerate(items or (), start):
+            for name, value in item.items():
+                column = columns.get(name)
+                if column is None:
+                    column = columns[sys.intern(name)] = Column(sys.intern(name))
+                column.append(row, value)
+        self._page_offsets.append(start + len(items or ()))
+        self._pages.append(items)
+        return range(start, len(self))
+
+    def sync_pages(self, pages: list[list[dict]]) -> bool:
+        """
+        Bring the store in line with a list of pages, only appending new pages if the
+        existing pages are still the same objects otherwise the store is rebuilt
+
+        :param pages: all pages of results
+        :type pages: list[list[dict]]
+        :return: True if the store was rebuilt
+        :rtype: bool
+        """
+        rebuilt = len(pages) < self.page_count or any(
+            page is not known for page, known in zip(pages, self._pages)
+        )
+        if rebuilt:
+            self.clear()
+        for page in pages[self.page_count :]:
+            self.append_page(page)
+        return rebuilt
+
+    def snapshot(self, names: Iterable[str]) -> "ColumnarRowStore":
+        """
+        Copy of the store with only the given columns, for reading in a worker thread
+        while the store keeps having pages added or is cleared
+
+        :param names: attribute names to copy, names that aren't in the store are skipped
+        :type names: Iterable[str]
+        :return: store holding the copied columns and the current rows and pages
+        :rtype: ColumnarRowStore
+        """
+        snapshot = ColumnarRowStore()
+        snapshot._columns = {
+            name: self._columns[name].copy() for name in names if name in self._columns
+        }
+        snapshot._page_offsets = self._page_offsets[:]
+        snapshot._pages = self._pages[:]
+        snapshot.generation = self.generation
+        return snapshot
+
+    def page_range(self, page: int) -> range:
+        return range(self._page_offsets[page], self._page_offsets[page + 1])
+
+    def page_of_row(self, row: int) -> int:
+        for page in range(self.page_count):
+            if row < self._page_offsets[page + 1]:
+                return page
+        return max(self.page_count - 1, 0)
+
+    def columns_in(self, rows: range) -> list[str]:
+        """Attribute names that at least one row in a contiguous range has"""
+        return [
+            name for name, column in self._columns.items() if column.any_present(rows)
+        ]
+
+    def columns_of(self, rows: Sequence[int]) -> list[str]:
+        """
+        Attribute names that at least one of a set of rows has, the rows can be in any
+        order e.g a page of sorted or filtered rows
+
+        :param rows: distinct row indexes
+        :type rows: Sequence[int]
+        :return: attribute names in the order they were first seen
+        :rtype: list[str]
+        """
+        if isinstance(rows, range) and rows.step == 1:
+            return self.columns_in(rows)
+        if len(rows) == len(self):
+            # every row in a different order, e.g all rows sorted
+            return self.columns
+        return [
+            name
+            for name, column in self._columns.items()
+            if column.any_present_in(rows)
+        ]
+
+    def row(self, row: int) -> dict:
+        """Rebuild a single item as a dict"""
+        return {
+            name: column.get(row)
+            for name, column in self._columns.items()
+            if column.has_value(row)
+        }
+
+    def rows(self, rows: Iterable[int], columns: list[str]) -> list[list[Any]]:
+        """
+        Get the values of a set of rows for the given columns, used to fill a `DataTable`
+
+        :param rows: row indexes
+        :type rows: Iterable[int]
+        :param columns: attribute names
+        :type columns: list[str]
+        :return: one list of values per row
+        :rtype: list[list[Any]]
+        """
+        getters = [
+            self._columns[name].get if name in self._columns else lambda _: None
+            for name in columns
+        ]
+        return [[get(row) for get in getters] for row in rows]
+
+    def _column_sort_keys(self, column: Column) -> Sequence[Any]:
+        cached = self._sort_keys.get(column.name)
+        if cached and cached[0] == len(self):
+            return cached[1]
+        keys = column.sort_keys()
+        self._sort_keys[column.name] = (len(self), keys)
+        return keys
+
+    def sort_permutation(self, name: str, descending: bool = False) -> array:
+        """
+        Order all rows by a column without moving any data, rows missing the attribute
+        are always put last
+
+        :param name: attribute name to sort by
+        :type name: str
+        :param descending: sort from largest to smallest
+        :type descending: bool
+        :return: row indexes in sorted order
+        :rtype: array
+        """
+        column = self._columns.get(name)
+        if column is None:
+            return array("q", range(len(self)))
+        present = column.present()
+        with_value = list(compress(range(len(present)), present))
+        missing = column.missing_rows(len(self))
+        keys = self._column_sort_keys(column)
+        with_value.sort(key=keys.__getitem__, reverse=descending)
+        return array("q", with_value + missing)
+
+    def column_values(self, name: str, rows: Iterable[int]) -> list[Any]:
+        column = self._columns.get(name)
+        if column is None:
+            return [None for _ in rows]
+        return [column.get(row) for row in rows]
@@ -0,0 +1,232 @@
+import re
+from array import array
+from bisect import bisect_right
+from typing import Any, Callable, Iterator
+
+import simplejson as json
+
+from dyno_viewer.util.row_store import Column, ColumnarRowStore
+from dyno_viewer.util.util import format_output
+
+ATTRIBUTE_QUERY_PATTERN = re.compile(r"^\s*([^=\s]+)\s*=\s*(.*?)\s*$")
+REGEX_QUERY_PATTERN = re.compile(r"^/(.*)/$")
+
+# once a column has more distinct values than this it gets searched by its text chunks
+MAX_INDEXED_VALUES = 5_000
+
+
+def value_to_text(value: Any) -> str:
+    """
+    Convert an attribute value into the lower case single line text that gets searched
+
+    :param value: value of an attribute
+    :type value: Any
+    :return: searchable text
+    :rtype: str
+    """
+    if isinstance(value, (dict, list, set)):
+        value = json.dumps(
+            list(value) if isinstance(value, set) else value, default=str
+        )
+    return str(format_output(value)).lower().replace("\n", " ")
+
+
+class TextChunk:
+    """
+    The values of one column for a range of rows joined into a single new line separated
+    string, so they can be searched with `str.find` or a regex in one go
+    """
+
+    __slots__ = ("text", "rows", "offsets")
+
+    def __init__(self, values: list[tuple[int, str]]) -> None:
+        self.rows = array("I", (row for row, _ in values))
+        self.offsets = array("I")
+        offset = 1
+        for _, text in values:
+            self.offsets.append(offset)
+            offset += len(text) + 1
+        self.text = "\n" + "\n".join(text for _, text in values) + "\n"
+
+    def _line_at(self, position: int) -> tuple[int, int, int]:
+        """Row of the line at a position, where its value starts and the next one does"""
+        line = max(bisect_right(self.offsets, position) - 1, 0)
+        next_line = (
+            self.offsets[line + 1] if line + 1 < len(self.offsets) else len(self.text)
+        )
+        return self.rows[line], self.offsets[line], next_line
+
+    def find(self, text: str) -> Iterator[int]:
+        # a whole line match starts on the new line before the value
+        shift = 1 if text.startswith("\n") else 0
+        position = self.text.find(text)
+        while position != -1:
+            row, _, next_line = self._line_at(position + shift)
+            yield row
+            position = self.text.find(text, next_line - shift)
+
+    def find_regex(self, pattern: re.Pattern) -> Iterator[int]:
+        # a match can run over the new lines into the rows around it, e.g with \s, so
+        # it only counts if it's inside the row's value or the value matches by itself
+        position = 0
+        while position < len(self.text):
+            match = pattern.search(self.text, position)
+            if match is None:
+                return
+            row, start, next_line = self._line_at(match.start())
+            end = next_line - 1
+            if (start <= match.start() and match.end() <= end) or pattern.search(
+                self.text, start, end
+            ):
+                yield row
+            position = next_line
+
+
+class ColumnIndex:
+    """
+    Search index for a single column. Starts as an inverted index of distinct value to
+    rows and switches to text chunks when the column has too many distinct values for
+    the inverted index to pay off (e.g ids).
+    """
+
+    __slots__ = ("values", "chunks")
+
+    def __init__(self) -> None:
+        self.values: dict[str, int | array] | None = {}
+        self.chunks: list[TextChunk] = []
+
+    def add(self, column: Column, start: int, stop: int) -> None:
+        texts = [
+            (row, value_to_text(value))
+            for row, value in column.iter_values(start, stop)
+        ]
+        if self.values is not None:
+            values = self.values
+            for row, text in texts:
+                postings = values.get(text)
+                if postings is None:
+                    # most values are only seen once in high cardinality columns so
+                    # keep the row as is until another row has the same value
+                    values[text] = row
+                elif isinstance(postings, int):
+                    values[text] = array("I", (postings, row))
+                else:
+                    postings.append(row)
+            if len(values) <= MAX_INDEXED_VALUES:
+                return
+            self.values = None
+            texts = [
+                (row, value_to_text(value))
+                for row, value in column.iter_values(0, stop)
+            ]
+        if texts:
+            self.chunks.append(TextChunk(texts))
+
+    def _matching_postings(self, matches: Callable[[str], bool]) -> Iterator[int]:
+        for text, postings in self.values.items():
+            if matches(text):
+                if isinstance(postings, int):
+                    yield postings
+                else:
+                    yield from postings
+
+    def equals(self, text: str) -> Iterator[int]:
+        if self.values is None:
+            return (row for chunk in self.chunks for row in chunk.find(f"\n{text}\n"))
+        postings = self.values.get(text, ())
+        return iter((postings,) if isinstance(postings, int) else postings)
+
+    def contains(self, text: str) -> Iterator[int]:
+        if self.values is None:
+            return (row for chunk in self.chunks for row in chunk.find(text))
+        return self._matching_postings(lambda value: text in value)
+
+    def regex(self, pattern: re.Pattern) -> Iterator[int]:
+        if self.values is None:
+            return (row for chunk in self.chunks for row in chunk.find_regex(pattern))
+        return self._matching_postings(lambda value: pattern.search(value) is not None)
+
+
+class RowSearchIndex:
+    """
+    Index over the rows of a `ColumnarRowStore`, used for filtering results that are
+    already loaded without going back to dynamodb. Only the rows added since the last
+    sync get indexed as more pages are loaded.
+    """
+
+    def __init__(self) -> None:
+        self._columns: dict[str, ColumnIndex] = {}
+        self._indexed_rows = 0
+        self._store_generation = -1
+
+    def __len__(self) -> int:
+        return self._indexed_rows
+
+    def clear(self) -> None:
+        self._columns = {}
+        self._indexed_rows = 0
+
+    def sync(self, store: ColumnarRowStore) -> None:
+        """
+        Index any rows that have been added to the store since the last sync, the index
+        is rebuilt if the store was cleared
+
+        :param store: row store to index
+        :type store: ColumnarRowStore
+        """
+        if store.generation != self._store_generation:
+            self.clear()
+            self._store_generation = store.generation
+        if self._indexed_rows >= len(store):
+            return
+        for name in store.columns:
+            column_index = self._columns.get(name)
+            if column_index is None:
+                column_index = self._columns[name] = ColumnIndex()
+            column_index.add(store.column(name), self._indexed_rows, len(store))
+        self._indexed_rows = len(store)
+
+    def search(self, store: ColumnarRowStore, query: str) -> set[int] | None:
+        """
+        Find the rows that match a quick filter query, the query can be:
+
+        - ``/pattern/`` a case insensitive regex matched against every value
+        - ``attr=value`` rows where an attribute equals the value (case insensitive),
+          no rows if none of the rows have the attribute
+        - anything else is a case insensitive substring search across every value
+
+        :param store: row store to search
+        :type store: ColumnarRowStore
+        :param query: quick filter query
+        :type query: str
+        :return: matching row indexes or None if the query is empty
+        :rtype: set[int] | None
+        :raises: re.error if the regex is invalid
+        """
+        if not query.strip():
+            return None
+        self.sync(store)
+
+        regex_query = REGEX_QUERY_PATTERN.match(query)
+        if regex_query:
+            pattern = re.compile(regex_query.group(1), re.IGNORECASE | re.MULTILINE)
+            return {
+                row
+                for column_index in self._columns.values()
+                for row in column_index.regex(pattern)
+            }
+
+        attribute_query = ATTRIBUTE_QUERY_PATTERN.match(query)
+        if attribute_query:
+            name, value = attribute_query.groups()
+            for column_name, column_index in self._columns.items():
+                if column_name.lower() == name.lower():
+                    return set(column_index.equals(value.lower()))
+            return set()
+
+        text = query.lower()
+        return {
+            row
+            for column_index in self._columns.values()
+            for row in column_index.contains(text)
+        }
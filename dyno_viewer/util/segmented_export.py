@@ -0,0 +1,483 @@
+import csv
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+from zoneinfo import ZoneInfo
+
+from dyno_viewer.aws.ddb import from_dynamodb_json, iter_pages, to_dynamodb_json
+from dyno_viewer.models import (
+    ExportCheckpoint,
+    ExportManifest,
+    ExportPart,
+    FileToSave,
+    QueryParameters,
+)
+from dyno_viewer.util.export import (
+    COPY_CHUNK_SIZE,
+    ArrowExportWriter,
+    ExportWriter,
+    detect_compression,
+    get_export_writer,
+    is_resumable,
+    iter_export_items,
+    open_export_binary,
+    open_export_input,
+    pa,
+    pq,
+)
+
+# formats where part files can be concatenated as is, compressed or not
+CONCATENATED_FORMATS = {"jsonl", "ddb-json"}
+ARROW_FORMATS = {"arrow", "parquet"}
+MERGE_PAGE_SIZE = 1000
+# seconds between checkpoints of a resumable export
+CHECKPOINT_INTERVAL = 5.0
+
+
+def part_path(path: str | Path, segment: int, total_segments: int) -> Path:
+    """
+    Path of the part file a scan segment is exported to, e.g ``export.part-0001-of-0004.json.gz``
+
+    :param path: file the export is merged into
+    :type path: str | Path
+    :param segment: zero based scan segment
+    :type segment: int
+    :param total_segments: number of scan segments
+    :type total_segments: int
+    :return: part file path
+    :rtype: Path
+    """
+    path = Path(path)
+    stem, dot, suffixes = path.name.partition(".")
+    return path.with_name(
+        f"{stem}.part-{segment + 1:04d}-of-{total_segments:04d}{dot}{suffixes}"
+    )
+
+
+def manifest_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.name}.manifest.json")
+
+
+def save_manifest(manifest: ExportManifest) -> None:
+    manifest_path(manifest.path).write_text(
+        manifest.model_dump_json(indent=2), encoding="utf-8"
+    )
+
+
+def load_manifest(path: str | Path) -> ExportManifest:
+    """
+    Load the manifest of a parallel export
+
+    :param path: manifest file or the file the export is merged into
+    :type path: str | Path
+    :return: export manifest
+    :rtype: ExportManifest
+    """
+    path = Path(path)
+    if not path.name.endswith(".manifest.json"):
+        path = manifest_path(path)
+    return ExportManifest.model_validate_json(path.read_text(encoding="utf-8"))
+
+
+def _seekable_export(path: str | Path) -> BinaryIO:
+    """Arrow and parquet files need to be seekable, compressed ones are copied out"""
+    if detect_compression(path) is None:
+        return open(path, "rb")
+    with open_export_binary(path) as source:
+        copy = tempfile.TemporaryFile("w+b", dir=Path(path).parent)
+        shutil.copyfileobj(source, copy, COPY_CHUNK_SIZE)
+    copy.seek(0)
+    return copy
+
+
+def iter_export_batches(path: str | Path, file_format: str) -> Iterator:
+    """
+    Read the record batches of an arrow or parquet export
+
+    :param path: exported file
+    :type path: str | Path
+    :param file_format: arrow or parquet
+    :type file_format: str
+    :return: iterator of record batches
+    :rtype: Iterator[pyarrow.RecordBatch]
+    """
+    with _seekable_export(path) as source:
+        if file_format == "parquet":
+            yield from pq.ParquetFile(source).iter_batches()
+            return
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def iter_export_pages(
+    path: str | Path, file_format: str, page_size: int = MERGE_PAGE_SIZE
+) -> Iterator[list[dict]]:
+    """
+    Read back a csv or json export a page of items at a time, csv values are read as
+    strings with empty values left out
+
+    :param path: exported file
+    :type path: str | Path
+    :param file_format: format the file was exported in
+    :type file_format: str
+    :param page_size: number of items per page
+    :type page_size: int
+    :return: iterator of pages of items
+    :rtype: Iterator[list[dict]]
+    """
+    if file_format == "csv":
+        f = open_export_input(path, newline="")
+        items = (
+            {name: value for name, value in row.items() if value != ""}
+            for row in csv.DictReader(f)
+        )
+    else:
+        f = None
+        items = iter_export_items(path, file_format)
+    page = []
+    try:
+        for item in items:
+            page.append(item)
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+    finally:
+        if f is not None:
+            f.close()
+
+
+def count_export_items(path: str | Path, file_format: str) -> int:
+    if file_format in ARROW_FORMATS:
+        return sum(batch.num_rows for batch in iter_export_batches(path, file_format))
+    return sum(len(page) for page in iter_export_pages(path, file_format))
+
+
+def merge_parts(manifest: ExportManifest) -> None:
+    """
+    Merge the part files of a parallel export into a single file and remove them.
+    Json lines and dynamodb json parts are concatenated as is, other formats are read
+    back and written again so there is only one csv header, json array or schema
+
+    :param manifest: manifest of a finished export
+    :type manifest: ExportManifest
+    """
+    file_format = manifest.file_format.value
+    parts = [Path(part.path) for part in manifest.parts]
+    if file_format in CONCATENATED_FORMATS:
+        with open(manifest.path, "wb") as output:
+            for part in parts:
+                with open(part, "rb") as source:
+                    shutil.copyfileobj(source, output, COPY_CHUNK_SIZE)
+    else:
+        with get_export_writer(
+            file_format, manifest.path, compression=manifest.compression
+        ) as writer:
+            for part in parts:
+                if isinstance(writer, ArrowExportWriter):
+                    for batch in iter_export_batches(part, file_format):
+                        writer.write_batch(batch)
+                else:
+                    for page in iter_export_pages(part, file_format):
+                        writer.write_page(page)
+    for part in parts:
+        part.unlink()
+    manifest.merged = True
+    save_manifest(manifest)
+
+
+def verify_export(path: str | Path) -> list[str]:
+    """
+    Check the files of a parallel export have the number of items in its manifest
+
+    :param path: manifest file or the file the export is merged into
+    :type path: str | Path
+    :return: a description of each problem found, empty if the export is complete
+    :rtype: list[str]
+    """
+    manifest = load_manifest(path)
+    file_format = manifest.file_format.value
+    if manifest.merged:
+        items = count_export_items(manifest.path, file_format)
+        if items != manifest.items:
+            return [f"{manifest.path} has {items} items, expected {manifest.items}"]
+        return []
+    problems = []
+    for part in manifest.parts:
+        if not part.finished:
+            problems.append(
+                f"segment {part.segment} did not finish: {part.error or 'cancelled'}"
+            )
+            continue
+        items = count_export_items(part.path, file_format)
+        if items != part.items:
+            problems.append(f"{part.path} has {items} items, expected {part.items}")
+    return problems
+
+
+class SegmentedExport:
+    """
+    Export a table with a parallel scan, each scan segment is run on its own thread and
+    written to its own part file. A manifest with the items in each part is saved next
+    to the export whenever a part finishes so a partial export can still be used. With
+    a single segment the query or scan is written straight to the export file.
+
+    Resumable exports (see `is_resumable`) are checkpointed every
+    `CHECKPOINT_INTERVAL` seconds: the part file is synced and the LastEvaluatedKey,
+    items and bytes written are recorded, so `resume` can truncate the part back to
+    the checkpoint and carry on from the same key without duplicating or losing items.
+
+    The table resource is shared by the segment threads, queries and scans only use its
+    client which boto3 makes thread safe.
+
+    :param table: dynamodb table to scan
+    :param file_to_save: file, format and compression to export to
+    :type file_to_save: FileToSave
+    :param total_segments: number of scan segments run in parallel
+    :type total_segments: int
+    :param merge: merge the parts into one file once every segment has finished
+    :type merge: bool
+    :param query_params: query or scan to export, a full table scan if not set
+    :type query_params: QueryParameters | None
+    :param query_kwargs: extra query or scan parameters, e.g a Limit
+    """
+
+    def __init__(
+        self,
+        table,
+        file_to_save: FileToSave,
+        total_segments: int,
+        merge: bool = False,
+        query_params: QueryParameters | None = None,
+        **query_kwargs,
+    ) -> None:
+        self.table = table
+        if query_params:
+            query_params = query_params.model_copy(update={"next_token": None})
+            query_kwargs = {**query_params.boto_params, **query_kwargs}
+        self.query_kwargs = query_kwargs
+        scan_mode = query_params.scan_mode if query_params else True
+        if not scan_mode and total_segments > 1:
+            raise ValueError("only scans can be split into segments")
+        self.manifest = ExportManifest(
+            path=str(file_to_save.path),
+            file_format=file_to_save.file_format,
+            compression=file_to_save.compression,
+            table_name=getattr(table, "name", None),
+            query_params=(
+                query_params.model_dump(mode="json", exclude={"boto_params"})
+                if query_params
+                else None
+            ),
+            scan_mode=scan_mode,
+            total_segments=total_segments,
+            merge=merge and total_segments > 1,
+            parts=[
+                ExportPart(
+                    segment=segment,
+                    path=str(
+                        part_path(file_to_save.path, segment, total_segments)
+                        if total_segments > 1
+                        else file_to_save.path
+                    ),
+                )
+                for segment in range(total_segments)
+            ],
+        )
+        self._lock = threading.Lock()
+
+    @classmethod
+    def resume(cls, table, manifest: ExportManifest) -> "SegmentedExport":
+        """
+        Carry on an export from its last checkpoint, parts that finished are kept
+
+        :param table: dynamodb table being exported
+        :param manifest: manifest of the export from the data store
+        :type manifest: ExportManifest
+        :return: export that can be run
+        :rtype: SegmentedExport
+        """
+        segmented_export = cls(
+            table,
+            FileToSave(
+                path=manifest.path,
+                file_format=manifest.file_format,
+                compression=manifest.compression,
+            ),
+            manifest.total_segments,
+            merge=manifest.merge,
+            query_params=(
+                QueryParameters.model_validate(manifest.query_params)
+                if manifest.query_params
+                else None
+            ),
+        )
+        segmented_export.manifest = manifest.model_copy(deep=True)
+        return segmented_export
+
+    @property
+    def resumable(self) -> bool:
+        return is_resumable(self.manifest.file_format, self.manifest.compression)
+
+    def _save_manifest(self) -> None:
+        if self.manifest.segmented:
+            save_manifest(self.manifest)
+
+    def _checkpoint(
+        self,
+        part: ExportPart | None,
+        checkpoint: ExportCheckpoint | None,
+        on_checkpoint: Callable[[ExportManifest], None],
+    ) -> None:
+        with self._lock:
+            if checkpoint:
+                part.checkpoint = checkpoint
+            self.manifest.updated_at = datetime.now(ZoneInfo("UTC"))
+            manifest = self.manifest.model_copy(deep=True)
+        on_checkpoint(manifest)
+
+    def _checkpoint_writer(
+        self,
+        part: ExportPart,
+        writer: ExportWriter,
+        last_key: dict,
+        on_checkpoint: Callable[[ExportManifest], None],
+    ) -> None:
+        writer.sync()
+        self._checkpoint(
+            part,
+            ExportCheckpoint(
+                last_evaluated_key=to_dynamodb_json(last_key),
+                items=writer.items_written,
+                offset=writer.bytes_written,
+            ),
+            on_checkpoint,
+        )
+
+    def _export_segment(
+        self,
+        part: ExportPart,
+        is_cancelled: Callable[[], bool],
+        on_progress: Callable[[ExportManifest], None],
+        on_checkpoint: Callable[[ExportManifest], None],
+    ) -> None:
+        resumable = self.resumable
+        checkpoint = part.checkpoint if resumable else None
+        segment_kwargs = (
+            {"Segment": part.segment, "TotalSegments": self.manifest.total_segments}
+            if self.manifest.segmented
+            else {}
+        )
+        last_checkpoint = time.monotonic()
+        written_key = None
+        cancelled = False
+        with get_export_writer(
+            self.manifest.file_format,
+            part.path,
+            compression=self.manifest.compression,
+            checkpoint=checkpoint,
+        ) as writer:
+            part.items = writer.items_written
+            for items, last_key in iter_pages(
+                self.table,
+                scan_mode=self.manifest.scan_mode,
+                exclusive_start_key=(
+                    from_dynamodb_json(checkpoint.last_evaluated_key)
+                    if checkpoint and checkpoint.last_evaluated_key
+                    else None
+                ),
+                **segment_kwargs,
+                **self.query_kwargs,
+            ):
+                if is_cancelled():
+                    cancelled = True
+                    break
+                writer.write_page(items)
+                written_key = last_key
+                part.items = writer.items_written
+                part.bytes_written = writer.bytes_written
+                if (
+                    resumable
+                    and written_key
+                    and time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL
+                ):
+                    self._checkpoint_writer(part, writer, written_key, on_checkpoint)
+                    last_checkpoint = time.monotonic()
+                on_progress(self.manifest)
+            if cancelled:
+                if resumable and written_key:
+                    # carry on from the last page written when resumed
+                    self._checkpoint_writer(part, writer, written_key, on_checkpoint)
+                return
+        with self._lock:
+            part.bytes_written = writer.bytes_written
+            part.finished = True
+            self._save_manifest()
+        if resumable:
+            self._checkpoint(part, None, on_checkpoint)
+        on_progress(self.manifest)
+
+    def run(
+        self,
+        is_cancelled: Callable[[], bool] = lambda: False,
+        on_progress: Callable[[ExportManifest], None] = lambda _: None,
+        on_checkpoint: Callable[[ExportManifest], None] = lambda _: None,
+    ) -> ExportManifest:
+        """
+        Run every segment that hasn't finished yet and merge the parts if asked to, a
+        segment that fails has its error recorded in the manifest and doesn't stop the
+        others
+
+        :param is_cancelled: checked before each page is written
+        :type is_cancelled: Callable[[], bool]
+        :param on_progress: called from the segment threads after each page
+        :type on_progress: Callable[[ExportManifest], None]
+        :param on_checkpoint: called from the segment threads with a copy of the
+            manifest whenever a resumable export is checkpointed, e.g to save it to the
+            data store
+        :type on_checkpoint: Callable[[ExportManifest], None]
+        :return: manifest of the export
+        :rtype: ExportManifest
+        """
+        parts = [part for part in self.manifest.parts if not part.finished]
+        for part in parts:
+            part.error = None
+        self._save_manifest()
+        if self.resumable:
+            self._checkpoint(None, None, on_checkpoint)
+        with ThreadPoolExecutor(
+            max_workers=max(len(parts), 1),
+            thread_name_prefix="export segment",
+        ) as pool:
+            futures = [
+                (
+                    part,
+                    pool.submit(
+                        self._export_segment,
+                        part,
+                        is_cancelled,
+                        on_progress,
+                        on_checkpoint,
+                    ),
+                )
+                for part in parts
+            ]
+            for part, future in futures:
+                try:
+                    future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    part.error = str(e)
+        self.manifest.finished = all(part.finished for part in self.manifest.parts)
+        self.manifest.updated_at = datetime.now(ZoneInfo("UTC"))
+        self._save_manifest()
+        if self.manifest.merge and self.manifest.finished:
+            merge_parts(self.manifest)
+        return self.manifest
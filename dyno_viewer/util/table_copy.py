@@ -0,0 +1,243 @@
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from dyno_viewer.aws.ddb import iter_pages
+from dyno_viewer.models import CopyProgress, QueryParameters
+from dyno_viewer.util.bulk_import import CapacityBudget, TableWriter
+
+# seconds a reader thread waits for room in the page queue before checking if the
+# pages are still wanted
+QUEUE_TIMEOUT = 0.5
+
+
+def table_description(table) -> str:
+    """Region and name of a table, e.g ap-southeast-2/orders"""
+    return f"{table.meta.client.meta.region_name}/{table.name}"
+
+
+def copy_reject_path(table_name: str) -> Path:
+    """Default file items that couldn't be copied from a table are written to"""
+    return (
+        Path.home() / f"{table_name}-copy-{datetime.now():%Y%m%d-%H%M%S}.rejected.jsonl"
+    )
+
+
+def replace_key_prefix(
+    key_names: list[str], old_prefix: str, new_prefix: str
+) -> Callable[[dict], dict]:
+    """
+    Key transform that swaps a prefix of the string key values of an item for another
+    one, e.g to copy `prod#1` to `staging#1`. Keys without the prefix are left as is
+
+    :param key_names: key attributes to rewrite
+    :type key_names: list[str]
+    :param old_prefix: prefix to replace
+    :type old_prefix: str
+    :param new_prefix: prefix to replace it with
+    :type new_prefix: str
+    :return: transform for `TableCopy`
+    :rtype: Callable[[dict], dict]
+    """
+
+    def transform(item: dict) -> dict:
+        item = dict(item)
+        for name in key_names:
+            value = item.get(name)
+            if isinstance(value, str) and value.startswith(old_prefix):
+                item[name] = new_prefix + value[len(old_prefix) :]
+        return item
+
+    return transform
+
+
+def iter_segment_pages(
+    table,
+    total_segments: int = 1,
+    scan_mode: bool = True,
+    max_queued_pages: int = 8,
+    on_response: Callable[[dict], None] | None = None,
+    **query_kwargs,
+) -> Iterator[list[dict]]:
+    """
+    Read the pages of a query, or every segment of a parallel scan, on background
+    threads. Pages are handed over through a queue of at most `max_queued_pages` so the
+    readers only get that far ahead, pages of different segments are interleaved. The
+    readers are stopped when the iterator is closed and the first error a reader hits
+    is raised.
+
+    :param table: dynamodb table to read
+    :param total_segments: number of scan segments read in parallel
+    :type total_segments: int
+    :param scan_mode: scan the table instead of querying it
+    :type scan_mode: bool
+    :param max_queued_pages: pages read ahead of the consumer
+    :type max_queued_pages: int
+    :param on_response: called from the reader threads with each response
+    :type on_response: Callable[[dict], None] | None
+    :param query_kwargs: query or scan parameters
+    :return: iterator of pages of items
+    :rtype: Iterator[list[dict]]
+    """
+    pages = queue.Queue(maxsize=max_queued_pages)
+    stopped = threading.Event()
+    errors = []
+
+    def put(page: list[dict] | None) -> bool:
+        while not stopped.is_set():
+            try:
+                pages.put(page, timeout=QUEUE_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_segment(segment_kwargs: dict) -> None:
+        try:
+            for items, _ in iter_pages(
+                table,
+                scan_mode=scan_mode,
+                on_response=on_response,
+                **segment_kwargs,
+                **query_kwargs,
+            ):
+                if not put(items):
+                    return
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+        finally:
+            # tells the consumer this segment is done
+            put(None)
+
+    threads = [
+        threading.Thread(
+            target=read_segment,
+            args=(
+                (
+                    {"Segment": segment, "TotalSegments": total_segments}
+                    if total_segments > 1
+                    else {}
+                ),
+            ),
+            name=f"read segment {segment}",
+            daemon=True,
+        )
+        for segment in range(total_segments)
+    ]
+    for thread in threads:
+        thread.start()
+    remaining = len(threads)
+    try:
+        while remaining:
+            page = pages.get()
+            if page is None:
+                remaining -= 1
+                if errors:
+                    raise errors[0]
+                continue
+            yield page
+    finally:
+        stopped.set()
+        for thread in threads:
+            thread.join()
+
+
+class TableCopy(TableWriter):
+    """
+    Copy the items of a query or scan from one table to another, which can be in
+    another account or region, in one streaming pass. Each scan segment is read on its
+    own thread into a queue of at most two pages per writer thread, so only a few pages
+    are held in memory however big the table is, and the pages are written with
+    `TableWriter`. Reads have their own optional read capacity budget, each page is
+    paid for with the capacity it consumed before the next one is read.
+
+    :param source: table to read from
+    :param target: table to write to
+    :param query_params: query or scan to copy, a full table scan if not set
+    :type query_params: QueryParameters | None
+    :param total_segments: number of scan segments read in parallel
+    :type total_segments: int
+    :param transform: called with each item before it's written and returns the item
+        to write or None to skip it, e.g to rewrite the keys. Items it raises an error
+        for are rejected
+    :type transform: Callable[[dict], dict | None] | None
+    :param workers: number of threads writing batches
+    :type workers: int
+    :param rcu_budget: max read capacity units used per second, no limit if not set
+    :type rcu_budget: int | None
+    :param wcu_budget: max write capacity units used per second, no limit if not set
+    :type wcu_budget: int | None
+    :param reject_path: file rejected items are written to, in the home directory if
+        not set, see `copy_reject_path`
+    :type reject_path: str | Path | None
+    :param query_kwargs: extra query or scan parameters, e.g a Limit
+    """
+
+    def __init__(
+        self,
+        source,
+        target,
+        *,
+        query_params: QueryParameters | None = None,
+        total_segments: int = 1,
+        transform: Callable[[dict], dict | None] | None = None,
+        workers: int = 4,
+        rcu_budget: int | None = None,
+        wcu_budget: int | None = None,
+        reject_path: str | Path | None = None,
+        **query_kwargs,
+    ) -> None:
+        if query_params:
+            query_params = query_params.model_copy(update={"next_token": None})
+            query_kwargs = {**query_params.boto_params, **query_kwargs}
+        self.scan_mode = query_params.scan_mode if query_params else True
+        if not self.scan_mode and total_segments > 1:
+            raise ValueError("only scans can be split into segments")
+        reject_path = reject_path or copy_reject_path(source.name)
+        super().__init__(
+            target,
+            CopyProgress(
+                source=table_description(source),
+                target=table_description(target),
+                reject_path=reject_path,
+            ),
+            reject_path,
+            workers=workers,
+            wcu_budget=wcu_budget,
+        )
+        self.source = source
+        self.total_segments = max(total_segments, 1)
+        self.transform = transform
+        self.read_budget = CapacityBudget(rcu_budget) if rcu_budget else None
+        self.query_kwargs = {**query_kwargs, "ReturnConsumedCapacity": "TOTAL"}
+
+    def _read_response(self, response: dict) -> None:
+        consumed = response.get("ConsumedCapacity", {}).get("CapacityUnits", 0)
+        with self._lock:
+            self.progress.items_read += len(response["Items"])
+            self.progress.consumed_read_capacity += consumed
+        if self.read_budget and consumed:
+            self.read_budget.acquire(consumed)
+
+    def iter_items(self) -> Iterator[dict]:
+        """Items of the source table with the transform applied"""
+        for page in iter_segment_pages(
+            self.source,
+            total_segments=self.total_segments,
+            scan_mode=self.scan_mode,
+            max_queued_pages=self.workers * 2,
+            on_response=self._read_response,
+            **self.query_kwargs,
+        ):
+            for item in page:
+                if self.transform:
+                    try:
+                        item = self.transform(item)
+                    except Exception as e:  # pylint: disable=broad-except
+                        self._reject([item], f"transform failed: {e}")
+                        continue
+                    if item is None:
+                        continue
+                yield item
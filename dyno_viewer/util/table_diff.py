@@ -0,0 +1,375 @@
+import hashlib
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Iterator, TextIO
+
+import simplejson as json
+from boto3.dynamodb.types import Binary
+
+from dyno_viewer.aws.ddb import from_dynamodb_json, to_dynamodb_json
+from dyno_viewer.models import (
+    AttributeChange,
+    DiffEntry,
+    DiffProgress,
+    QueryParameters,
+)
+from dyno_viewer.util.export import export_json_default
+from dyno_viewer.util.table_copy import iter_segment_pages, table_description
+
+# number of bucket files each side is spilled to, only one bucket of the source is
+# held in memory at a time
+SPILL_BUCKETS = 64
+# compared items between progress updates
+PROGRESS_INTERVAL = 1000
+
+
+def _canonical(value: dict) -> dict:
+    """Typed dynamodb json value with set members sorted and numbers normalised"""
+    ((type_name, type_value),) = value.items()
+    if type_name == "N":
+        return {"N": _normalise_number(type_value)}
+    if type_name == "NS":
+        return {"NS": sorted(_normalise_number(number) for number in type_value)}
+    if type_name in ("SS", "BS"):
+        return {type_name: sorted(type_value)}
+    if type_name == "M":
+        return {
+            "M": {name: _canonical(element) for name, element in type_value.items()}
+        }
+    if type_name == "L":
+        return {"L": [_canonical(element) for element in type_value]}
+    return value
+
+
+def _normalise_number(value: str) -> str:
+    number = Decimal(value)
+    return "0" if number.is_zero() else str(number.normalize())
+
+
+def canonical_json(item: dict) -> str:
+    """
+    Json of an item that's the same however the item was read, keys and set members
+    are sorted and numbers normalised, so equal items always have the same hash
+    """
+    return json.dumps(
+        {name: _canonical(value) for name, value in to_dynamodb_json(item).items()},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def item_hash(item: dict) -> str:
+    """Hash of the canonical json of an item"""
+    return hashlib.blake2b(canonical_json(item).encode(), digest_size=16).hexdigest()
+
+
+def diff_attributes(old: dict, new: dict) -> list[AttributeChange]:
+    """
+    Attributes added, removed or changed between two versions of an item
+
+    :param old: item in the source
+    :type old: dict
+    :param new: item in the target
+    :type new: dict
+    :return: changed attributes sorted by name
+    :rtype: list[AttributeChange]
+    """
+    changes = []
+    for name in sorted(old.keys() | new.keys()):
+        if name not in new:
+            changes.append(AttributeChange(name=name, change="removed", old=old[name]))
+        elif name not in old:
+            changes.append(AttributeChange(name=name, change="added", new=new[name]))
+        elif canonical_json({name: old[name]}) != canonical_json({name: new[name]}):
+            changes.append(
+                AttributeChange(
+                    name=name, change="changed", old=old[name], new=new[name]
+                )
+            )
+    return changes
+
+
+def _sortable(value):
+    return value.value if isinstance(value, Binary) else value
+
+
+def write_diff_entry(f: TextIO, entry: DiffEntry) -> None:
+    """Write a diff entry as a json line"""
+    f.write(
+        json.dumps(entry.model_dump(exclude_defaults=True), default=export_json_default)
+        + "\n"
+    )
+
+
+class TableDiff:
+    """
+    Diff the items of a query or scan on two tables, which can be in different
+    accounts or regions, without holding either side in memory. Both sides are
+    streamed, each scan segment on its own thread, and every item is hashed from its
+    canonical json.
+
+    When both sides are queries of the base table their items come back in key order,
+    so they are merge joined on the primary key as they're read. Otherwise the key,
+    hash and item of each side are spilled to `SPILL_BUCKETS` bucket files by the
+    hash of the key, then each source bucket is loaded and the matching target bucket
+    streamed against it. Attributes are only compared for items whose hashes differ.
+
+    :param source: table diffed from
+    :param target: table diffed to
+    :param query_params: query or scan to run on both tables, full table scans if
+        not set
+    :type query_params: QueryParameters | None
+    :param total_segments: number of scan segments read in parallel on each side
+    :type total_segments: int
+    :param spill_dir: directory the spill files are made in, the temp directory if not
+        set
+    :type spill_dir: str | Path | None
+    :param query_kwargs: extra query or scan parameters, e.g a Limit
+    """
+
+    def __init__(
+        self,
+        source,
+        target,
+        query_params: QueryParameters | None = None,
+        total_segments: int = 1,
+        spill_dir: str | Path | None = None,
+        **query_kwargs,
+    ) -> None:
+        if query_params:
+            query_params = query_params.model_copy(update={"next_token": None})
+            query_kwargs = {**query_params.boto_params, **query_kwargs}
+        self.scan_mode = query_params.scan_mode if query_params else True
+        if not self.scan_mode and total_segments > 1:
+            raise ValueError("only scans can be split into segments")
+        self.source = source
+        self.target = target
+        self.total_segments = max(total_segments, 1)
+        self.spill_dir = spill_dir
+        self.query_kwargs = query_kwargs
+        self.key_names = [key["AttributeName"] for key in source.key_schema]
+        self.progress = DiffProgress(
+            source=table_description(source),
+            target=table_description(target),
+            # queries of an index can have many items with the same index key
+            merge_join=not self.scan_mode and "IndexName" not in query_kwargs,
+        )
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._on_progress: Callable[[DiffProgress], None] = lambda _: None
+
+    def _key(self, item: dict) -> dict:
+        return {name: item[name] for name in self.key_names}
+
+    def _iter_items(self, table, count_attr: str) -> Iterator[dict]:
+        for page in iter_segment_pages(
+            table,
+            total_segments=self.total_segments,
+            scan_mode=self.scan_mode,
+            **self.query_kwargs,
+        ):
+            with self._lock:
+                setattr(
+                    self.progress,
+                    count_attr,
+                    getattr(self.progress, count_attr) + len(page),
+                )
+                self._update()
+            yield from page
+
+    def _update(self) -> None:
+        self.progress.elapsed = time.monotonic() - self._start
+        self._on_progress(self.progress)
+
+    def _emit(
+        self,
+        change: str,
+        key: dict,
+        on_entry: Callable[[DiffEntry], None],
+        old: dict | None = None,
+        new: dict | None = None,
+    ) -> None:
+        setattr(self.progress, change, getattr(self.progress, change) + 1)
+        # the spilled buckets are compared after every page is read, so updates are
+        # made as they're compared too
+        if not self.progress.merge_join and not (
+            (self.progress.differences + self.progress.unchanged) % PROGRESS_INTERVAL
+        ):
+            self._update()
+        if change == "unchanged":
+            return
+        on_entry(
+            DiffEntry(
+                change=change,
+                key=key,
+                attributes=diff_attributes(old, new) if change == "changed" else [],
+            )
+        )
+
+    def _merge_join(
+        self, is_cancelled: Callable[[], bool], on_entry: Callable[[DiffEntry], None]
+    ) -> None:
+        def keyed(table, count_attr: str) -> Iterator[tuple[tuple, dict]]:
+            last_key = None
+            for item in self._iter_items(table, count_attr):
+                sort_key = tuple(_sortable(item[name]) for name in self.key_names)
+                if last_key is not None and sort_key < last_key:
+                    raise ValueError(
+                        f"{table_description(table)} isn't in key order, can't merge"
+                    )
+                last_key = sort_key
+                yield sort_key, item
+
+        source_items = keyed(self.source, "source_items")
+        target_items = keyed(self.target, "target_items")
+        try:
+            source = next(source_items, None)
+            target = next(target_items, None)
+            while (source or target) and not is_cancelled():
+                if target is None or (source is not None and source[0] < target[0]):
+                    self._emit("removed", self._key(source[1]), on_entry)
+                    source = next(source_items, None)
+                elif source is None or target[0] < source[0]:
+                    self._emit("added", self._key(target[1]), on_entry)
+                    target = next(target_items, None)
+                else:
+                    change = (
+                        "unchanged"
+                        if item_hash(source[1]) == item_hash(target[1])
+                        else "changed"
+                    )
+                    self._emit(
+                        change, self._key(source[1]), on_entry, source[1], target[1]
+                    )
+                    source = next(source_items, None)
+                    target = next(target_items, None)
+        finally:
+            source_items.close()
+            target_items.close()
+
+    def _spill(
+        self,
+        table,
+        count_attr: str,
+        buckets: list[TextIO],
+        is_cancelled: Callable[[], bool],
+    ) -> None:
+        items = self._iter_items(table, count_attr)
+        try:
+            for item in items:
+                if is_cancelled():
+                    return
+                key_json = canonical_json(self._key(item))
+                item_json = canonical_json(item)
+                bucket = int(hashlib.blake2b(key_json.encode()).hexdigest()[:8], 16)
+                buckets[bucket % len(buckets)].write(
+                    f"{key_json}\t{item_hash(item)}\t{item_json}\n"
+                )
+        finally:
+            items.close()
+
+    def _hash_join(
+        self, is_cancelled: Callable[[], bool], on_entry: Callable[[DiffEntry], None]
+    ) -> None:
+        with tempfile.TemporaryDirectory(dir=self.spill_dir) as spill_dir:
+            paths = {
+                side: [
+                    Path(spill_dir) / f"{side}-{bucket}.tsv"
+                    for bucket in range(SPILL_BUCKETS)
+                ]
+                for side in ("source", "target")
+            }
+            # closed once both sides are spilled, or on the first open that fails
+            with ExitStack() as stack:
+                files = {
+                    side: [
+                        stack.enter_context(open(path, "w", encoding="utf-8"))
+                        for path in side_paths
+                    ]
+                    for side, side_paths in paths.items()
+                }
+                with ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="diff side"
+                ) as pool:
+                    futures = [
+                        pool.submit(
+                            self._spill,
+                            table,
+                            f"{side}_items",
+                            files[side],
+                            is_cancelled,
+                        )
+                        for side, table in (
+                            ("source", self.source),
+                            ("target", self.target),
+                        )
+                    ]
+                    for future in futures:
+                        future.result()
+            for source_path, target_path in zip(paths["source"], paths["target"]):
+                if is_cancelled():
+                    return
+                with open(source_path, encoding="utf-8") as f:
+                    source = {}
+                    for line in f:
+                        key_json, hash_value, item_json = line.rstrip("\n").split("\t")
+                        source[key_json] = (hash_value, item_json)
+                with open(target_path, encoding="utf-8") as f:
+                    for line in f:
+                        key_json, hash_value, item_json = line.rstrip("\n").split("\t")
+                        key = from_dynamodb_json(json.loads(key_json))
+                        if key_json not in source:
+                            self._emit("added", key, on_entry)
+                            continue
+                        source_hash, source_json = source.pop(key_json)
+                        if source_hash == hash_value:
+                            self._emit("unchanged", key, on_entry)
+                            continue
+                        self._emit(
+                            "changed",
+                            key,
+                            on_entry,
+                            from_dynamodb_json(json.loads(source_json)),
+                            from_dynamodb_json(json.loads(item_json)),
+                        )
+                for key_json in source:
+                    self._emit(
+                        "removed", from_dynamodb_json(json.loads(key_json)), on_entry
+                    )
+
+    def run(
+        self,
+        is_cancelled: Callable[[], bool] = lambda: False,
+        on_entry: Callable[[DiffEntry], None] = lambda _: None,
+        on_progress: Callable[[DiffProgress], None] = lambda _: None,
+    ) -> DiffProgress:
+        """
+        Diff the two sides
+
+        :param is_cancelled: checked before each item is compared or spilled
+        :type is_cancelled: Callable[[], bool]
+        :param on_entry: called with each item that was added, removed or changed
+        :type on_entry: Callable[[DiffEntry], None]
+        :param on_progress: called with the progress after each page read and as the
+            spilled buckets are compared, can be called from the reader threads
+        :type on_progress: Callable[[DiffProgress], None]
+        :return: counts of the items read and of each kind of change
+        :rtype: DiffProgress
+        """
+        self._start = time.monotonic()
+        self._on_progress = on_progress
+        try:
+            if self.progress.merge_join:
+                self._merge_join(is_cancelled, on_entry)
+            else:
+                self._hash_join(is_cancelled, on_entry)
+        except Exception as e:  # pylint: disable=broad-except
+            self.progress.error = str(e)
+        self.progress.elapsed = time.monotonic() - self._start
+        self.progress.finished = not self.progress.error and not is_cancelled()
+        return self.progress
@@ -22,3 +22,19 @@ def output_to_csv_str(iterable):
     writer = csv.writer(output)
     writer.writerow(iterable)
     return output.getvalue()
+
+
+def format_bytes(size: float) -> str:
+    """format a byte count e.g 1536 -> 1.5 KB"""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_duration(seconds: float) -> str:
+    """format seconds as h:mm:ss"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
@@ -1,92 +1,40 @@
-import sys
-import uuid
-
-sys.path.append("..")
-from dyno_viewer.models import QueryParameters, KeyCondition, FilterCondition
-import time
 import argparse
 import asyncio
+import sys
+import time
 from pathlib import Path
-import aiosqlite
-from pydantic import BaseModel, ConfigDict
-import json
-from typing import Any, List, TypedDict
-from dyno_viewer.db.data_store import (
-    insert,
-    remove,
-    update,
-    get,
-    get_all,
-    setup_connection,
-)
-from dyno_viewer.db.queries import (
-    add_query_history,
-    add_saved_query_from_query_params,
-    list_query_history,
-    get_saved_query_by_name,
-)
+
+sys.path.append("..")
+from dyno_viewer.db.manager import DatabaseManager
+from dyno_viewer.models import KeyCondition, QueryParameters
 
 
-async def seed_data(connection: aiosqlite.Connection) -> None:
-    for _ in range(50):
-        await add_query_history(
-            connection,
-            QueryParameters.model_validate(
+def query_params(partition_value: str) -> QueryParameters:
+    return QueryParameters.model_validate(
+        {
+            "scan_mode": False,
+            "primary_key_name": "pk",
+            "sort_key_name": "sk",
+            "key_condition": KeyCondition.model_validate(
                 {
-                    "scan_mode": False,
-                    "primary_key_name": "pk",
-                    "sort_key_name": "sk",
-                    "key_condition": KeyCondition.model_validate(
-                        {
-                            "partitionKeyValue": "partition_value",
-                        }
-                    ),
-                    "filter_conditions": [],
-                    "next_token": None,
+                    "partitionKeyValue": partition_value,
                 }
             ),
-        )
-        time.sleep(0.2)
-    for _ in range(20):
-        await add_saved_query_from_query_params(
-            connection,
-            name=f"Test Saved Query {uuid.uuid4()}",
+            "filter_conditions": [],
+            "next_token": None,
+        }
+    )
+
+
+async def seed_data(db_manager: DatabaseManager, count: int) -> None:
+    for i in range(count):
+        await db_manager.add_query_history(query_params(f"partition_value_{i}"))
+    for i in range(count):
+        await db_manager.add_saved_query_from_query_params(
+            name=f"Test Saved Query {i}",
             description="A test saved query",
-            params=QueryParameters.model_validate(
-                {
-                    "scan_mode": False,
-                    "primary_key_name": "pk",
-                    "sort_key_name": "sk",
-                    "key_condition": KeyCondition.model_validate(
-                        {
-                            "partitionKeyValue": "partition_value",
-                        }
-                    ),
-                    "filter_conditions": [],
-                    "next_token": None,
-                }
-            ),
-        )
-        time.sleep(0.2)
-    for _ in range(50):
-        await add_query_history(
-            connection,
-            QueryParameters.model_validate(
-                {
-                    "scan_mode": False,
-                    "primary_key_name": "pk",
-                    "sort_key_name": "sk",
-                    "key_condition": KeyCondition.model_validate(
-                        {
-                            "partitionKeyValue": "partition_value",
-                        }
-                    ),
-                    "filter_conditions": [],
-                    "next_token": None,
-                }
-            ),
+            params=query_params(f"partition_value_{i}"),
         )
-        time.sleep(0.2)
 
 
 async def main() -> None:
@@ -104,44 +52,39 @@ async def main() -> None:
         action="store_true",
         help="Seed the database with test data",
     )
-    args = parser.parse_args()
-    connection = await setup_connection(args.db_path)
-
-    if args.seed_data:
-        print("Seeding data...")
-        await seed_data(connection)
-
-    page = 1
-    results = []
-    result = await list_query_history(connection, page=page, page_size=10)
-    results.extend(result)
-    print(f"Page {page}: {len(result)} results")
-    while result:
-        result = await list_query_history(connection, page=page, page_size=10)
-        page += 1
-        print(f"Page {page}: {len(result)} results")
-        if result:
-            results.append(result)
-    print(results[0].created_at.tzinfo)
-    saved_query = await get_saved_query_by_name(
-        connection,
-        "Test Saved Query ced7f097-b471-465e-8e56-a2f0d7dfc2a7",
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=50,
+        help="Number of query history rows and saved queries to seed",
     )
-    print(saved_query)
+    args = parser.parse_args()
+    db_manager = DatabaseManager(args.db_path)
+    await db_manager.setup()
+    try:
+        if args.seed_data:
+            print("Seeding data...")
+            start = time.perf_counter()
+            await seed_data(db_manager, args.count)
+            print(f"Seeded in {time.perf_counter() - start:.2f}s")
 
-    await connection.close()
-    # async with aiosqlite.connect(args.db_path) as db:
-    #     await configure_db(db)
-    #     await create_data_store_table(db)
-    #     await get_all(db)
-    # await db.execute(
-    #     "INSERT INTO data_store (key, data) VALUES (?, ?)",
-    #     ("key1", '{"some_key": "some_value"}'),
-    # )
-    # await db.commit()
-    # await update(db, "key1", {"new_key": {"nested_key": "777", "another_key": {"deep_key": 42}}})
+        page = 0
+        results = []
+        after = None
+        start = time.perf_counter()
+        while result := await db_manager.list_query_history(page_size=10, after=after):
+            page += 1
+            print(f"Page {page}: {len(result)} results")
+            results.extend(result)
+            after = result[-1].cursor
+        print(f"Read {len(results)} rows in {time.perf_counter() - start:.2f}s")
+        if results:
+            print(results[0].created_at.tzinfo)
 
-    # await remove(db, "key1")
+        saved_query = await db_manager.get_saved_query_by_name("Test Saved Query 0")
+        print(saved_query)
+    finally:
+        await db_manager.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+"""
+Benchmarks of the `DatabaseManager` on databases seeded with a lot of rows. They're
+opt in, only collected when DYNO_VIEWER_BENCHMARK_SIZES is set to the number of rows to
+seed, e.g `DYNO_VIEWER_BENCHMARK_SIZES=10000,100000,1000000`, and need pytest-benchmark.
+See `poe benchmark`
+"""
+
+import asyncio
+import os
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Iterator
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from dyno_viewer.db.manager import DatabaseManager
+from dyno_viewer.db.models import RecordType
+from dyno_viewer.models import (
+    FilterCondition,
+    KeyCondition,
+    QueryHistory,
+    SavedQuery,
+    Session,
+    SessionGroup,
+    SortKeyCondition,
+)
+
+SIZES = [
+    int(size)
+    for size in os.environ.get("DYNO_VIEWER_BENCHMARK_SIZES", "").split(",")
+    if size.strip()
+]
+if not SIZES:
+    collect_ignore_glob = ["test_*.py"]
+
+# rows are written in batches of this many
+SEED_BATCH_SIZE = 10_000
+# sessions in each session group
+GROUP_SIZE = 100
+WORDS = ("orders", "customers", "invoices", "shipments", "products", "refunds")
+
+
+def query_history(i: int) -> QueryHistory:
+    return QueryHistory(
+        table=f"{WORDS[i % len(WORDS)]}-{i % 50}",
+        primary_key_name="pk",
+        sort_key_name="sk",
+        key_condition=KeyCondition(
+            partitionKeyValue=f"customer#{i}",
+            sortKey=SortKeyCondition(
+                attrType="string", attrCondition="begins_with", attrValue="order#"
+            ),
+        ),
+        filter_conditions=[
+            FilterCondition(
+                attrName="status",
+                attrType="string",
+                attrCondition="==",
+                attrValue=WORDS[i % len(WORDS)],
+            )
+        ],
+    )
+
+
+def saved_query(i: int) -> SavedQuery:
+    return SavedQuery(
+        name=f"{WORDS[i % len(WORDS)]} {i}",
+        description=f"saved query {i} of {WORDS[(i + 1) % len(WORDS)]}",
+        **query_history(i).model_dump(include=set(SavedQuery.model_fields)),
+    )
+
+
+def session(i: int) -> Session:
+    return Session(
+        session_id=f"session-{i}",
+        session_group_id=f"group-{i // GROUP_SIZE}",
+        name=f"{WORDS[i % len(WORDS)]} {i}",
+        table_name=f"{WORDS[i % len(WORDS)]}-{i % 50}",
+        aws_region="ap-southeast-2",
+    )
+
+
+# key and record of the i-th row of each type, sessions are put in groups of GROUP_SIZE
+SEED_ROWS: dict[str, Callable[[int], tuple[str, Any]]] = {
+    RecordType.SessionGroup.value: lambda i: (
+        f"group-{i}",
+        SessionGroup(session_group_id=f"group-{i}", name=f"group {i}"),
+    ),
+    RecordType.Session.value: lambda i: (f"session-{i}", session(i)),
+    RecordType.SavedQuery.value: lambda i: (f"saved-query-{i}", saved_query(i)),
+    RecordType.QueryHistory.value: lambda i: (f"query-history-{i}", query_history(i)),
+}
+
+
+async def seed(path: Path, size: int) -> None:
+    """
+    Seed a database with `size` query history, saved query and session rows. Rows are
+    written with one statement per batch, adding them one by one would take hours for
+    the bigger sizes
+    """
+    manager = DatabaseManager(path)
+    await manager.setup()
+    start = datetime(2024, 1, 1, tzinfo=ZoneInfo("UTC"))
+    counts = {
+        RecordType.SessionGroup.value: -(-size // GROUP_SIZE),
+        RecordType.Session.value: size,
+        RecordType.SavedQuery.value: size,
+        RecordType.QueryHistory.value: size,
+    }
+    try:
+        for record_type, count in counts.items():
+            for batch in range(0, count, SEED_BATCH_SIZE):
+                rows = [
+                    manager._record_row(
+                        *SEED_ROWS[record_type](i),
+                        record_type,
+                        (start + timedelta(seconds=i)).isoformat(),
+                    )
+                    for i in range(batch, min(batch + SEED_BATCH_SIZE, count))
+                ]
+                table, columns = rows[0]
+                await manager.connection.executemany(
+                    manager._insert_statement(table, list(columns)),
+                    [tuple(row.values()) for _, row in rows],
+                )
+                await manager.connection.commit()
+        await manager.checkpoint("TRUNCATE")
+    finally:
+        await manager.close()
+
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda size: f"{size}_rows")
+def size(request) -> int:
+    """Number of rows of each type the database is seeded with"""
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def seeded_db(size, tmp_path_factory) -> Path:
+    """Database seeded with `size` rows of each type, shared by the benchmarks"""
+    path = tmp_path_factory.mktemp(f"seeded_{size}") / "db.db"
+    asyncio.run(seed(path, size))
+    return path
+
+
+@pytest.fixture
+def make_query_history() -> Callable[[int], QueryHistory]:
+    """Builds the parameters of the i-th query in the seeded history"""
+    return query_history
+
+
+@pytest.fixture
+def run() -> Iterator[Callable[[Coroutine], Any]]:
+    """
+    Runs a coroutine to completion, benchmarks time a plain function so each benchmark
+    has its own event loop to run the manager in
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        yield loop.run_until_complete
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def manager(run, seeded_db) -> Iterator[DatabaseManager]:
+    """Manager of the seeded database, for benchmarks that only read"""
+    manager = DatabaseManager(seeded_db)
+    run(manager.setup())
+    try:
+        yield manager
+    finally:
+        run(manager.close())
+
+
+@pytest.fixture
+def writable_manager(run, seeded_db, tmp_path) -> Iterator[DatabaseManager]:
+    """Manager of a copy of the seeded database, for benchmarks that write"""
+    path = tmp_path / "db.db"
+    shutil.copy(seeded_db, path)
+    manager = DatabaseManager(path)
+    run(manager.setup())
+    try:
+        yield manager
+    finally:
+        run(manager.close())
@@ -0,0 +1,102 @@
+from itertools import count
+
+import pytest
+
+from dyno_viewer.db.manager import DatabaseManager
+
+PAGE_SIZE = 20
+
+
+def test_add_query_history(benchmark, run, writable_manager, size, make_query_history):
+    # every round runs a query that isn't in the history yet
+    queries = count(size)
+    benchmark(
+        lambda: run(
+            writable_manager.add_query_history(make_query_history(next(queries)))
+        )
+    )
+
+
+def test_add_query_history_again(
+    benchmark, run, writable_manager, size, make_query_history
+):
+    # bumps the run count of a query already in the history
+    params = make_query_history(size // 2)
+    benchmark(lambda: run(writable_manager.add_query_history(params)))
+
+
+def test_list_query_history_first_page(benchmark, run, manager):
+    rows = benchmark(lambda: run(manager.list_query_history(page_size=PAGE_SIZE)))
+    assert len(rows) == PAGE_SIZE
+
+
+def test_list_query_history_deep_keyset_page(benchmark, run, manager, size):
+    # the page half way through the history
+    [*_, last] = run(
+        manager.list_query_history(page=size // PAGE_SIZE // 2, page_size=PAGE_SIZE)
+    )
+    rows = benchmark(
+        lambda: run(manager.list_query_history(page_size=PAGE_SIZE, after=last.cursor))
+    )
+    assert len(rows) == PAGE_SIZE
+
+
+def test_list_query_history_deep_offset_page(benchmark, run, manager, size):
+    rows = benchmark(
+        lambda: run(
+            manager.list_query_history(page=size // PAGE_SIZE // 2, page_size=PAGE_SIZE)
+        )
+    )
+    assert len(rows) == PAGE_SIZE
+
+
+def test_list_query_history_data(benchmark, run, manager):
+    # listing is lazy, this times reading every row too
+    def list_history():
+        rows = run(manager.list_query_history(page_size=PAGE_SIZE))
+        return [row.data for row in rows]
+
+    assert len(benchmark(list_history)) == PAGE_SIZE
+
+
+@pytest.mark.parametrize(
+    "method,kwargs",
+    [
+        ("list_saved_queries", {"search": "invoices"}),
+        ("list_query_history", {"search": "customers"}),
+        ("list_sessions", {"search_name": "shipments"}),
+        ("list_sessions", {"search_name": "ord", "session_group_id": "group-0"}),
+    ],
+    ids=["saved_queries", "query_history", "sessions", "sessions_in_group"],
+)
+def test_search(benchmark, run, manager, method, kwargs):
+    list_records = getattr(manager, method)
+    rows = benchmark(lambda: run(list_records(page_size=PAGE_SIZE, **kwargs)))
+    assert rows
+
+
+def test_get_saved_query_by_name(benchmark, run, manager, size):
+    name = f"orders {size // 2 // 6 * 6}"
+    saved_query = benchmark(lambda: run(manager.get_saved_query_by_name(name)))
+    assert saved_query.name == name
+
+
+def test_update_session(benchmark, run, writable_manager, size):
+    names = count()
+    session_id = f"session-{size // 2}"
+    session = benchmark(
+        lambda: run(
+            writable_manager.update_session(session_id, name=f"renamed {next(names)}")
+        )
+    )
+    assert session.session_id == session_id
+
+
+def test_startup(benchmark, run, seeded_db):
+    # opening the database when the app starts, with the schema already up to date
+    def startup():
+        manager = DatabaseManager(seeded_db)
+        run(manager.setup())
+        run(manager.close())
+
+    benchmark(startup)
@@ -58,3 +58,46 @@ def test_convert_filter_exp_value(attr_value):
 
     result = convert_filter_exp_value(**attr_value["args"])
     assert isinstance(result, attr_value["resultType"])
+
+
+def test_iter_pages(ddb_table_with_data, ddb_table):
+    from dyno_viewer.aws.ddb import iter_pages
+
+    pages = list(iter_pages(ddb_table, scan_mode=True, Limit=50))
+    assert len(pages) > 1
+    assert all(last_key for _, last_key in pages[:-1])
+    assert pages[-1][1] is None
+    assert all(len(items) == 50 for items, _ in pages[:-1])
+    assert sorted(item["sk"] for items, _ in pages for item in items) == sorted(
+        item["sk"] for item in ddb_table_with_data
+    )
+
+
+def test_dynamodb_json_round_trip():
+    from boto3.dynamodb.types import Binary
+
+    from dyno_viewer.aws.ddb import from_dynamodb_json, to_dynamodb_json
+
+    item = {
+        "pk": "customer#1",
+        "amount": Decimal("10.5"),
+        "tags": {"a", "b"},
+        "blob": Binary(b"data"),
+        "blobs": {Binary(b"1")},
+        "details": {"nested": [Binary(b"x"), None, True]},
+    }
+    ddb_json = to_dynamodb_json(item)
+    assert ddb_json["blob"] == {"B": "ZGF0YQ=="}
+    assert ddb_json["details"]["M"]["nested"]["L"][0] == {"B": "eA=="}
+    assert from_dynamodb_json(ddb_json) == item
+    # exports from dynamodb wrap each item in an "Item" key
+    assert from_dynamodb_json({"Item": ddb_json}) == item
+    assert from_dynamodb_json({"Item": ddb_json, "error": "rejected"}) == item
+    # an attribute called Item isn't a wrapped item
+    for item in (
+        {"Item": {"x": Decimal(1)}},
+        {"Item": {"S": "value"}},
+        {"Item": "value"},
+        {"Item": {"M": {"S": "value"}}},
+    ):
+        assert from_dynamodb_json(to_dynamodb_json(item)) == item
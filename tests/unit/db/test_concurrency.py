@@ -0,0 +1,147 @@
+import asyncio
+import sqlite3
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from dyno_viewer.db.manager import DatabaseManager
+from dyno_viewer.db.migrations import SCHEMA_VERSION, get_schema_version
+from dyno_viewer.models import Session, SessionGroup
+
+
+@pytest_asyncio.fixture
+async def db_path(tmp_path):
+    path = tmp_path / "db.db"
+    manager = DatabaseManager(path)
+    await manager.setup()
+    await manager.close()
+    return path
+
+
+async def hold_write_lock(path, seconds: float) -> None:
+    """Another instance writing to the database for a while"""
+    async with aiosqlite.connect(path) as connection:
+        await connection.execute("BEGIN IMMEDIATE")
+        await asyncio.sleep(seconds)
+        await connection.commit()
+
+
+async def test_instances_open_a_new_database_at_once(tmp_path):
+    managers = [DatabaseManager(tmp_path / "db.db") for _ in range(3)]
+    await asyncio.gather(*(manager.setup() for manager in managers))
+    try:
+        for manager in managers:
+            assert await get_schema_version(manager.connection) == SCHEMA_VERSION
+    finally:
+        for manager in managers:
+            await manager.close()
+
+
+async def test_writes_wait_for_another_instance(db_path):
+    first = DatabaseManager(db_path)
+    second = DatabaseManager(db_path)
+    await first.setup()
+    await second.setup()
+    try:
+        group = SessionGroup(name="work")
+        lock = asyncio.create_task(hold_write_lock(db_path, 0.2))
+        await asyncio.sleep(0.05)
+        await first.add_session_group(group)
+        await lock
+        assert await second.get_session_group_by_name("work") == group
+    finally:
+        await first.close()
+        await second.close()
+
+
+async def test_locked_flush_keeps_writes(db_path):
+    manager = DatabaseManager(
+        db_path, write_behind=True, flush_interval=60, busy_timeout=0.05
+    )
+    await manager.setup()
+    try:
+        await manager.add_session_group(SessionGroup(name="work"))
+        lock = asyncio.create_task(hold_write_lock(db_path, 0.3))
+        await asyncio.sleep(0.05)
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            await manager.flush()
+        assert manager.pending_writes == 1
+        await lock
+        await manager.flush()
+        assert manager.pending_writes == 0
+        assert await manager.get_session_group_by_name("work")
+    finally:
+        await manager.close()
+
+
+async def test_instances_see_each_others_updates(db_path):
+    first = DatabaseManager(db_path)
+    second = DatabaseManager(db_path)
+    await first.setup()
+    await second.setup()
+    try:
+        group = SessionGroup(name="work")
+        await first.add_session_group(group)
+        session = Session(
+            name="orders",
+            table_name="orders",
+            aws_region="ap-southeast-2",
+            session_group_id=group.session_group_id,
+        )
+        await first.add_session(session)
+        # cached by the first instance, the second one's session isn't there yet
+        assert (await first.get_session(session.session_id)).name == "orders"
+        assert await first.get_session("second") is None
+
+        await second.update_session(session.session_id, name="customers")
+        await second.add_session(
+            session.model_copy(update={"session_id": "second", "name": "second"})
+        )
+
+        assert (await first.get_session(session.session_id)).name == "customers"
+        assert (await first.get_session("second")).name == "second"
+    finally:
+        await first.close()
+        await second.close()
+
+
+async def test_reads_use_read_only_connections(db_path, mocker):
+    manager = DatabaseManager(db_path, read_connections=2)
+    await manager.setup()
+    try:
+        group = SessionGroup(name="work")
+        await manager.add_session_group(group)
+        writer = mocker.spy(manager.connection, "execute")
+        assert await manager.get_session_group_by_name("work") == group
+        assert await manager.list_session_group()
+        assert writer.call_count == 0
+
+        reader = await manager._reader()
+        assert reader is not manager.connection
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            await reader.execute("DELETE FROM session_groups")
+    finally:
+        await manager.close()
+
+
+async def test_in_memory_database_has_one_connection(db_manager):
+    assert await db_manager._reader() is db_manager.connection
+
+
+async def test_checkpoint(db_path):
+    manager = DatabaseManager(db_path, write_behind=True, auto_checkpoint=False)
+    await manager.setup()
+    try:
+        async with manager.connection.execute("PRAGMA wal_autocheckpoint") as cursor:
+            assert (await cursor.fetchone())[0] == 0
+        await manager.add_session_group(SessionGroup(name="work"))
+        # queued writes are flushed first
+        busy, log, checkpointed = await manager.checkpoint()
+        assert manager.pending_writes == 0
+        assert busy == 0
+        assert log == checkpointed > 0
+        with pytest.raises(ValueError, match="Invalid checkpoint mode"):
+            await manager.checkpoint("FULL); DROP TABLE sessions; --")
+    finally:
+        await manager.close()
@@ -0,0 +1,268 @@
+import sqlite3
+
+import aiosqlite
+import pytest
+
+from dyno_viewer.db.manager import DatabaseManager
+from dyno_viewer.db.migrations import (
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    _json_value,
+    get_schema_version,
+    migrate,
+)
+from dyno_viewer.models import KeyCondition, QueryHistory, Session, SessionGroup
+
+
+async def query_plan(connection: aiosqlite.Connection, statement: str, values) -> str:
+    async with connection.execute(f"EXPLAIN QUERY PLAN {statement}", values) as cursor:
+        return " ".join(row[-1] for row in await cursor.fetchall())
+
+
+def create_legacy_db(path) -> None:
+    """Database made before migrations, with only the data_store table"""
+    with sqlite3.connect(path) as connection:
+        connection.execute(MIGRATIONS[0][0])
+        connection.execute(
+            "INSERT INTO data_store (key, record_type, data) VALUES (?, ?, ?)",
+            (
+                "group-1",
+                "SessionGroup",
+                '{"name": "work", "session_group_id": "group-1"}',
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO data_store (key, record_type, data) VALUES (?, ?, ?)",
+            [
+                (
+                    key,
+                    "Session",
+                    f'{{"name": "{key}", "session_id": "{key}", '
+                    f'"session_group_id": "{group}", "table_name": "orders", '
+                    '"aws_region": "ap-southeast-2"}',
+                )
+                # sessions of deleted groups used to be left behind
+                for key, group in (("orders", "group-1"), ("orphan", "group-2"))
+            ],
+        )
+    connection.close()
+
+
+async def test_migrate_new_db(db_manager):
+    connection = db_manager.connection
+    assert await get_schema_version(connection) == SCHEMA_VERSION
+    # already up to date so nothing is run again
+    assert await migrate(connection) == SCHEMA_VERSION
+
+
+async def test_migrate_legacy_db(tmp_path):
+    path = tmp_path / "db.db"
+    create_legacy_db(path)
+    manager = DatabaseManager(path)
+    await manager.setup()
+    try:
+        assert await get_schema_version(manager.connection) == SCHEMA_VERSION
+        group = await manager.get_session_group_by_name("work")
+        assert group.session_group_id == "group-1"
+        # and existing rows are added to the search index
+        groups = await manager.list_session_group(search_name="wo")
+        assert [group.data.name for group in groups] == ["work"]
+        # records are moved to their own tables
+        sessions = await manager.list_sessions(session_group_id="group-1")
+        assert [session.key for session in sessions] == ["orders"]
+        # sessions of deleted groups are kept, in their group added back
+        orphan = await manager.get_session("orphan")
+        assert orphan.session_group_id == "group-2"
+        recovered = await manager.get_session_group_by_name(
+            "Recovered sessions group-2"
+        )
+        assert recovered.session_group_id == "group-2"
+        async with manager.connection.execute(
+            "SELECT count(*) FROM data_store"
+        ) as cursor:
+            assert (await cursor.fetchone())[0] == 0
+    finally:
+        await manager.close()
+
+
+async def test_migrate_legacy_db_data_store_schema(tmp_path):
+    path = tmp_path / "db.db"
+    create_legacy_db(path)
+    async with aiosqlite.connect(path) as connection:
+        await migrate(connection)
+        async with connection.execute(
+            "SELECT name FROM pragma_table_xinfo('data_store')"
+        ) as cursor:
+            columns = [row[0] async for row in cursor]
+        async with connection.execute(
+            "SELECT name FROM sqlite_master WHERE tbl_name = 'data_store' "
+            "AND type != 'table'"
+        ) as cursor:
+            objects = {row[0] async for row in cursor}
+    # data_store is left as it was with just an index for its remaining records
+    assert columns == ["id", "key", "created_at", "record_type", "data"]
+    assert objects == {
+        "sqlite_autoindex_data_store_1",
+        "idx_data_store_record_type_key",
+    }
+
+
+async def test_migrate_legacy_query_history(tmp_path):
+    path = tmp_path / "db.db"
+    create_legacy_db(path)
+    history = QueryHistory(
+        table="orders",
+        primary_key_name="pk",
+        sort_key_name="sk",
+        key_condition=KeyCondition(partitionKeyValue="customer#1"),
+    )
+    # keyed by when the query was run then its hash
+    params_hash = DatabaseManager().query_history_key(history)
+    with sqlite3.connect(path) as connection:
+        connection.executemany(
+            "INSERT INTO data_store (key, record_type, data, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (
+                    f"{created_at}_{params_hash}",
+                    "QueryHistory",
+                    history.model_dump_json(exclude={"boto_params"}),
+                    created_at,
+                )
+                for created_at in (
+                    "2024-01-02T12:00:00+00:00",
+                    "2024-01-01T12:00:00+00:00",
+                    "2024-01-03T12:00:00+00:00",
+                )
+            ],
+        )
+    connection.close()
+    manager = DatabaseManager(path)
+    await manager.setup()
+    try:
+        [row] = await manager.list_query_history()
+        assert row.key == params_hash
+        assert row.created_at == row.data.last_run
+        assert row.data.run_count == 3
+        assert row.data.first_run.isoformat() == "2024-01-01T12:00:00+00:00"
+        assert row.data.last_run.isoformat() == "2024-01-03T12:00:00+00:00"
+        # running it again carries on counting
+        await manager.add_query_history(history)
+        [row] = await manager.list_query_history()
+        assert row.data.run_count == 4
+    finally:
+        await manager.close()
+
+
+@pytest.mark.parametrize(
+    "value",
+    ['"order#"', "12", "1.5", "true", "false", "null", '[{"a": 1}]', '{"b": "c"}'],
+)
+def test_json_value_matches_the_json_operator(value):
+    # the -> operator needs sqlite 3.38, the migrations have to run on older versions
+    with sqlite3.connect(":memory:") as connection:
+        data = f'{{"value": {value}}}'
+        expected, actual, missing = connection.execute(
+            f"SELECT :data -> '$.value', {_json_value(':data', '$.value')}, "
+            f"{_json_value(':data', '$.missing')}",
+            {"data": data},
+        ).fetchone()
+    connection.close()
+    assert actual == expected
+    assert missing is None
+
+
+async def test_migrate_newer_db(tmp_path):
+    path = tmp_path / "db.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    connection.close()
+    async with aiosqlite.connect(path) as connection:
+        with pytest.raises(RuntimeError, match="please upgrade dyno-viewer"):
+            await migrate(connection)
+
+
+async def test_migrate_failure_rolls_back(tmp_path, mocker):
+    mocker.patch(
+        "dyno_viewer.db.migrations.MIGRATIONS",
+        [MIGRATIONS[0], ["CREATE TABLE broken (id)", "NOT SQL"]],
+    )
+    mocker.patch("dyno_viewer.db.migrations.SCHEMA_VERSION", 2)
+    async with aiosqlite.connect(tmp_path / "db.db") as connection:
+        with pytest.raises(sqlite3.OperationalError):
+            await migrate(connection)
+        assert await get_schema_version(connection) == 1
+        async with connection.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'broken'"
+        ) as cursor:
+            assert await cursor.fetchone() is None
+
+
+@pytest.mark.parametrize(
+    "statement,values,index",
+    [
+        (
+            "SELECT * FROM saved_queries WHERE name = ?",
+            ("orders",),
+            "idx_saved_queries_name_key",
+        ),
+        (
+            "SELECT * FROM session_groups ORDER BY name LIMIT 20",
+            (),
+            "idx_session_groups_name_key",
+        ),
+        (
+            "SELECT * FROM query_history ORDER BY created_at DESC LIMIT 20",
+            (),
+            "idx_query_history_created_at_key",
+        ),
+        (
+            "SELECT * FROM sessions WHERE session_group_id = ? "
+            "ORDER BY name LIMIT 20",
+            ("group-1",),
+            "idx_sessions_session_group_id_name_key",
+        ),
+    ],
+)
+async def test_listings_use_indexes(db_manager, statement, values, index):
+    plan = await query_plan(db_manager.connection, statement, values)
+    assert f"USING INDEX {index}" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+async def test_list_sessions_search_in_group(db_manager):
+    groups = [SessionGroup(name=name) for name in ("work", "home")]
+    for group in groups:
+        await db_manager.add_session_group(group)
+    await db_manager.add_sessions(
+        [
+            Session(
+                name=name,
+                table_name="dawnstar",
+                aws_region="ap-southeast-2",
+                session_group_id=group.session_group_id,
+            )
+            for group in groups
+            for name in ("orders", "users", "order items")
+        ]
+    )
+    sessions = await db_manager.list_sessions(
+        search_name="order", session_group_id=groups[0].session_group_id
+    )
+    # best match first
+    assert [session.data.name for session in sessions] == ["orders", "order items"]
+    assert await db_manager.list_sessions(search_name="' OR 1=1 --") == []
+    assert [
+        group.data.name
+        for group in await db_manager.list_session_group(search_name="ho")
+    ] == ["home"]
+
+
+async def test_records_lookup_is_an_index_seek(db_manager):
+    plan = await query_plan(
+        db_manager.connection,
+        "SELECT record_type FROM records WHERE key = ?",
+        ("key",),
+    )
+    # a seek on the key of each table the view lists
+    assert plan.count("(key=?)") == 5
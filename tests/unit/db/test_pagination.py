@@ -0,0 +1,129 @@
+from datetime import datetime
+
+import pytest
+import time_machine
+
+from dyno_viewer.db.models import PageCursor, RecordType
+from dyno_viewer.models import KeyCondition, QueryHistory, Session, SessionGroup
+
+
+def query_history(value: str) -> QueryHistory:
+    return QueryHistory(
+        table="orders",
+        primary_key_name="pk",
+        sort_key_name="sk",
+        key_condition=KeyCondition(partitionKeyValue=value),
+    )
+
+
+async def add_history(db_manager, count: int, second: int = 0) -> None:
+    for i in range(count):
+        # rows written in the same second sort on their key
+        with time_machine.travel(datetime(2024, 1, 1, 12, 0, second), tick=False):
+            await db_manager.add_query_history(query_history(f"{second}-{i}"))
+
+
+async def test_query_history_keyset_pages(db_manager):
+    await add_history(db_manager, 25)
+    expected = await db_manager.list_query_history(page_size=100)
+
+    pages = []
+    after = None
+    while page := await db_manager.list_query_history(page_size=10, after=after):
+        pages.append(page)
+        after = page[-1].cursor
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [row.key for page in pages for row in page] == [row.key for row in expected]
+    # offset pages are the same as long as nothing is written in between
+    assert [
+        row.key for row in await db_manager.list_query_history(page=2, page_size=10)
+    ] == [row.key for row in pages[1]]
+
+
+async def test_query_history_keyset_pages_are_stable(db_manager):
+    await add_history(db_manager, 10)
+    first_page = await db_manager.list_query_history(page_size=5)
+    # newer history written after the first page was read
+    await add_history(db_manager, 3, second=30)
+    second_page = await db_manager.list_query_history(
+        page_size=5, after=first_page[-1].cursor
+    )
+    offset_page = await db_manager.list_query_history(page=2, page_size=5)
+
+    keys = [row.key for row in first_page + second_page]
+    assert len(set(keys)) == 10
+    # the offset page shifted, repeating rows from the first page
+    assert {row.key for row in offset_page} & {row.key for row in first_page}
+
+
+async def test_sessions_keyset_pages(db_manager):
+    group = SessionGroup(name="work")
+    await db_manager.add_session_group(group)
+    await db_manager.add_sessions(
+        [
+            Session(
+                name=name,
+                aws_region="ap-southeast-2",
+                table_name="orders",
+                session_group_id=group.session_group_id,
+            )
+            # names that are the same sort on their key
+            for name in ("b", "a", "c", "a", "d")
+        ]
+    )
+    names = []
+    after = None
+    while page := await db_manager.list_sessions(
+        page_size=2, session_group_id=group.session_group_id, after=after
+    ):
+        names += [row.data.name for row in page]
+        after = page[-1].cursor
+    assert names == ["a", "a", "b", "c", "d"]
+
+    searched = []
+    after = None
+    while page := await db_manager.list_sessions(
+        page_size=1, search_name="a", after=after
+    ):
+        searched += page
+        after = page[-1].cursor
+    assert [row.data.name for row in searched] == ["a", "a"]
+    assert searched[0].key != searched[1].key
+
+
+@pytest.mark.parametrize(
+    "record_type,sort_by,descending,index",
+    [
+        (
+            RecordType.QueryHistory,
+            "query_history.created_at",
+            True,
+            "idx_query_history_created_at_key ((created_at,key)<",
+        ),
+        (
+            RecordType.SessionGroup,
+            "session_groups.name",
+            False,
+            "idx_session_groups_name_key ((name,key)>",
+        ),
+        (RecordType.SavedQuery, None, False, "sqlite_autoindex_saved_queries_1 (key>?"),
+    ],
+)
+async def test_keyset_page_is_an_index_seek(
+    db_manager, record_type, sort_by, descending, index
+):
+    statement, values = db_manager._listing_query(
+        record_type,
+        sort_by,
+        descending=descending,
+        after=PageCursor(sort_value="2024-01-01", key="key"),
+    )
+    async with db_manager.connection.execute(
+        f"EXPLAIN QUERY PLAN {statement}", values
+    ) as cursor:
+        plan = " ".join(row[-1] for row in await cursor.fetchall())
+    assert f"USING INDEX {index}" in plan
+    assert "TEMP B-TREE" not in plan
+    # no rows are skipped
+    assert values[-1] == 0
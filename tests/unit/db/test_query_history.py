@@ -0,0 +1,122 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import time_machine
+
+from dyno_viewer.db.manager import DatabaseManager
+from dyno_viewer.models import KeyCondition, QueryHistory, QueryRunMetrics
+
+
+def query_history(value: str) -> QueryHistory:
+    return QueryHistory(
+        table="orders",
+        primary_key_name="pk",
+        sort_key_name="sk",
+        key_condition=KeyCondition(partitionKeyValue=value),
+    )
+
+
+async def add_history(db_manager, value: str, when: datetime) -> str:
+    with time_machine.travel(when, tick=False):
+        return await db_manager.add_query_history(query_history(value))
+
+
+async def test_add_query_history_counts_runs(db_manager):
+    first = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    last = datetime(2024, 1, 3, 12, tzinfo=timezone.utc)
+    key = await add_history(db_manager, "customer#1", first)
+    await add_history(
+        db_manager, "customer#2", datetime(2024, 1, 2, tzinfo=timezone.utc)
+    )
+    assert await add_history(db_manager, "customer#1", last) == key
+
+    rows = await db_manager.list_query_history()
+    # the query run again is listed first
+    assert [row.data.key_condition.partitionKeyValue for row in rows] == [
+        "customer#1",
+        "customer#2",
+    ]
+    assert rows[0].key == key
+    assert rows[0].data.run_count == 2
+    assert rows[0].data.first_run == first
+    assert rows[0].data.last_run == last
+    assert rows[1].data.run_count == 1
+    assert (
+        await db_manager.get_query(key) == query_history("customer#1").to_query_params()
+    )
+
+
+async def test_update_query_history_metrics(db_manager):
+    key = await db_manager.add_query_history(query_history("customer#1"))
+    metrics = QueryRunMetrics(
+        items=20, scanned_count=40, consumed_capacity=2.5, elapsed=0.1
+    )
+    await db_manager.update_query_history_metrics(key, metrics)
+    # running the query again keeps the metrics until the new run's are saved
+    await db_manager.add_query_history(query_history("customer#1"))
+
+    [row] = await db_manager.list_query_history()
+    assert row.data.last_metrics == metrics
+    assert row.data.run_count == 2
+
+
+async def test_compact_history(db_manager):
+    for day in range(1, 6):
+        await add_history(
+            db_manager, f"customer#{day}", datetime(2024, 1, day, tzinfo=timezone.utc)
+        )
+
+    with time_machine.travel(datetime(2024, 1, 10, tzinfo=timezone.utc), tick=False):
+        # nothing to remove
+        assert await db_manager.compact_history() == 0
+        # run over 7 days ago
+        assert await db_manager.compact_history(max_age_days=7) == 2
+        # the least recently run
+        assert await db_manager.compact_history(max_rows=2) == 1
+
+    rows = await db_manager.list_query_history()
+    assert [row.data.key_condition.partitionKeyValue for row in rows] == [
+        "customer#5",
+        "customer#4",
+    ]
+    async with db_manager.connection.execute("PRAGMA auto_vacuum") as cursor:
+        assert (await cursor.fetchone())[0] == db_manager.AUTO_VACUUM_INCREMENTAL
+
+
+async def test_compact_history_compares_dates_not_strings(db_manager):
+    key = await add_history(
+        db_manager, "customer#1", datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+    # a row written with CURRENT_TIMESTAMP has a space instead of the T, later on the
+    # day of the cutoff so it's kept
+    await db_manager.connection.execute(
+        "UPDATE query_history SET created_at = '2024-01-03 12:00:00' WHERE key = ?",
+        (key,),
+    )
+    await db_manager.connection.commit()
+
+    with time_machine.travel(datetime(2024, 1, 10, tzinfo=timezone.utc), tick=False):
+        assert await db_manager.compact_history(max_age_days=7) == 0
+        assert await db_manager.compact_history(max_age_days=6) == 1
+
+
+async def test_compact_history_turns_on_auto_vacuum(tmp_path):
+    path = tmp_path / "db.db"
+    # a database made before auto vacuum was turned on
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE legacy (id)")
+    connection.close()
+    manager = DatabaseManager(path)
+    await manager.setup()
+    try:
+        async with manager.connection.execute("PRAGMA auto_vacuum") as cursor:
+            assert (await cursor.fetchone())[0] == 0
+        # it's only vacuumed when asked to
+        await manager.compact_history()
+        async with manager.connection.execute("PRAGMA auto_vacuum") as cursor:
+            assert (await cursor.fetchone())[0] == 0
+        await manager.compact_history(vacuum=True)
+        async with manager.connection.execute("PRAGMA auto_vacuum") as cursor:
+            assert (await cursor.fetchone())[0] == manager.AUTO_VACUUM_INCREMENTAL
+    finally:
+        await manager.close()
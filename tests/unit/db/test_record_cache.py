@@ -0,0 +1,146 @@
+import aiosqlite
+
+from dyno_viewer.db.manager import DatabaseManager
+from dyno_viewer.models import SavedQuery, Session, SessionGroup
+
+
+async def test_get_reads_through_the_cache(db_manager, mocker):
+    group = SessionGroup(name="work")
+    await db_manager.add_session_group(group)
+    execute = mocker.spy(db_manager.connection, "execute")
+
+    assert (await db_manager.get(group.session_group_id))["name"] == "work"
+    assert (await db_manager.get(group.session_group_id))["name"] == "work"
+    # screens without a session are cached too
+    assert await db_manager.get("table_1234") is None
+    assert await db_manager.get("table_1234") is None
+    # the group's type is looked up then it's read from its table
+    assert execute.call_count == 3
+
+
+async def test_writes_invalidate_the_cache(db_manager):
+    assert await db_manager.get("key") is None
+    await db_manager.insert("key", {"name": "first"}, record_type="SessionGroup")
+    assert await db_manager.get("key") == {"name": "first", "session_group_id": "key"}
+    await db_manager.update("key", {"name": "second"})
+    assert await db_manager.get("key") == {"name": "second", "session_group_id": "key"}
+    await db_manager.remove("key")
+    assert await db_manager.get("key") is None
+
+    saved_query = SavedQuery(
+        name="orders",
+        description="",
+        primary_key_name="pk",
+        sort_key_name="sk",
+        scan_mode=True,
+    )
+    await db_manager.insert(
+        "saved", saved_query.model_dump(mode="json"), record_type="SavedQuery"
+    )
+    assert await db_manager.get_saved_query("saved") == saved_query
+    await db_manager.delete_all_saved_queries()
+    assert await db_manager.get_saved_query("saved") is None
+
+
+async def test_other_records_arent_cached(db_manager, mocker):
+    await db_manager.insert(
+        "export", {"name": "export"}, record_type="ExportCheckpoint"
+    )
+    execute = mocker.spy(db_manager.connection, "execute")
+    await db_manager.get("export")
+    await db_manager.get("export")
+    assert execute.call_count == 4
+
+
+async def test_cache_is_bounded(db_manager, mocker):
+    mocker.patch.object(DatabaseManager, "RECORD_CACHE_SIZE", 2)
+    for key in ("a", "b", "c"):
+        await db_manager.get(key)
+    execute = mocker.spy(db_manager.connection, "execute")
+    await db_manager.get("c")
+    await db_manager.get("a")
+    assert execute.call_count == 1
+
+
+async def test_update_session_is_one_statement(db_manager, mocker):
+    group = SessionGroup(name="work")
+    await db_manager.add_session_group(group)
+    session = Session(
+        name="orders",
+        table_name="orders",
+        aws_region="ap-southeast-2",
+        session_group_id=group.session_group_id,
+    )
+    await db_manager.add_session(session)
+    execute = mocker.spy(db_manager.connection, "execute")
+
+    updated = await db_manager.update_session(
+        session.session_id, table_name="customers", aws_profile="dev"
+    )
+    assert execute.call_count == 1
+    assert updated == session.model_copy(
+        update={"table_name": "customers", "aws_profile": "dev"}
+    )
+    # the cache has the session as it is after the update
+    assert await db_manager.get_session(session.session_id) == updated
+    assert execute.call_count == 1
+    assert await db_manager.update_session("missing", name="missing") is None
+
+    renamed = await db_manager.update_session_group(group.session_group_id, "home")
+    assert renamed["name"] == "home"
+
+
+async def test_cache_is_dropped_when_another_connection_writes(tmp_path):
+    manager = DatabaseManager(tmp_path / "db.db")
+    await manager.setup()
+    try:
+        group = SessionGroup(name="work")
+        await manager.add_session_group(group)
+        assert (await manager.get(group.session_group_id))["name"] == "work"
+        assert await manager.get("missing") is None
+
+        # another dyno-viewer instance
+        async with aiosqlite.connect(tmp_path / "db.db") as connection:
+            await connection.execute(
+                "UPDATE session_groups SET name = 'home' WHERE key = ?",
+                (group.session_group_id,),
+            )
+            await connection.execute(
+                "INSERT INTO data_store (key, record_type, data) VALUES (?, ?, ?)",
+                ("missing", "ExportCheckpoint", '{"name": "found"}'),
+            )
+            await connection.commit()
+
+        assert (await manager.get(group.session_group_id))["name"] == "home"
+        assert await manager.get("missing") == {"name": "found"}
+    finally:
+        await manager.close()
+
+
+async def test_update_session_with_write_behind_is_queued(mocker):
+    manager = DatabaseManager(write_behind=True, flush_interval=60)
+    await manager.setup()
+    try:
+        group = SessionGroup(name="work")
+        await manager.add_session_group(group)
+        session = Session(
+            name="orders",
+            table_name="orders",
+            aws_region="ap-southeast-2",
+            session_group_id=group.session_group_id,
+        )
+        await manager.add_session(session)
+        await manager.flush()
+        commit = mocker.spy(manager.connection, "commit")
+
+        updated = await manager.update_session(session.session_id, name="customers")
+        assert updated == session.model_copy(update={"name": "customers"})
+        renamed = await manager.update_session_group(group.session_group_id, "home")
+        assert renamed["name"] == "home"
+        assert commit.call_count == 0
+        assert manager.pending_writes == 2
+
+        await manager.flush()
+        assert (await manager.get_session(session.session_id)).name == "customers"
+    finally:
+        await manager.close()
@@ -0,0 +1,115 @@
+import pytest
+
+from dyno_viewer.db.utils import fts_match_expression
+from dyno_viewer.models import (
+    FilterCondition,
+    KeyCondition,
+    QueryHistory,
+    SavedQuery,
+    SessionGroup,
+    SortKeyCondition,
+)
+
+
+def saved_query(name: str, description: str = "", **kwargs) -> SavedQuery:
+    return SavedQuery(
+        name=name,
+        description=description,
+        primary_key_name="pk",
+        sort_key_name="sk",
+        **{"key_condition": KeyCondition(partitionKeyValue="customer#1"), **kwargs},
+    )
+
+
+@pytest.mark.parametrize(
+    "search,expected",
+    [
+        ("orders", '"orders"*'),
+        ("ord  Act", '"ord"* "Act"*'),
+        ('say "hi" OR', '"say"* "hi"* "OR"*'),
+        ("  '%", ""),
+    ],
+)
+def test_fts_match_expression(search, expected):
+    assert fts_match_expression(search) == expected
+
+
+async def test_search_saved_queries(db_manager):
+    await db_manager.add_saved_query(saved_query("active orders", "orders by status"))
+    await db_manager.add_saved_query(
+        saved_query(
+            "by status",
+            "all the active orders",
+            filter_conditions=[
+                FilterCondition(
+                    attrName="status",
+                    attrType="string",
+                    attrCondition="==",
+                    attrValue="shipped",
+                )
+            ],
+        )
+    )
+    await db_manager.add_saved_query(
+        saved_query(
+            "dated",
+            key_condition=KeyCondition(
+                partitionKeyValue="customer#2",
+                sortKey=SortKeyCondition(
+                    attrType="string", attrCondition="begins_with", attrValue="Order#"
+                ),
+            ),
+        )
+    )
+
+    async def search(term: str) -> list[str]:
+        return [
+            row.data.name for row in await db_manager.list_saved_queries(search=term)
+        ]
+
+    # a match in the name ranks above one in the description
+    assert await search("act ord") == ["active orders", "by status"]
+    # conditions are searched too
+    assert await search("shipped") == ["by status"]
+    assert await search("begins_with order") == ["dated"]
+    assert await search("customer 2") == ["dated"]
+    assert await search("missing") == []
+    # no words so everything is listed
+    assert len(await search("%")) == 3
+
+
+async def test_search_query_history(db_manager):
+    for table in ("orders", "customers", "order-items"):
+        await db_manager.add_query_history(
+            QueryHistory(
+                table=table,
+                primary_key_name="pk",
+                sort_key_name="sk",
+                key_condition=KeyCondition(partitionKeyValue=f"{table}#1"),
+            )
+        )
+    rows = await db_manager.list_query_history(search="order")
+    assert sorted(row.data.table for row in rows) == ["order-items", "orders"]
+    rows = await db_manager.list_query_history(search="order", page=2, page_size=1)
+    assert len(rows) == 1
+
+
+async def test_search_index_follows_changes(db_manager):
+    group = SessionGroup(name="work")
+    await db_manager.add_session_group(group)
+    await db_manager.update_session_group(group.session_group_id, "holiday")
+
+    async def search(term: str) -> list[str]:
+        return [
+            row.data.name
+            for row in await db_manager.list_session_group(search_name=term)
+        ]
+
+    assert await search("work") == []
+    assert await search("holi") == ["holiday"]
+    await db_manager.remove(group.session_group_id)
+    assert await search("holi") == []
+    async with db_manager.connection.execute(
+        "SELECT count(*) FROM session_groups_fts"
+    ) as cursor:
+        assert (await cursor.fetchone())[0] == 0
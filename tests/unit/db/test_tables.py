@@ -0,0 +1,154 @@
+import sqlite3
+
+import pytest
+
+from dyno_viewer.db import manager
+from dyno_viewer.db.models import ListSessionGroupResultRow
+from dyno_viewer.db.tables import record_from_row, record_values
+from dyno_viewer.models import (
+    FilterCondition,
+    KeyCondition,
+    QueryHistory,
+    QueryRunMetrics,
+    SavedQuery,
+    Session,
+    SessionGroup,
+    SortKeyCondition,
+)
+
+
+@pytest.mark.parametrize(
+    "record_type,record",
+    [
+        ("SessionGroup", SessionGroup(session_group_id="key", name="work")),
+        (
+            "Session",
+            Session(
+                session_id="key",
+                session_group_id="group-1",
+                name="orders",
+                table_name="orders",
+                aws_region="ap-southeast-2",
+            ),
+        ),
+        (
+            "SavedQuery",
+            SavedQuery(
+                name="shipped",
+                description="shipped orders",
+                primary_key_name="pk",
+                sort_key_name="sk",
+                index="by_status",
+                key_condition=KeyCondition(
+                    partitionKeyValue="customer#1",
+                    sortKey=SortKeyCondition(
+                        attrType="number", attrCondition=">", attrValue=5
+                    ),
+                ),
+                filter_conditions=[
+                    FilterCondition(
+                        attrName="status",
+                        attrType="string",
+                        attrCondition="==",
+                        attrValue="shipped",
+                    )
+                ],
+                next_token={"pk": "customer#1", "sk": 6},
+            ),
+        ),
+        (
+            "QueryHistory",
+            QueryHistory(
+                table="orders",
+                primary_key_name="pk",
+                sort_key_name="sk",
+                scan_mode=True,
+                run_count=3,
+                last_metrics=QueryRunMetrics(
+                    items=10, scanned_count=20, consumed_capacity=0.5, elapsed=0.1
+                ),
+            ),
+        ),
+    ],
+)
+@pytest.mark.parametrize("trusted", [False, True])
+def test_record_columns_round_trip(record_type, record, trusted):
+    row = tuple(record_values(record).values())
+    built = record_from_row(record_type, "key", row, trusted=trusted)
+    assert built == record
+    assert built.model_dump() == record.model_dump()
+
+
+async def test_deleting_a_session_group_deletes_its_sessions(db_manager):
+    groups = [SessionGroup(name=name) for name in ("work", "home")]
+    for group in groups:
+        await db_manager.add_session_group(group)
+    sessions = [
+        Session(
+            name="orders",
+            table_name="orders",
+            aws_region="ap-southeast-2",
+            session_group_id=group.session_group_id,
+        )
+        for group in groups
+    ]
+    await db_manager.add_sessions(sessions)
+    assert await db_manager.get_session(sessions[0].session_id) == sessions[0]
+
+    await db_manager.delete_session_group(groups[0].session_group_id)
+    assert await db_manager.get_session(sessions[0].session_id) is None
+    assert [row.key for row in await db_manager.list_sessions()] == [
+        sessions[1].session_id
+    ]
+    # removing a group by key does the same
+    await db_manager.remove(groups[1].session_group_id)
+    assert await db_manager.list_sessions() == []
+
+
+async def test_session_needs_its_group(db_manager):
+    with pytest.raises(sqlite3.IntegrityError):
+        await db_manager.insert(
+            "key",
+            Session(
+                name="orders",
+                table_name="orders",
+                aws_region="ap-southeast-2",
+                session_group_id="missing",
+            ).model_dump(mode="json"),
+            record_type="Session",
+        )
+
+
+async def test_only_fields_with_a_column_are_updated(db_manager):
+    group = SessionGroup(name="work")
+    await db_manager.add_session_group(group)
+    with pytest.raises(ValueError, match="description of a SessionGroup"):
+        await db_manager.update(group.session_group_id, {"description": "trip"})
+    # records in the data store are still updated as json
+    await db_manager.insert(
+        "export", {"name": "export"}, record_type="ExportCheckpoint"
+    )
+    assert await db_manager.update("export", {"parts": {"count": "2"}}) == {
+        "name": "export",
+        "parts": {"count": "2"},
+    }
+
+
+async def test_listed_rows_are_built_when_used(db_manager, mocker):
+    group = SessionGroup(name="work")
+    await db_manager.add_session_group(group)
+    record_from_row = mocker.spy(manager, "record_from_row")
+    [row] = await db_manager.list_session_group()
+    assert row.key == group.session_group_id
+    assert record_from_row.call_count == 0
+
+    assert row.data == group
+    assert row.data is row.data
+    assert record_from_row.call_count == 1
+    # lazy rows compare and dump like rows built with their data
+    [other] = await db_manager.list_session_group()
+    assert other == row
+    assert other.model_dump()["data"] == group.model_dump()
+    assert other == ListSessionGroupResultRow(
+        data=group, created_at=row.created_at, key=row.key, cursor=row.cursor
+    )
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from dyno_viewer.db.manager import DatabaseManager
+from dyno_viewer.models import Session, SessionGroup
+
+
+@pytest_asyncio.fixture
+async def write_behind_manager():
+    manager = DatabaseManager(write_behind=True, flush_interval=0.05)
+    await manager.setup()
+    try:
+        yield manager
+    finally:
+        await manager.close()
+
+
+@pytest_asyncio.fixture
+async def queueing_manager():
+    # doesn't flush on its own during a test
+    manager = DatabaseManager(write_behind=True, flush_interval=60)
+    await manager.setup()
+    try:
+        yield manager
+    finally:
+        await manager.close()
+
+
+async def count_rows(manager: DatabaseManager) -> int:
+    async with manager.connection.execute("SELECT count(*) FROM records") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def test_writes_are_flushed_in_the_background(write_behind_manager):
+    group = SessionGroup(name="work")
+    await write_behind_manager.add_session_group(group)
+    await write_behind_manager.insert("other", {"name": "other"})
+    assert write_behind_manager.pending_writes == 2
+    assert await count_rows(write_behind_manager) == 0
+
+    await asyncio.sleep(0.1)
+    assert write_behind_manager.pending_writes == 0
+    assert await count_rows(write_behind_manager) == 2
+
+
+async def test_reads_see_queued_writes(write_behind_manager):
+    group = SessionGroup(name="work")
+    await write_behind_manager.add_session_group(group)
+    # adding a session reads its group
+    await write_behind_manager.add_session(
+        Session(
+            name="orders",
+            table_name="orders",
+            aws_region="ap-southeast-2",
+            session_group_id=group.session_group_id,
+        )
+    )
+    sessions = await write_behind_manager.list_sessions()
+    assert [session.data.name for session in sessions] == ["orders"]
+
+
+async def test_updates_of_a_record_are_merged(queueing_manager):
+    group = SessionGroup(name="work")
+    await queueing_manager.add_session_group(group)
+    session = Session(
+        name="orders",
+        table_name="orders",
+        aws_region="ap-southeast-2",
+        session_group_id=group.session_group_id,
+    )
+    await queueing_manager.add_session(session)
+    await queueing_manager.update(session.session_id, {"table_name": "orders"})
+    await queueing_manager.update(session.session_id, {"aws_region": "us-east-1"})
+    await queueing_manager.update(session.session_id, {"table_name": "customers"})
+    # the inserts of the group and the session, and the updates merged into one
+    assert queueing_manager.pending_writes == 3
+
+    # the record is gone once the delete is flushed, so there's nothing to update
+    await queueing_manager.remove(session.session_id)
+    assert (
+        await queueing_manager.update(session.session_id, {"table_name": "users"})
+        is None
+    )
+    assert queueing_manager.pending_writes == 0
+    assert await queueing_manager.get_session(session.session_id) is None
+
+
+async def test_merged_update(write_behind_manager):
+    group = SessionGroup(name="work")
+    await write_behind_manager.add_session_group(group)
+    await write_behind_manager.flush()
+    await write_behind_manager.update(group.session_group_id, {"name": "home"})
+    await write_behind_manager.update(group.session_group_id, {"name": "holiday"})
+    assert write_behind_manager.pending_writes == 1
+    assert await write_behind_manager.get(group.session_group_id) == {
+        **group.model_dump(mode="json"),
+        "name": "holiday",
+    }
+
+
+async def test_reads_by_key_dont_flush(queueing_manager):
+    group = SessionGroup(name="work")
+    await queueing_manager.add_session_group(group)
+    await queueing_manager.insert("checkpoint", {"page": 1})
+    assert (await queueing_manager.get(group.session_group_id))["name"] == "work"
+    assert await queueing_manager.get("checkpoint") == {"page": 1}
+    assert await queueing_manager.get("missing") is None
+    await queueing_manager.update(group.session_group_id, {"name": "home"})
+    assert (await queueing_manager.get(group.session_group_id))["name"] == "home"
+    assert queueing_manager.pending_writes == 3
+
+
+async def test_update_returns_the_record(queueing_manager):
+    group = SessionGroup(name="work")
+    await queueing_manager.add_session_group(group)
+    assert await queueing_manager.update(group.session_group_id, {"name": "home"}) == {
+        **group.model_dump(mode="json"),
+        "name": "home",
+    }
+    assert await queueing_manager.update("missing", {"name": "home"}) is None
+    with pytest.raises(ValueError):
+        await queueing_manager.update(group.session_group_id, {"colour": "red"})
+    await queueing_manager.flush()
+    assert (await queueing_manager.get(group.session_group_id))["name"] == "home"
+
+
+async def test_failed_write_doesnt_lose_the_others(write_behind_manager):
+    await write_behind_manager.insert("first", {"name": "first"})
+    # the key is already taken
+    await write_behind_manager.insert("first", {"name": "again"})
+    await write_behind_manager.insert("second", {"name": "second"})
+    await write_behind_manager.flush()
+    assert await write_behind_manager.get("first") == {"name": "first"}
+    assert await write_behind_manager.get("second") == {"name": "second"}
+
+
+async def test_close_flushes_writes(tmp_path):
+    path = tmp_path / "db.db"
+    manager = DatabaseManager(path, write_behind=True, flush_interval=60)
+    await manager.setup()
+    await manager.insert("key", {"name": "value"})
+    await manager.close()
+
+    manager = DatabaseManager(path)
+    await manager.setup()
+    try:
+        assert await manager.get("key") == {"name": "value"}
+    finally:
+        await manager.close()
@@ -52,7 +52,7 @@ async def test_initial_options_display(user_config_dir_tmp_path):
         assert config_path.exists()
         assert (
             config_path.read_text()
-            == "load_last_query_on_startup: true\npage_size: 20\nstartup_session_group: null\ntheme: textual-dark\n"
+            == "database_busy_timeout: 5.0\ndatabase_vacuum: false\nexport_segments: 4\nhistory_max_age_days: 365\nhistory_max_rows: 10000\nimport_workers: 4\ninfinite_scroll: false\ninfinite_scroll_max_rows: 10000\nload_last_query_on_startup: true\nmerge_export_parts: true\npage_size: 20\nstartup_session_group: null\ntheme: textual-dark\n"
         )
         await pilot.press("o")
 
@@ -86,7 +86,7 @@ async def test_theme_selection_updates_app_theme(user_config_dir_tmp_path):
         config_path = user_config_dir_tmp_path / "config.yaml"
         assert (
             config_path.read_text()
-            == f"load_last_query_on_startup: true\npage_size: 20\nstartup_session_group: null\ntheme: {option_list.highlighted_option.id}\n"
+            == f"database_busy_timeout: 5.0\ndatabase_vacuum: false\nexport_segments: 4\nhistory_max_age_days: 365\nhistory_max_rows: 10000\nimport_workers: 4\ninfinite_scroll: false\ninfinite_scroll_max_rows: 10000\nload_last_query_on_startup: true\nmerge_export_parts: true\npage_size: 20\nstartup_session_group: null\ntheme: {option_list.highlighted_option.id}\n"
         )
 
 
@@ -117,7 +117,7 @@ async def test_exit_saves_theme_and_page_size(user_config_dir_tmp_path):
         config_path = user_config_dir_tmp_path / "config.yaml"
         assert (
             config_path.read_text()
-            == f"load_last_query_on_startup: true\npage_size: 55\nstartup_session_group: ''\ntheme: {option_list.highlighted_option.id}\n"
+            == f"database_busy_timeout: 5.0\ndatabase_vacuum: false\nexport_segments: 4\nhistory_max_age_days: 365\nhistory_max_rows: 10000\nimport_workers: 4\ninfinite_scroll: false\ninfinite_scroll_max_rows: 10000\nload_last_query_on_startup: true\nmerge_export_parts: true\npage_size: 55\nstartup_session_group: ''\ntheme: {option_list.highlighted_option.id}\n"
         )
 
 
@@ -139,7 +139,7 @@ async def test_load_last_query_switch(user_config_dir_tmp_path):
         config_path = user_config_dir_tmp_path / "config.yaml"
         assert (
             config_path.read_text()
-            == "load_last_query_on_startup: false\npage_size: 20\nstartup_session_group: ''\ntheme: textual-dark\n"
+            == "database_busy_timeout: 5.0\ndatabase_vacuum: false\nexport_segments: 4\nhistory_max_age_days: 365\nhistory_max_rows: 10000\nimport_workers: 4\ninfinite_scroll: false\ninfinite_scroll_max_rows: 10000\nload_last_query_on_startup: false\nmerge_export_parts: true\npage_size: 20\nstartup_session_group: ''\ntheme: textual-dark\n"
         )
 
 
@@ -163,18 +163,24 @@ async def test_clear_query_history(db_manager, user_config_dir_tmp_path):
             filter_conditions=[],
         ),
     ]
+    history = []
     for i, query_history in enumerate(query_params):
-        with time_machine.travel(
-            datetime(2024, 1, 1, 12, 0, i, tzinfo=ZoneInfo("UTC")), tick=False
-        ):
+        run = datetime(2024, 1, 1, 12, 0, i, tzinfo=ZoneInfo("UTC"))
+        with time_machine.travel(run, tick=False):
             await db_manager.add_query_history(query_history)
+        # the first run of each query
+        history.append(
+            query_history.model_copy(
+                update={"run_count": 1, "first_run": run, "last_run": run}
+            )
+        )
 
     # Verify all query histories are in the DB
     list_query_history_result = await db_manager.list_query_history()
-    for param in query_params:
-        assert param in [row.data for row in list_query_history_result]
+    for query_history in history:
+        assert query_history in [row.data for row in list_query_history_result]
     async with db_manager.connection.execute(
-        "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+        "SELECT COUNT(*) FROM records WHERE record_type = ?",
         (RecordType.QueryHistory.value,),
     ) as cursor:
         row = await cursor.fetchone()
@@ -194,10 +200,10 @@ async def test_clear_query_history(db_manager, user_config_dir_tmp_path):
 
         # Verify that query history is cleared
         list_query_history_result = await db_manager.list_query_history()
-        for query_history in query_params:
+        for query_history in history:
             assert query_history not in [row.data for row in list_query_history_result]
         async with db_manager.connection.execute(
-            "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+            "SELECT COUNT(*) FROM records WHERE record_type = ?",
             (RecordType.QueryHistory.value,),
         ) as cursor:
             row = await cursor.fetchone()
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+from textual.app import App
+from textual.widgets import Button, Input, Static, Switch
+
+from dyno_viewer.components.screens.copy_table import CopyTableScreen
+from dyno_viewer.components.screens.write_progress import WriteProgressScreen
+from dyno_viewer.models import CopyProgress, TableCopyOptions
+
+
+class CopyTableApp(App):
+    def __init__(self, screen: CopyTableScreen):
+        super().__init__()
+        self._screen = screen
+        self.notifications = []
+        self.dismissed_result = None
+
+    def notify(self, message, severity="information", **_):
+        self.notifications.append((message, severity))
+
+    def on_mount(self):
+        def _callback(result):
+            self.dismissed_result = result
+
+        self.push_screen(self._screen, _callback)
+
+
+async def test_copy_table_returns_options():
+    screen = CopyTableScreen("orders", "prod", "ap-southeast-2", has_query=True)
+    async with CopyTableApp(screen).run_test() as pilot:
+        # defaults to a file in the home directory named after the table
+        reject_path = screen.query_one("#rejectPath", Input)
+        assert Path(reject_path.value).parent == Path.home()
+        assert Path(reject_path.value).name.startswith("orders-copy-")
+        reject_path.value = "~/rejected.jsonl"
+        screen.query_one("#targetProfile", Input).value = "staging"
+        screen.query_one("#targetTable", Input).value = "orders"
+        screen.query_one("#keyPrefix", Input).value = "prod#=>staging#"
+        screen.query_one("#wcuBudget", Input).value = "25"
+        screen.query_one("#ok", Button).press()
+        await pilot.pause()
+        assert pilot.app.dismissed_result == TableCopyOptions(
+            target_profile="staging",
+            target_region="ap-southeast-2",
+            target_table="orders",
+            use_query=True,
+            total_segments=4,
+            key_prefix=("prod#", "staging#"),
+            wcu_budget=25,
+            reject_path=Path.home() / "rejected.jsonl",
+        )
+
+
+async def test_copy_table_validation():
+    screen = CopyTableScreen("orders", None, "ap-southeast-2", has_query=False)
+    async with CopyTableApp(screen).run_test() as pilot:
+        assert screen.query_one("#useQuery", Switch).disabled
+        screen.query_one("#ok", Button).press()
+        await pilot.pause()
+        assert pilot.app.notifications[-1] == (
+            "Please enter a target region, table and file for rejected items",
+            "warning",
+        )
+        screen.query_one("#targetTable", Input).value = "orders"
+        screen.query_one("#rcuBudget", Input).value = "0"
+        screen.query_one("#ok", Button).press()
+        await pilot.pause()
+        assert pilot.app.notifications[-1] == (
+            "Read capacity has to be more than 0",
+            "warning",
+        )
+        assert pilot.app.dismissed_result is None
+
+
+async def test_copy_progress_shows_the_reject_file():
+    progress = CopyProgress(
+        source="ap-southeast-2/orders",
+        target="us-east-1/orders",
+        reject_path="/tmp/rejected.jsonl",
+    )
+    screen = WriteProgressScreen(progress)
+    async with CopyTableApp(screen).run_test():
+        status = str(screen.query_one("#status", Static).render())
+        assert "rejected items file: /tmp/rejected.jsonl" in status
+        # nothing has been written to it yet
+        assert "rejected: 0\n" in status
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from textual.app import App
+from textual.widgets import Button, Input, Switch
+
+from dyno_viewer.components.screens.diff_table import DiffTableScreen
+from dyno_viewer.models import TableDiffOptions
+
+
+class DiffTableApp(App):
+    def __init__(self, screen: DiffTableScreen):
+        super().__init__()
+        self._screen = screen
+        self.notifications = []
+        self.dismissed_result = None
+
+    def notify(self, message, severity="information", **_):
+        self.notifications.append((message, severity))
+
+    def on_mount(self):
+        def _callback(result):
+            self.dismissed_result = result
+
+        self.push_screen(self._screen, _callback)
+
+
+async def test_diff_table_returns_options(tmp_path):
+    screen = DiffTableScreen("orders", "prod", "ap-southeast-2", has_query=False)
+    async with DiffTableApp(screen).run_test() as pilot:
+        assert screen.query_one("#useQuery", Switch).disabled
+        output_path = screen.query_one("#outputPath", Input)
+        assert Path(output_path.value).name.startswith("orders-diff-")
+        screen.query_one("#ok", Button).press()
+        await pilot.pause()
+        assert pilot.app.notifications[-1] == (
+            "Please enter a region, table and file to write to",
+            "warning",
+        )
+
+        screen.query_one("#targetTable", Input).value = "orders"
+        screen.query_one("#targetRegion", Input).value = "us-east-1"
+        output_path.value = str(tmp_path / "diff.jsonl")
+        screen.query_one("#ok", Button).press()
+        await pilot.pause()
+        assert pilot.app.dismissed_result == TableDiffOptions(
+            target_profile="prod",
+            target_region="us-east-1",
+            target_table="orders",
+            use_query=False,
+            total_segments=4,
+            output_path=tmp_path / "diff.jsonl",
+        )
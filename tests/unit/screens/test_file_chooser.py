@@ -5,13 +5,17 @@ from textual.app import App
 from textual.pilot import Pilot
 from textual.widgets import Button, OptionList, DirectoryTree
 
-from dyno_viewer.components.screens.file_chooser import SaveFileChooser
-from dyno_viewer.models import OutputFormat, FileToSave
+from dyno_viewer.components.screens.file_chooser import (
+    ImportFileChooser,
+    SaveFileChooser,
+    guess_import_format,
+)
+from dyno_viewer.models import Compression, FileToImport, OutputFormat, FileToSave
 
 
 class TestHostApp(App):
 
-    def __init__(self, screen: SaveFileChooser):
+    def __init__(self, screen: SaveFileChooser | ImportFileChooser):
         super().__init__()
         self._screen = screen
         self.notifications = []
@@ -96,6 +100,21 @@ async def test_file_format_selection_json_updates_reactive_and_return_value():
         assert result.file_format == OutputFormat.JSON
 
 
+async def test_compression_selection_gzip_adds_suffix():
+    screen = SaveFileChooser(default_filename="datafile.json")
+    async with TestHostApp(screen).run_test() as pilot:
+        compression_list = screen.query_one("#compression", OptionList)
+        await select_option_in_option_list(pilot, compression_list, 1)
+
+        ok_button = screen.query_one("#ok", Button)
+        ok_button.press()
+        await pilot.pause()
+        result = pilot.app.dismissed_result
+        assert isinstance(result, FileToSave)
+        assert result.compression == Compression.GZIP
+        assert Path(result.path).name == "datafile.json.gz"
+
+
 async def test_watch_base_directory_no_duplicate_refresh():
     screen = SaveFileChooser(default_filename="noop.txt")
     async with TestHostApp(screen).run_test() as pilot:
@@ -106,3 +125,43 @@ async def test_watch_base_directory_no_duplicate_refresh():
         await select_option_in_option_list(pilot, quicknav, 0)
         # Path should remain identical object or at least equal; we check equality and that not changed to something else.
         assert dir_tree.path == original_path_obj
+
+
+async def test_import_file_chooser_returns_file_to_import(tmp_path):
+    path = tmp_path / "items.csv.gz"
+    screen = ImportFileChooser()
+    async with TestHostApp(screen).run_test() as pilot:
+        ok_button = screen.query_one("#ok", Button)
+        ok_button.press()
+        await pilot.pause()
+        assert pilot.app.notifications[-1] == (
+            "Please select a file to import",
+            "warning",
+        )
+
+        screen.path_selected = path
+        screen.file_format = guess_import_format(path)
+        screen.query_one("#column_types").value = "amount=N"
+        screen.query_one("#wcu_budget").value = "50"
+        ok_button.press()
+        await pilot.pause()
+        result = pilot.app.dismissed_result
+        assert result == FileToImport(
+            path=path,
+            file_format=OutputFormat.CSV,
+            column_types={"amount": "N"},
+            wcu_budget=50,
+        )
+
+
+async def test_import_file_chooser_invalid_column_types(tmp_path):
+    screen = ImportFileChooser()
+    async with TestHostApp(screen).run_test() as pilot:
+        screen.path_selected = tmp_path / "items.csv"
+        screen.query_one("#column_types").value = "amount=number"
+        screen.query_one("#ok", Button).press()
+        await pilot.pause()
+        message, severity = pilot.app.notifications[-1]
+        assert "unknown type NUMBER" in message
+        assert severity == "warning"
+        assert pilot.app.dismissed_result is None
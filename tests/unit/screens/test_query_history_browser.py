@@ -1,9 +1,10 @@
 import asyncio
 from datetime import datetime
+from zoneinfo import ZoneInfo
 
 
 from textual.app import App
-from textual.widgets import DataTable
+from textual.widgets import DataTable, Input
 
 from dyno_viewer.components.screens.confirm_dialogue import ConfirmDialogue
 from dyno_viewer.components.screens.query_history_browser import QueryHistoryBrowser
@@ -225,6 +226,7 @@ async def test_query_history_screen_row_selection(db_manager):
 
     with time_machine.travel(datetime(2024, 1, 1, 12, 0, 0), tick=False):
         await db_manager.add_query_history(query_history)
+        run = datetime.now(ZoneInfo("UTC"))
 
     class TestApp(App):
         def __init__(self, db_manager):
@@ -251,6 +253,11 @@ async def test_query_history_screen_row_selection(db_manager):
         # The screen should have been dismissed and returned QueryParameters
 
         assert pilot.app.params == query_history.to_query_params()
+        # the history has the query's run
+        [row] = await db_manager.list_query_history()
+        assert row.data == query_history.model_copy(
+            update={"run_count": 1, "first_run": run, "last_run": run}
+        )
 
 
 async def test_query_history_screen_delete_row(db_manager):
@@ -281,10 +288,18 @@ async def test_query_history_screen_delete_row(db_manager):
         await db_manager.add_query_history(
             query_params[0],
         )
+        first_run = datetime.now(ZoneInfo("UTC"))
     with time_machine.travel(datetime(2024, 1, 1, 12, 0, 1), tick=False):
         await db_manager.add_query_history(
             query_params[1],
         )
+        second_run = datetime.now(ZoneInfo("UTC"))
+    history = [
+        query_history.model_copy(
+            update={"run_count": 1, "first_run": run, "last_run": run}
+        )
+        for query_history, run in zip(query_params, (first_run, second_run))
+    ]
 
     class TestApp(App):
         def __init__(self, db_manager):
@@ -313,8 +328,8 @@ async def test_query_history_screen_delete_row(db_manager):
         )
         assert len(list_query_history_result) == 1
         query_params_removed = [row.data for row in list_query_history_result]
-        assert query_params[1] not in query_params_removed
-        assert query_params[0] in query_params_removed
+        assert history[1] not in query_params_removed
+        assert history[0] in query_params_removed
 
 
 async def test_query_history_screen_delete_all_rows(db_manager):
@@ -361,7 +376,7 @@ async def test_query_history_screen_delete_all_rows(db_manager):
 
         # Verify all rows are deleted from the DB
         async with db_manager.connection.execute(
-            "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+            "SELECT COUNT(*) FROM records WHERE record_type = ?",
             (RecordType.QueryHistory.value,),
         ) as cursor:
             row = await cursor.fetchone()
@@ -396,3 +411,39 @@ async def test_query_history_screen_no_data(db_manager):
 
         # The screen should have been dismissed and returned None
         assert pilot.app.params is None
+
+
+async def test_query_history_screen_search(db_manager):
+    """Searching the history only lists the queries that match, best match first."""
+    for table in ("orders", "customers", "order_items"):
+        await db_manager.add_query_history(
+            QueryHistory(
+                table=table,
+                primary_key_name="pk",
+                sort_key_name="sk",
+                key_condition=KeyCondition(partitionKeyValue="A"),
+            ),
+        )
+
+    class TestApp(App):
+        def __init__(self, db_manager):
+            super().__init__()
+            self.db_manager = db_manager
+
+        async def on_mount(self):  # type: ignore[override]
+            self.push_screen(QueryHistoryBrowser())
+
+    async with TestApp(db_manager).run_test() as pilot:
+        await pilot.pause(0.05)
+        screen: QueryHistoryBrowser = pilot.app.screen  # type: ignore
+        table = screen.query_one(DataTable)
+        assert table.row_count == 3
+
+        screen.query_one("#search_query_history", Input).focus()
+        await pilot.press(*"cust", "enter")
+        await pilot.pause(0.05)
+        assert [table.get_row_at(row)[1] for row in range(table.row_count)] == [
+            "customers"
+        ]
+        # the table has focus again so the results can be picked
+        assert table.has_focus
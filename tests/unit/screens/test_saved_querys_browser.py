@@ -161,7 +161,7 @@ async def test_empty_search_results(db_manager):
             row.data for row in await db_manager.list_saved_queries()
         ]
     async with db_manager.connection.execute(
-        "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+        "SELECT COUNT(*) FROM records WHERE record_type = ?",
         (RecordType.SavedQuery.value,),
     ) as cursor:
         row = await cursor.fetchone()
@@ -236,7 +236,7 @@ async def test_select_saved_query(db_manager):
         assert saved_query in saved_queries_db
 
     async with db_manager.connection.execute(
-        "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+        "SELECT COUNT(*) FROM records WHERE record_type = ?",
         (RecordType.SavedQuery.value,),
     ) as cursor:
         row = await cursor.fetchone()
@@ -316,7 +316,7 @@ async def test_pagination_saved_queries(db_manager):
             row.data for row in await db_manager.list_saved_queries(page_size=200)
         ]
     async with db_manager.connection.execute(
-        "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+        "SELECT COUNT(*) FROM records WHERE record_type = ?",
         (RecordType.SavedQuery.value,),
     ) as cursor:
         row = await cursor.fetchone()
@@ -397,7 +397,7 @@ async def test_delete_saved_query(db_manager):
             row.data for row in await db_manager.list_saved_queries()
         ]
         async with db_manager.connection.execute(
-            "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+            "SELECT COUNT(*) FROM records WHERE record_type = ?",
             (RecordType.SavedQuery.value,),
         ) as cursor:
             row = await cursor.fetchone()
@@ -454,7 +454,7 @@ async def test_delete_all_saved_queries(db_manager):
                 row.data for row in await db_manager.list_saved_queries()
             ]
         async with db_manager.connection.execute(
-            "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+            "SELECT COUNT(*) FROM records WHERE record_type = ?",
             (RecordType.SavedQuery.value,),
         ) as cursor:
             row = await cursor.fetchone()
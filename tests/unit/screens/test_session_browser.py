@@ -306,3 +306,36 @@ async def test_session_browser_with_session_rename_session(
         ]
         updated_session = await db_manager.get_session(session.session_id)
         assert updated_session.name == "test1"
+
+
+async def test_session_browser_with_session_search(
+    db_manager: DatabaseManager, ddb_table_with_data, ddb_tables
+):
+    session_group = SessionGroup(name="test_session_group")
+    await db_manager.add_session_group(session_group)
+    await db_manager.add_sessions(
+        [
+            Session(
+                name=name,
+                aws_region="ap-southeast-2",
+                table_name="",
+                session_group_id=session_group.session_group_id,
+            )
+            for name in ("orders", "customers", "customer orders")
+        ]
+    )
+    async with DynCli().run_test() as pilot:
+        pilot.app.db_manager = db_manager
+        pilot.app.session_group = session_group
+        await pilot.press("j")
+        await pilot.pause()
+        assert isinstance(pilot.app.screen, SessionBrowser)
+        table = pilot.app.screen.query_exactly_one(DataTable)
+        assert table.row_count == 3
+        pilot.app.screen.query_exactly_one(Input).focus()
+        await pilot.press(*"cust", "enter")
+        await pilot.pause()
+        assert [table.get_row_at(row)[0] for row in range(table.row_count)] == [
+            "customers",
+            "customer orders",
+        ]
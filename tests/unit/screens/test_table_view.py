@@ -1,26 +1,39 @@
 import uuid
+
+import simplejson as json
 from textual.app import App
 from textual.widgets import DataTable
 from textual.reactive import reactive
 
 
 from dyno_viewer.aws.ddb import get_ddb_client
+from dyno_viewer.components.aggregation import AggregationPanel
+from dyno_viewer.components.job_status import JobStatus
 from dyno_viewer.components.query.filter_query import FilterQuery
 from dyno_viewer.components.query.key_filter import KeyFilter
 from dyno_viewer.components.screens.table_query import TableQuery
+from dyno_viewer.components.screens.file_chooser import ImportFileChooser
 from dyno_viewer.components.screens.query_history_browser import QueryHistoryBrowser
+from dyno_viewer.components.screens.resume_export import ResumeExportSelect
 from dyno_viewer.components.screens.table_view import TableViewer
 from dyno_viewer.components.table import DataTableManager
 
 from dyno_viewer.db.manager import DatabaseManager
 from dyno_viewer.db.models import RecordType
 from dyno_viewer.models import (
+    FileToImport,
+    FileToSave,
     KeyCondition,
+    OutputFormat,
     QueryParameters,
     SortKeyCondition,
     QueryHistory,
+    TableCopyOptions,
+    TableDiffOptions,
 )
 from dyno_viewer.models import Config
+from dyno_viewer.util.export import get_export_writer
+from dyno_viewer.util.segmented_export import SegmentedExport
 
 
 class TableViewModeApp(App):
@@ -60,7 +73,7 @@ async def test_table_view_mode_initialization(db_manager):
         assert len(data_table.rows) == 0
 
         async with db_manager.connection.execute(
-            "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+            "SELECT COUNT(*) FROM records WHERE record_type = ?",
             (RecordType.QueryHistory.value,),
         ) as cursor:
             row = await cursor.fetchone()
@@ -103,7 +116,7 @@ async def test_table_view_mode_set_table_name(ddb_table, db_manager):
         )  # columns should be set after data is loaded
 
         async with db_manager.connection.execute(
-            "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+            "SELECT COUNT(*) FROM records WHERE record_type = ?",
             (RecordType.QueryHistory.value,),
         ) as cursor:
             row = await cursor.fetchone()
@@ -113,7 +126,7 @@ async def test_table_view_mode_set_table_name(ddb_table, db_manager):
 
 async def test_table_view_mode_run_query(ddb_table_with_data, ddb_table, db_manager):
     async with TableViewModeApp(db_manager).run_test() as pilot:
-        
+
         await pilot.pause()
         table_viewer: TableViewer = pilot.app.screen
         assert isinstance(table_viewer, TableViewer)
@@ -183,6 +196,38 @@ async def test_table_view_mode_run_query(ddb_table_with_data, ddb_table, db_mana
         assert list_query_history_result[0].data.to_query_params() == params
 
 
+async def test_table_view_saves_query_metrics(
+    ddb_table_with_data, ddb_table, db_manager
+):
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+
+        params = QueryParameters(
+            primary_key_name="pk",
+            sort_key_name="sk",
+            key_condition=KeyCondition(
+                partitionKeyValue="customer#0e044201-d3ce-4ce9-99c3-594ef3f2c60d",
+            ),
+        )
+        table_viewer.query_history_key = await db_manager.add_query_history(
+            QueryHistory.model_validate(
+                {"table": ddb_table.name, **params.model_dump()}
+            )
+        )
+        table_viewer.query_params = params
+        await pilot.pause(0.1)
+
+        [row] = await db_manager.list_query_history()
+        assert row.data.last_metrics.items == 1
+        assert row.data.last_metrics.scanned_count == 1
+        assert row.data.last_metrics.elapsed > 0
+        assert table_viewer.query_history_key is None
+
+
 async def test_table_view_mode_pagination(ddb_table_with_data, ddb_table, db_manager):
     async with TableViewModeApp(db_manager).run_test() as pilot:
 
@@ -258,7 +303,7 @@ async def test_table_view_mode_pagination(ddb_table_with_data, ddb_table, db_man
 
         # check if query is not added to history as its a scan
         async with db_manager.connection.execute(
-            "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+            "SELECT COUNT(*) FROM records WHERE record_type = ?",
             (RecordType.QueryHistory.value,),
         ) as cursor:
             row = await cursor.fetchone()
@@ -349,9 +394,11 @@ async def test_run_query_from_history(ddb_table_with_data, ddb_table, db_manager
     )
 
     await db_manager.add_query_history(query_param)
-    assert query_param in [row.data for row in await db_manager.list_query_history()]
+    assert query_param.to_query_params() in [
+        row.data.to_query_params() for row in await db_manager.list_query_history()
+    ]
     async with db_manager.connection.execute(
-        "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+        "SELECT COUNT(*) FROM records WHERE record_type = ?",
         (RecordType.QueryHistory.value,),
     ) as cursor:
         row = await cursor.fetchone()
@@ -466,7 +513,7 @@ async def test_table_view_mode_load_last_query_on_startup(
     )
     # check if added to database
     async with db_manager.connection.execute(
-        "SELECT COUNT(*) FROM data_store WHERE record_type = ?",
+        "SELECT COUNT(*) FROM records WHERE record_type = ?",
         (RecordType.QueryHistory.value,),
     ) as cursor:
         row = await cursor.fetchone()
@@ -508,3 +555,246 @@ async def test_table_view_mode_load_last_query_on_startup(
                 "test1",
             ]
         ]
+
+
+async def test_table_view_aggregate_full_query(
+    ddb_table_with_data, ddb_table, db_manager
+):
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+        # only the first page is loaded
+        assert len(table_viewer.data) == 1
+
+        await pilot.press("a")
+        panel = table_viewer.query_one(AggregationPanel)
+        assert panel.has_class("-active")
+        await pilot.press(*"pk", "tab", *"totalAmount")
+        await pilot.click("#aggregate_stream")
+        for _ in range(50):
+            await pilot.pause(0.1)
+            if not panel.running:
+                break
+        assert not panel.running
+
+        results = panel.query_one("#aggregate_results", DataTable)
+        rows = {
+            row[0]: row
+            for row in (results.get_row_at(i) for i in range(results.row_count))
+        }
+        orders = [item for item in ddb_table_with_data if "totalAmount" in item]
+        expected_total = sum(
+            item["totalAmount"] for item in orders if item["pk"] == "1234567890"
+        )
+        assert rows["1234567890"][1] == 100
+        assert rows["1234567890"][2] == str(expected_total)
+        assert len(rows) == len({item["pk"] for item in ddb_table_with_data})
+
+
+async def test_table_view_export_entire_result(
+    ddb_table_with_data, ddb_table, db_manager, tmp_path
+):
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+        # only the first page is loaded
+        assert len(table_viewer.data) == 1
+
+        path = tmp_path / "export.json"
+        worker = table_viewer.export_query(
+            FileToSave(path=path, file_format=OutputFormat.JSON),
+            table_viewer.query_params,
+        )
+        await worker.wait()
+        await pilot.pause()
+
+        exported = json.loads(path.read_text())
+        assert sorted(item["sk"] for item in exported) == sorted(
+            item["sk"] for item in ddb_table_with_data
+        )
+        job_status = table_viewer.query_one(JobStatus)
+        assert job_status.has_class("-active")
+        assert f"{len(ddb_table_with_data)} items" in str(job_status.render())
+        assert "done" in str(job_status.render())
+
+
+async def test_table_view_export_segmented(
+    ddb_table_with_data, ddb_table, db_manager, tmp_path
+):
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+
+        path = tmp_path / "export.jsonl"
+        worker = table_viewer.export_query_segmented(
+            FileToSave(path=path, file_format=OutputFormat.JSONL),
+            table_viewer.query_params,
+        )
+        await worker.wait()
+        await pilot.pause()
+
+        exported = [json.loads(line) for line in path.read_text().splitlines()]
+        assert sorted(item["sk"] for item in exported) == sorted(
+            item["sk"] for item in ddb_table_with_data
+        )
+        job_status = table_viewer.query_one(JobStatus)
+        assert f"{len(ddb_table_with_data)} items" in str(job_status.render())
+        assert "done" in str(job_status.render())
+
+
+async def test_table_view_resume_export(
+    ddb_table_with_data, ddb_table, db_manager, tmp_path
+):
+    path = tmp_path / "export.jsonl"
+    checkpoints = []
+    pages_written = []
+    SegmentedExport(
+        ddb_table,
+        FileToSave(path=path, file_format=OutputFormat.JSONL),
+        total_segments=1,
+        Limit=50,
+    ).run(
+        is_cancelled=lambda: len(pages_written) >= 1,
+        on_progress=pages_written.append,
+        on_checkpoint=checkpoints.append,
+    )
+    assert checkpoints[-1].items == 50
+    await db_manager.save_export_checkpoint(checkpoints[-1])
+
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+
+        await pilot.press("R")
+        await pilot.pause()
+        assert isinstance(pilot.app.screen, ResumeExportSelect)
+        await pilot.press("enter")
+        await pilot.pause()
+        await table_viewer.workers.wait_for_complete()
+        await pilot.pause()
+
+        exported = [json.loads(line) for line in path.read_text().splitlines()]
+        assert sorted(item["sk"] for item in exported) == sorted(
+            item["sk"] for item in ddb_table_with_data
+        )
+        assert "done" in str(table_viewer.query_one(JobStatus).render())
+        # the checkpoint is removed once the export finishes
+        assert await db_manager.list_unfinished_exports(ddb_table.name) == []
+
+
+async def test_table_view_import_items(ddb_table, ddb_test_data, db_manager, tmp_path):
+    path = tmp_path / "items.jsonl"
+    with get_export_writer("jsonl", path) as writer:
+        writer.write_page(ddb_test_data)
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+
+        worker = table_viewer.import_items(
+            FileToImport(path=path, file_format=OutputFormat.JSONL)
+        )
+        await worker.wait()
+        await pilot.pause()
+
+        assert len(ddb_table.scan()["Items"]) == len(ddb_test_data)
+        assert table_viewer.write_progress.items == len(ddb_test_data)
+        job_status = table_viewer.query_one(JobStatus)
+        assert f"{len(ddb_test_data)} items" in str(job_status.render())
+        assert "done" in str(job_status.render())
+
+
+async def test_table_view_import_items_key(ddb_table_with_data, ddb_table, db_manager):
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+        # reachable while the results grid, which binds i, has focus
+        assert isinstance(pilot.app.focused, DataTable)
+
+        await pilot.press("I")
+        await pilot.pause()
+        assert isinstance(pilot.app.screen, ImportFileChooser)
+
+
+async def test_table_view_copy_table(
+    ddb_table_with_data, ddb_table, ddb_tables, db_manager, tmp_path
+):
+    target = ddb_tables[1]
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+
+        worker = table_viewer.copy_table(
+            TableCopyOptions(
+                target_region=target.meta.client.meta.region_name,
+                target_table=target.name,
+                total_segments=2,
+                key_prefix=("customer#", "copy#"),
+                reject_path=tmp_path / "rejected.jsonl",
+            ),
+            None,
+        )
+        await worker.wait()
+        await pilot.pause()
+
+        copied = target.scan()["Items"]
+        assert len(copied) == len(ddb_table_with_data)
+        assert not any(item["pk"].startswith("customer#") for item in copied)
+        assert table_viewer.write_progress.items == len(ddb_table_with_data)
+        assert "done" in str(table_viewer.query_one(JobStatus).render())
+
+
+async def test_table_view_diff_tables(
+    ddb_table_with_data, ddb_table, ddb_tables, db_manager, tmp_path
+):
+    target = ddb_tables[1]
+    with target.batch_writer() as batch:
+        for item in ddb_table_with_data[1:]:
+            batch.put_item(Item=item)
+        batch.put_item(Item={**ddb_table_with_data[1], "changed": True})
+    output_path = tmp_path / "diff.jsonl"
+    async with TableViewModeApp(db_manager).run_test() as pilot:
+        await pilot.pause()
+        table_viewer: TableViewer = pilot.app.screen
+        table_viewer.table_name = ddb_table.name
+        table_viewer.update_table_client()
+        await pilot.pause()
+
+        worker = table_viewer.diff_tables(
+            TableDiffOptions(
+                target_region=target.meta.client.meta.region_name,
+                target_table=target.name,
+                total_segments=2,
+                output_path=output_path,
+            ),
+            None,
+        )
+        await worker.wait()
+        await pilot.pause()
+
+        lines = [json.loads(line) for line in output_path.read_text().splitlines()]
+        assert sorted(line["change"] for line in lines) == ["changed", "removed"]
+        status = str(table_viewer.query_one(JobStatus).render())
+        assert "1 added" not in status
+        assert "1 removed, 1 changed" in status
+        assert "done" in status
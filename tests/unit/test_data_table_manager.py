@@ -1,3 +1,6 @@
+import re
+from decimal import Decimal
+
 import pytest
 from textual.app import App, on
 from textual.widgets import DataTable, Footer
@@ -414,3 +417,178 @@ async def test_data_table_manager_paginate_then_simulate_table_change():
             ["cart#2231436", "CART", None, None, None, None],
             ["cart#2231437", "CART", None, None, None, None],
         ]
+
+
+class InfiniteScrollApp(App):
+    data = reactive([])
+    paginated_data = reactive([])
+    table_info = reactive(
+        TableInfo(
+            tableName="test_table_1",
+            keySchema={"primaryKey": "pk", "sortKey": "sk"},
+            gsi={},
+        )
+    )
+
+    def compose(self):
+        yield DataTableManager().data_bind(
+            InfiniteScrollApp.data, InfiniteScrollApp.table_info
+        )
+
+    def on_mount(self):
+        self.query_one(DataTableManager).infinite_scroll = True
+
+    @on(DataTableManager.PaginateRequest)
+    def paginate_data(self):
+        data_table_man = self.query_one(DataTableManager)
+        if self.paginated_data:
+            self.data = self.data + [self.paginated_data.pop(0)]
+        data_table_man.pagination_finished(has_more=bool(self.paginated_data))
+
+
+async def test_data_table_manager_infinite_scroll_appends_pages():
+    pages = [
+        [{"pk": f"customer#{page}{index}", "sk": "CUSTOMER"} for index in range(5)]
+        for page in range(4)
+    ]
+    app = InfiniteScrollApp()
+    async with app.run_test() as pilot:
+        pilot.app.paginated_data = pages[1:]
+        pilot.app.data = [pages[0]]
+        manager = pilot.app.query_one(DataTableManager)
+        # fetches run one after another so give them time when the test runner is busy
+        for _ in range(20):
+            await pilot.pause(0.1)
+            if not manager.has_more:
+                break
+        table = pilot.app.query_one(DataTable)
+        # rows near the bottom of the grid trigger background fetches until all pages are loaded
+        assert table.row_count == 20
+        assert manager.has_more is False
+        assert [table.get_row_at(i)[0] for i in range(0, 6)] == [
+            "customer#00",
+            "customer#01",
+            "customer#02",
+            "customer#03",
+            "customer#04",
+            "customer#10",
+        ]
+        assert "20 rows loaded" in str(
+            pilot.app.query_one("#stream_status").render()
+        )
+
+
+async def test_data_table_manager_infinite_scroll_max_rows():
+    pages = [
+        [{"pk": f"customer#{page}{index}", "sk": "CUSTOMER"} for index in range(5)]
+        for page in range(4)
+    ]
+    app = InfiniteScrollApp()
+    async with app.run_test() as pilot:
+        manager = pilot.app.query_one(DataTableManager)
+        manager.max_rows = 10
+        pilot.app.paginated_data = pages[1:]
+        pilot.app.data = [pages[0]]
+        table = pilot.app.query_one(DataTable)
+        for _ in range(20):
+            await pilot.pause(0.1)
+            if table.row_count >= 10:
+                break
+        await pilot.pause(0.2)
+        assert table.row_count == 10
+        assert len(pilot.app.paginated_data) == 2
+
+        # toggling back to paged mode shows a single page
+        await pilot.press("ctrl+t")
+        await pilot.pause()
+        assert table.row_count == 5
+
+
+async def test_data_table_manager_sort_across_pages():
+    data = [
+        [
+            {"pk": "customer#1", "sk": "CUSTOMER", "amount": Decimal("30")},
+            {"pk": "customer#2", "sk": "CUSTOMER"},
+        ],
+        [
+            {"pk": "customer#3", "sk": "CUSTOMER", "amount": Decimal("5.5")},
+            {"pk": "customer#4", "sk": "CUSTOMER", "amount": Decimal("100")},
+        ],
+    ]
+    app = DataTableManagerApp()
+    async with app.run_test() as pilot:
+        pilot.app.data = data
+        await pilot.pause()
+        manager = pilot.app.query_one(DataTableManager)
+        table = pilot.app.query_one(DataTable)
+
+        manager.sort_by("amount")
+        await pilot.pause()
+        # first page now holds the smallest amounts from across both pages
+        assert [table.get_row_at(i)[0] for i in range(table.row_count)] == [
+            "customer#3",
+            "customer#1",
+        ]
+        await pilot.press("]")
+        await pilot.pause()
+        # missing values are always last
+        assert [table.get_row_at(i)[0] for i in range(table.row_count)] == [
+            "customer#4",
+            "customer#2",
+        ]
+
+        manager.sort_by("amount", descending=True)
+        await pilot.pause()
+        assert [table.get_row_at(i)[0] for i in range(table.row_count)] == [
+            "customer#3",
+            "customer#2",
+        ]
+
+        manager.sort_by(None)
+        await pilot.pause()
+        assert [table.get_row_at(i)[0] for i in range(table.row_count)] == [
+            "customer#3",
+            "customer#4",
+        ]
+
+
+async def test_data_table_manager_quick_filter():
+    data = [
+        [
+            {"pk": "customer#1", "sk": "CUSTOMER", "status": "active"},
+            {"pk": "customer#2", "sk": "CUSTOMER", "status": "inactive"},
+        ],
+        [
+            {"pk": "customer#3", "sk": "CUSTOMER", "status": "Active"},
+            {"pk": "customer#4", "sk": "ORDER#1", "amount": Decimal("10")},
+        ],
+    ]
+    app = DataTableManagerApp()
+    async with app.run_test() as pilot:
+        pilot.app.data = data
+        await pilot.pause()
+        manager = pilot.app.query_one(DataTableManager)
+        table = pilot.app.query_one(DataTable)
+
+        # matches are paged using the size of the first page
+        assert manager.apply_filter("status=active") == 2
+        await pilot.pause()
+        assert [table.get_row_at(i)[0] for i in range(table.row_count)] == [
+            "customer#1",
+            "customer#3",
+        ]
+
+        assert manager.apply_filter("order") == 1
+        await pilot.pause()
+        assert [table.get_row_at(i)[0] for i in range(table.row_count)] == [
+            "customer#4"
+        ]
+
+        assert manager.apply_filter("/^customer#[23]$/") == 2
+        with pytest.raises(re.error):
+            manager.apply_filter("/customer[/")
+        assert manager.filter_query == "/^customer#[23]$/"
+
+        assert manager.apply_filter("") == 4
+        await pilot.pause()
+        assert table.row_count == 2
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from dyno_viewer.util.aggregate import AggregateResult, Aggregator, GroupAggregate
+from dyno_viewer.util.row_store import ColumnarRowStore
+
+ITEMS = [
+    {"pk": "customer#1", "status": "active", "amount": Decimal("10.5")},
+    {"pk": "customer#2", "status": "active", "amount": Decimal("4")},
+    {"pk": "customer#3", "status": "inactive", "amount": "n/a"},
+    {"pk": "customer#4", "amount": Decimal("-1")},
+]
+
+
+def test_aggregator_group_by():
+    aggregator = Aggregator("status", "amount")
+    aggregator.add_items(ITEMS[:2])
+    aggregator.add_items(ITEMS[2:])
+    assert aggregator.item_count == 4
+    assert aggregator.results() == [
+        AggregateResult(
+            group="active",
+            count=2,
+            sum=Decimal("14.5"),
+            avg=Decimal("7.25"),
+            min=Decimal("4"),
+            max=Decimal("10.5"),
+        ),
+        # non numeric values are counted but not summed
+        AggregateResult(group="inactive", count=1),
+        AggregateResult(
+            group=None,
+            count=1,
+            sum=Decimal("-1"),
+            avg=Decimal("-1"),
+            min=Decimal("-1"),
+            max=Decimal("-1"),
+        ),
+    ]
+
+
+def test_aggregator_without_group_by():
+    aggregator = Aggregator(attribute="amount")
+    aggregator.add_items(ITEMS)
+    assert aggregator.results() == [
+        AggregateResult(
+            group="(all)",
+            count=4,
+            sum=Decimal("13.5"),
+            avg=Decimal("4.5"),
+            min=Decimal("-1"),
+            max=Decimal("10.5"),
+        )
+    ]
+
+
+def test_aggregator_store_matches_items():
+    store = ColumnarRowStore()
+    store.append_page(ITEMS[:3])
+    store.append_page(ITEMS[3:])
+    from_store = Aggregator("status", "amount")
+    from_store.add_store(store)
+    from_items = Aggregator("status", "amount")
+    from_items.add_items(ITEMS)
+    assert from_store.item_count == 4
+    assert from_store.results() == from_items.results()
+
+
+def test_aggregator_store_numbers_match_items():
+    items = [
+        {"status": "active", "amount": Decimal("10.5"), "count": Decimal(3)},
+        {"status": "active", "amount": Decimal("0.1"), "count": Decimal(-7)},
+        {"status": True, "amount": Decimal("0.2"), "count": Decimal(2**60)},
+        {"status": Decimal(1), "amount": Decimal("1.00000000000000000001")},
+        {"status": {"nested": 1}, "amount": Decimal("4.0")},
+        {"amount": Decimal("1e30"), "count": Decimal(1)},
+        {"status": "inactive"},
+    ]
+    store = ColumnarRowStore()
+    store.append_page(items[:4])
+    store.append_page(items[4:])
+    for group_by in ("status", "missing", None):
+        for attribute in ("amount", "count"):
+            from_store = Aggregator(group_by, attribute)
+            from_store.add_store(store)
+            from_items = Aggregator(group_by, attribute)
+            from_items.add_items(items)
+            assert from_store.item_count == len(items)
+            assert from_store.results() == from_items.results()
+
+
+def test_aggregator_store_sums_whole_numbers_as_floats(mocker):
+    store = ColumnarRowStore()
+    store.append_page([{"count": Decimal(count)} for count in range(1000)])
+    add_value = mocker.spy(GroupAggregate, "add_value")
+    aggregator = Aggregator(attribute="count")
+    aggregator.add_store(store)
+    [result] = aggregator.results()
+    assert result.sum == Decimal(499500)
+    assert (result.min, result.max) == (Decimal(0), Decimal(999))
+    add_value.assert_not_called()
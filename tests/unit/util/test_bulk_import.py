@@ -0,0 +1,257 @@
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+from boto3.dynamodb.types import Binary
+
+from dyno_viewer.models import FileToImport, OutputFormat
+from dyno_viewer.util.bulk_import import (
+    BulkImport,
+    CapacityBudget,
+    TableWriter,
+    convert_csv_value,
+    parse_column_types,
+    reject_path,
+)
+from dyno_viewer.util.export import get_export_writer, iter_export_items
+
+
+def scan_all(table) -> list[dict]:
+    return table.scan()["Items"]
+
+
+def item_key(item: dict) -> tuple:
+    return item["pk"], item["sk"]
+
+
+@pytest.mark.parametrize(
+    "file_format", [OutputFormat.JSONL, OutputFormat.JSON, OutputFormat.DYNAMODB_JSON]
+)
+def test_bulk_import_export_round_trip(ddb_table, ddb_test_data, tmp_path, file_format):
+    path = tmp_path / f"items.{file_format.value}"
+    with get_export_writer(file_format, path) as writer:
+        writer.write_page(ddb_test_data)
+    progress_updates = []
+
+    progress = BulkImport(
+        ddb_table, FileToImport(path=path, file_format=file_format), workers=3
+    ).run(on_progress=progress_updates.append)
+
+    assert progress.finished
+    assert progress.items == len(ddb_test_data)
+    assert progress.rejected == 0
+    assert progress.reject_path is None
+    assert progress_updates[-1].items <= len(ddb_test_data)
+    assert sorted(scan_all(ddb_table), key=item_key) == sorted(
+        ddb_test_data, key=item_key
+    )
+
+
+def test_bulk_import_csv_column_types(ddb_table, tmp_path):
+    path = tmp_path / "items.csv"
+    path.write_text(
+        "pk,sk,amount,tags,active,blob\n"
+        '1,a,10.5,"[""x"", ""y""]",true,ZGF0YQ==\n'
+        "2,b,3,,false,\n"
+    )
+    progress = BulkImport(
+        ddb_table,
+        FileToImport(
+            path=path,
+            file_format=OutputFormat.CSV,
+            column_types=parse_column_types("amount=N, tags=ss,active=BOOL,blob=B"),
+        ),
+    ).run()
+    assert progress.items == 2
+    assert sorted(scan_all(ddb_table), key=lambda item: item["pk"]) == [
+        {
+            "pk": "1",
+            "sk": "a",
+            "amount": Decimal("10.5"),
+            "tags": {"x", "y"},
+            "active": True,
+            "blob": Binary(b"data"),
+        },
+        # empty values are left out
+        {"pk": "2", "sk": "b", "amount": Decimal("3"), "active": False},
+    ]
+
+
+def test_bulk_import_rejects(ddb_table, tmp_path):
+    path = tmp_path / "items.jsonl.gz"
+    with get_export_writer("jsonl", path, compression="gzip") as writer:
+        writer.write_page(
+            [
+                {"pk": "1", "sk": "a"},
+                {"pk": "2"},
+                {"pk": "3", "sk": "c", "value": ""},
+                {"pk": "4", "sk": "d"},
+            ]
+        )
+    progress = BulkImport(
+        ddb_table, FileToImport(path=path, file_format=OutputFormat.JSONL)
+    ).run()
+
+    assert progress.finished
+    assert progress.items == 3
+    assert progress.rejected == 1
+    assert progress.reject_path == tmp_path / "items.jsonl.rejected.jsonl"
+    lines = [json.loads(line) for line in progress.reject_path.read_text().splitlines()]
+    assert lines == [
+        {"Item": {"pk": {"S": "2"}}, "Error": "missing key attribute sk"},
+    ]
+    # the reject file can be fixed up and imported again as dynamodb json
+    assert list(iter_export_items(progress.reject_path, "ddb-json")) == [{"pk": "2"}]
+
+
+def test_bulk_import_rejects_bad_item_in_batch(ddb_table, tmp_path):
+    path = tmp_path / "items.jsonl"
+    path.write_text(
+        '{"pk": "1", "sk": "a"}\n{"pk": 2, "sk": "b"}\n{"pk": "3", "sk": "c"}\n'
+    )
+    progress = BulkImport(
+        ddb_table, FileToImport(path=path, file_format=OutputFormat.JSONL)
+    ).run()
+    # the batch fails validation so its items are written one at a time
+    assert progress.items == 2
+    assert progress.rejected == 1
+    rejected = json.loads(progress.reject_path.read_text())
+    assert rejected["Item"] == {"pk": {"N": "2"}, "sk": {"S": "b"}}
+    assert "ValidationException" in rejected["Error"]
+
+
+def test_bulk_import_duplicate_keys_split_batches(ddb_table, tmp_path):
+    path = tmp_path / "items.jsonl"
+    path.write_text(
+        '{"pk": "1", "sk": "a", "version": 1}\n{"pk": "1", "sk": "a", "version": 2}\n'
+    )
+    progress = BulkImport(
+        ddb_table, FileToImport(path=path, file_format=OutputFormat.JSONL), workers=1
+    ).run()
+    assert progress.items == 2
+    assert progress.rejected == 0
+    assert scan_all(ddb_table) == [{"pk": "1", "sk": "a", "version": Decimal("2")}]
+
+
+def test_bulk_import_retries_unprocessed_items(ddb_table, tmp_path, mocker):
+    mocker.patch("dyno_viewer.util.bulk_import.time.sleep")
+    path = tmp_path / "items.jsonl"
+    path.write_text('{"pk": "1", "sk": "a"}\n{"pk": "2", "sk": "b"}\n')
+    client = ddb_table.meta.client
+    batch_write_item = client.batch_write_item
+    requests = []
+
+    def unprocess_first_item(RequestItems, **kwargs):
+        requests.append(RequestItems)
+        if len(requests) > 1:
+            return batch_write_item(RequestItems=RequestItems, **kwargs)
+        put_requests = RequestItems[ddb_table.name]
+        batch_write_item(RequestItems={ddb_table.name: put_requests[1:]}, **kwargs)
+        return {
+            "UnprocessedItems": {ddb_table.name: put_requests[:1]},
+            "ConsumedCapacity": [{"TableName": ddb_table.name, "CapacityUnits": 1.0}],
+        }
+
+    mocker.patch.object(client, "batch_write_item", side_effect=unprocess_first_item)
+    progress = BulkImport(
+        ddb_table,
+        FileToImport(path=path, file_format=OutputFormat.JSONL, wcu_budget=100),
+    ).run()
+
+    assert len(requests) == 2
+    assert requests[1][ddb_table.name] == [
+        {"PutRequest": {"Item": {"pk": "1", "sk": "a"}}}
+    ]
+    assert progress.items == 2
+    assert progress.consumed_capacity >= 1
+    assert len(scan_all(ddb_table)) == 2
+
+
+def test_bulk_import_rejects_after_max_retries(ddb_table, tmp_path, mocker):
+    mocker.patch("dyno_viewer.util.bulk_import.time.sleep")
+    mocker.patch("dyno_viewer.util.bulk_import.MAX_RETRIES", 2)
+    path = tmp_path / "items.jsonl"
+    path.write_text('{"pk": "1", "sk": "a"}\n')
+    mocker.patch.object(
+        ddb_table.meta.client,
+        "batch_write_item",
+        side_effect=lambda RequestItems, **_: {"UnprocessedItems": RequestItems},
+    )
+    progress = BulkImport(
+        ddb_table, FileToImport(path=path, file_format=OutputFormat.JSONL)
+    ).run()
+    assert progress.items == 0
+    assert progress.rejected == 1
+    assert "still unprocessed after 2 retries" in progress.reject_path.read_text()
+
+
+def test_bulk_import_cancelled(ddb_table, ddb_test_data, tmp_path):
+    path = tmp_path / "items.jsonl"
+    with get_export_writer("jsonl", path) as writer:
+        writer.write_page(ddb_test_data)
+    progress = BulkImport(
+        ddb_table, FileToImport(path=path, file_format=OutputFormat.JSONL)
+    ).run(is_cancelled=lambda: True)
+    assert not progress.finished
+    assert progress.items == 0
+
+
+def test_capacity_budget_sleeps_off_debt(mocker):
+    monotonic = mocker.patch(
+        "dyno_viewer.util.bulk_import.time.monotonic", return_value=100.0
+    )
+    sleep = mocker.patch("dyno_viewer.util.bulk_import.time.sleep")
+    budget = CapacityBudget(10)
+    # a second of units is banked
+    budget.acquire(10)
+    sleep.assert_not_called()
+    budget.acquire(5)
+    sleep.assert_called_once_with(0.5)
+    # consumed less than reserved so some units are given back
+    monotonic.return_value = 101.0
+    budget.adjust(-5)
+    budget.acquire(10)
+    assert sleep.call_count == 1
+
+
+def test_parse_column_types_invalid():
+    assert parse_column_types("") == {}
+    with pytest.raises(ValueError, match="isn't name=type"):
+        parse_column_types("amount")
+    with pytest.raises(ValueError, match="unknown type X"):
+        parse_column_types("amount=x")
+
+
+@pytest.mark.parametrize(
+    "value,column_type,expected",
+    [
+        ("1.50", "N", Decimal("1.50")),
+        ('{"a": 1}', "M", {"a": Decimal("1")}),
+        ("[1, 2]", "NS", {Decimal("1"), Decimal("2")}),
+        ('[1, "a"]', "L", [Decimal("1"), "a"]),
+        ("FALSE", "BOOL", False),
+        ("anything", "NULL", None),
+    ],
+)
+def test_convert_csv_value(value, column_type, expected):
+    assert convert_csv_value(value, column_type) == expected
+
+
+@pytest.mark.parametrize(
+    "value,column_type", [("abc", "N"), ("yes", "BOOL"), ("[1]", "M"), ("{}", "SS")]
+)
+def test_convert_csv_value_invalid(value, column_type):
+    with pytest.raises(ValueError, match="can't read"):
+        convert_csv_value(value, column_type)
+
+
+def test_reject_path():
+    assert reject_path("/tmp/items.csv.zst").name == "items.csv.rejected.jsonl"
+
+
+def test_table_writer_without_iter_items(tmp_path):
+    class IncompleteWriter(TableWriter):
+        pass
+
+    with pytest.raises(TypeError, match="iter_items"):
+        IncompleteWriter(None, None, tmp_path / "rejected.jsonl")
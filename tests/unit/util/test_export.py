@@ -0,0 +1,292 @@
+import csv
+import gzip
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+from boto3.dynamodb.types import Binary
+
+from dyno_viewer.models import ExportCheckpoint, OutputFormat
+from dyno_viewer.util.export import (
+    CsvExportWriter,
+    DynamoDbJsonExportWriter,
+    ExportWriter,
+    JsonExportWriter,
+    JsonLinesExportWriter,
+    get_export_writer,
+    is_resumable,
+    iter_export_items,
+    open_export_input,
+)
+
+PAGES = [
+    [
+        {"pk": "customer#1", "sk": "CUSTOMER", "amount": Decimal("10.5")},
+        {"pk": "customer#2", "sk": "CUSTOMER", "tags": {"a"}},
+    ],
+    [
+        {"pk": "customer#3", "sk": "ORDER#1", "details": {"total": Decimal("3")}},
+        {"pk": "customer#4", "sk": "ORDER#2", "blob": Binary(b"data")},
+    ],
+]
+
+
+def test_export_writer_without_write_page(tmp_path):
+    class IncompleteWriter(ExportWriter):
+        pass
+
+    path = tmp_path / "export.txt"
+    with pytest.raises(TypeError, match="write_page"):
+        IncompleteWriter(path)
+    assert not path.exists()
+
+
+def test_json_export_writer(tmp_path):
+    path = tmp_path / "export.json"
+    with JsonExportWriter(path) as writer:
+        for page in PAGES:
+            writer.write_page(page)
+    assert writer.items_written == 4
+    assert writer.bytes_written == path.stat().st_size
+    assert json.loads(path.read_text(), use_decimal=True) == [
+        PAGES[0][0],
+        {"pk": "customer#2", "sk": "CUSTOMER", "tags": ["a"]},
+        PAGES[1][0],
+        {"pk": "customer#4", "sk": "ORDER#2", "blob": "ZGF0YQ=="},
+    ]
+
+
+def test_json_export_writer_no_items(tmp_path):
+    path = tmp_path / "export.json"
+    with JsonExportWriter(path):
+        pass
+    assert json.loads(path.read_text()) == []
+
+
+def test_json_lines_export_writer(tmp_path):
+    path = tmp_path / "export.jsonl"
+    with get_export_writer(OutputFormat.JSONL, path) as writer:
+        assert isinstance(writer, JsonLinesExportWriter)
+        for page in PAGES:
+            writer.write_page(page)
+    assert writer.items_written == 4
+    assert writer.bytes_written == path.stat().st_size
+    assert len(path.read_text().splitlines()) == 4
+    assert list(iter_export_items(path, OutputFormat.JSONL)) == [
+        PAGES[0][0],
+        {"pk": "customer#2", "sk": "CUSTOMER", "tags": ["a"]},
+        PAGES[1][0],
+        {"pk": "customer#4", "sk": "ORDER#2", "blob": "ZGF0YQ=="},
+    ]
+
+
+def test_dynamodb_json_export_writer_round_trip(tmp_path):
+    path = tmp_path / "export.ddb.json"
+    with get_export_writer(OutputFormat.DYNAMODB_JSON, path) as writer:
+        assert isinstance(writer, DynamoDbJsonExportWriter)
+        for page in PAGES:
+            writer.write_page(page)
+    assert writer.items_written == 4
+    first_line = json.loads(path.read_text().splitlines()[0])
+    assert first_line == {
+        "pk": {"S": "customer#1"},
+        "sk": {"S": "CUSTOMER"},
+        "amount": {"N": "10.5"},
+    }
+    # sets and binary values come back as the same types
+    assert list(iter_export_items(path, OutputFormat.DYNAMODB_JSON)) == [
+        item for page in PAGES for item in page
+    ]
+
+
+def test_iter_export_items_json(tmp_path):
+    path = tmp_path / "export.json"
+    with JsonExportWriter(path) as writer:
+        writer.write_page(PAGES[1][:1])
+    assert list(iter_export_items(path, "json")) == PAGES[1][:1]
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+@pytest.mark.parametrize("file_format", ["json", "jsonl", "ddb-json"])
+def test_compressed_export_round_trip(tmp_path, compression, file_format, mocker):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    # small chunks so pages are handed to the compressor thread as they're written
+    mocker.patch("dyno_viewer.util.export.COPY_CHUNK_SIZE", 16)
+    path = tmp_path / f"export.{file_format}"
+    with get_export_writer(file_format, path, compression=compression) as writer:
+        for page in PAGES:
+            writer.write_page(page)
+    assert writer.items_written == 4
+    items = list(iter_export_items(path, file_format))
+    assert [item["pk"] for item in items] == [f"customer#{i}" for i in range(1, 5)]
+
+
+def test_compressed_csv_export(tmp_path):
+    path = tmp_path / "export.csv.gz"
+    with CsvExportWriter(path, compression="gzip") as writer:
+        for page in PAGES:
+            writer.write_page(page)
+    assert writer.bytes_written == path.stat().st_size
+    with gzip.open(path, "rt", newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f))[0] == [
+            "pk",
+            "sk",
+            "amount",
+            "tags",
+            "details",
+            "blob",
+        ]
+
+
+def test_compressed_export_raises_compressor_error(tmp_path, mocker):
+    path = tmp_path / "export.jsonl.gz"
+    writer = get_export_writer("jsonl", path, compression="gzip")
+    mocker.patch.object(
+        writer._output._stream, "write", side_effect=OSError("disk full")
+    )
+    writer.write_page(PAGES[0])
+    with pytest.raises(OSError, match="disk full"):
+        writer.close()
+
+
+def test_open_export_input_plain_text(tmp_path):
+    path = tmp_path / "export.jsonl"
+    path.write_text('{"pk": "1"}\n')
+    with open_export_input(path) as f:
+        assert f.read() == '{"pk": "1"}\n'
+
+
+@pytest.mark.parametrize("file_format", ["json", "jsonl", "ddb-json"])
+def test_resume_export_writer_from_checkpoint(tmp_path, file_format):
+    path = tmp_path / f"export.{file_format}"
+    writer = get_export_writer(file_format, path)
+    writer.write_page(PAGES[0])
+    writer.sync()
+    checkpoint = ExportCheckpoint(
+        items=writer.items_written, offset=writer.bytes_written
+    )
+    # written after the checkpoint so dropped when resumed
+    writer.write_page(PAGES[1])
+    writer.close()
+
+    with get_export_writer(file_format, path, checkpoint=checkpoint) as writer:
+        assert writer.items_written == 2
+        writer.write_page(PAGES[1])
+    assert writer.bytes_written == path.stat().st_size
+    assert [item["pk"] for item in iter_export_items(path, file_format)] == [
+        f"customer#{i}" for i in range(1, 5)
+    ]
+
+
+def test_resume_export_writer_not_resumable(tmp_path):
+    checkpoint = ExportCheckpoint(items=1, offset=10)
+    assert not is_resumable("csv")
+    assert not is_resumable("jsonl", "gzip")
+    with pytest.raises(ValueError):
+        get_export_writer("csv", tmp_path / "export.csv", checkpoint=checkpoint)
+    path = tmp_path / "export.jsonl"
+    path.write_text("{}\n")
+    with pytest.raises(ValueError, match="shorter than its checkpoint"):
+        get_export_writer("jsonl", path, checkpoint=checkpoint)
+
+
+def read_csv_rows(path) -> list[list[str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_export_writer(tmp_path):
+    path = tmp_path / "export.csv"
+    with get_export_writer(OutputFormat.CSV, path) as writer:
+        assert isinstance(writer, CsvExportWriter)
+        for page in PAGES:
+            writer.write_page(page)
+    assert writer.items_written == 4
+    assert writer.bytes_written == path.stat().st_size
+    # columns are in the order they were first seen and every row is padded out
+    assert read_csv_rows(path) == [
+        ["pk", "sk", "amount", "tags", "details", "blob"],
+        ["customer#1", "CUSTOMER", "10.5", "", "", ""],
+        ["customer#2", "CUSTOMER", "", '["a"]', "", ""],
+        ["customer#3", "ORDER#1", "", "", '{"total": 3}', ""],
+        ["customer#4", "ORDER#2", "", "", "", "ZGF0YQ=="],
+    ]
+
+
+def test_csv_export_writer_multiline_values(tmp_path):
+    path = tmp_path / "export.csv"
+    with CsvExportWriter(path) as writer:
+        writer.write_page([{"pk": "1", "note": "line 1\nline, 2"}, {"pk": "2"}])
+        writer.write_page([{"pk": "3", "extra": "x"}])
+    assert read_csv_rows(path) == [
+        ["pk", "note", "extra"],
+        ["1", "line 1\nline, 2", ""],
+        ["2", "", ""],
+        ["3", "", "x"],
+    ]
+
+
+def test_csv_export_writer_fixed_columns(tmp_path):
+    path = tmp_path / "export.csv"
+    with CsvExportWriter(path, columns=["sk", "pk"]) as writer:
+        for page in PAGES:
+            writer.write_page(page)
+    assert read_csv_rows(path) == [
+        ["sk", "pk"],
+        ["CUSTOMER", "customer#1"],
+        ["CUSTOMER", "customer#2"],
+        ["ORDER#1", "customer#3"],
+        ["ORDER#2", "customer#4"],
+    ]
+
+
+def test_csv_export_writer_no_items(tmp_path):
+    path = tmp_path / "export.csv"
+    with CsvExportWriter(path):
+        pass
+    assert read_csv_rows(path) == [[]]
+
+
+@pytest.mark.parametrize("file_format", [OutputFormat.ARROW, OutputFormat.PARQUET])
+def test_arrow_export_writer(tmp_path, file_format):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / f"export.{file_format.value}"
+    with get_export_writer(file_format, path) as writer:
+        for page in PAGES:
+            writer.write_page(page)
+        writer.write_page([{"pk": "customer#5", "amount": Decimal("2"), "tags": 1}])
+    assert writer.items_written == 5
+    assert writer.bytes_written == path.stat().st_size
+    table = (
+        pa.ipc.open_file(path).read_all()
+        if file_format == OutputFormat.ARROW
+        else pq.read_table(path)
+    )
+    assert table.column_names == ["pk", "sk", "amount", "tags", "details", "blob"]
+    assert table.schema.field("amount").type == pa.float64()
+    assert pa.types.is_struct(table.schema.field("details").type)
+    # tags has a set and a number so is written as json text
+    assert table.column("tags").to_pylist() == [None, '["a"]', None, None, "1"]
+    assert table.to_pylist()[2]["details"] == {"total": 3}
+    assert table.to_pylist()[3]["blob"] == b"data"
+    assert table.column("amount").to_pylist() == [10.5, None, None, None, 2.0]
+
+
+def test_compressed_parquet_export(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "export.parquet.gz"
+    with get_export_writer(OutputFormat.PARQUET, path, compression="gzip") as writer:
+        for page in PAGES:
+            writer.write_page(page)
+    with gzip.open(path) as f:
+        assert pq.read_table(f).num_rows == 4
+
+
+def test_parquet_export_writer_empty_map(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "export.parquet"
+    with get_export_writer(OutputFormat.PARQUET, path) as writer:
+        writer.write_page([{"pk": "1", "details": {}}])
+    assert pq.read_table(path).to_pylist() == [{"pk": "1", "details": "{}"}]
@@ -0,0 +1,120 @@
+from decimal import Decimal
+
+import pytest
+
+from dyno_viewer.util.row_store import ColumnarRowStore, ColumnType
+
+
+def test_row_store_round_trips_items():
+    page = [
+        {"pk": "customer#1", "sk": "CUSTOMER", "amount": Decimal("12.5")},
+        {"pk": "customer#2", "sk": "CUSTOMER", "tags": ["a", "b"]},
+        {
+            "pk": "customer#3",
+            "sk": "CUSTOMER",
+            "amount": Decimal("12345678901234567890.123"),
+            "active": True,
+        },
+    ]
+    store = ColumnarRowStore()
+    assert store.append_page(page) == range(0, 3)
+
+    assert len(store) == 3
+    assert [store.row(i) for i in range(3)] == page
+    assert store.row(2)["amount"] == Decimal("12345678901234567890.123")
+    assert store.column("amount").type == ColumnType.NUMBER
+    assert store.column("tags").type == ColumnType.LIST
+    assert store.column("active").type == ColumnType.BOOLEAN
+
+
+def test_row_store_numbers_are_packed():
+    store = ColumnarRowStore()
+    store.append_page([{"n": Decimal(i)} for i in range(5)])
+    column = store.column("n")
+    assert list(column.numbers()) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert column.get(3) == Decimal("3")
+    assert str(column.get(3)) == "3"
+
+
+def test_row_store_mixed_column():
+    store = ColumnarRowStore()
+    store.append_page([{"value": Decimal("1")}, {"other": "x"}, {"value": "one"}])
+    column = store.column("value")
+    assert column.type == ColumnType.MIXED
+    assert store.column_values("value", range(3)) == [Decimal("1"), None, "one"]
+    with pytest.raises(ValueError):
+        column.numbers()
+
+
+def test_row_store_sync_pages():
+    page_one = [{"pk": "a"}, {"pk": "b"}]
+    page_two = [{"pk": "c", "extra": "x"}]
+    store = ColumnarRowStore()
+
+    assert store.sync_pages([page_one]) is False
+    assert store.sync_pages([page_one, page_two]) is False
+    assert len(store) == 3
+    assert store.page_range(1) == range(2, 3)
+    assert store.columns_in(store.page_range(0)) == ["pk"]
+    assert store.columns_in(store.page_range(1)) == ["pk", "extra"]
+
+    # replacing the pages rebuilds the store
+    assert store.sync_pages([page_two]) is True
+    assert len(store) == 1
+    assert store.rows(range(1), ["pk", "extra", "missing"]) == [["c", "x", None]]
+
+
+def test_row_store_sort_permutation():
+    store = ColumnarRowStore()
+    store.append_page(
+        [
+            {"value": Decimal("10")},
+            {"value": "b"},
+            {},
+            {"value": Decimal("-1.5")},
+            {"value": "a"},
+        ]
+    )
+    assert list(store.sort_permutation("value")) == [3, 0, 4, 1, 2]
+    assert list(store.sort_permutation("value", descending=True)) == [1, 4, 0, 3, 2]
+    assert list(store.sort_permutation("missing")) == [0, 1, 2, 3, 4]
+
+
+def test_row_store_sync_pages_replaced_by_new_lists():
+    store = ColumnarRowStore()
+    # the first page isn't referenced anywhere else, so once freed a new list can be
+    # given the same id
+    store.sync_pages([[{"pk": "a"}]])
+    for value in "bcd":
+        assert store.sync_pages([[{"pk": value}]]) is True
+        assert store.rows(range(len(store)), ["pk"]) == [[value]]
+
+
+def test_row_store_snapshot_is_unaffected_by_later_pages():
+    store = ColumnarRowStore()
+    store.append_page([{"pk": "a", "amount": Decimal("1")}, {"pk": "b"}])
+    snapshot = store.snapshot(["amount", "missing"])
+    store.append_page([{"pk": "c", "amount": "mixed"}, {"pk": "d", "amount": 4}])
+    assert len(snapshot) == 2
+    assert snapshot.page_count == 1
+    assert snapshot.columns == ["amount"]
+    assert snapshot.column("amount").type == ColumnType.NUMBER
+    assert snapshot.rows(range(2), ["pk", "amount"]) == [
+        [None, Decimal("1")],
+        [None, None],
+    ]
+    store.clear()
+    assert len(snapshot) == 2
+    assert snapshot.column_values("amount", range(2)) == [Decimal("1"), None]
+
+
+def test_row_store_columns_of_rows_in_any_order():
+    store = ColumnarRowStore()
+    store.append_page([{"pk": "a", "first": 1}, {"pk": "b"}, {"pk": "c", "last": 3}])
+    assert store.columns_of([2, 1]) == ["pk", "last"]
+    assert store.columns_of([1]) == ["pk"]
+    # rows past the last row a column has
+    assert store.columns_of([1, 0]) == ["pk", "first"]
+    assert store.columns_of(range(1, 3)) == ["pk", "last"]
+    assert store.columns_of([2, 0, 1]) == ["pk", "first", "last"]
+    assert store.columns_of([]) == []
@@ -0,0 +1,100 @@
+import re
+from decimal import Decimal
+
+import pytest
+
+from dyno_viewer.util import search_index
+from dyno_viewer.util.row_store import ColumnarRowStore
+from dyno_viewer.util.search_index import RowSearchIndex
+
+
+@pytest.fixture
+def store() -> ColumnarRowStore:
+    store = ColumnarRowStore()
+    store.append_page(
+        [
+            {"pk": "customer#1", "sk": "CUSTOMER", "status": "active"},
+            {"pk": "customer#2", "sk": "CUSTOMER", "status": "inactive"},
+            {
+                "pk": "customer#3",
+                "sk": "ORDER#1",
+                "amount": Decimal("12.50"),
+                "tags": ["Priority"],
+            },
+        ]
+    )
+    return store
+
+
+def test_search_substring(store):
+    index = RowSearchIndex()
+    assert index.search(store, "ACTIVE") == {0, 1}
+    assert index.search(store, "order#") == {2}
+    assert index.search(store, "12.5") == {2}
+    assert index.search(store, "priority") == {2}
+    assert index.search(store, "missing") == set()
+    assert index.search(store, "  ") is None
+
+
+def test_search_attribute_value(store):
+    index = RowSearchIndex()
+    assert index.search(store, "status=Active") == {0}
+    assert index.search(store, "SK = customer") == {0, 1}
+    # not an attribute, so it isn't searched as text either
+    store.append_page([{"pk": "other=1"}])
+    assert index.search(store, "other=1") == set()
+
+
+def test_search_regex(store):
+    index = RowSearchIndex()
+    assert index.search(store, "/^customer#[12]$/") == {0, 1}
+    assert index.search(store, "/^in/") == {1}
+    with pytest.raises(re.error):
+        index.search(store, "/[/")
+
+
+def test_search_regex_in_chunks(mocker):
+    mocker.patch.object(search_index, "MAX_INDEXED_VALUES", 2)
+    store = ColumnarRowStore()
+    store.append_page([{"id": f"v{i}"} for i in range(8)])
+    index = RowSearchIndex()
+    assert index.search(store, "/^v[35]$/") == {3, 5}
+    assert index.search(store, r"/v\d/") == set(range(8))
+    # matches that would run over the new line between rows
+    assert index.search(store, r"/v1\sv2/") == set()
+    assert index.search(store, "/[^x]+v3/") == set()
+    assert index.search(store, r"/\s/") == set()
+    assert index.search(store, "/v[^x]*/") == set(range(8))
+
+
+def test_search_index_is_incremental(store, mocker):
+    mocker.patch.object(search_index, "MAX_INDEXED_VALUES", 2)
+    index = RowSearchIndex()
+    assert index.search(store, "customer#") == {0, 1, 2}
+    assert len(index) == 3
+
+    store.append_page([{"pk": "customer#4", "status": "active"}])
+    assert index.search(store, "customer#4") == {3}
+    assert index.search(store, "pk=customer#4") == {3}
+    assert index.search(store, "status=active") == {0, 3}
+    assert len(index) == 4
+
+    store.clear()
+    store.append_page([{"pk": "customer#5"}])
+    assert index.search(store, "customer") == {0}
+    assert len(index) == 1
+
+
+def test_search_attribute_value_in_chunks(mocker):
+    mocker.patch.object(search_index, "MAX_INDEXED_VALUES", 2)
+    store = ColumnarRowStore()
+    store.append_page([{"id": f"v{i}", "status": "same"} for i in range(8)])
+    index = RowSearchIndex()
+    assert index.search(store, "id=v5") == {5}
+    assert index.search(store, "id=v0") == {0}
+    assert index.search(store, "id=v7") == {7}
+    assert index.search(store, "id=v") == set()
+
+    # rows next to each other with the same value are all found
+    store.append_page([{"id": "dup"}, {"id": "dup"}, {"id": "v10"}])
+    assert index.search(store, "id=dup") == {8, 9}
@@ -0,0 +1,188 @@
+from pathlib import Path
+
+import pytest
+import simplejson as json
+
+from dyno_viewer.models import Compression, FileToSave, OutputFormat, QueryParameters
+from dyno_viewer.util.export import iter_export_items
+from dyno_viewer.util.segmented_export import (
+    SegmentedExport,
+    count_export_items,
+    load_manifest,
+    manifest_path,
+    part_path,
+    verify_export,
+)
+
+
+def test_part_path():
+    assert part_path("/tmp/export.json.gz", 0, 4) == Path(
+        "/tmp/export.part-0001-of-0004.json.gz"
+    )
+    assert part_path("/tmp/export", 3, 4) == Path("/tmp/export.part-0004-of-0004")
+
+
+@pytest.mark.parametrize(
+    "file_format", [OutputFormat.JSONL, OutputFormat.JSON, OutputFormat.CSV]
+)
+def test_segmented_export_parts(ddb_table_with_data, ddb_table, tmp_path, file_format):
+    path = tmp_path / f"export.{file_format.value}"
+    progress = []
+    manifest = SegmentedExport(
+        ddb_table,
+        FileToSave(path=path, file_format=file_format),
+        total_segments=3,
+        Limit=25,
+    ).run(on_progress=progress.append)
+
+    assert manifest.finished
+    assert not manifest.merged
+    assert not path.exists()
+    assert progress
+    assert manifest.items == len(ddb_table_with_data)
+    assert load_manifest(path) == manifest
+    assert all(
+        count_export_items(part.path, file_format.value) == part.items
+        for part in manifest.parts
+    )
+    assert verify_export(manifest_path(path)) == []
+
+
+@pytest.mark.parametrize(
+    "file_format,compression",
+    [
+        (OutputFormat.JSONL, Compression.GZIP),
+        (OutputFormat.JSON, Compression.NONE),
+        (OutputFormat.DYNAMODB_JSON, Compression.NONE),
+    ],
+)
+def test_segmented_export_merge(
+    ddb_table_with_data, ddb_table, tmp_path, file_format, compression
+):
+    path = tmp_path / f"export.{file_format.value}"
+    manifest = SegmentedExport(
+        ddb_table,
+        FileToSave(path=path, file_format=file_format, compression=compression),
+        total_segments=4,
+        merge=True,
+    ).run()
+
+    assert manifest.merged
+    assert not any(Path(part.path).exists() for part in manifest.parts)
+    assert sorted(
+        item["sk"] for item in iter_export_items(path, file_format)
+    ) == sorted(item["sk"] for item in ddb_table_with_data)
+    assert verify_export(path) == []
+
+
+@pytest.mark.parametrize("file_format", [OutputFormat.ARROW, OutputFormat.PARQUET])
+def test_segmented_export_merge_arrow(
+    ddb_table_with_data, ddb_table, tmp_path, file_format
+):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / f"export.{file_format.value}"
+    manifest = SegmentedExport(
+        ddb_table,
+        FileToSave(path=path, file_format=file_format),
+        total_segments=2,
+        merge=True,
+    ).run()
+    assert manifest.merged
+    assert count_export_items(path, file_format.value) == len(ddb_table_with_data)
+
+
+def test_segmented_export_failed_segment(ddb_table_with_data, ddb_table, tmp_path):
+    path = tmp_path / "export.jsonl"
+    segmented_export = SegmentedExport(
+        ddb_table,
+        FileToSave(path=path, file_format=OutputFormat.JSONL),
+        total_segments=2,
+        merge=True,
+    )
+    original_export_segment = segmented_export._export_segment
+
+    def export_segment(part, *args):
+        if part.segment == 1:
+            raise RuntimeError("throttled")
+        original_export_segment(part, *args)
+
+    segmented_export._export_segment = export_segment
+    manifest = segmented_export.run()
+
+    assert not manifest.finished
+    assert not manifest.merged
+    assert manifest.parts[0].finished
+    assert manifest.parts[1].error == "throttled"
+    assert verify_export(path) == ["segment 1 did not finish: throttled"]
+    # the finished part is still usable
+    assert json.loads(manifest_path(path).read_text())["parts"][0]["items"] == len(
+        list(iter_export_items(manifest.parts[0].path, "jsonl"))
+    )
+
+
+@pytest.mark.parametrize(
+    "file_format,total_segments",
+    [(OutputFormat.JSONL, 1), (OutputFormat.JSON, 1), (OutputFormat.JSON, 3)],
+)
+def test_segmented_export_resume_from_checkpoint(
+    ddb_table_with_data, ddb_table, tmp_path, mocker, file_format, total_segments
+):
+    mocker.patch("dyno_viewer.util.segmented_export.CHECKPOINT_INTERVAL", 0)
+    path = tmp_path / f"export.{file_format.value}"
+    checkpoints = []
+    pages_written = []
+
+    def export_progress(_):
+        pages_written.append(None)
+        if len(pages_written) == 4:
+            # dies after writing a page past the last checkpoint
+            raise RuntimeError("credentials expired")
+
+    manifest = SegmentedExport(
+        ddb_table,
+        FileToSave(path=path, file_format=file_format),
+        total_segments=total_segments,
+        merge=True,
+        query_params=QueryParameters(
+            scan_mode=True, primary_key_name="pk", sort_key_name="sk"
+        ),
+        Limit=20,
+    ).run(on_progress=export_progress, on_checkpoint=checkpoints.append)
+    assert not manifest.finished
+    assert "credentials expired" in [part.error for part in manifest.parts]
+    last_checkpoint = checkpoints[-1]
+    assert last_checkpoint.table_name == ddb_table.name
+    assert last_checkpoint.query_params["scan_mode"]
+    assert any(part.checkpoint for part in last_checkpoint.parts)
+
+    resumed = SegmentedExport.resume(ddb_table, last_checkpoint)
+    resumed.query_kwargs["Limit"] = 20
+    manifest = resumed.run(on_checkpoint=checkpoints.append)
+
+    assert manifest.finished
+    exported = [item["sk"] for item in iter_export_items(path, file_format)]
+    assert sorted(exported) == sorted(item["sk"] for item in ddb_table_with_data)
+
+
+def test_segmented_export_cancel_checkpoints_last_page(
+    ddb_table_with_data, ddb_table, tmp_path
+):
+    path = tmp_path / "export.jsonl"
+    checkpoints = []
+    pages_written = []
+    manifest = SegmentedExport(
+        ddb_table,
+        FileToSave(path=path, file_format=OutputFormat.JSONL),
+        total_segments=1,
+        Limit=50,
+    ).run(
+        is_cancelled=lambda: len(pages_written) >= 2,
+        on_progress=pages_written.append,
+        on_checkpoint=checkpoints.append,
+    )
+    assert not manifest.finished
+    assert checkpoints[-1].parts[0].checkpoint.items == 100
+
+    manifest = SegmentedExport.resume(ddb_table, checkpoints[-1]).run()
+    assert manifest.finished
+    assert len(list(iter_export_items(path, "jsonl"))) == len(ddb_table_with_data)
@@ -0,0 +1,151 @@
+import boto3
+import pytest
+
+from dyno_viewer.models import KeyCondition, QueryParameters
+from dyno_viewer.util.table_copy import TableCopy, replace_key_prefix
+from tests.fixtures.ddb_tables import create_ddb_table
+
+
+def scan_all(table) -> list[dict]:
+    items = []
+    kwargs = {}
+    while True:
+        response = table.scan(**kwargs)
+        items += response["Items"]
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def item_key(item: dict) -> tuple:
+    return item["pk"], item["sk"]
+
+
+@pytest.fixture
+def other_region_table(ddb_tables):
+    return create_ddb_table(
+        boto3.resource("dynamodb", region_name="us-east-1"), "dawnstar", 1
+    )
+
+
+@pytest.mark.parametrize("total_segments", [1, 3])
+def test_table_copy_to_other_region(
+    ddb_table_with_data, ddb_table, other_region_table, tmp_path, total_segments
+):
+    progress = TableCopy(
+        ddb_table,
+        other_region_table,
+        total_segments=total_segments,
+        workers=2,
+        reject_path=tmp_path / "rejected.jsonl",
+        Limit=20,
+    ).run()
+
+    assert progress.finished
+    assert progress.source == f"{ddb_table.meta.client.meta.region_name}/dawnstar"
+    assert progress.target == "us-east-1/dawnstar"
+    assert progress.items_read == len(ddb_table_with_data)
+    assert progress.items == len(ddb_table_with_data)
+    assert progress.rejected == 0
+    assert not (tmp_path / "rejected.jsonl").exists()
+    assert sorted(scan_all(other_region_table), key=item_key) == sorted(
+        ddb_table_with_data, key=item_key
+    )
+
+
+def test_table_copy_query_with_key_transform(
+    ddb_table_with_data, ddb_table, ddb_tables, tmp_path
+):
+    target = ddb_tables[1]
+    query_params = QueryParameters(
+        primary_key_name="pk",
+        sort_key_name="sk",
+        key_condition=KeyCondition(partitionKeyValue="1234567890"),
+    )
+    progress = TableCopy(
+        ddb_table,
+        target,
+        query_params=query_params,
+        transform=replace_key_prefix(["pk", "sk"], "Order", "Copied"),
+        reject_path=tmp_path / "rejected.jsonl",
+    ).run()
+
+    expected = [item for item in ddb_table_with_data if item["pk"] == "1234567890"]
+    assert progress.items == len(expected)
+    copied = scan_all(target)
+    assert {item["sk"] for item in copied} == {
+        item["sk"].replace("Order", "Copied") for item in expected
+    }
+
+
+def test_table_copy_transform_skip_and_reject(
+    ddb_table_with_data, ddb_table, ddb_tables, tmp_path
+):
+    def transform(item):
+        if item["pk"] == "1234567890":
+            return None
+        if item["pk"] == "9876543210":
+            raise ValueError("bad item")
+        return item
+
+    progress = TableCopy(
+        ddb_table,
+        ddb_tables[1],
+        transform=transform,
+        reject_path=tmp_path / "rejected.jsonl",
+    ).run()
+
+    rejected = [item for item in ddb_table_with_data if item["pk"] == "9876543210"]
+    copied = [
+        item
+        for item in ddb_table_with_data
+        if item["pk"] not in ("1234567890", "9876543210")
+    ]
+    assert progress.finished
+    assert progress.items == len(copied)
+    assert progress.rejected == len(rejected)
+    assert "transform failed: bad item" in progress.reject_path.read_text()
+    assert len(scan_all(ddb_tables[1])) == len(copied)
+
+
+def test_table_copy_read_error(ddb_table, ddb_tables, tmp_path, mocker):
+    mocker.patch.object(ddb_table, "scan", side_effect=RuntimeError("access denied"))
+    progress = TableCopy(
+        ddb_table,
+        ddb_tables[1],
+        total_segments=2,
+        reject_path=tmp_path / "rejected.jsonl",
+    ).run()
+    assert not progress.finished
+    assert progress.error == "access denied"
+
+
+def test_table_copy_cancelled_stops_readers(
+    ddb_table_with_data, ddb_table, ddb_tables, tmp_path
+):
+    progress = TableCopy(
+        ddb_table,
+        ddb_tables[1],
+        total_segments=4,
+        workers=1,
+        reject_path=tmp_path / "rejected.jsonl",
+        Limit=5,
+    ).run(is_cancelled=lambda: True)
+    assert not progress.finished
+    assert progress.items == 0
+    # only the first few pages are read before the queue is full
+    assert progress.items_read < len(ddb_table_with_data)
+
+
+def test_table_copy_query_segments():
+    with pytest.raises(ValueError, match="only scans can be split into segments"):
+        TableCopy(
+            None,
+            None,
+            query_params=QueryParameters(
+                primary_key_name="pk",
+                sort_key_name="sk",
+                key_condition=KeyCondition(partitionKeyValue="1"),
+            ),
+            total_segments=2,
+        )
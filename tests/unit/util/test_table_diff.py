@@ -0,0 +1,170 @@
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+
+from dyno_viewer.models import KeyCondition, QueryParameters
+from dyno_viewer.util.table_diff import (
+    TableDiff,
+    canonical_json,
+    diff_attributes,
+    item_hash,
+    write_diff_entry,
+)
+
+
+@pytest.fixture
+def diff_tables(ddb_tables):
+    source, target = ddb_tables[0], ddb_tables[1]
+    source_items = [
+        {"pk": "1", "sk": "a", "value": Decimal("1")},
+        {"pk": "1", "sk": "b", "tags": {"x", "y"}},
+        {"pk": "1", "sk": "c", "value": "removed"},
+        {"pk": "2", "sk": "a", "value": Decimal("2")},
+    ]
+    target_items = [
+        {"pk": "1", "sk": "a", "value": Decimal("1.0")},
+        {"pk": "1", "sk": "b", "tags": {"y", "x"}, "extra": True},
+        {"pk": "1", "sk": "d", "value": "added"},
+        {"pk": "2", "sk": "a", "value": Decimal("3")},
+    ]
+    for table, items in ((source, source_items), (target, target_items)):
+        with table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+    return source, target
+
+
+def entry_summary(entries) -> list[tuple]:
+    return sorted((entry.change, entry.key["pk"], entry.key["sk"]) for entry in entries)
+
+
+def test_canonical_json():
+    assert canonical_json(
+        {"b": Decimal("1.50"), "a": {"NS": 1}, "s": {Decimal("2"), Decimal("10")}}
+    ) == canonical_json(
+        {
+            "s": {Decimal("10"), Decimal("2.0")},
+            "a": {"NS": Decimal("1")},
+            "b": Decimal("1.5"),
+        }
+    )
+    assert item_hash({"pk": "1", "n": Decimal("0.0")}) == item_hash(
+        {"n": Decimal("0"), "pk": "1"}
+    )
+    assert item_hash({"pk": "1"}) != item_hash({"pk": "1", "n": None})
+
+
+def test_diff_attributes():
+    changes = diff_attributes(
+        {"a": 1, "b": [1, 2], "c": "same", "d": "gone"},
+        {"a": 2, "b": [1, 2], "c": "same", "e": "new"},
+    )
+    assert [change.model_dump() for change in changes] == [
+        {"name": "a", "change": "changed", "old": 1, "new": 2},
+        {"name": "d", "change": "removed", "old": "gone", "new": None},
+        {"name": "e", "change": "added", "old": None, "new": "new"},
+    ]
+
+
+@pytest.mark.parametrize("total_segments", [1, 3])
+def test_table_diff_scan(diff_tables, total_segments):
+    entries = []
+    progress = TableDiff(*diff_tables, total_segments=total_segments, Limit=1).run(
+        on_entry=entries.append
+    )
+
+    assert progress.finished
+    assert not progress.merge_join
+    assert progress.source_items == 4
+    assert progress.target_items == 4
+    assert (progress.added, progress.removed, progress.changed) == (1, 1, 2)
+    # numbers and sets are compared by value
+    assert progress.unchanged == 1
+    assert entry_summary(entries) == [
+        ("added", "1", "d"),
+        ("changed", "1", "b"),
+        ("changed", "2", "a"),
+        ("removed", "1", "c"),
+    ]
+    changed = {entry.key["sk"]: entry for entry in entries if entry.key["pk"] == "1"}
+    assert [
+        (change.name, change.change, change.new) for change in changed["b"].attributes
+    ] == [("extra", "added", True)]
+
+
+def test_table_diff_query_merge_join(diff_tables):
+    entries = []
+    progress = TableDiff(
+        *diff_tables,
+        query_params=QueryParameters(
+            primary_key_name="pk",
+            sort_key_name="sk",
+            key_condition=KeyCondition(partitionKeyValue="1"),
+        ),
+        Limit=1,
+    ).run(on_entry=entries.append)
+
+    assert progress.finished
+    assert progress.merge_join
+    assert (progress.source_items, progress.target_items) == (3, 3)
+    # merged in key order
+    assert [(entry.change, entry.key["sk"]) for entry in entries] == [
+        ("changed", "b"),
+        ("removed", "c"),
+        ("added", "d"),
+    ]
+
+
+def test_table_diff_merge_join_out_of_order(diff_tables, mocker):
+    source, target = diff_tables
+    mocker.patch.object(
+        source,
+        "query",
+        return_value={
+            "Items": [{"pk": "1", "sk": "b"}, {"pk": "1", "sk": "a"}],
+            "Count": 2,
+        },
+    )
+    progress = TableDiff(
+        source,
+        target,
+        query_params=QueryParameters(
+            primary_key_name="pk",
+            sort_key_name="sk",
+            key_condition=KeyCondition(partitionKeyValue="1"),
+        ),
+    ).run()
+    assert not progress.finished
+    assert "isn't in key order" in progress.error
+
+
+def test_table_diff_cancelled(diff_tables, tmp_path):
+    entries = []
+    progress = TableDiff(*diff_tables, spill_dir=tmp_path).run(
+        is_cancelled=lambda: True, on_entry=entries.append
+    )
+    assert not progress.finished
+    assert entries == []
+    # the spill files are cleaned up
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_diff_entry(diff_tables, tmp_path):
+    path = tmp_path / "diff.jsonl"
+    with open(path, "w") as f:
+        TableDiff(*diff_tables).run(on_entry=lambda entry: write_diff_entry(f, entry))
+    lines = sorted(
+        (json.loads(line) for line in path.read_text().splitlines()),
+        key=lambda line: (line["key"]["pk"], line["key"]["sk"]),
+    )
+    assert lines[0] == {
+        "change": "changed",
+        "key": {"pk": "1", "sk": "b"},
+        "attributes": [{"name": "extra", "change": "added", "new": True}],
+    }
+    assert lines[-1] == {
+        "change": "changed",
+        "key": {"pk": "2", "sk": "a"},
+        "attributes": [{"name": "value", "change": "changed", "old": 2, "new": 3}],
+    }